@@ -72,6 +72,7 @@ from app.models.instruction_label import instruction_label_association
 from app.models.llm_usage_record import LLMUsageRecord
 from app.models.api_key import ApiKey
 from app.models.instruction_build import InstructionBuild
+from app.models.instruction_version_term import InstructionVersionTerm
 
 from app.settings.config import settings
 
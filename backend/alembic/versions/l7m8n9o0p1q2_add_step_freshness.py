@@ -0,0 +1,30 @@
+"""add freshness to steps
+
+Revision ID: l7m8n9o0p1q2
+Revises: k6l7m8n9o0p1
+Create Date: 2025-01-02 10:00:00.000000
+
+Adds a freshness column holding the input table change signals observed at a
+step's last successful refresh, used to skip scheduled reruns of unchanged steps.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'l7m8n9o0p1q2'
+down_revision: Union[str, None] = 'k6l7m8n9o0p1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('steps', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('freshness', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('steps', schema=None) as batch_op:
+        batch_op.drop_column('freshness')
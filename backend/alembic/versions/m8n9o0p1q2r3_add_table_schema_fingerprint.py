@@ -0,0 +1,34 @@
+"""add schema_fingerprint to connection and datasource tables
+
+Revision ID: m8n9o0p1q2r3
+Revises: l7m8n9o0p1q2
+Create Date: 2025-01-03 10:00:00.000000
+
+Stores a hash of each table's introspected columns/pks/fks/metadata so schema
+refreshes only rewrite tables that changed.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'm8n9o0p1q2r3'
+down_revision: Union[str, None] = 'l7m8n9o0p1q2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('connection_tables', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('schema_fingerprint', sa.String(length=64), nullable=True))
+    with op.batch_alter_table('datasource_tables', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('schema_fingerprint', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('datasource_tables', schema=None) as batch_op:
+        batch_op.drop_column('schema_fingerprint')
+    with op.batch_alter_table('connection_tables', schema=None) as batch_op:
+        batch_op.drop_column('schema_fingerprint')
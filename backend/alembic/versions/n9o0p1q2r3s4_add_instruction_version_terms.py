@@ -0,0 +1,50 @@
+"""add instruction_version_terms inverted index
+
+Revision ID: n9o0p1q2r3s4
+Revises: m8n9o0p1q2r3
+Create Date: 2025-01-04 10:00:00.000000
+
+Postings (version, term, tf) and per-version document lengths used to rank
+'intelligent' instructions of a build with BM25 without loading every version.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'n9o0p1q2r3s4'
+down_revision: Union[str, None] = 'm8n9o0p1q2r3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'instruction_version_terms',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('instruction_version_id', sa.String(length=36), nullable=False),
+        sa.Column('term', sa.String(length=64), nullable=False),
+        sa.Column('tf', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['instruction_version_id'], ['instruction_versions.id'], ondelete='CASCADE'),
+        sa.UniqueConstraint('instruction_version_id', 'term', name='uq_instruction_version_term'),
+    )
+    op.create_index('ix_instruction_version_terms_id', 'instruction_version_terms', ['id'])
+    op.create_index('ix_instruction_version_terms_term', 'instruction_version_terms', ['term', 'instruction_version_id'])
+
+    with op.batch_alter_table('instruction_versions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_length', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('instruction_versions', schema=None) as batch_op:
+        batch_op.drop_column('search_length')
+
+    op.drop_index('ix_instruction_version_terms_term', table_name='instruction_version_terms')
+    op.drop_index('ix_instruction_version_terms_id', table_name='instruction_version_terms')
+    op.drop_table('instruction_version_terms')
@@ -0,0 +1,32 @@
+"""add schema_version and stats_version to data_sources
+
+Revision ID: o0p1q2r3s4t5
+Revises: n9o0p1q2r3s4
+Create Date: 2025-01-05 10:00:00.000000
+
+Version counters of a data source's tables and usage stats, bumped on change, so
+every web worker invalidates its cached schema context at once.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'o0p1q2r3s4t5'
+down_revision: Union[str, None] = 'n9o0p1q2r3s4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('data_sources', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('schema_version', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('stats_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('data_sources', schema=None) as batch_op:
+        batch_op.drop_column('stats_version')
+        batch_op.drop_column('schema_version')
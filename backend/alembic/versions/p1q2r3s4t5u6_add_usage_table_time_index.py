@@ -0,0 +1,26 @@
+"""index table_usage_events by schema table and time
+
+Revision ID: p1q2r3s4t5u6
+Revises: o0p1q2r3s4t5
+Create Date: 2025-01-06 10:00:00.000000
+
+Table co-usage for join-graph metrics is read per schema table over a recent window.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'p1q2r3s4t5u6'
+down_revision: Union[str, None] = 'o0p1q2r3s4t5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_usage_dstable_time', 'table_usage_events', ['datasource_table_id', 'used_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_usage_dstable_time', table_name='table_usage_events')
@@ -0,0 +1,31 @@
+"""re-index instruction search terms
+
+Revision ID: q2r3s4t5u6v7
+Revises: p1q2r3s4t5u6
+Create Date: 2025-01-07 10:00:00.000000
+
+The search tokenizer now splits camelCase identifiers, so postings written by the
+previous one are dropped; versions without `search_length` are re-indexed when
+their build is next searched (InstructionSearchService.ensure_indexed).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'q2r3s4t5u6v7'
+down_revision: Union[str, None] = 'p1q2r3s4t5u6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("DELETE FROM instruction_version_terms")
+    op.execute("UPDATE instruction_versions SET search_length = NULL WHERE search_length IS NOT NULL")
+
+
+def downgrade() -> None:
+    # Postings are rebuilt on demand with whichever tokenizer is deployed
+    op.execute("DELETE FROM instruction_version_terms")
+    op.execute("UPDATE instruction_versions SET search_length = NULL WHERE search_length IS NOT NULL")
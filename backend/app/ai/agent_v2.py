@@ -649,7 +649,9 @@ class AgentV2:
                 if self.sigkill_event.is_set():
                     break
 
-                # Refresh warm context (skip on first loop - already done above)
+                self.context_hub.metadata.loop_index = loop_index
+                # Refresh warm context (skip on first loop - already done above); only
+                # sections marked dirty since the last refresh are rebuilt
                 if loop_index > 0:
                     await self.context_hub.refresh_warm()
                     view = self.context_hub.get_view()
@@ -665,27 +667,23 @@ class AgentV2:
 
                 # Build enhanced planner input with validation and retry on failure
                 try:
-                    # Get messages context for detailed conversation history
-                    # On first loop, use cached messages from refresh_warm(); rebuild on subsequent loops
-                    if loop_index == 0 and view.warm.messages:
-                        messages_section = view.warm.messages
-                    else:
-                        messages_section = await self.context_hub.message_builder.build(max_messages=20)
-                    messages_context = messages_section.render() if messages_section else ""
+                    # Get messages context for detailed conversation history (kept current by
+                    # refresh_warm(); rendered text is reused until the section changes)
+                    messages_context = self.context_hub.render_section("messages")
                     # Use cached resources from prime_static() - static, no need to rebuild
                     resources_section = view.static.resources
-                    resources_context = resources_section.render() if resources_section else ""
+                    resources_context = self.context_hub.render_section("resources")
                     # Smaller combined excerpt to control tokens per-iteration
                     try:
                         resources_combined_small = resources_section.render_combined(top_k_per_repo=10, index_limit=200) if resources_section else ""
                     except Exception:
                         resources_combined_small = resources_context
                     # Files context (uploaded files schemas/metadata) - use cached
-                    files_context = view.static.files.render() if getattr(view.static, "files", None) else ""
+                    files_context = self.context_hub.render_section("files")
                     # Mentions context (current user turn mentions)
-                    mentions_context = (view.warm.mentions.render() if getattr(view.warm, "mentions", None) else "")
+                    mentions_context = self.context_hub.render_section("mentions")
                     # Entities context (catalog entities relevant to this turn)
-                    entities_context = (view.warm.entities.render() if getattr(view.warm, "entities", None) else "")
+                    entities_context = self.context_hub.render_section("entities")
 
                     planner_input = PlannerInput(
                         organization_name=self.organization.name,
@@ -1120,6 +1118,7 @@ class AgentV2:
                         
                         # Refresh warm context to include the latest planner decision blocks in messages
                         try:
+                            self.context_hub.mark_dirty("messages")
                             await self.context_hub.refresh_warm()
                             view = self.context_hub.get_view()
                         except Exception:
@@ -1277,11 +1276,12 @@ class AgentV2:
                         if not created_step_id and self.current_step_id:
                             created_step_id = self.current_step_id
 
-                        # Capture post-tool context snapshot
+                        # Capture post-tool context snapshot (the tool may have added blocks, queries and entities)
+                        self.context_hub.mark_dirty("messages", "queries", "entities")
                         await self.context_hub.refresh_warm()
                         # Refresh static sections (schemas with stats) so post_tool snapshot reflects latest table usage
                         try:
-                            await self.context_hub.build_context()
+                            await self.context_hub.build_context(loop_index=loop_index)
                         except Exception:
                             pass
                         post_view = self.context_hub.get_view()
@@ -1389,7 +1389,8 @@ class AgentV2:
                         # Reset invalid retry counter
                         invalid_retry_count = 0
 
-                        # Refresh for next iteration
+                        # Refresh for next iteration (the finished tool execution shows up in messages)
+                        self.context_hub.mark_dirty("messages")
                         await self.context_hub.refresh_warm()
                         view = self.context_hub.get_view()
                         schemas_excerpt = view.static.schemas.render() if getattr(view.static, "schemas", None) else ""
@@ -1402,6 +1403,7 @@ class AgentV2:
                     break
 
             # Save final context snapshot (recompute metadata so counts/tokens are up to date)
+            self.context_hub.mark_dirty("messages", "queries")
             await self.context_hub.refresh_warm()
             try:
                 await self.context_hub.build_context()
@@ -1565,8 +1567,12 @@ class AgentV2:
         if view is None:
             view = self.context_hub.get_view()
 
-        instructions_section = await self.context_hub.instruction_builder.build()
-        instructions = instructions_section.render()
+        # Reuse sections cached by prime_static()/refresh_warm(); build only what is missing
+        if getattr(view.static, "instructions", None) is not None:
+            instructions = self.context_hub.render_section("instructions")
+        else:
+            instructions_section = await self.context_hub.instruction_builder.build()
+            instructions = instructions_section.render()
 
         history_summary = self.context_hub.get_history_summary(self.context_hub.observation_builder.to_dict())
 
@@ -1578,19 +1584,25 @@ class AgentV2:
         except Exception:
             schemas_combined = view.static.schemas.render() if getattr(view.static, "schemas", None) else ""
 
-        messages_section = await self.context_hub.message_builder.build(max_messages=20)
-        messages_context = messages_section.render()
+        if getattr(view.warm, "messages", None) is not None:
+            messages_context = self.context_hub.render_section("messages")
+        else:
+            messages_context = (await self.context_hub.message_builder.build(max_messages=20)).render()
 
-        resources_section = await self.context_hub.resource_builder.build()
-        resources_context = resources_section.render()
+        resources_section = view.static.resources
+        if resources_section is None:
+            resources_section = await self.context_hub.resource_builder.build()
+            resources_context = resources_section.render()
+        else:
+            resources_context = self.context_hub.render_section("resources")
         try:
             resources_combined_small = resources_section.render_combined(top_k_per_repo=self.top_k_metadata_resources, index_limit=INDEX_LIMIT)
         except Exception:
             resources_combined_small = resources_context
 
-        files_context = view.static.files.render() if getattr(view.static, "files", None) else ""
-        mentions_context = (view.warm.mentions.render() if getattr(view.warm, "mentions", None) else "")
-        entities_context = (view.warm.entities.render() if getattr(view.warm, "entities", None) else "")
+        files_context = self.context_hub.render_section("files")
+        mentions_context = self.context_hub.render_section("mentions")
+        entities_context = self.context_hub.render_section("entities")
 
         user_message = (self.head_completion.prompt or {}).get("content", "")
 
@@ -1624,6 +1636,8 @@ class AgentV2:
             prompt_tokens = count_tokens(prompt_text, getattr(self.model, "model_id", None))
             metadata = self.context_hub.metadata
             section_sizes = dict(metadata.section_sizes or {})
+            # Per-section counts are memoized per section version; only changed sections are re-tokenized
+            section_sizes.update(self.context_hub.section_sizes())
             section_sizes["_planner_prompt_total"] = prompt_tokens
             metadata.section_sizes = section_sizes
             metadata.total_tokens = prompt_tokens
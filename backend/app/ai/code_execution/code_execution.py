@@ -1,17 +1,101 @@
-import io
-import sys
+import asyncio
+import types
 import pandas as pd
-import numpy as np
-import datetime
-import json
-import uuid
-from contextlib import redirect_stdout
+import traceback
 from typing import Dict, Any, Tuple, List, Optional, Callable, Coroutine
 from app.schemas.organization_settings_schema import OrganizationSettingsConfig
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from app.ai.context.builders.code_context_builder import CodeContextBuilder
 from app.ai.schemas.codegen import CodeGenContext, CodeGenRequest
+from app.ai.code_execution.process_pool import (
+    CodeExecutionCancelled,
+    JobNotPicklable,
+    get_code_execution_pool,
+    run_generated_code,
+)
+from app.ai.code_execution.compiled_code import get_compiled_code
+from app.ai.code_execution.df_profile import profile_dataframe
+from app.data_sources.query_cache import query_cache_metrics
+from app.data_sources.query_control import QueryControl
+from app.ai.code_execution.widget_serializer import (
+    COLUMNAR_LAYOUT,
+    ROWS_LAYOUT,
+    build_columnar,
+    build_rows,
+    column_defs,
+)
+
+
+def _snapshot_file(file) -> Any:
+    """Detach a File row into a plain, picklable object exposing what generated code reads."""
+    if isinstance(file, types.SimpleNamespace):
+        return file
+    try:
+        description = file.description
+    except Exception:
+        description = ""
+    return types.SimpleNamespace(
+        id=str(getattr(file, "id", "") or ""),
+        filename=getattr(file, "filename", None),
+        path=getattr(file, "path", None),
+        content_type=getattr(file, "content_type", None),
+        description=description,
+    )
+
+
+def _result_limits() -> Dict[str, Optional[int]]:
+    """Row/byte caps for queries issued by generated code (see app.data_sources.result_limits)."""
+    from app.settings.config import settings
+
+    config = settings.bow_config.code_execution if settings.bow_config else None
+    if config is None:
+        return {}
+    return {
+        "max_rows": config.query_max_rows,
+        "max_bytes": config.query_max_bytes,
+        "chunk_rows": config.query_chunk_rows,
+    }
+
+
+def _query_timeout() -> Optional[float]:
+    """Server-side timeout (seconds) per query issued by generated code."""
+    from app.settings.config import settings
+
+    config = settings.bow_config.code_execution if settings.bow_config else None
+    return config.query_timeout_seconds if config is not None else None
+
+
+def _precheck(code: str, logger=None) -> None:
+    """Reject code that can't run before it reaches a worker; log risky constructs.
+
+    Syntax errors are left to the execution itself so they surface exactly as before.
+    """
+    try:
+        compiled = get_compiled_code(code)
+    except SyntaxError:
+        return
+    if not compiled.defines_generate_df:
+        raise Exception("No generate_df function found in code")
+    if compiled.findings and logger:
+        logger.warning(f"Generated code uses risky constructs: {', '.join(compiled.findings)}")
+
+
+async def _run_in_thread(code: str, ds_clients: Dict, files: List, limits: Dict, sigkill_event=None) -> Tuple[pd.DataFrame, str]:
+    """Run code in a thread; setting `sigkill_event` cancels its running queries."""
+    control = QueryControl(_query_timeout())
+    watcher = None
+    if sigkill_event is not None and hasattr(sigkill_event, "wait"):
+        async def _cancel_on_sigkill():
+            await sigkill_event.wait()
+            await asyncio.to_thread(control.cancel)
+        watcher = asyncio.ensure_future(_cancel_on_sigkill())
+    try:
+        return await asyncio.to_thread(run_generated_code, code, ds_clients, files, limits, control)
+    finally:
+        if watcher is not None and not watcher.done():
+            watcher.cancel()
+
 
 class CodeExecutionManager:
     """
@@ -30,9 +114,9 @@ class CodeExecutionManager:
         executor = StreamingCodeExecutor(organization_settings=self.organization_settings, logger=self.logger)
         return executor.execute_code(code=code, ds_clients=db_clients, excel_files=excel_files)
 
-    def format_df_for_widget(self, df: pd.DataFrame, max_rows: int = 1000) -> Dict:
+    def format_df_for_widget(self, df: pd.DataFrame, max_rows: int = 1000, layout: str = ROWS_LAYOUT) -> Dict:
         executor = StreamingCodeExecutor(organization_settings=self.organization_settings, logger=self.logger)
-        return executor.format_df_for_widget(df=df, max_rows=max_rows)
+        return executor.format_df_for_widget(df=df, max_rows=max_rows, layout=layout)
 
 
 class StreamingCodeExecutor:
@@ -46,140 +130,64 @@ class StreamingCodeExecutor:
 
     def execute_code(self, *, code: str, ds_clients: Dict, excel_files: List) -> Tuple[pd.DataFrame, str]:
         """Execute Python code and return the resulting DataFrame and captured stdout log."""
-        output_log = ""
-        local_namespace = {
-            'pd': pd,
-            'np': np,
-            'db_clients': ds_clients,
-            'excel_files': excel_files,
-        }
         if self.logger:
             self.logger.debug(f"Executing code:\n{code}")
-        with io.StringIO() as stdout_capture:
-            with redirect_stdout(stdout_capture):
-                exec(code, local_namespace)
-                generate_df = local_namespace.get('generate_df')
-                if not generate_df:
-                    raise Exception("No generate_df function found in code")
-                df = generate_df(ds_clients, excel_files)
-            output_log = stdout_capture.getvalue()
-        return df, output_log
+        _precheck(code, self.logger)
+        control = QueryControl(_query_timeout())
+        return run_generated_code(code, ds_clients, excel_files, limits=_result_limits(), control=control)
 
-    def get_df_info(self, df: pd.DataFrame) -> Dict:
-        """Extract comprehensive information from a DataFrame."""
-        def convert_to_native(obj):
-            if isinstance(obj, (np.int64, np.int32, np.int16, np.int8)):
-                return int(obj)
-            if isinstance(obj, (np.float64, np.float32, np.float16)):
-                return float(obj)
-            if isinstance(obj, np.bool_):
-                return bool(obj)
-            if isinstance(obj, (np.datetime64, datetime.datetime, datetime.date)):
-                return pd.Timestamp(obj).isoformat()
-            if isinstance(obj, pd.Timestamp):
-                return obj.isoformat()
-            if isinstance(obj, datetime.time):
-                return obj.isoformat()
-            if isinstance(obj, (datetime.timedelta, pd.Timedelta)):
-                return str(obj)
-            if isinstance(obj, np.ndarray):
-                return obj.tolist()
-            if isinstance(obj, uuid.UUID):
-                return str(obj)
-            # Fallback for any other non-JSON-serializable types
-            try:
-                json.dumps(obj)
-                return obj
-            except (TypeError, ValueError):
-                return str(obj)
-        def make_hashable(value: Any) -> Any:
-            """
-            Convert potentially unhashable values (dict, list, set, ndarray, Timestamp)
-            into a hashable representation so nunique/value_counts won't crash.
-            """
-            try:
-                # Fast path: already hashable
-                hash(value)
-                return value
-            except Exception:
-                pass
-            # Normalize common container types
-            if isinstance(value, (pd.Timestamp, datetime.date)):
-                return pd.Timestamp(value).isoformat()
-            if isinstance(value, np.ndarray):
-                return tuple(value.tolist())
-            if isinstance(value, (list, tuple)):
-                try:
-                    return tuple(make_hashable(v) for v in value)
-                except Exception:
-                    return tuple(str(v) for v in value)
-            if isinstance(value, set):
-                try:
-                    return tuple(sorted(make_hashable(v) for v in value))
-                except Exception:
-                    return tuple(sorted(str(v) for v in value))
-            if isinstance(value, dict):
-                try:
-                    # Stable, readable representation
-                    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
-                except Exception:
-                    # Fallback to tuple of items
-                    try:
-                        return tuple(sorted((str(k), str(v)) for k, v in value.items()))
-                    except Exception:
-                        return str(value)
-            # Final fallback
-            try:
-                return str(value)
-            except Exception:
-                return None
-
-        info_dict = {
-            "total_rows": int(len(df)),
-            "total_columns": int(len(df.columns)),
-            "column_info": {},
-            "memory_usage": int(df.memory_usage(deep=True).sum()),
-            "dtypes_count": {str(k): int(v) for k, v in df.dtypes.value_counts().items()},
-        }
-        # describe(include='all') may fail on unhashable objects (e.g., dict cells). Guard it.
+    async def aexecute_code(self, *, code: str, ds_clients: Dict, excel_files: List, sigkill_event=None) -> Tuple[pd.DataFrame, str]:
+        """Execute code without blocking the event loop.
+
+        Runs on the warm process pool when configured; setting `sigkill_event` cancels
+        the running queries server-side, kills the worker if it doesn't stop in time and
+        raises CodeExecutionCancelled. Falls back to a thread when the clients or files
+        cannot be pickled, or when the inline backend is configured.
+        """
+        if self.logger:
+            self.logger.debug(f"Executing code:\n{code}")
+        _precheck(code, self.logger)
+        files = [_snapshot_file(f) for f in (excel_files or [])]
+        limits = _result_limits()
+        pool = get_code_execution_pool()
         try:
-            desc_dict = df.describe(include='all').to_dict()
-        except Exception:
-            desc_dict = {}
-        for column in df.columns:
-            column_info = {
-                "dtype": str(df[column].dtype),
-                "non_null_count": int(df[column].count()),
-                "memory_usage": int(df[column].memory_usage(deep=True)),
-                "null_count": int(df[column].isna().sum()),
-                # nunique may fail for unhashable objects; fall back to a hashable projection
-                "unique_count": 0,
-            }
-            try:
-                column_info["unique_count"] = int(df[column].nunique(dropna=True))
-            except Exception:
-                try:
-                    projected = df[column].map(make_hashable)
-                    column_info["unique_count"] = int(projected.nunique(dropna=True))
-                except Exception:
-                    column_info["unique_count"] = 0
-            if column in desc_dict:
+            if pool is not None:
                 try:
-                    stats = {stat: convert_to_native(value) for stat, value in desc_dict[column].items() if pd.notna(value)}
-                    column_info.update(stats)
-                except Exception:
-                    # Best-effort; skip stats if conversion fails
-                    pass
-            info_dict["column_info"][column] = column_info
-        return info_dict
-
-    def format_df_for_widget(self, df: pd.DataFrame, max_rows: int = 1000) -> Dict:
+                    return await pool.run(
+                        code, ds_clients, files, limits=limits, query_timeout=_query_timeout(), sigkill_event=sigkill_event
+                    )
+                except JobNotPicklable as e:
+                    if self.logger:
+                        self.logger.warning(f"Clients not picklable, executing in thread: {e}")
+            return await _run_in_thread(code, ds_clients, files, limits, sigkill_event=sigkill_event)
+        finally:
+            query_cache_metrics.log_if_due()
+
+    def get_df_info(self, df: pd.DataFrame) -> Dict:
+        """Extract comprehensive information from a DataFrame.
+
+        Large frames are profiled on a sample (approximate distinct counts, top/freq and
+        deep memory); see app.ai.code_execution.df_profile.
+        """
+        from app.settings.config import settings
+
+        config = settings.bow_config.code_execution if settings.bow_config else None
+        if config is None:
+            return profile_dataframe(df)
+        return profile_dataframe(
+            df,
+            sample_threshold=config.profile_sample_threshold,
+            sample_size=config.profile_sample_size,
+        )
+
+    def format_df_for_widget(self, df: pd.DataFrame, max_rows: int = 1000, layout: str = ROWS_LAYOUT) -> Dict:
         """Format a DataFrame into a widget-compatible structure.
         
-        Uses pandas' native JSON serialization which handles datetime, time,
-        timedelta, numpy types, NaN/NaT, and other edge cases robustly.
+        Values are converted per column into JSON-native types (ISO dates, NaN/NaT
+        as null); see app.ai.code_execution.widget_serializer. `layout="columnar"`
+        returns `data` (one list per column) instead of `rows`.
         """
-        columns = [{"headerName": str(col), "field": str(col)} for col in df.columns]
+        columns = column_defs(df)
         if df.empty:
             rows = []
             df_info = {
@@ -195,14 +203,21 @@ class StreamingCodeExecutor:
                 "memory_usage": int(df.memory_usage(deep=True).sum()),
                 "dtypes_count": {str(k): int(v) for k, v in df.dtypes.value_counts().items()},
             }
+            # e.g. a byte cap hit on the first chunk
+            if df.attrs.get("truncated"):
+                df_info["truncated"] = df.attrs["truncated"]
         else:
-            # Use pandas' native JSON serialization for robust type handling:
-            # - date_format='iso' handles datetime, date, time, Timestamp
-            # - default_handler=str catches anything else (UUID, Decimal, etc.)
-            rows = json.loads(
-                df.head(max_rows).to_json(orient='records', date_format='iso', default_handler=str)
-            )
+            head = df.head(max_rows)
+            rows = build_columnar(head) if layout == COLUMNAR_LAYOUT else build_rows(head)
             df_info = self.get_df_info(df)
+        if layout == COLUMNAR_LAYOUT:
+            return {
+                "columns": columns,
+                "data": rows or [[] for _ in columns],
+                "layout": COLUMNAR_LAYOUT,
+                "loadingColumn": False,
+                "info": df_info,
+            }
         return {
             "rows": rows,
             "columns": columns,
@@ -305,12 +320,15 @@ class StreamingCodeExecutor:
                 # Cancellation before executing user code
                 if sigkill_event and hasattr(sigkill_event, 'is_set') and sigkill_event.is_set():
                     break
-                exec_df, execution_log = self.execute_code(code=final_code, ds_clients=ds_clients, excel_files=excel_files)
+                exec_df, execution_log = await self.aexecute_code(
+                    code=final_code, ds_clients=ds_clients, excel_files=excel_files, sigkill_event=sigkill_event
+                )
                 executed_successfully = True
                 break
+            except CodeExecutionCancelled:
+                break
             except Exception as e:
-                import traceback
-                trace = traceback.format_exc()
+                trace = getattr(e, "remote_traceback", None) or traceback.format_exc()
                 msg = f"Execution error: {str(e)}\n{trace}"
                 code_and_error_messages.append((final_code, msg))
                 yield {"type": "stdout", "payload": msg}
@@ -444,12 +462,15 @@ class StreamingCodeExecutor:
             try:
                 if sigkill_event and hasattr(sigkill_event, 'is_set') and sigkill_event.is_set():
                     break
-                exec_df, execution_log = self.execute_code(code=final_code, ds_clients=ds_clients, excel_files=excel_files)
+                exec_df, execution_log = await self.aexecute_code(
+                    code=final_code, ds_clients=ds_clients, excel_files=excel_files, sigkill_event=sigkill_event
+                )
                 executed_successfully = True
                 break
+            except CodeExecutionCancelled:
+                break
             except Exception as e:
-                import traceback
-                trace = traceback.format_exc()
+                trace = getattr(e, "remote_traceback", None) or traceback.format_exc()
                 msg = f"Execution error: {str(e)}\n{trace}"
                 code_and_error_messages.append((final_code, msg))
                 yield {"type": "stdout", "payload": msg}
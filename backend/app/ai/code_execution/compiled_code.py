@@ -0,0 +1,188 @@
+"""
+Cache of compiled generated code.
+
+Steps and entities are re-executed with the same `code` over and over (scheduled
+refreshes, manual reruns, dashboard loads). `get_compiled_code(code)` parses and
+compiles a given source once per process and keeps, next to the code object, what a
+static pass over its AST found:
+  - whether it defines `generate_df` (the only entry point run_generated_code calls);
+    code without it is rejected before it is dispatched to a worker,
+  - the `db_clients[...]` keys it uses, when every use is a constant key, so callers
+    can build only the clients the code needs,
+  - risky constructs (eval/exec, subprocess, filesystem access, ...), logged by the
+    executor rather than blocked.
+
+Entries are keyed by a hash of the source and evicted least-recently-used.
+"""
+import ast
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from types import CodeType
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_RISKY_CALLS = {"eval", "exec", "compile", "__import__", "open", "globals", "getattr", "setattr", "delattr"}
+_RISKY_MODULES = {"os", "sys", "subprocess", "shutil", "socket", "importlib", "ctypes", "pickle", "multiprocessing"}
+
+
+def code_hash(code: str) -> str:
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class CompiledCode:
+    key: str
+    code_object: CodeType
+    defines_generate_df: bool
+    # None when db_clients is used in a way the keys can't be read from (loops, .items(), passed along)
+    db_client_keys: Optional[Tuple[str, ...]] = None
+    findings: Tuple[str, ...] = field(default=())
+
+    def needed_clients(self, names: Iterable[str]) -> List[str]:
+        """Subset of `names` the code can reach; all of them if that isn't known statically."""
+        names = list(names)
+        if self.db_client_keys is None:
+            return names
+        return [n for n in names if n in self.db_client_keys]
+
+    def unknown_clients(self, names: Iterable[str]) -> List[str]:
+        """Statically referenced keys missing from `names`."""
+        available = set(names)
+        return [k for k in (self.db_client_keys or ()) if k not in available]
+
+
+def _client_param_names(tree: ast.AST) -> set:
+    names = {"db_clients"}
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "generate_df" and node.args.args:
+            names.add(node.args.args[0].arg)
+    return names
+
+
+def analyze(tree: ast.AST) -> Dict[str, Any]:
+    """Static facts about generated code; see the module docstring."""
+    client_names = _client_param_names(tree)
+    parents: Dict[int, ast.AST] = {}
+    for node in ast.walk(tree):
+        for child in ast.iter_child_nodes(node):
+            parents[id(child)] = node
+
+    imports: List[str] = []
+    keys: List[str] = []
+    dynamic = False
+    findings: List[str] = []
+    defines_generate_df = False
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "generate_df":
+            defines_generate_df = True
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.append(alias.name)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            imports.append(node.module)
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _RISKY_CALLS:
+            findings.append(f"call to {node.func.id}() on line {node.lineno}")
+        elif isinstance(node, ast.Name) and node.id in client_names and isinstance(node.ctx, ast.Load):
+            parent = parents.get(id(node))
+            if isinstance(parent, ast.Subscript) and parent.value is node:
+                key = parent.slice
+            elif (
+                isinstance(parent, ast.Attribute) and parent.attr == "get"
+                and isinstance(parents.get(id(parent)), ast.Call)
+                and parents[id(parent)].args
+            ):
+                key = parents[id(parent)].args[0]
+            else:
+                key = None
+            if isinstance(key, ast.Constant) and isinstance(key.value, str):
+                if key.value not in keys:
+                    keys.append(key.value)
+            else:
+                dynamic = True
+
+    imports = list(dict.fromkeys(imports))
+    for module in imports:
+        if module.split(".")[0] in _RISKY_MODULES:
+            findings.append(f"imports {module}")
+    return {
+        "defines_generate_df": defines_generate_df,
+        "db_client_keys": None if dynamic else tuple(keys),
+        "findings": tuple(findings),
+    }
+
+
+def compile_code(code: str) -> CompiledCode:
+    """Parse, analyze and compile `code`; raises SyntaxError like exec() would."""
+    # "<string>" keeps tracebacks identical to exec() on the source
+    tree = ast.parse(code, filename="<string>", mode="exec")
+    code_object = compile(tree, filename="<string>", mode="exec")
+    return CompiledCode(key=code_hash(code), code_object=code_object, **analyze(tree))
+
+
+class CompiledCodeCache:
+    """Bounded LRU of CompiledCode by source hash. Thread-safe."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[str, CompiledCode]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, code: str) -> CompiledCode:
+        key = code_hash(code)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        # Compile outside the lock; a racing duplicate compile is harmless
+        entry = compile_code(code)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_cache: Optional[CompiledCodeCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_compiled_code_cache() -> CompiledCodeCache:
+    global _cache
+    if _cache is not None:
+        return _cache
+    from app.settings.config import settings
+
+    config = settings.bow_config.code_execution if settings.bow_config else None
+    with _cache_lock:
+        if _cache is None:
+            _cache = CompiledCodeCache(config.compiled_cache_size if config else 256)
+    return _cache
+
+
+def get_compiled_code(code: str) -> CompiledCode:
+    return get_compiled_code_cache().get(code)
+
+
+def needed_data_sources(code: str, data_sources: List[Any]) -> List[Any]:
+    """Data sources whose clients `code` can use (by name); all of them if unknown or unparsable."""
+    try:
+        compiled = get_compiled_code(code or "")
+    except SyntaxError:
+        return list(data_sources)
+    needed = set(compiled.needed_clients(ds.name for ds in data_sources))
+    return [ds for ds in data_sources if ds.name in needed]
@@ -0,0 +1,274 @@
+"""
+DataFrame profiling for step/widget `info` payloads.
+
+Numeric, timedelta and datetime columns are described in one vectorized `describe()`
+per dtype group. Object-like columns (object, string, category, bool) are profiled one
+by one with hash-based counting; above `sample_threshold` rows their distinct count is
+a HyperLogLog estimate and top/freq/deep memory come from a uniform random sample.
+
+The output keeps the shape produced by `describe(include='all')` + `nunique()`, so
+callers (create_data observations, the stats UI) are unaffected.
+"""
+import datetime
+import json
+import math
+import uuid
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SAMPLE_THRESHOLD = 100_000
+DEFAULT_SAMPLE_SIZE = 20_000
+HLL_PRECISION = 14
+
+
+def convert_to_native(obj):
+    if isinstance(obj, (np.int64, np.int32, np.int16, np.int8)):
+        return int(obj)
+    if isinstance(obj, (np.float64, np.float32, np.float16)):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, (np.datetime64, datetime.datetime, datetime.date)):
+        return pd.Timestamp(obj).isoformat()
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, datetime.time):
+        return obj.isoformat()
+    if isinstance(obj, (datetime.timedelta, pd.Timedelta)):
+        return str(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    # Fallback for any other non-JSON-serializable types
+    try:
+        json.dumps(obj)
+        return obj
+    except (TypeError, ValueError):
+        return str(obj)
+
+
+def make_hashable(value: Any) -> Any:
+    """
+    Convert potentially unhashable values (dict, list, set, ndarray, Timestamp)
+    into a hashable representation so nunique/value_counts won't crash.
+    """
+    try:
+        # Fast path: already hashable
+        hash(value)
+        return value
+    except Exception:
+        pass
+    # Normalize common container types
+    if isinstance(value, (pd.Timestamp, datetime.date)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, np.ndarray):
+        return tuple(value.tolist())
+    if isinstance(value, (list, tuple)):
+        try:
+            return tuple(make_hashable(v) for v in value)
+        except Exception:
+            return tuple(str(v) for v in value)
+    if isinstance(value, set):
+        try:
+            return tuple(sorted(make_hashable(v) for v in value))
+        except Exception:
+            return tuple(sorted(str(v) for v in value))
+    if isinstance(value, dict):
+        try:
+            # Stable, readable representation
+            return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+        except Exception:
+            # Fallback to tuple of items
+            try:
+                return tuple(sorted((str(k), str(v)) for k, v in value.items()))
+            except Exception:
+                return str(value)
+    # Final fallback
+    try:
+        return str(value)
+    except Exception:
+        return None
+
+
+def _leading_zeros64(x: np.ndarray) -> np.ndarray:
+    """Vectorized count of leading zero bits in uint64 values (x must be non-zero)."""
+    n = np.zeros(x.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = x < (np.uint64(1) << np.uint64(64 - shift))
+        n[mask] += shift
+        x = np.where(mask, x << np.uint64(shift), x)
+    return n
+
+
+def approx_distinct(values: pd.Series, precision: int = HLL_PRECISION) -> int:
+    """HyperLogLog estimate of the number of distinct non-null values.
+
+    Raises TypeError for columns holding unhashable cells (dicts, lists).
+    """
+    values = values.dropna()
+    if values.empty:
+        return 0
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+    m = 1 << precision
+    buckets = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    # Sentinel bit keeps the rank bounded to 64 - precision + 1
+    rest = (hashes << np.uint64(precision)) | np.uint64(1 << (precision - 1))
+    ranks = _leading_zeros64(rest) + 1
+    registers = np.zeros(m, dtype=np.uint8)
+    np.maximum.at(registers, buckets, ranks)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)))
+    empty = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and empty:
+        estimate = m * math.log(m / empty)
+    return int(min(round(estimate), len(values)))
+
+
+def _sample(series: pd.Series, size: int, rng: np.random.Generator) -> pd.Series:
+    """Uniform sample without replacement (in-memory equivalent of reservoir sampling)."""
+    if len(series) <= size:
+        return series
+    positions = np.sort(rng.choice(len(series), size=size, replace=False))
+    return series.iloc[positions]
+
+
+def _sample_distinct(counts: pd.Series, sample_rows: int, total_rows: int) -> int:
+    """GEE distinct-count estimate from a sample's value counts."""
+    singletons = int((counts == 1).sum())
+    repeated = int(len(counts)) - singletons
+    estimate = math.sqrt(total_rows / max(sample_rows, 1)) * singletons + repeated
+    return int(min(round(estimate), total_rows))
+
+
+def _object_stats(series: pd.Series, sampled: Optional[pd.Series]) -> Dict[str, Any]:
+    """describe()-compatible count/unique/top/freq for an object-like column."""
+    non_null = int(series.count())
+    stats: Dict[str, Any] = {"count": non_null}
+    if non_null == 0:
+        stats["unique"] = 0
+        return stats
+    source = sampled if sampled is not None else series
+    hashable = True
+    try:
+        counts = source.value_counts(dropna=True)
+    except TypeError:
+        hashable = False
+        counts = source.map(make_hashable).value_counts(dropna=True)
+    if sampled is not None:
+        sample_non_null = int(sampled.count()) or 1
+        if hashable:
+            try:
+                stats["unique"] = approx_distinct(series)
+            except TypeError:
+                # Unhashable cells outside the sample
+                hashable = False
+        if hashable:
+            # Exact frequency of the sampled top value; one vectorized comparison
+            stats["freq"] = int((series == counts.index[0]).sum()) if len(counts) else 0
+        else:
+            counts = source.map(make_hashable).value_counts(dropna=True)
+            stats["unique"] = _sample_distinct(counts, sample_non_null, non_null)
+            stats["freq"] = int(round(int(counts.iloc[0]) * non_null / sample_non_null)) if len(counts) else 0
+    else:
+        stats["unique"] = int(len(counts))
+        stats["freq"] = int(counts.iloc[0]) if len(counts) else 0
+    if len(counts):
+        stats["top"] = counts.index[0]
+    return stats
+
+
+def _is_object_like(dtype) -> bool:
+    return not (
+        pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+    ) and not pd.api.types.is_datetime64_any_dtype(dtype) and not pd.api.types.is_timedelta64_dtype(dtype)
+
+
+def profile_dataframe(
+    df: pd.DataFrame,
+    *,
+    sample_threshold: int = DEFAULT_SAMPLE_THRESHOLD,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Build the `info` dict for a DataFrame (see module docstring)."""
+    total_rows = int(len(df))
+    sampling = total_rows > sample_threshold
+    rng = np.random.default_rng(seed)
+
+    shallow = df.memory_usage(deep=False, index=False)
+    index_memory = int(df.index.memory_usage(deep=True))
+
+    # Vectorized describe per dtype group; columns that fail fall back to per-column stats
+    desc_dict: Dict[Any, Dict[str, Any]] = {}
+    object_positions = []
+    grouped = {"numeric": [], "datetime": []}
+    for pos, dtype in enumerate(df.dtypes):
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            grouped["datetime"].append(pos)
+        elif _is_object_like(dtype):
+            object_positions.append(pos)
+        else:
+            grouped["numeric"].append(pos)
+    for positions in grouped.values():
+        if not positions:
+            continue
+        try:
+            desc_dict.update(df.iloc[:, positions].describe().to_dict())
+        except Exception:
+            pass
+
+    column_info: Dict[Any, Dict[str, Any]] = {}
+    total_memory = index_memory
+    for pos, column in enumerate(df.columns):
+        series = df.iloc[:, pos]
+        non_null = int(series.count())
+        info = {
+            "dtype": str(series.dtype),
+            "non_null_count": non_null,
+            "memory_usage": 0,
+            "null_count": total_rows - non_null,
+            # nunique may fail for unhashable objects; fall back to a hashable projection
+            "unique_count": 0,
+        }
+        stats: Dict[str, Any] = desc_dict.get(column, {})
+        values_memory = int(shallow.iloc[pos])
+        if pos in object_positions:
+            sampled = _sample(series, sample_size, rng) if sampling else None
+            if sampled is not None and len(sampled):
+                per_row = sampled.memory_usage(deep=True, index=False) / len(sampled)
+                values_memory = int(per_row * total_rows)
+            else:
+                values_memory = int(series.memory_usage(deep=True, index=False))
+            try:
+                stats = _object_stats(series, sampled)
+                info["unique_count"] = int(stats.get("unique", 0))
+            except Exception:
+                stats = {}
+        else:
+            try:
+                info["unique_count"] = int(series.nunique(dropna=True))
+            except Exception:
+                info["unique_count"] = 0
+        info["memory_usage"] = values_memory + index_memory
+        total_memory += values_memory
+        try:
+            info.update({stat: convert_to_native(value) for stat, value in stats.items() if pd.notna(value)})
+        except Exception:
+            # Best-effort; skip stats if conversion fails
+            pass
+        column_info[column] = info
+
+    result = {
+        "total_rows": total_rows,
+        "total_columns": int(len(df.columns)),
+        "column_info": column_info,
+        "memory_usage": int(total_memory),
+        "dtypes_count": {str(k): int(v) for k, v in df.dtypes.value_counts().items()},
+    }
+    # Set by run_generated_code when a query hit the row/byte caps
+    if df.attrs.get("truncated"):
+        result["truncated"] = df.attrs["truncated"]
+    return result
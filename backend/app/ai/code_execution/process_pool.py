@@ -0,0 +1,511 @@
+"""
+Warm process pool for running generated `generate_df` code off the event loop.
+
+Workers are forked from a forkserver that has pandas/numpy preloaded, so a job only
+pays for unpickling its clients and running the user code. A job that is cancelled
+(sigkill) or times out first has its running queries cancelled server-side (see
+app.data_sources.query_control); a worker that doesn't finish within the grace period
+is killed and replaced.
+
+Result frames come back as an Arrow IPC file in shared memory (/dev/shm) which the
+parent memory-maps, instead of being pickled through the pipe. Frames Arrow cannot
+represent (mixed-type object columns, non-string column names) fall back to pickle.
+
+Waiting for a worker never parks a thread: idle workers and waiting callers are
+matched under a lock and the worker is handed to the caller's event loop. Replies
+are read on the pool's own threads, so a busy default executor can't stall them.
+"""
+import asyncio
+import contextvars
+import glob
+import io
+import logging
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.ai.code_execution.compiled_code import get_compiled_code
+from app.data_sources.query_cache import query_cache_metrics
+from app.data_sources.query_control import QueryControl, query_control
+from app.data_sources.result_limits import result_limits, truncation_info, truncation_warning
+
+logger = logging.getLogger(__name__)
+
+_PRELOAD_MODULES = ["pandas", "numpy", "pyarrow"]
+_RESULT_PREFIX = "bow-result-"
+
+
+class CodeExecutionError(Exception):
+    """Generated code raised inside a worker. Carries the worker-side traceback."""
+
+    def __init__(self, message: str, remote_traceback: str = ""):
+        super().__init__(message)
+        self.remote_traceback = remote_traceback
+
+
+class CodeExecutionCancelled(Exception):
+    """The job was cancelled (sigkill) or timed out and its worker was killed."""
+
+
+class JobNotPicklable(Exception):
+    """Clients or files of a job cannot be sent to a worker process."""
+
+
+_stdout_capture: contextvars.ContextVar[Optional[io.StringIO]] = contextvars.ContextVar("bow_stdout_capture", default=None)
+_stdout_lock = threading.Lock()
+
+
+class _StdoutRouter:
+    """sys.stdout stand-in: writes of a capturing execution go to its own buffer.
+
+    Executions running in threads of the same process (inline backend, pickling
+    fallback) each see only their own output; everything else reaches the real stdout.
+    """
+
+    def __init__(self, default):
+        self._default = default
+
+    def _target(self):
+        buffer = _stdout_capture.get()
+        return buffer if buffer is not None else self._default
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+
+@contextmanager
+def capture_stdout() -> Iterator[io.StringIO]:
+    """Collect what the current thread/context prints, without touching other threads' output."""
+    with _stdout_lock:
+        if not isinstance(sys.stdout, _StdoutRouter):
+            sys.stdout = _StdoutRouter(sys.stdout)
+    buffer = io.StringIO()
+    token = _stdout_capture.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _stdout_capture.reset(token)
+
+
+def run_generated_code(
+    code: str,
+    ds_clients: Dict,
+    excel_files: List,
+    limits: Optional[Dict[str, Any]] = None,
+    control: Optional[QueryControl] = None,
+) -> Tuple[pd.DataFrame, str]:
+    """Exec `code` and call its `generate_df`. Returns (df, captured stdout).
+
+    `limits` (max_rows/max_bytes/chunk_rows) cap every streamed query the code issues;
+    if any query was cut short, the returned frame gets `attrs["truncated"]` and the
+    log a warning, so partial results are never passed off as complete.
+    `control` carries the query timeout and lets another thread cancel running queries.
+    The source is compiled once per process (see compiled_code).
+    """
+    compiled = get_compiled_code(code)
+    local_namespace = {
+        'pd': pd,
+        'np': np,
+        'db_clients': ds_clients,
+        'excel_files': excel_files,
+    }
+    with capture_stdout() as stdout_capture, result_limits(**(limits or {})) as active_limits, query_control(control):
+        exec(compiled.code_object, local_namespace)
+        generate_df = local_namespace.get('generate_df')
+        if not generate_df:
+            raise Exception("No generate_df function found in code")
+        df = generate_df(ds_clients, excel_files)
+        output_log = stdout_capture.getvalue()
+    truncated = truncation_info(active_limits.truncations)
+    if truncated:
+        if isinstance(df, pd.DataFrame):
+            df.attrs["truncated"] = truncated
+        output_log += truncation_warning(truncated)
+    return df, output_log
+
+
+def default_result_dir() -> str:
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+def write_arrow_result(df: Any, result_dir: str) -> Optional[str]:
+    """Write `df` as an Arrow IPC file and return its path, or None if Arrow can't hold it."""
+    if not isinstance(df, pd.DataFrame) or not all(isinstance(c, str) for c in df.columns):
+        return None
+    try:
+        table = pa.Table.from_pandas(df)
+    except (pa.ArrowException, TypeError, ValueError):
+        return None
+    fd, path = tempfile.mkstemp(prefix=f"{_RESULT_PREFIX}{os.getpid()}-", suffix=".arrow", dir=result_dir)
+    os.close(fd)
+    try:
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
+
+def read_arrow_result(path: str) -> pd.DataFrame:
+    """Memory-map an Arrow IPC result file and convert it to pandas, then unlink it.
+
+    The frame is a regular writable one (not zero-copy over the read-only mapping),
+    since callers modify results in place.
+    """
+    try:
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+            return table.to_pandas()
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def _watch_cancel(cancel_event, active: Dict[str, Optional[QueryControl]], lock: threading.Lock) -> None:
+    """Worker thread: cancel the running job's queries whenever the parent sets `cancel_event`."""
+    while True:
+        cancel_event.wait()
+        with lock:
+            control = active.get("control")
+        cancel_event.clear()
+        if control is not None:
+            control.cancel()
+
+
+def _worker_main(conn, result_transport: str = "arrow", result_dir: Optional[str] = None, cancel_event=None) -> None:
+    """Worker loop: receive pickled jobs, run them, send back results.
+
+    Every reply ends with the worker's query cache counters for that job.
+    """
+    active: Dict[str, Optional[QueryControl]] = {}
+    active_lock = threading.Lock()
+    if cancel_event is not None:
+        threading.Thread(target=_watch_cancel, args=(cancel_event, active, active_lock), daemon=True).start()
+    while True:
+        try:
+            payload = conn.recv_bytes()
+        except (EOFError, OSError):
+            break
+        try:
+            code, ds_clients, excel_files, limits, query_timeout = pickle.loads(payload)
+            control = QueryControl(query_timeout)
+            with active_lock:
+                active["control"] = control
+            try:
+                df, output_log = run_generated_code(code, ds_clients, excel_files, limits, control)
+            finally:
+                with active_lock:
+                    active["control"] = None
+            path = write_arrow_result(df, result_dir) if result_transport == "arrow" else None
+            if path is not None:
+                # DataFrame.attrs (e.g. truncation info) don't survive the Arrow file
+                conn.send(("ok_arrow", path, output_log, query_cache_metrics.drain(), dict(df.attrs)))
+            else:
+                conn.send(("ok", df, output_log, query_cache_metrics.drain()))
+        except BaseException as e:
+            try:
+                conn.send(("error", str(e), traceback.format_exc(), query_cache_metrics.drain()))
+            except Exception:
+                break
+
+
+class _Worker:
+    def __init__(self, process, conn, cancel_event):
+        self.process = process
+        self.conn = conn
+        self.cancel_event = cancel_event
+        self.jobs = 0
+
+    def kill(self, result_dir: Optional[str] = None) -> None:
+        try:
+            self.process.kill()
+            self.process.join(timeout=5)
+        except Exception:
+            pass
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+        # Drop result files a killed worker wrote but nobody read
+        if result_dir and self.process.pid:
+            for path in glob.glob(os.path.join(result_dir, f"{_RESULT_PREFIX}{self.process.pid}-*")):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+
+class CodeExecutionPool:
+    """Fixed-size pool of long-lived worker processes with per-job cancellation."""
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_jobs_per_worker: int = 200,
+        start_method: str = "forkserver",
+        result_transport: str = "arrow",
+        result_dir: Optional[str] = None,
+        cancel_grace_seconds: float = 5,
+    ):
+        self.size = max(1, int(size))
+        self.max_jobs_per_worker = max(1, int(max_jobs_per_worker))
+        self.result_transport = result_transport
+        self.result_dir = result_dir or default_result_dir()
+        self.cancel_grace_seconds = max(0.0, float(cancel_grace_seconds))
+        if start_method not in multiprocessing.get_all_start_methods():
+            start_method = "spawn"
+        self._ctx = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            self._ctx.set_forkserver_preload(_PRELOAD_MODULES)
+        self._idle: Deque[_Worker] = deque()
+        # (loop, future) of callers waiting for a worker, oldest first
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+        # Reads replies; one in-flight read per worker at most
+        self._readers = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="bow-code-exec-reply")
+        self._started = False
+        self._closed = False
+
+    def _spawn_worker(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe(duplex=True)
+        cancel_event = self._ctx.Event()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.result_transport, self.result_dir, cancel_event),
+            daemon=True,
+            name="bow-code-exec",
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn, cancel_event)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started or self._closed:
+                return
+            for _ in range(self.size):
+                self._idle.append(self._spawn_worker())
+            self._started = True
+        logger.info("Code execution pool started with %s workers", self.size)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            waiters = list(self._waiters)
+            self._waiters.clear()
+        for worker in idle:
+            worker.kill(self.result_dir)
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(self._fail_waiter, waiter)
+            except RuntimeError:
+                pass
+        self._readers.shutdown(wait=False)
+
+    @staticmethod
+    def _fail_waiter(waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_exception(CodeExecutionError("Code execution pool is shut down"))
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        if self._closed:
+            worker.kill(self.result_dir)
+            return
+        if healthy and worker.process.is_alive() and worker.jobs < self.max_jobs_per_worker:
+            self._put_idle(worker)
+            return
+        worker.kill(self.result_dir)
+        try:
+            self._put_idle(self._spawn_worker())
+        except Exception as e:
+            logger.error(f"Failed to replace code execution worker: {e}")
+
+    def _put_idle(self, worker: _Worker) -> None:
+        """Hand `worker` to the oldest waiting caller, or park it. Callable from any thread."""
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                if waiter.done():
+                    continue
+                try:
+                    loop.call_soon_threadsafe(self._hand_over, waiter, worker)
+                    return
+                except RuntimeError:
+                    # The waiter's loop is closed
+                    continue
+            self._idle.append(worker)
+
+    def _hand_over(self, waiter: asyncio.Future, worker: _Worker) -> None:
+        # Runs on the waiter's loop; a caller cancelled meanwhile passes the worker on
+        if waiter.done():
+            self._put_idle(worker)
+        else:
+            waiter.set_result(worker)
+
+    async def _acquire(self) -> _Worker:
+        """Take an idle worker, or wait on the event loop until one is released."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._idle:
+                return self._idle.popleft()
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        return await waiter
+
+    async def _recv(self, worker: _Worker):
+        return await asyncio.get_running_loop().run_in_executor(self._readers, worker.conn.recv)
+
+    async def _wait_readable(self, worker: _Worker, sigkill_event=None, timeout: Optional[float] = None) -> None:
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        fd = worker.conn.fileno()
+
+        def _on_readable():
+            if not readable.done():
+                readable.set_result(None)
+
+        loop.add_reader(fd, _on_readable)
+        waiters = [readable]
+        cancel_task = None
+        if sigkill_event is not None and hasattr(sigkill_event, "wait"):
+            cancel_task = asyncio.ensure_future(sigkill_event.wait())
+            waiters.append(cancel_task)
+        try:
+            done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if readable not in done:
+                raise CodeExecutionCancelled("Code execution timed out" if not done else "Code execution cancelled")
+        finally:
+            loop.remove_reader(fd)
+            if cancel_task is not None and not cancel_task.done():
+                cancel_task.cancel()
+
+    async def _cancel_job(self, worker: _Worker) -> None:
+        """Ask the worker to cancel its running queries and wait for the job's reply.
+
+        Raises CodeExecutionCancelled (the worker must then be killed) if it doesn't
+        reply within the grace period.
+        """
+        worker.cancel_event.set()
+        await self._wait_readable(worker, timeout=self.cancel_grace_seconds)
+        try:
+            message = await self._recv(worker)
+        except (EOFError, OSError):
+            raise CodeExecutionCancelled("Code execution cancelled")
+        query_cache_metrics.merge(message[3])
+        if message[0] == "ok_arrow":
+            try:
+                os.unlink(message[1])
+            except OSError:
+                pass
+
+    async def run(
+        self,
+        code: str,
+        ds_clients: Dict,
+        excel_files: List,
+        *,
+        limits: Optional[Dict[str, Any]] = None,
+        query_timeout: Optional[float] = None,
+        sigkill_event=None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[pd.DataFrame, str]:
+        """Run code on a pooled worker. Raises JobNotPicklable before any worker is taken.
+
+        `query_timeout` (seconds) is applied to each query the code issues.
+        """
+        try:
+            payload = pickle.dumps((code, ds_clients, excel_files, limits, query_timeout), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            raise JobNotPicklable(str(e)) from e
+        self.start()
+        worker = await self._acquire()
+        healthy = False
+        try:
+            if sigkill_event is not None and sigkill_event.is_set():
+                healthy = True
+                raise CodeExecutionCancelled("Code execution cancelled")
+            worker.jobs += 1
+            worker.cancel_event.clear()
+            worker.conn.send_bytes(payload)
+            try:
+                await self._wait_readable(worker, sigkill_event=sigkill_event, timeout=timeout)
+            except CodeExecutionCancelled:
+                await self._cancel_job(worker)
+                healthy = True
+                raise
+            try:
+                message = await self._recv(worker)
+            except (EOFError, OSError):
+                raise CodeExecutionError(f"Code execution worker exited unexpectedly (exit code {worker.process.exitcode})")
+            healthy = True
+        finally:
+            self._release(worker, healthy)
+        query_cache_metrics.merge(message[3])
+        if message[0] == "ok_arrow":
+            df = await asyncio.to_thread(read_arrow_result, message[1])
+            df.attrs.update(message[4])
+            return df, message[2]
+        if message[0] == "ok":
+            return message[1], message[2]
+        raise CodeExecutionError(message[1], remote_traceback=message[2])
+
+
+_pool: Optional[CodeExecutionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_code_execution_pool() -> Optional[CodeExecutionPool]:
+    """Return the process-wide pool, or None when the inline backend is configured."""
+    global _pool
+    if _pool is not None:
+        return _pool
+    from app.settings.config import settings
+
+    config = settings.bow_config.code_execution if settings.bow_config else None
+    if config is not None and config.backend != "process":
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = CodeExecutionPool(
+                size=config.pool_size if config else 2,
+                max_jobs_per_worker=config.max_jobs_per_worker if config else 200,
+                start_method=config.start_method if config else "forkserver",
+                result_transport=config.result_transport if config else "arrow",
+                result_dir=config.result_dir if config else None,
+                cancel_grace_seconds=config.cancel_grace_seconds if config else 5,
+            )
+    return _pool
+
+
+def shutdown_code_execution_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,173 @@
+"""
+Widget payload serialization straight from DataFrame column arrays.
+
+Values are converted per column with vectorized numpy/pandas operations into
+JSON-native Python values (no `to_json` -> `json.loads` round trip). The output
+matches `df.to_json(orient='records', date_format='iso', default_handler=str)`:
+datetimes as millisecond ISO strings (tz-aware converted to UTC with a `Z`),
+dates as midnight datetimes, timedeltas as ISO durations, NaN/NaT/inf as null and
+floats rounded to 10 decimals.
+
+Two layouts are supported:
+  rows:     {"rows": [{field: value}, ...], "columns": [...], ...}   (default)
+  columnar: {"columns": [...], "data": [[col0 values], [col1 values], ...], ...}
+"""
+import datetime
+import decimal
+import json
+import uuid
+from typing import Any, Dict, List
+
+import numpy as np
+import orjson
+import pandas as pd
+
+ROWS_LAYOUT = "rows"
+COLUMNAR_LAYOUT = "columnar"
+
+_FLOAT_DECIMALS = 10
+
+
+def _iso_datetime(value: datetime.datetime) -> str:
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        return ts.tz_convert("UTC").tz_localize(None).isoformat(timespec="milliseconds") + "Z"
+    return ts.isoformat(timespec="milliseconds")
+
+
+def _iso_duration(value) -> str:
+    """ISO 8601 duration with pandas' to_json fraction widths (3/6/9 digits)."""
+    c = pd.Timedelta(value).components
+    if c.nanoseconds:
+        fraction = f".{c.milliseconds:03d}{c.microseconds:03d}{c.nanoseconds:03d}"
+    elif c.microseconds:
+        fraction = f".{c.milliseconds:03d}{c.microseconds:03d}"
+    elif c.milliseconds:
+        fraction = f".{c.milliseconds:03d}"
+    else:
+        fraction = ""
+    return f"P{c.days}DT{c.hours}H{c.minutes}M{c.seconds}{fraction}S"
+
+
+def _to_json_value(value: Any) -> Any:
+    """Convert a single (object-dtype) cell into a JSON-native value."""
+    if value is None or isinstance(value, (str, bool, int)):
+        return value
+    if isinstance(value, float):
+        return round(value, _FLOAT_DECIMALS) if np.isfinite(value) else None
+    if value is pd.NaT:
+        return None
+    if isinstance(value, datetime.datetime):
+        return _iso_datetime(value)
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day).isoformat(timespec="milliseconds")
+    if isinstance(value, datetime.time):
+        return value.isoformat()
+    if isinstance(value, (pd.Timedelta, datetime.timedelta)):
+        return _iso_duration(value)
+    if isinstance(value, np.generic):
+        return _to_json_value(value.item())
+    if isinstance(value, decimal.Decimal):
+        return _to_json_value(float(value))
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    if isinstance(value, dict):
+        return {str(k): _to_json_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, np.ndarray)):
+        return [_to_json_value(v) for v in value]
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return str(value)
+
+
+def _float_values(values: np.ndarray) -> List[Any]:
+    # Python's round() per value, like the scalar path: np.round scales by 10**10 and
+    # back, which adds representation noise to large values (523178077.891 -> ...100003)
+    finite = np.isfinite(values)
+    out = values.astype(np.float64).tolist()
+    for i in np.flatnonzero(finite):
+        out[i] = round(out[i], _FLOAT_DECIMALS)
+    for i in np.flatnonzero(~finite):
+        out[i] = None
+    return out
+
+
+def _datetime_values(series: pd.Series) -> List[Any]:
+    suffix = ""
+    if getattr(series.dt, "tz", None) is not None:
+        series = series.dt.tz_convert("UTC").dt.tz_localize(None)
+        suffix = "Z"
+    values = series.to_numpy(dtype="datetime64[ms]")
+    strings = np.datetime_as_string(values, unit="ms")
+    nulls = np.isnat(values)
+    out = [s + suffix for s in strings.tolist()] if suffix else strings.tolist()
+    for i in np.flatnonzero(nulls):
+        out[i] = None
+    return out
+
+
+def column_values(series: pd.Series) -> List[Any]:
+    """JSON-native values for one column."""
+    dtype = series.dtype
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return _datetime_values(series)
+    if isinstance(dtype, np.dtype):
+        if dtype.kind in "iub":
+            return series.to_numpy().tolist()
+        if dtype.kind == "f":
+            return _float_values(series.to_numpy())
+        if dtype.kind == "m":
+            return [None if pd.isna(v) else _iso_duration(v) for v in series]
+    else:
+        # Extension dtypes (nullable ints/bools, category, string, period, ...)
+        series = series.astype(object)
+    values = series.to_numpy(dtype=object)
+    if pd.api.types.infer_dtype(values, skipna=True) == "string":
+        nulls = pd.isna(values)
+        out = values.tolist()
+        for i in np.flatnonzero(nulls):
+            out[i] = None
+        return out
+    return [_to_json_value(v) for v in values.tolist()]
+
+
+def column_defs(df: pd.DataFrame) -> List[Dict[str, str]]:
+    return [{"headerName": str(col), "field": str(col)} for col in df.columns]
+
+
+def build_rows(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Record-oriented rows (the `rows` layout)."""
+    fields = [str(col) for col in df.columns]
+    columns = [column_values(df.iloc[:, i]) for i in range(len(fields))]
+    return [dict(zip(fields, values)) for values in zip(*columns)]
+
+
+def build_columnar(df: pd.DataFrame) -> List[List[Any]]:
+    """One list of values per column (the `columnar` layout)."""
+    return [column_values(df.iloc[:, i]) for i in range(len(df.columns))]
+
+
+def rows_to_columnar(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a stored rows-layout widget payload into the columnar layout."""
+    if not isinstance(payload, dict) or "rows" not in payload:
+        return payload
+    rows = payload.get("rows") or []
+    fields = [c.get("field") for c in (payload.get("columns") or [])]
+    converted = {k: v for k, v in payload.items() if k != "rows"}
+    converted["data"] = [[row.get(field) for row in rows] for field in fields]
+    converted["layout"] = COLUMNAR_LAYOUT
+    return converted
+
+
+def dumps_widget_payload(payload: Dict[str, Any]) -> bytes:
+    """Serialize a widget payload to JSON bytes."""
+    try:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY, default=str)
+    except orjson.JSONEncodeError:
+        # e.g. integers beyond 64 bits, which the stdlib encoder still accepts
+        return json.dumps(payload, default=str).encode("utf-8")
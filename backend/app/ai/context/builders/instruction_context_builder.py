@@ -1,5 +1,4 @@
 from typing import List, Optional, Set, Tuple, Dict
-import re
 import logging
 
 from sqlalchemy import select, and_, or_, func
@@ -14,6 +13,14 @@ from app.models.instruction_version import InstructionVersion
 from app.models.organization import Organization
 from app.models.user import User
 
+from app.services.instruction_search_service import (
+    InstructionSearchService,
+    SEARCH_STOPWORDS,
+    rank_documents,
+    search_terms,
+    searchable_text,
+)
+
 from app.ai.context.sections.instructions_section import InstructionsSection, InstructionItem, InstructionLabelItem
 
 logger = logging.getLogger(__name__)
@@ -30,7 +37,9 @@ class InstructionContextBuilder:
 
     Load behavior:
     1. Load ALL 'always' instructions first
-    2. Fill remaining capacity with 'intelligent' instructions (keyword-matched)
+    2. Fill remaining capacity with 'intelligent' instructions (keyword-matched,
+       ranked with BM25; builds use a persisted per-version inverted index, fused
+       with embedding similarity when semantic search is enabled)
     3. Skip 'disabled' instructions
     
     The max_instructions_in_context setting (default 50) controls total capacity.
@@ -38,15 +47,7 @@ class InstructionContextBuilder:
     """
     
     # Common stopwords to filter out when extracting keywords
-    STOPWORDS = {
-        "the", "a", "an", "of", "and", "for", "to", "in", "by", "with", "on", 
-        "is", "are", "be", "this", "that", "it", "as", "at", "from", "or",
-        "what", "how", "when", "where", "why", "which", "who", "can", "will",
-        "should", "would", "could", "have", "has", "had", "do", "does", "did",
-        "i", "you", "we", "they", "he", "she", "my", "your", "our", "their",
-        "me", "us", "them", "all", "some", "any", "no", "not", "but", "if",
-        "show", "get", "find", "give", "tell", "list", "display", "want", "need",
-    }
+    STOPWORDS = SEARCH_STOPWORDS
     
     # Default max instructions in context
     DEFAULT_MAX_INSTRUCTIONS = 50
@@ -202,16 +203,14 @@ class InstructionContextBuilder:
         result = await self.db.execute(stmt)
         all_instructions = result.scalars().all()
         
-        # Score and filter by keyword match (or include all if no keywords)
+        # Rank by BM25 keyword relevance (or include all if no keywords)
         scored: List[Tuple[Instruction, float]] = []
-        for instruction in all_instructions:
-            if keywords:
-                score = self._score_instruction(instruction, keywords)
-                if score > 0:
-                    scored.append((instruction, score))
-            else:
-                # No query - include all with score 0
-                scored.append((instruction, 0.0))
+        if keywords:
+            scores = rank_documents(list(keywords), [searchable_text(i) for i in all_instructions])
+            scored = [(inst, score) for inst, score in zip(all_instructions, scores) if score > 0]
+        else:
+            # No query - include all with score 0
+            scored = [(instruction, 0.0) for instruction in all_instructions]
         
         # Sort by score descending and limit
         scored.sort(key=lambda x: x[1], reverse=True)
@@ -321,24 +320,26 @@ class InstructionContextBuilder:
         if not build:
             return None  # No build available, fallback to legacy
         
-        # Load build contents with versions
+        # Load non-intelligent build contents with versions; intelligent ones are
+        # retrieved from the build's search index below, only as many as fit
         contents_result = await self.db.execute(
             select(BuildContent)
             .options(
                 selectinload(BuildContent.instruction),
                 selectinload(BuildContent.instruction_version),
             )
-            .where(BuildContent.build_id == build.id)
+            .join(InstructionVersion, InstructionVersion.id == BuildContent.instruction_version_id)
+            .where(
+                BuildContent.build_id == build.id,
+                or_(
+                    InstructionVersion.load_mode.is_(None),
+                    InstructionVersion.load_mode != "intelligent",
+                ),
+            )
         )
         contents = contents_result.scalars().all()
         
-        if not contents:
-            return []  # Build exists but is empty
-        
-        # Separate by load_mode
         always_contents: List[Tuple[BuildContent, Instruction, InstructionVersion]] = []
-        intelligent_contents: List[Tuple[BuildContent, Instruction, InstructionVersion]] = []
-        
         for content in contents:
             instruction = content.instruction
             version = content.instruction_version
@@ -352,16 +353,29 @@ class InstructionContextBuilder:
             if version.load_mode == "disabled":
                 continue
             
-            # Categorize by load_mode
-            if version.load_mode == "intelligent":
-                intelligent_contents.append((content, instruction, version))
+            # 'always' or None (treat NULL as always for backwards compat)
+            always_contents.append((content, instruction, version))
+        
+        # Calculate remaining slots for intelligent instructions
+        remaining_slots = max_instructions - len(always_contents)
+        search = InstructionSearchService()
+        intelligent_contents: List[Tuple[BuildContent, float]] = []
+        if remaining_slots > 0:
+            if query:
+                # BM25 over the build's inverted index (fused with embedding similarity when
+                # semantic search is enabled); only matching instructions are loaded
+                keywords = self._extract_keywords(query)
+                intelligent_contents = await search.search(
+                    self.db, build.id, keywords, remaining_slots, semantic_query=query,
+                )
             else:
-                # 'always' or None (treat NULL as always for backwards compat)
-                always_contents.append((content, instruction, version))
+                # No query - fill remaining capacity with intelligent instructions
+                intelligent_contents = [(c, 0.0) for c in await search.fill(self.db, build.id, remaining_slots)]
         
-        # Batch load usage counts for all candidates
-        all_instruction_ids = [str(c.instruction_id) for c in contents]
-        usage_counts = await self._batch_load_usage_counts(all_instruction_ids)
+        # Batch load usage counts for the selected instructions
+        selected_ids = [str(c.instruction_id) for c, _, _ in always_contents]
+        selected_ids.extend(str(c.instruction_id) for c, _ in intelligent_contents)
+        usage_counts = await self._batch_load_usage_counts(selected_ids)
         
         # Build items for 'always' instructions (they all get loaded)
         always_items: List[InstructionItem] = []
@@ -384,42 +398,29 @@ class InstructionContextBuilder:
                 build_number=build.build_number,
             ))
         
-        # Calculate remaining slots for intelligent instructions
-        remaining_slots = max_instructions - len(always_items)
         intelligent_items: List[InstructionItem] = []
-        
-        if remaining_slots > 0 and intelligent_contents:
-            # Extract keywords from query for scoring
-            keywords = self._extract_keywords(query) if query else set()
-            
-            # Score and rank intelligent instructions
-            scored: List[Tuple[InstructionItem, float]] = []
-            for content, instruction, version in intelligent_contents:
-                score = self._score_instruction_version(version, keywords)
-                # Include if score > 0 OR if we have no query (load all intelligent)
-                if score > 0 or not query:
-                    inst_id = str(instruction.id)
-                    item = InstructionItem(
-                        id=inst_id,
-                        category=instruction.category,
-                        text=version.text or "",
-                        load_mode="intelligent",
-                        load_reason=f"search_match:{score:.2f}" if score > 0 else "fill",
-                        source_type=instruction.source_type,
-                        title=version.title,
-                        labels=self._extract_labels(instruction),
-                        usage_count=usage_counts.get(inst_id),
-                        # Version/Build lineage tracking
-                        version_id=str(version.id),
-                        version_number=version.version_number,
-                        content_hash=version.content_hash,
-                        build_number=build.build_number,
-                    )
-                    scored.append((item, score))
-            
-            # Sort by score descending and take top N
-            scored.sort(key=lambda x: x[1], reverse=True)
-            intelligent_items = [item for item, _ in scored[:remaining_slots]]
+        for content, score in intelligent_contents:
+            instruction = content.instruction
+            version = content.instruction_version
+            if not instruction or not version:
+                continue
+            inst_id = str(instruction.id)
+            intelligent_items.append(InstructionItem(
+                id=inst_id,
+                category=instruction.category,
+                text=version.text or "",
+                load_mode="intelligent",
+                load_reason=f"search_match:{score:.2f}" if score > 0 else "fill",
+                source_type=instruction.source_type,
+                title=version.title,
+                labels=self._extract_labels(instruction),
+                usage_count=usage_counts.get(inst_id),
+                # Version/Build lineage tracking
+                version_id=str(version.id),
+                version_number=version.version_number,
+                content_hash=version.content_hash,
+                build_number=build.build_number,
+            ))
         
         logger.info(
             f"_load_from_build: loaded {len(always_items)} always + "
@@ -572,103 +573,8 @@ class InstructionContextBuilder:
         ]
     
     def _extract_keywords(self, text: str) -> Set[str]:
-        """Extract meaningful keywords from text."""
-        # Lowercase and split on non-alphanumeric (including underscores for better matching)
-        words = re.split(r'[^a-z0-9]+', text.lower())
-        # Filter out stopwords and short words
-        keywords = {
-            w for w in words 
-            if w and len(w) >= 2 and w not in self.STOPWORDS
-        }
-        return keywords
-    
-    def _score_instruction(self, instruction: Instruction, keywords: Set[str]) -> float:
-        """
-        Score an instruction based on keyword matching.
-        
-        Uses both exact matching and substring matching for better recall.
-        Returns a score between 0 and 1.
-        """
-        # Build searchable text from instruction
-        searchable = self._build_searchable_text(instruction)
-        return self._score_text(searchable, keywords)
-    
-    def _score_instruction_version(self, version: InstructionVersion, keywords: Set[str]) -> float:
-        """
-        Score an instruction version based on keyword matching.
-        
-        Used for build-based loading to match against version.text/title.
-        Returns a score between 0 and 1.
-        """
-        # Build searchable text from version fields
-        parts = [version.text or ""]
-        if version.title:
-            parts.append(version.title)
-        if version.structured_data:
-            if isinstance(version.structured_data, dict):
-                if version.structured_data.get('name'):
-                    parts.append(version.structured_data['name'])
-                if version.structured_data.get('description'):
-                    parts.append(version.structured_data['description'])
-        searchable = " ".join(parts)
-        return self._score_text(searchable, keywords)
-    
-    def _score_text(self, searchable: str, keywords: Set[str]) -> float:
-        """
-        Score text based on keyword matching.
-        
-        Uses both exact matching and substring matching for better recall.
-        Returns a score between 0 and 1.
-        """
-        searchable_lower = searchable.lower()
-        searchable_keywords = self._extract_keywords(searchable)
-        
-        if not searchable_keywords and not searchable_lower:
-            return 0.0
-        
-        if not keywords:
-            return 0.0
-        
-        # Score 1: Exact keyword match (Jaccard similarity)
-        exact_intersection = len(keywords & searchable_keywords)
-        exact_union = len(keywords | searchable_keywords) if searchable_keywords else 1
-        jaccard_score = exact_intersection / exact_union if exact_union > 0 else 0.0
-        
-        # Score 2: Substring match (check if query keywords appear in searchable text)
-        substring_matches = 0
-        for kw in keywords:
-            if len(kw) >= 3 and kw in searchable_lower:  # Only match keywords 3+ chars
-                substring_matches += 1
-        substring_score = substring_matches / len(keywords) if keywords else 0.0
-        
-        # Combined score: max of exact and substring (substring helps when words are joined)
-        return max(jaccard_score, substring_score * 0.8)  # Slight penalty for substring-only
-    
-    def _build_searchable_text(self, instruction: Instruction) -> str:
-        """Build searchable text from instruction fields."""
-        parts = [instruction.text or ""]
-        
-        if instruction.title:
-            parts.append(instruction.title)
-        
-        if instruction.formatted_content:
-            parts.append(instruction.formatted_content)
-        
-        # Include structured data fields if present
-        if instruction.structured_data:
-            if instruction.structured_data.get('name'):
-                parts.append(instruction.structured_data['name'])
-            if instruction.structured_data.get('description'):
-                parts.append(instruction.structured_data['description'])
-            if instruction.structured_data.get('path'):
-                parts.append(instruction.structured_data['path'])
-            # Include column names
-            columns = instruction.structured_data.get('columns', [])
-            for col in columns:
-                if isinstance(col, dict) and col.get('name'):
-                    parts.append(col['name'])
-        
-        return " ".join(parts)
+        """Extract meaningful keywords from text (the terms the search index uses)."""
+        return set(search_terms(text))
     
     @staticmethod
     def _format_instruction(instruction: Instruction) -> str:
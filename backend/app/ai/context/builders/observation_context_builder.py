@@ -29,6 +29,9 @@ class ObservationContextBuilder:
         
         # Other useful outputs (files created, data processed, etc.)
         self.artifacts: Dict[str, Any] = {}
+
+        # Bumped on every change, so ContextHub only rebuilds the section when needed
+        self.version: int = 0
     
     def add_tool_observation(self, tool_name: str, tool_input: Dict[str, Any], observation: Dict[str, Any]):
         """
@@ -40,6 +43,7 @@ class ObservationContextBuilder:
             observation: Tool execution result with summary and artifacts
         """
         self.execution_count += 1
+        self.version += 1
         
         tool_observation = {
             "execution_number": self.execution_count,
@@ -65,6 +69,7 @@ class ObservationContextBuilder:
             widget_id: ID of the widget that was created/updated
             widget_data: Widget data including title, type, etc.
         """
+        self.version += 1
         self.widget_updates.append({
             "widget_id": widget_id,
             "timestamp": datetime.utcnow().isoformat(),
@@ -79,6 +84,7 @@ class ObservationContextBuilder:
             step_id: ID of the step that was created/updated  
             step_data: Step data including status, results, etc.
         """
+        self.version += 1
         self.step_updates.append({
             "step_id": step_id,
             "timestamp": datetime.utcnow().isoformat(),
@@ -89,6 +95,7 @@ class ObservationContextBuilder:
         """
         Track visualization creation or updates.
         """
+        self.version += 1
         self.visualization_updates.append({
             "visualization_id": visualization_id,
             "timestamp": datetime.utcnow().isoformat(),
@@ -243,4 +250,5 @@ class ObservationContextBuilder:
         self.step_updates.clear()
         self.visualization_updates.clear()
         self.artifacts.clear()
-        self.execution_count = 0
\ No newline at end of file
+        self.execution_count = 0
+        self.version += 1
\ No newline at end of file
@@ -16,6 +16,7 @@ Example migration:
 
 import re
 import json
+import asyncio
 import warnings
 from sqlalchemy import select
 
@@ -25,6 +26,7 @@ from app.models.git_repository import GitRepository
 from app.models.metadata_indexing_job import MetadataIndexingJob
 from app.models.organization import Organization
 from app.ai.context.sections.resources_section import ResourcesSection
+from app.ai.semantic_index import embed_query, get_index, rrf_fuse, semantic_enabled, semantic_top_k
 
 
 class ResourceContextBuilder:
@@ -91,8 +93,14 @@ class ResourceContextBuilder:
             )
             all_resources = metadata_resources_result.scalars().all()
             
-            # Filter resources based on keywords
-            relevant_resources = self._filter_resources_by_keywords(all_resources, keywords)
+            # Filter resources based on keywords (fused with embedding similarity when enabled)
+            if semantic_enabled():
+                relevant_resources = await self._semantic_rank_resources(
+                    all_resources, self._filter_resources_by_keywords(all_resources, keywords, limit=None),
+                    latest_index_job.id,
+                )
+            else:
+                relevant_resources = self._filter_resources_by_keywords(all_resources, keywords)
             # Add relevant resources to context
             if relevant_resources:
                 context.append("<relevant_metadata_resources>")
@@ -168,7 +176,7 @@ class ResourceContextBuilder:
         
         return keywords
 
-    def _filter_resources_by_keywords(self, resources, keywords):
+    def _filter_resources_by_keywords(self, resources, keywords, limit=5):
         """Filter resources based on keywords."""
         relevant_resources = []
         
@@ -182,7 +190,27 @@ class ResourceContextBuilder:
                 relevant_resources.append(resource)
         
         # Limit to top 5 most relevant resources to avoid context overload
-        return relevant_resources[:5]
+        return relevant_resources[:limit]
+
+    async def _semantic_rank_resources(self, resources, keyword_matches, indexing_job_id, limit=5):
+        """Keyword matches fused with the resources most similar to the prompt (embedding index per indexing job)."""
+        prompt = self.prompt_content.get('content', '') if isinstance(self.prompt_content, dict) else ''
+        try:
+            query_vector = await asyncio.to_thread(embed_query, prompt)
+            if query_vector is None:
+                return keyword_matches[:limit]
+            index = get_index(getattr(self.organization, 'id', ''), f"resources-{indexing_job_id}")
+            items = {
+                str(r.id): f"{r.name} {r.resource_type} {r.description or ''} {r.path or ''}"
+                for r in resources
+            }
+            await asyncio.to_thread(index.sync, items)
+            hits = index.search(query_vector, semantic_top_k())
+        except Exception:
+            return keyword_matches[:limit]
+        by_id = {str(r.id): r for r in resources}
+        fused = rrf_fuse([str(r.id) for r in keyword_matches], [resource_id for resource_id, _ in hits])
+        return [by_id[resource_id] for resource_id, _ in fused if resource_id in by_id][:limit]
 
     def _format_resource_by_type(self, resource):
         """Format a resource based on its type according to the schema."""
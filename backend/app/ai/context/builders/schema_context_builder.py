@@ -2,6 +2,7 @@
 Schema Context Builder - builds TablesSchemaContext object for schemas
 """
 from typing import List, Optional, Dict, Any
+import asyncio
 import re
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -15,6 +16,9 @@ from app.models.report import Report
 from app.models.data_source import DataSource
 from app.models.datasource_table import DataSourceTable
 from app.models.user_data_source_overlay import UserDataSourceTable, UserDataSourceColumn
+from app.data_sources.schema_cache import schema_context_cache, schema_version
+from app.data_sources.table_index import TableSearchIndex, table_index
+from app.ai.semantic_index import embed_query, get_index, rrf_fuse, semantic_enabled, semantic_top_k
 
 
 class SchemaContextBuilder:
@@ -28,6 +32,8 @@ class SchemaContextBuilder:
         self.report = report
         self.data_sources = data_sources
         self.user = user
+        # Schema version each data source's tables were last loaded at, for the table index
+        self._schema_versions: Dict[str, int] = {}
 
     async def build(
         self,
@@ -37,6 +43,8 @@ class SchemaContextBuilder:
         data_source_ids: Optional[List[str]] = None,
         table_names: Optional[List[str]] = None,
         name_patterns: Optional[List[str]] = None,
+        column_names: Optional[List[str]] = None,
+        semantic_query: Optional[str] = None,
         active_only: bool = True,
         sort: str = "score",  # "score" | "usage" | "centrality" | "alpha"
     ) -> TablesSchemaContext:
@@ -48,190 +56,37 @@ class SchemaContextBuilder:
             data_source_ids: Filter to specific data sources.
             table_names: Filter to specific table names (exact match).
             name_patterns: Filter tables by regex patterns.
+            column_names: Filter tables having one of these columns, or one as a column name token
+                (case-insensitive; `customer` matches `customer_id`). Combined with the name
+                filters with OR.
+            semantic_query: Also rank tables by embedding similarity to this text (when semantic
+                search is enabled). Similar tables are added to the filtered ones, and the result
+                is ordered by fusing both rankings.
             active_only: If True (default), only return active tables. If False, include inactive.
             sort: Sort order for tables.
         """
         ds_sections: List[TablesSchemaContext.DataSource] = []
 
         ds_filter = set(str(x) for x in (data_source_ids or [])) if data_source_ids else None
+        query_vector = None
+        if semantic_query and semantic_enabled():
+            query_vector = await asyncio.to_thread(embed_query, semantic_query)
         for ds in self.data_sources:
             if ds_filter and str(ds.id) not in ds_filter:
                 continue
-            # Build stats map (table name lowercase -> TableStats)
-            stats_map: Dict[str, TableStats] = {}
-            if with_stats:
-                res = await self.db.execute(
-                    select(TableStats).where(
-                        TableStats.report_id == None,
-                        TableStats.data_source_id == str(ds.id),
-                    )
-                )
-                for s in res.scalars().all():
-                    stats_map[(s.table_fqn or '').lower()] = s
+            # Cached lists are shared; sorting/filtering below works on a copy
+            tables = list(await self._load_tables(ds, with_stats=with_stats, active_only=active_only))
+            all_tables = tables
 
-            # Canonical (org-level) source
-            ds_tables_result = await self.db.execute(
-                select(DataSourceTable).where(DataSourceTable.datasource_id == str(ds.id))
-            )
-            ds_tables = ds_tables_result.scalars().all()
-            canonical_by_name: Dict[str, DataSourceTable] = {getattr(t, 'name', ''): t for t in ds_tables}
-
-            # Choose source: overlay for user_required with user, else canonical
-            use_overlay = (getattr(ds, 'auth_policy', 'system_only') == 'user_required') and (self.user is not None)
-
-            # Normalize into a common shape for downstream rendering
-            # Each entry: { name, columns: [{name,dtype}], pks: [{name,dtype}], fks: [fk], metadata_json, metrics, is_active }
-            normalized: List[Dict[str, Any]] = []
-
-            if use_overlay:
-                overlays_q = await self.db.execute(
-                    select(UserDataSourceTable).where(
-                        UserDataSourceTable.data_source_id == str(ds.id),
-                        UserDataSourceTable.user_id == str(self.user.id),
-                        UserDataSourceTable.is_accessible == True,
-                    )
+            # Apply table-level filters (name/column matching only - active filtering already done above).
+            # Filtering first keeps the sorts below small; they are stable, so the order is unchanged.
+            if table_names or name_patterns or column_names:
+                tables = self._filter_tables(
+                    ds, tables, active_only=active_only,
+                    table_names=table_names, name_patterns=name_patterns, column_names=column_names,
                 )
-                overlay_tables = overlays_q.scalars().all()
-                overlay_ids = [str(ot.id) for ot in overlay_tables]
-                cols_q = await self.db.execute(
-                    select(UserDataSourceColumn).where(
-                        UserDataSourceColumn.user_data_source_table_id.in_(overlay_ids)
-                    )
-                )
-                cols = cols_q.scalars().all()
-                cols_by_table: Dict[str, list[UserDataSourceColumn]] = {}
-                for c in cols:
-                    cols_by_table.setdefault(str(c.user_data_source_table_id), []).append(c)
-
-                for ot in overlay_tables:
-                    name = getattr(ot, 'table_name', '') or ''
-                    overlay_cols = cols_by_table.get(str(ot.id), [])
-                    columns = [{"name": getattr(c, 'column_name', ''), "dtype": getattr(c, 'data_type', None)} for c in overlay_cols]
-                    base = canonical_by_name.get(name)
-                    # Respect canonical table's is_active status (default False if not found)
-                    canonical_is_active = bool(getattr(base, 'is_active', False)) if base is not None else False
-                    # Skip inactive tables when active_only is True
-                    if active_only and not canonical_is_active:
-                        continue
-                    pks = getattr(base, 'pks', []) if base is not None else []
-                    fks = getattr(base, 'fks', []) if base is not None else []
-                    metadata_json = getattr(base, 'metadata_json', None) if base is not None else None
-                    normalized.append({
-                        "name": name,
-                        "columns": columns,
-                        "pks": pks,
-                        "fks": fks,
-                        "metadata_json": metadata_json,
-                        "centrality_score": getattr(base, 'centrality_score', None) if base is not None else None,
-                        "richness": getattr(base, 'richness', None) if base is not None else None,
-                        "degree_in": getattr(base, 'degree_in', None) if base is not None else None,
-                        "degree_out": getattr(base, 'degree_out', None) if base is not None else None,
-                        "entity_like": getattr(base, 'entity_like', None) if base is not None else None,
-                        "is_active": canonical_is_active,
-                    })
-            else:
-                for t in ds_tables:
-                    table_is_active = bool(getattr(t, 'is_active', False))
-                    # Skip inactive tables when active_only is True
-                    if active_only and not table_is_active:
-                        continue
-                    columns = [{"name": col.get("name"), "dtype": col.get("dtype", "unknown")} for col in (getattr(t, 'columns', []) or [])]
-                    normalized.append({
-                        "name": getattr(t, 'name', ''),
-                        "columns": columns,
-                        "pks": getattr(t, 'pks', []) or [],
-                        "fks": getattr(t, 'fks', []) or [],
-                        "metadata_json": getattr(t, 'metadata_json', None),
-                        "centrality_score": getattr(t, 'centrality_score', None),
-                        "richness": getattr(t, 'richness', None),
-                        "degree_in": getattr(t, 'degree_in', None),
-                        "degree_out": getattr(t, 'degree_out', None),
-                        "entity_like": getattr(t, 'entity_like', None),
-                        "is_active": table_is_active,
-                    })
-
-            # Common rendering and scoring
-            scored: List[tuple[float, PromptTable]] = []
-            tables: List[PromptTable] = []
-            for item in normalized:
-                columns = [
-                    PromptTableColumn(name=c.get("name"), dtype=c.get("dtype"))
-                    for c in (item.get("columns") or [])
-                ]
-                pks = [
-                    PromptTableColumn(name=pk.get("name"), dtype=pk.get("dtype"))
-                    for pk in (item.get("pks") or [])
-                ]
-                fks = [
-                    PromptForeignKey(
-                        column=PromptTableColumn(name=fk.get('column', {}).get('name'), dtype=fk.get('column', {}).get('dtype')),
-                        references_name=fk.get('references_name'),
-                        references_column=PromptTableColumn(name=fk.get('references_column', {}).get('name'), dtype=fk.get('references_column', {}).get('dtype')),
-                    )
-                    for fk in (item.get("fks") or [])
-                ]
-
-                tbl = PromptTable(
-                    name=item.get("name", ""),
-                    columns=columns,
-                    pks=pks,
-                    fks=fks,
-                    is_active=bool(item.get("is_active", False)),  # Default False for safety
-                    centrality_score=item.get("centrality_score"),
-                    richness=item.get("richness"),
-                    degree_in=item.get("degree_in"),
-                    degree_out=item.get("degree_out"),
-                    entity_like=item.get("entity_like"),
-                    metadata_json=item.get("metadata_json"),
-                )
-
-                if with_stats:
-                    key = (item.get("name", "") or '').lower()
-                    s = stats_map.get(key)
-                    if s:
-                        usage_count = int(s.usage_count or 0)
-                        success_count = int(s.success_count or 0)
-                        failure_count = int(s.failure_count or 0)
-                        weighted_usage_count = float(s.weighted_usage_count or 0.0)
-                        pos_feedback_count = int(s.pos_feedback_count or 0)
-                        neg_feedback_count = int(s.neg_feedback_count or 0)
-                        last_used_at = s.last_used_at.isoformat() if s.last_used_at else None
-                        last_feedback_at = s.last_feedback_at.isoformat() if s.last_feedback_at else None
-                        success_rate = (success_count / max(1, usage_count)) if usage_count > 0 else 0.0
-                        from datetime import datetime, timezone
-                        now = datetime.now(timezone.utc)
-                        if s.last_used_at:
-                            age_days = max(0.0, (now - s.last_used_at.replace(tzinfo=timezone.utc)).total_seconds() / 86400.0)
-                        else:
-                            age_days = 365.0
-                        recency = pow(2.718281828, -age_days / 14.0)
-                        usage_signal = (weighted_usage_count)**0.5
-                        feedback_signal = (float(s.weighted_pos_feedback or 0.0) - float(s.weighted_neg_feedback or 0.0))
-                        structural_signal = (float(item.get("centrality_score") or 0.0) + float(item.get("richness") or 0.0) + (0.5 if item.get("entity_like") else 0.0))
-                        score = 0.35 * (usage_signal * recency) + 0.25 * success_rate + 0.2 * feedback_signal + 0.2 * structural_signal - 0.2 * (failure_count**0.5)
-                        tbl.usage_count = usage_count
-                        tbl.success_count = success_count
-                        tbl.failure_count = failure_count
-                        tbl.weighted_usage_count = weighted_usage_count
-                        tbl.pos_feedback_count = pos_feedback_count
-                        tbl.neg_feedback_count = neg_feedback_count
-                        tbl.last_used_at = last_used_at
-                        tbl.last_feedback_at = last_feedback_at
-                        tbl.success_rate = round(success_rate, 4)
-                        tbl.score = float(round(score, 6))
-                        scored.append((tbl.score or 0.0, tbl))
-                    else:
-                        structural_signal = (float(item.get("centrality_score") or 0.0) + float(item.get("richness") or 0.0) + (0.5 if item.get("entity_like") else 0.0))
-                        score = 0.1 * structural_signal
-                        tbl.score = float(round(score, 6))
-                        scored.append((tbl.score or 0.0, tbl))
-                else:
-                    tables.append(tbl)
-
-            # Default ordering by composite score when stats are present
-            if with_stats:
-                scored.sort(key=lambda x: x[0], reverse=True)
-                tables = [t for (_, t) in scored]
+            if query_vector is not None:
+                tables = await self._semantic_rank(ds, all_tables, tables, query_vector)
 
             # Apply alternate sorts if requested
             try:
@@ -249,32 +104,6 @@ class SchemaContextBuilder:
             except Exception:
                 pass
 
-            # Apply table-level filters (name matching only - active filtering already done above)
-            if table_names or name_patterns:
-                name_set = set((table_names or []))
-                patterns = []
-                for p in (name_patterns or []):
-                    try:
-                        patterns.append(re.compile(p))
-                    except Exception:
-                        continue
-                def _match(n: str) -> bool:
-                    if name_set and n in name_set:
-                        return True
-                    for rp in patterns:
-                        try:
-                            if rp.search(n or ''):
-                                return True
-                        except Exception:
-                            continue
-                    return (not name_set) and (not patterns)
-                filtered = []
-                for t in tables:
-                    if not _match(getattr(t, 'name', '')):
-                        continue
-                    filtered.append(t)
-                tables = filtered
-
             # Apply top_k cap last
             if top_k is not None and top_k > 0:
                 tables = tables[:top_k]
@@ -295,6 +124,282 @@ class SchemaContextBuilder:
 
         return TablesSchemaContext(data_sources=ds_sections)
 
+    async def _load_tables(self, ds: DataSource, *, with_stats: bool, active_only: bool) -> List[PromptTable]:
+        """Normalized, scored tables of a data source in default order, cached per schema version."""
+        # Choose source: overlay for user_required with user, else canonical
+        use_overlay = (getattr(ds, 'auth_policy', 'system_only') == 'user_required') and (self.user is not None)
+        org_id = str(getattr(self.organization, 'id', '') or '')
+        key = (str(ds.id), str(self.user.id) if use_overlay else None, with_stats, active_only)
+        # Read the version before loading so a concurrent bump invalidates what we store
+        version = await schema_version(self.db, ds.id, with_stats=with_stats)
+        self._schema_versions[str(ds.id)] = version[0]
+        if schema_context_cache.enabled():
+            cached = schema_context_cache.get(org_id, key, version)
+            if cached is not None:
+                return cached
+        tables = await self._build_tables(ds, with_stats=with_stats, active_only=active_only, use_overlay=use_overlay)
+        schema_context_cache.put(org_id, key, version, tables)
+        return tables
+
+    def _filter_tables(
+        self,
+        ds: DataSource,
+        tables: List[PromptTable],
+        *,
+        active_only: bool,
+        table_names: Optional[List[str]],
+        name_patterns: Optional[List[str]],
+        column_names: Optional[List[str]],
+    ) -> List[PromptTable]:
+        """Tables matching any name, pattern or column; patterns are planned on the table index."""
+        name_set = set(table_names or [])
+        patterns = []
+        for p in (name_patterns or []):
+            try:
+                patterns.append((p, re.compile(p)))
+            except Exception:
+                continue
+        columns = [c for c in (column_names or []) if isinstance(c, str) and c]
+        if not name_set and not patterns and not columns:
+            return tables
+
+        matched = set(name_set)
+        if patterns or columns:
+            index = self._table_index(ds, tables, active_only=active_only)
+            for raw, rp in patterns:
+                candidates = index.candidates(raw)
+                # Candidates are a superset; the regex decides (a full scan when it can't be planned)
+                for n in (candidates if candidates is not None else index.names()):
+                    try:
+                        if rp.search(n):
+                            matched.add(n)
+                    except Exception:
+                        continue
+            for column in columns:
+                matched |= index.with_column(column)
+        return [t for t in tables if getattr(t, 'name', '') in matched]
+
+    def _table_index(self, ds: DataSource, tables: List[PromptTable], *, active_only: bool) -> TableSearchIndex:
+        use_overlay = (getattr(ds, 'auth_policy', 'system_only') == 'user_required') and (self.user is not None)
+        key = (str(ds.id), str(self.user.id) if use_overlay else None, active_only)
+        # `tables` come from `_load_tables`, which recorded the version they were loaded at
+        version = self._schema_versions.get(str(ds.id), object())
+        return table_index(key, tables, version)
+
+    async def _semantic_rank(self, ds: DataSource, all_tables: List[PromptTable], tables: List[PromptTable], query_vector) -> List[PromptTable]:
+        """`tables` plus the tables most similar to the query, ordered by fusing both rankings."""
+        try:
+            use_overlay = (getattr(ds, 'auth_policy', 'system_only') == 'user_required') and (self.user is not None)
+            name = f"tables-{ds.id}-{self.user.id}" if use_overlay else f"tables-{ds.id}"
+            index = get_index(getattr(self.organization, 'id', ''), name)
+            version = await schema_version(self.db, ds.id)
+            # Index the active tables; other listings only rank the tables they share with it
+            active = await self._load_tables(ds, with_stats=False, active_only=True)
+            if index.synced_version != version or len(index) != len(active):
+                items = {t.name: self._semantic_text(t) for t in active if t.name}
+                await asyncio.to_thread(index.sync, items)
+                index.synced_version = version
+            by_name = {t.name: t for t in all_tables}
+            hits = index.search(query_vector, semantic_top_k(), allowed=by_name.keys())
+        except Exception:
+            return tables
+        if not hits:
+            return tables
+        fused = rrf_fuse([t.name for t in tables], [name for name, _ in hits])
+        return [by_name[name] for name, _ in fused if name in by_name]
+
+    @staticmethod
+    def _semantic_text(table: PromptTable) -> str:
+        columns = ", ".join(c.name for c in (getattr(table, 'columns', None) or []) if c.name)
+        return f"{table.name}: {columns}" if columns else table.name
+
+    async def suggest_tables(self, name: str, data_source_ids: Optional[List[str]] = None, limit: int = 3) -> List[str]:
+        """Active table names closest to `name` (trigram similarity), for "did you mean" hints."""
+        ds_filter = set(str(x) for x in (data_source_ids or [])) if data_source_ids else None
+        suggestions: List[str] = []
+        for ds in self.data_sources:
+            if ds_filter and str(ds.id) not in ds_filter:
+                continue
+            tables = await self._load_tables(ds, with_stats=False, active_only=True)
+            suggestions.extend(self._table_index(ds, tables, active_only=True).similar(name, limit=limit))
+        return suggestions[:limit]
+
+    async def _build_tables(self, ds: DataSource, *, with_stats: bool, active_only: bool, use_overlay: bool) -> List[PromptTable]:
+        # Build stats map (table name lowercase -> TableStats)
+        stats_map: Dict[str, TableStats] = {}
+        if with_stats:
+            res = await self.db.execute(
+                select(TableStats).where(
+                    TableStats.report_id == None,
+                    TableStats.data_source_id == str(ds.id),
+                )
+            )
+            for s in res.scalars().all():
+                stats_map[(s.table_fqn or '').lower()] = s
+
+        # Canonical (org-level) source
+        ds_tables_result = await self.db.execute(
+            select(DataSourceTable).where(DataSourceTable.datasource_id == str(ds.id))
+        )
+        ds_tables = ds_tables_result.scalars().all()
+        canonical_by_name: Dict[str, DataSourceTable] = {getattr(t, 'name', ''): t for t in ds_tables}
+
+        # Normalize into a common shape for downstream rendering
+        # Each entry: { name, columns: [{name,dtype}], pks: [{name,dtype}], fks: [fk], metadata_json, metrics, is_active }
+        normalized: List[Dict[str, Any]] = []
+
+        if use_overlay:
+            overlays_q = await self.db.execute(
+                select(UserDataSourceTable).where(
+                    UserDataSourceTable.data_source_id == str(ds.id),
+                    UserDataSourceTable.user_id == str(self.user.id),
+                    UserDataSourceTable.is_accessible == True,
+                )
+            )
+            overlay_tables = overlays_q.scalars().all()
+            overlay_ids = [str(ot.id) for ot in overlay_tables]
+            cols_q = await self.db.execute(
+                select(UserDataSourceColumn).where(
+                    UserDataSourceColumn.user_data_source_table_id.in_(overlay_ids)
+                )
+            )
+            cols = cols_q.scalars().all()
+            cols_by_table: Dict[str, list[UserDataSourceColumn]] = {}
+            for c in cols:
+                cols_by_table.setdefault(str(c.user_data_source_table_id), []).append(c)
+
+            for ot in overlay_tables:
+                name = getattr(ot, 'table_name', '') or ''
+                overlay_cols = cols_by_table.get(str(ot.id), [])
+                columns = [{"name": getattr(c, 'column_name', ''), "dtype": getattr(c, 'data_type', None)} for c in overlay_cols]
+                base = canonical_by_name.get(name)
+                # Respect canonical table's is_active status (default False if not found)
+                canonical_is_active = bool(getattr(base, 'is_active', False)) if base is not None else False
+                # Skip inactive tables when active_only is True
+                if active_only and not canonical_is_active:
+                    continue
+                pks = getattr(base, 'pks', []) if base is not None else []
+                fks = getattr(base, 'fks', []) if base is not None else []
+                metadata_json = getattr(base, 'metadata_json', None) if base is not None else None
+                normalized.append({
+                    "name": name,
+                    "columns": columns,
+                    "pks": pks,
+                    "fks": fks,
+                    "metadata_json": metadata_json,
+                    "centrality_score": getattr(base, 'centrality_score', None) if base is not None else None,
+                    "richness": getattr(base, 'richness', None) if base is not None else None,
+                    "degree_in": getattr(base, 'degree_in', None) if base is not None else None,
+                    "degree_out": getattr(base, 'degree_out', None) if base is not None else None,
+                    "entity_like": getattr(base, 'entity_like', None) if base is not None else None,
+                    "is_active": canonical_is_active,
+                })
+        else:
+            for t in ds_tables:
+                table_is_active = bool(getattr(t, 'is_active', False))
+                # Skip inactive tables when active_only is True
+                if active_only and not table_is_active:
+                    continue
+                columns = [{"name": col.get("name"), "dtype": col.get("dtype", "unknown")} for col in (getattr(t, 'columns', []) or [])]
+                normalized.append({
+                    "name": getattr(t, 'name', ''),
+                    "columns": columns,
+                    "pks": getattr(t, 'pks', []) or [],
+                    "fks": getattr(t, 'fks', []) or [],
+                    "metadata_json": getattr(t, 'metadata_json', None),
+                    "centrality_score": getattr(t, 'centrality_score', None),
+                    "richness": getattr(t, 'richness', None),
+                    "degree_in": getattr(t, 'degree_in', None),
+                    "degree_out": getattr(t, 'degree_out', None),
+                    "entity_like": getattr(t, 'entity_like', None),
+                    "is_active": table_is_active,
+                })
+
+        # Common rendering and scoring
+        scored: List[tuple[float, PromptTable]] = []
+        tables: List[PromptTable] = []
+        for item in normalized:
+            columns = [
+                PromptTableColumn(name=c.get("name"), dtype=c.get("dtype"))
+                for c in (item.get("columns") or [])
+            ]
+            pks = [
+                PromptTableColumn(name=pk.get("name"), dtype=pk.get("dtype"))
+                for pk in (item.get("pks") or [])
+            ]
+            fks = [
+                PromptForeignKey(
+                    column=PromptTableColumn(name=fk.get('column', {}).get('name'), dtype=fk.get('column', {}).get('dtype')),
+                    references_name=fk.get('references_name'),
+                    references_column=PromptTableColumn(name=fk.get('references_column', {}).get('name'), dtype=fk.get('references_column', {}).get('dtype')),
+                    inferred=bool(fk.get('inferred')),
+                )
+                for fk in (item.get("fks") or [])
+            ]
+
+            tbl = PromptTable(
+                name=item.get("name", ""),
+                columns=columns,
+                pks=pks,
+                fks=fks,
+                is_active=bool(item.get("is_active", False)),  # Default False for safety
+                centrality_score=item.get("centrality_score"),
+                richness=item.get("richness"),
+                degree_in=item.get("degree_in"),
+                degree_out=item.get("degree_out"),
+                entity_like=item.get("entity_like"),
+                metadata_json=item.get("metadata_json"),
+            )
+
+            if with_stats:
+                key = (item.get("name", "") or '').lower()
+                s = stats_map.get(key)
+                if s:
+                    usage_count = int(s.usage_count or 0)
+                    success_count = int(s.success_count or 0)
+                    failure_count = int(s.failure_count or 0)
+                    weighted_usage_count = float(s.weighted_usage_count or 0.0)
+                    pos_feedback_count = int(s.pos_feedback_count or 0)
+                    neg_feedback_count = int(s.neg_feedback_count or 0)
+                    last_used_at = s.last_used_at.isoformat() if s.last_used_at else None
+                    last_feedback_at = s.last_feedback_at.isoformat() if s.last_feedback_at else None
+                    success_rate = (success_count / max(1, usage_count)) if usage_count > 0 else 0.0
+                    from datetime import datetime, timezone
+                    now = datetime.now(timezone.utc)
+                    if s.last_used_at:
+                        age_days = max(0.0, (now - s.last_used_at.replace(tzinfo=timezone.utc)).total_seconds() / 86400.0)
+                    else:
+                        age_days = 365.0
+                    recency = pow(2.718281828, -age_days / 14.0)
+                    usage_signal = (weighted_usage_count)**0.5
+                    feedback_signal = (float(s.weighted_pos_feedback or 0.0) - float(s.weighted_neg_feedback or 0.0))
+                    structural_signal = (float(item.get("centrality_score") or 0.0) + float(item.get("richness") or 0.0) + (0.5 if item.get("entity_like") else 0.0))
+                    score = 0.35 * (usage_signal * recency) + 0.25 * success_rate + 0.2 * feedback_signal + 0.2 * structural_signal - 0.2 * (failure_count**0.5)
+                    tbl.usage_count = usage_count
+                    tbl.success_count = success_count
+                    tbl.failure_count = failure_count
+                    tbl.weighted_usage_count = weighted_usage_count
+                    tbl.pos_feedback_count = pos_feedback_count
+                    tbl.neg_feedback_count = neg_feedback_count
+                    tbl.last_used_at = last_used_at
+                    tbl.last_feedback_at = last_feedback_at
+                    tbl.success_rate = round(success_rate, 4)
+                    tbl.score = float(round(score, 6))
+                    scored.append((tbl.score or 0.0, tbl))
+                else:
+                    structural_signal = (float(item.get("centrality_score") or 0.0) + float(item.get("richness") or 0.0) + (0.5 if item.get("entity_like") else 0.0))
+                    score = 0.1 * structural_signal
+                    tbl.score = float(round(score, 6))
+                    scored.append((tbl.score or 0.0, tbl))
+            else:
+                tables.append(tbl)
+
+        # Default ordering by composite score when stats are present
+        if with_stats:
+            scored.sort(key=lambda x: x[0], reverse=True)
+            tables = [t for (_, t) in scored]
+        return tables
+
     # Backward-compatibility helpers (temporary; will be removed after full migration)
     async def get_data_source_count(self) -> int:
         data_sources = getattr(self.report, 'data_sources', []) or []
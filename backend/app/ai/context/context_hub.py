@@ -2,8 +2,9 @@
 ContextHub - Main orchestrator for all agent context.
 """
 import json
+import logging
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .context_specs import (
@@ -33,12 +34,17 @@ from .builders.entity_context_builder import EntityContextBuilder
 from app.ai.utils.token_counter import count_tokens
 
 
+logger = logging.getLogger(__name__)
+
 # Default caps to keep planner prompt small and predictable
 DEFAULT_CONTEXT_LIMITS = {
     "messages_max": 20,        # last N messages
     "observations_max": 8    # last N observations
 }
 
+# Warm sections loaded from the database; refresh_warm() only rebuilds the dirty ones
+DB_WARM_SECTIONS = ("messages", "queries", "mentions", "entities")
+
 
 def _truncate_list(items, max_items):
     if not isinstance(items, list) or not max_items:
@@ -118,6 +124,14 @@ class ContextHub:
         # Static context cache (will be added later)
         self._static_cache: Dict[str, Any] = {}
         self._warm_cache: Dict[str, Any] = {}
+
+        # Section versions (bumped whenever a section object is replaced), warm sections
+        # to rebuild on the next refresh_warm(), and rendered text + token count per version
+        self._section_versions: Dict[str, int] = {}
+        self._dirty = set(DB_WARM_SECTIONS)
+        self._observations_version: Optional[int] = None
+        self._rendered: Dict[str, Tuple[int, str, int]] = {}
+        self._build_ms: Dict[str, float] = {}
     
     def _init_builders(self):
         """Initialize all context builders."""
@@ -288,13 +302,13 @@ class ContextHub:
                     allow_llm_see_data=allow_llm_see_data,
                 )
                 if ent_section:
-                    context.entities_context = ent_section.render()
-                    self._warm_cache["entities"] = ent_section
+                    self._set_section(self._warm_cache, "entities", ent_section)
+                    context.entities_context = self.render_section("entities")
                     try:
                         self.metadata.entities_count = len(getattr(ent_section, 'items', []) or [])
                     except Exception:
                         pass
-                    section_sizes['entities'] = _section_token_length(context.entities_context or '')
+                    section_sizes['entities'] = self.section_tokens("entities")
         except Exception:
             pass
         
@@ -313,22 +327,19 @@ class ContextHub:
         if messages_section and hasattr(messages_section, 'items'):
             self.metadata.messages_count = len(messages_section.items)
             # Add messages section size for total_tokens calculation
-            messages_text = messages_section.render() if messages_section else ""
-            section_sizes['messages'] = _section_token_length(messages_text)
+            section_sizes['messages'] = self.section_tokens("messages")
         
         widgets_section = self._warm_cache.get("widgets", None)
         if widgets_section and hasattr(widgets_section, 'items'):
             self.metadata.widgets_count = len(widgets_section.items)
             # Add widgets section size for total_tokens calculation
-            widgets_text = widgets_section.render() if widgets_section else ""
-            section_sizes['widgets'] = _section_token_length(widgets_text)
+            section_sizes['widgets'] = self.section_tokens("widgets")
         
         queries_section = self._warm_cache.get("queries", None)
         if queries_section and hasattr(queries_section, 'items'):
             self.metadata.queries_count = len(queries_section.items)
             # Add queries section size for total_tokens calculation
-            queries_text = queries_section.render() if queries_section else ""
-            section_sizes['queries'] = _section_token_length(queries_text)
+            section_sizes['queries'] = self.section_tokens("queries")
         
         # Mentions section counts (mirror pattern used above)
         mentions_section = self._warm_cache.get("mentions", None)
@@ -343,11 +354,7 @@ class ContextHub:
             except Exception:
                 pass
             # Add mentions section size for total_tokens calculation
-            try:
-                mentions_text = mentions_section.render()
-                section_sizes['mentions'] = _section_token_length(mentions_text or '')
-            except Exception:
-                pass
+            section_sizes['mentions'] = self.section_tokens("mentions")
         
         # Expose section sizes for UI diagnostics and calculate total_tokens as sum
         try:
@@ -387,8 +394,10 @@ class ContextHub:
             metadata=self.metadata,
         )
         # Cache
-        self._static_cache["schemas"] = schemas_obj or self._static_cache.get("schemas")
-        self._static_cache["files"] = files_obj or self._static_cache.get("files")
+        if schemas_obj:
+            self._set_section(self._static_cache, "schemas", schemas_obj)
+        if files_obj:
+            self._set_section(self._static_cache, "files", files_obj)
         return snapshot
 
     # --------------------------------------------------------------
@@ -420,18 +429,36 @@ class ContextHub:
         )
         
         # Store results (handle exceptions gracefully)
-        self._static_cache["schemas"] = schemas if not isinstance(schemas, Exception) else None
-        self._static_cache["instructions"] = instructions if not isinstance(instructions, Exception) else None
-        self._static_cache["code"] = None
-        self._static_cache["resources"] = resources if not isinstance(resources, Exception) else None
-        self._static_cache["files"] = files if not isinstance(files, Exception) else None
+        self._set_section(self._static_cache, "schemas", schemas if not isinstance(schemas, Exception) else None)
+        self._set_section(self._static_cache, "instructions", instructions if not isinstance(instructions, Exception) else None)
+        self._set_section(self._static_cache, "code", None)
+        self._set_section(self._static_cache, "resources", resources if not isinstance(resources, Exception) else None)
+        self._set_section(self._static_cache, "files", files if not isinstance(files, Exception) else None)
+
+    def mark_dirty(self, *sections: str) -> None:
+        """Rebuild these warm sections on the next refresh_warm() (all DB-backed ones if none given).
+
+        Call after anything that changes what a section reads: planner decisions and tool
+        executions add completion blocks (messages), tools create queries/steps (queries)
+        and catalog entities (entities). Mentions belong to the head completion and don't
+        change during a turn; observations are tracked by the observation builder itself.
+        """
+        self._dirty.update(sections or DB_WARM_SECTIONS)
 
-    async def refresh_warm(self) -> None:
-        """Rebuild warm sections each loop (messages, queries, observations, entities).
+    async def refresh_warm(self, force: bool = False) -> None:
+        """Rebuild the warm sections that changed (messages, queries, observations, entities).
         
-        Runs builders in parallel where possible for faster refresh.
+        Only sections marked dirty (see mark_dirty) are reloaded, and observations only
+        when new ones were recorded; `force` rebuilds everything. Runs builders in parallel
+        where possible for faster refresh.
         """
         import asyncio
+
+        dirty = set(DB_WARM_SECTIONS) if force else set(self._dirty)
+        observations_version = self.observation_builder.version
+        if not dirty and observations_version == self._observations_version:
+            self._record_section_stats(rebuilt=())
+            return
         
         # Get org settings first (needed for queries and entities)
         allow_llm_see_data = True
@@ -452,35 +479,115 @@ class ContextHub:
         except Exception:
             user_text = ""
         
-        # Run all warm builders in parallel
-        messages_task = asyncio.create_task(self.message_builder.build(max_messages=DEFAULT_CONTEXT_LIMITS["messages_max"]))
-        queries_task = asyncio.create_task(self.query_builder.build(max_queries=5, include_data_preview=allow_llm_see_data))
-        mentions_task = asyncio.create_task(self.mention_builder.build())
-        entities_task = asyncio.create_task(self.entity_builder.build_for_turn(
-            top_k=5,
-            require_source_assoc=True,
-            user_text=user_text,
-            allow_llm_see_data=allow_llm_see_data,
-        ))
-        
-        # Wait for all to complete
-        messages, queries, mentions, entities = await asyncio.gather(
-            messages_task, queries_task, mentions_task, entities_task,
-            return_exceptions=True
+        builders = {
+            "messages": lambda: self.message_builder.build(max_messages=DEFAULT_CONTEXT_LIMITS["messages_max"]),
+            "queries": lambda: self.query_builder.build(max_queries=5, include_data_preview=allow_llm_see_data),
+            "mentions": lambda: self.mention_builder.build(),
+            "entities": lambda: self.entity_builder.build_for_turn(
+                top_k=5,
+                require_source_assoc=True,
+                user_text=user_text,
+                allow_llm_see_data=allow_llm_see_data,
+            ),
+        }
+
+        async def _timed(name):
+            started = time.perf_counter()
+            try:
+                return await builders[name]()
+            finally:
+                self._build_ms[name] = (time.perf_counter() - started) * 1000
+
+        # Run the dirty warm builders in parallel (marks made while they run are kept)
+        names = [name for name in DB_WARM_SECTIONS if name in dirty]
+        self._dirty.difference_update(names)
+        results = await asyncio.gather(*(_timed(name) for name in names), return_exceptions=True)
+        for name, result in zip(names, results):
+            # Failed sections are cleared and marked dirty again, so the next refresh retries them
+            self._set_section(self._warm_cache, name, result if not isinstance(result, Exception) else None)
+            if isinstance(result, Exception):
+                self._dirty.add(name)
+        self._warm_cache["widgets"] = None  # Deprecated
+
+        rebuilt = list(names)
+        if observations_version != self._observations_version:
+            # Build observations synchronously (it's fast, no DB calls)
+            started = time.perf_counter()
+            observations = self.observation_builder.build()
+            _safe_setattr_list(observations, "items", DEFAULT_CONTEXT_LIMITS["observations_max"])
+            self._build_ms["observations"] = (time.perf_counter() - started) * 1000
+            self._set_section(self._warm_cache, "observations", observations)
+            self._observations_version = observations_version
+            rebuilt.append("observations")
+        self._record_section_stats(rebuilt=rebuilt)
+
+    # --------------------------------------------------------------
+    # Section versions, memoized rendering and per-loop instrumentation
+    # --------------------------------------------------------------
+    def _set_section(self, cache: Dict[str, Any], name: str, section: Any) -> None:
+        cache[name] = section
+        self._section_versions[name] = self._section_versions.get(name, 0) + 1
+
+    def _section(self, name: str) -> Any:
+        if name in self._warm_cache:
+            return self._warm_cache.get(name)
+        return self._static_cache.get(name)
+
+    def _rendered_section(self, name: str) -> Tuple[str, int]:
+        """(rendered text, token count) of a cached section, computed once per section version."""
+        version = self._section_versions.get(name, 0)
+        cached = self._rendered.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+        section = self._section(name)
+        try:
+            text = section.render() if section is not None else ""
+        except Exception:
+            text = ""
+        tokens = _section_token_length(text)
+        self._rendered[name] = (version, text, tokens)
+        return text, tokens
+
+    def render_section(self, name: str) -> str:
+        """Default rendering of a cached static or warm section ("" when missing)."""
+        return self._rendered_section(name)[0]
+
+    def section_tokens(self, name: str) -> int:
+        return self._rendered_section(name)[1]
+
+    def section_sizes(self) -> Dict[str, int]:
+        """Token count per cached section, reusing counts of sections that didn't change.
+
+        Schemas are left out: prompts include a top-k excerpt, not the full rendering.
+        """
+        names = [
+            n for n, section in {**self._static_cache, **self._warm_cache}.items()
+            if section is not None and n != "schemas"
+        ]
+        return {name: self.section_tokens(name) for name in names}
+
+    def _record_section_stats(self, rebuilt) -> None:
+        """Expose this refresh's build time (rebuilt sections only) and rendered bytes per warm section."""
+        rebuilt = set(rebuilt)
+        build_ms = {name: round(self._build_ms.get(name, 0.0), 2) for name in rebuilt}
+        sizes = {
+            name: len(self.render_section(name).encode("utf-8"))
+            for name in (*DB_WARM_SECTIONS, "observations")
+            if self._warm_cache.get(name) is not None
+        }
+        try:
+            self.metadata.section_build_ms = build_ms
+            self.metadata.section_bytes = sizes
+        except Exception:
+            pass
+        logger.info(
+            "refresh_warm loop=%s rebuilt=%s reused=%s build_ms=%s bytes=%s",
+            self.metadata.loop_index,
+            sorted(rebuilt),
+            sorted(set(sizes) - rebuilt),
+            build_ms,
+            sizes,
         )
-        
-        # Build observations synchronously (it's fast, no DB calls)
-        observations = self.observation_builder.build()
-        _safe_setattr_list(observations, "items", DEFAULT_CONTEXT_LIMITS["observations_max"])
-        
-        self._warm_cache.update({
-            "messages": messages if not isinstance(messages, Exception) else None,
-            "widgets": None,  # Deprecated
-            "queries": queries if not isinstance(queries, Exception) else None,
-            "observations": observations,
-            "mentions": mentions if not isinstance(mentions, Exception) else None,
-            "entities": entities if not isinstance(entities, Exception) else None,
-        })
 
     def get_view(self) -> ContextView:
         """Return a read-only grouped view over current static + warm context."""
@@ -36,6 +36,9 @@ class ContextMetadata(BaseModel):
     total_tokens: int = 0
     section_sizes: Dict[str, int] = Field(default_factory=dict)
     build_duration_ms: float = 0
+    # Last refresh_warm(): build time of the sections it rebuilt, rendered bytes of each warm section
+    section_build_ms: Dict[str, float] = Field(default_factory=dict)
+    section_bytes: Dict[str, int] = Field(default_factory=dict)
     
     # Content metadata
     schemas_count: int = 0
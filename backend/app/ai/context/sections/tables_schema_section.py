@@ -54,7 +54,8 @@ class TablesSchemaContext(ContextSection):
                 fks = "\n".join(
                     f'<fk column="{xml_escape(fk.column.name)}" '
                     f'ref_table="{xml_escape(fk.references_name)}" '
-                    f'ref_column="{xml_escape(fk.references_column.name)}"/>'
+                    f'ref_column="{xml_escape(fk.references_column.name)}"'
+                    + (' inferred="true"' if getattr(fk, 'inferred', False) else '') + '/>'
                     for fk in (t.fks or [])
                 )
                 metrics_lines: List[str] = []
@@ -174,7 +175,8 @@ class TablesSchemaContext(ContextSection):
                 fks = "\n".join(
                     f'<fk column="{xml_escape(fk.column.name)}" '
                     f'ref_table="{xml_escape(fk.references_name)}" '
-                    f'ref_column="{xml_escape(fk.references_column.name)}"/>'
+                    f'ref_column="{xml_escape(fk.references_column.name)}"'
+                    + (' inferred="true"' if getattr(fk, 'inferred', False) else '') + '/>'
                     for fk in (t.fks or [])
                 )
                 attrs = {"name": t.name, "cols": str(len(t.columns or []))}
@@ -156,6 +156,8 @@ class ForeignKey(BaseModel):
     column: TableColumn
     references_name: str
     references_column: TableColumn
+    # Guessed from column names and types (table_keys.infer_foreign_keys), not declared
+    inferred: bool = False
 
 
 class Table(BaseModel):
@@ -243,6 +245,7 @@ class TableFormatter:
         for fk in table.fks or []:
             table_fmt.append(
                 f"    foreign key ({fk.column.name}) references {fk.references_name}({fk.references_column.name})"  # noqa: E501
+                + (" (inferred)" if getattr(fk, "inferred", False) else "")
             )
         # Append compact metrics block if available
         metrics_lines = []
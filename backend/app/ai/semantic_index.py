@@ -0,0 +1,326 @@
+"""
+Optional local embedding index for semantic retrieval.
+
+Keyword matching misses synonyms ("revenue" vs `amt_gross`), so context builders can
+also rank candidates by embedding similarity and fuse both rankings (reciprocal
+rank fusion). Embeddings come from a small CPU-only model run in-process through
+`fastembed` (ONNX runtime); without it, or with `semantic_search.enabled` off, every
+function here returns nothing and callers keep their keyword-only behavior.
+
+Each index is a flat store on disk: `<index_dir>/<org>/<name>.npz` holds the
+L2-normalized vectors together with the item ids, text hashes and model name, written
+to a temporary file and swapped in with one rename, so a reader never pairs vectors
+with ids from another writer. `sync` re-embeds only new or changed items; large
+backlogs are embedded in a background thread while searches use what is already
+indexed (searches read an immutable snapshot and query embeddings don't wait for
+index embedding). A flat inner product over tens of
+thousands of 384-d vectors takes milliseconds.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RRF_K = 60
+MAX_OPEN_INDEXES = 64
+
+_model = None
+_model_failed = False
+_load_lock = threading.Lock()
+# Index embedding (including background backfills) runs one batch at a time; search
+# queries have their own lock so they never queue behind a backfill. ONNX Runtime
+# sessions allow concurrent runs.
+_index_lock = threading.Lock()
+_query_lock = threading.Lock()
+
+
+def _config():
+    from app.settings.config import settings
+
+    return settings.bow_config.semantic_search if settings.bow_config else None
+
+
+def semantic_enabled() -> bool:
+    config = _config()
+    return bool(config and config.enabled) and not _model_failed
+
+
+def semantic_top_k() -> int:
+    config = _config()
+    return config.top_k if config else 50
+
+
+def _index_dir() -> str:
+    config = _config()
+    return (config.index_dir if config and config.index_dir else None) or os.path.join(
+        tempfile.gettempdir(), "bow-embeddings"
+    )
+
+
+def _embedder():
+    """The embedding model, loaded on first use; None when unavailable."""
+    global _model, _model_failed
+    if _model is not None or _model_failed:
+        return _model
+    with _load_lock:
+        if _model is not None or _model_failed:
+            return _model
+        config = _config()
+        try:
+            from fastembed import TextEmbedding
+
+            _model = TextEmbedding(
+                model_name=config.model,
+                cache_dir=config.model_dir,
+                threads=config.threads,
+            )
+        except ImportError:
+            _model_failed = True
+            logger.warning("semantic_search is enabled but fastembed is not installed; using keyword retrieval only")
+        except Exception as e:
+            _model_failed = True
+            logger.warning(f"Failed to load embedding model {config.model}: {e}; using keyword retrieval only")
+    return _model
+
+
+def embed(texts: Sequence[str], *, query: bool = False) -> Optional[np.ndarray]:
+    """L2-normalized float32 embeddings of `texts`, or None when no model is available."""
+    model = _embedder()
+    if model is None:
+        return None
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    config = _config()
+    with _query_lock if query else _index_lock:
+        vectors = np.asarray(list(model.embed(list(texts), batch_size=config.batch_size)), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _safe_name(value: Any) -> str:
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in str(value))
+
+
+class _Snapshot(NamedTuple):
+    """One consistent version of an index; replaced as a whole, never mutated."""
+
+    ids: Tuple[str, ...]
+    hashes: Tuple[str, ...]
+    vectors: np.ndarray
+    positions: Dict[str, int]
+
+    @classmethod
+    def build(cls, ids: Sequence[str], hashes: Sequence[str], vectors: np.ndarray) -> "_Snapshot":
+        return cls(tuple(ids), tuple(hashes), vectors, {item_id: i for i, item_id in enumerate(ids)})
+
+    def without(self, item_ids: set) -> "_Snapshot":
+        keep = [i for i, item_id in enumerate(self.ids) if item_id not in item_ids]
+        if len(keep) == len(self.ids):
+            return self
+        vectors = np.asarray(self.vectors)[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+        return _Snapshot.build([self.ids[i] for i in keep], [self.hashes[i] for i in keep], vectors)
+
+    def with_items(self, items: Mapping[str, str], vectors: np.ndarray) -> "_Snapshot":
+        # Changed items are replaced, not duplicated
+        base = self.without(set(items) & set(self.positions))
+        existing = np.asarray(base.vectors)
+        return _Snapshot.build(
+            base.ids + tuple(items),
+            base.hashes + tuple(_text_hash(t) for t in items.values()),
+            np.vstack([existing, vectors]) if len(existing) else vectors,
+        )
+
+
+_EMPTY = _Snapshot((), (), np.zeros((0, 0), dtype=np.float32), {})
+
+
+class VectorIndex:
+    """Flat on-disk vector store of (id, text) items.
+
+    Readers use the current `_Snapshot` without locking. Writers embed first and take
+    `_lock` only to swap in the new snapshot and save it, so a search (run on the event
+    loop) never waits for embedding.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.synced_version: Any = None
+        self._snapshot = _EMPTY
+        self._lock = threading.Lock()
+        self._backfilling = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with np.load(f"{self.path}.npz", allow_pickle=False) as data:
+                model = str(data["model"])
+                ids, hashes, vectors = data["ids"].tolist(), data["hashes"].tolist(), data["vectors"]
+        except (OSError, ValueError, KeyError):
+            return
+        config = _config()
+        if model != (config.model if config else "") or len(ids) != len(vectors) or len(hashes) != len(ids):
+            # Different model: start over
+            return
+        self._snapshot = _Snapshot.build(ids, hashes, vectors)
+
+    def _save(self, snapshot: _Snapshot) -> None:
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        config = _config()
+        with tempfile.NamedTemporaryFile(dir=directory, suffix=".npz", delete=False) as f:
+            np.savez(
+                f,
+                vectors=np.ascontiguousarray(snapshot.vectors),
+                ids=np.array(snapshot.ids, dtype=str),
+                hashes=np.array(snapshot.hashes, dtype=str),
+                model=np.array(config.model if config else ""),
+            )
+        os.replace(f.name, f"{self.path}.npz")
+        # Separate .npy/.json files written by earlier versions
+        for suffix in (".npy", ".json"):
+            try:
+                os.unlink(self.path + suffix)
+            except OSError:
+                pass
+
+    def _swap(self, update) -> None:
+        """Apply `update` (snapshot -> snapshot) to the current snapshot and save the result."""
+        with self._lock:
+            snapshot = update(self._snapshot)
+            if snapshot is self._snapshot:
+                return
+            self._snapshot = snapshot
+            self._save(snapshot)
+
+    def __len__(self) -> int:
+        return len(self._snapshot.ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._snapshot.positions
+
+    def missing(self, items: Mapping[str, str]) -> List[str]:
+        """Ids of `items` that are new or whose text changed."""
+        snapshot = self._snapshot
+        return [
+            item_id for item_id, text in items.items()
+            if (pos := snapshot.positions.get(item_id)) is None or snapshot.hashes[pos] != _text_hash(text)
+        ]
+
+    def sync(self, items: Mapping[str, str], *, prune: bool = True, inline_limit: Optional[int] = None) -> int:
+        """Embed new/changed `items` (and drop ids not in it when `prune`); returns how many were embedded.
+
+        At most `inline_limit` items are embedded before returning; the rest are
+        embedded in a background thread.
+        """
+        if self._backfilling:
+            # The background thread is catching up; the next sync embeds whatever it missed
+            return 0
+        stale = self.missing(items)
+        removed = [i for i in self._snapshot.ids if i not in items] if prune else []
+        if not stale and not removed:
+            return 0
+        if inline_limit is None:
+            inline_limit = _config().inline_embed_limit if _config() else 256
+        now, later = stale[:inline_limit], stale[inline_limit:]
+        now_items = {i: items[i] for i in now}
+        vectors = embed(list(now_items.values())) if now_items else None
+
+        def _update(snapshot: _Snapshot) -> _Snapshot:
+            if removed:
+                snapshot = snapshot.without(set(removed) | set(stale))
+            if vectors is not None:
+                snapshot = snapshot.with_items(now_items, vectors)
+            return snapshot
+
+        self._swap(_update)
+        if later:
+            self._backfill({i: items[i] for i in later})
+        return len(now_items) if vectors is not None else 0
+
+    def _backfill(self, items: Mapping[str, str]) -> None:
+        with self._lock:
+            if self._backfilling:
+                return
+            self._backfilling = True
+
+        def _run():
+            try:
+                batch = max(1, (_config().inline_embed_limit if _config() else 256))
+                pending = list(items.items())
+                for start in range(0, len(pending), batch):
+                    chunk = dict(pending[start:start + batch])
+                    vectors = embed(list(chunk.values()))
+                    if vectors is None:
+                        break
+                    self._swap(lambda snapshot: snapshot.with_items(chunk, vectors))
+            except Exception as e:
+                logger.warning(f"Background embedding of {self.path} failed: {e}")
+            finally:
+                self._backfilling = False
+
+        threading.Thread(target=_run, name="semantic-index-backfill", daemon=True).start()
+
+    def search(self, query: np.ndarray, k: int, allowed: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """Top `k` (id, cosine similarity), optionally among `allowed` ids only."""
+        snapshot = self._snapshot
+        if not len(snapshot.ids) or query is None:
+            return []
+        scores = np.asarray(snapshot.vectors) @ query
+        if allowed is not None:
+            mask = np.zeros(len(snapshot.ids), dtype=bool)
+            positions = [snapshot.positions[i] for i in allowed if i in snapshot.positions]
+            if not positions:
+                return []
+            mask[positions] = True
+            scores = np.where(mask, scores, -np.inf)
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(snapshot.ids[i], float(scores[i])) for i in top]
+
+
+_indexes: "OrderedDict[str, VectorIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_index(org_id: Any, name: str) -> VectorIndex:
+    """The index `name` of an organization (opened once per process)."""
+    path = os.path.join(_index_dir(), _safe_name(org_id), _safe_name(name))
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = VectorIndex(path)
+        _indexes.move_to_end(path)
+        while len(_indexes) > MAX_OPEN_INDEXES:
+            _indexes.popitem(last=False)
+        return index
+
+
+def embed_query(text: Optional[str]) -> Optional[np.ndarray]:
+    """Embedding of a search query, or None when it is empty or no model is available."""
+    if not text or not text.strip():
+        return None
+    vectors = embed([text], query=True)
+    return vectors[0] if vectors is not None and len(vectors) else None
+
+
+def rrf_fuse(*rankings: Sequence[Any], k: int = RRF_K) -> List[Tuple[Any, float]]:
+    """Reciprocal rank fusion of ranked id lists, best first."""
+    scores: Dict[Any, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
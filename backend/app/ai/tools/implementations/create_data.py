@@ -478,7 +478,15 @@ Do NOT use generic placeholders like "value" unless that's the actual column nam
                 ctx = await context_hub.schema_builder.build(
                     with_stats=True,
                     name_patterns=name_patterns,
+                    semantic_query=user_text,
                 )
+                if keywords and not any(ds.tables for ds in ctx.data_sources):
+                    # No table is named after the request; fall back to tables with matching columns
+                    ctx = await context_hub.schema_builder.build(
+                        with_stats=True,
+                        column_names=keywords,
+                        semantic_query=user_text,
+                    )
                 return ctx.render_combined(top_k_per_ds=top_k, index_limit=0, include_index=False)
             _schemas_section_obj = getattr(context_view.static, "schemas", None) if context_view else None
             return _schemas_section_obj.render("gist") if _schemas_section_obj else ""
@@ -566,7 +574,8 @@ Do NOT use generic placeholders like "value" unless that's the actual column nam
                     if matched:
                         resolved.append({"data_source_id": ds_id, "tables": matched})
                     else:
-                        warnings.append(f"No active tables matched patterns {input_tables} in data source {ds_id}")
+                        hint = await CreateDataTool._similar_tables_hint(schema_builder, input_tables, ds_id)
+                        warnings.append(f"No active tables matched patterns {input_tables} in data source {ds_id}{hint}")
                 else:
                     # Cross-source: create one group per ds that had matches
                     any_match = False
@@ -576,13 +585,30 @@ Do NOT use generic placeholders like "value" unless that's the actual column nam
                             actual_ds_id = None if resolved_ds_id == "__all__" else resolved_ds_id
                             resolved.append({"data_source_id": actual_ds_id, "tables": matched})
                     if not any_match:
-                        warnings.append(f"No active tables matched patterns {input_tables} across any data source")
+                        hint = await CreateDataTool._similar_tables_hint(schema_builder, input_tables, None)
+                        warnings.append(f"No active tables matched patterns {input_tables} across any data source{hint}")
                         
             except Exception as e:
                 warnings.append(f"Failed to resolve tables {input_tables}: {str(e)}")
         
         return resolved, warnings
 
+    @staticmethod
+    async def _similar_tables_hint(schema_builder, names: List[Any], ds_id: Optional[str]) -> str:
+        """Suffix for an unresolved-tables warning naming close active tables, if any."""
+        similar: List[str] = []
+        try:
+            for name in names:
+                if isinstance(name, str) and name.strip():
+                    similar.extend(await schema_builder.suggest_tables(
+                        name.strip(),
+                        data_source_ids=[ds_id] if ds_id else None,
+                    ))
+        except Exception:
+            return ""
+        similar = list(dict.fromkeys(similar))[:5]
+        return f". Similar active tables: {', '.join(similar)}" if similar else ""
+
     @staticmethod
     def _summarize_errors(errors) -> dict:
         last_text = (errors[-1][1] if errors else "") or ""
@@ -39,6 +39,7 @@ class CreateWidgetTool(Tool):
                 ctx = await context_hub.schema_builder.build(
                     with_stats=True,
                     name_patterns=name_patterns,
+                    semantic_query=user_text,
                 )
                 return ctx.render_combined(top_k_per_ds=top_k, index_limit=0, include_index=False)
             # Fallback to compact static renderers
@@ -311,10 +311,11 @@ class DescribeEntityTool(Tool):
                 if not code_to_run.strip():
                     errors.append("Entity has no code to execute")
                 else:
-                    exec_df, execution_log = executor.execute_code(
+                    exec_df, execution_log = await executor.aexecute_code(
                         code=code_to_run,
                         ds_clients=ds_clients,
                         excel_files=[],
+                        sigkill_event=runtime_ctx.get("sigkill_event"),
                     )
                     entity_data = executor.format_df_for_widget(exec_df)
 
@@ -0,0 +1,49 @@
+"""
+Bounded thread pool for blocking data source client calls made from async code.
+
+`DataSourceClient.aexecute_query` / `aget_schemas` / `atest_connection` default to
+running their synchronous counterpart here, so introspecting a slow warehouse doesn't
+block the event loop, and a burst of schema refreshes can't grow the default
+executor without bound. Clients with a native async driver override those methods.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_client_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is not None:
+        return _executor
+    from app.settings.config import settings
+
+    config = settings.bow_config.data_source_engines if settings.bow_config else None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, config.client_threads if config else 16),
+                thread_name_prefix="bow-client",
+            )
+    return _executor
+
+
+async def run_client_call(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking client call on the client pool; context variables carry over."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return await loop.run_in_executor(get_client_executor(), call)
+
+
+def shutdown_client_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
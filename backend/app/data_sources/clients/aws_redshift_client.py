@@ -1,4 +1,5 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.query_control import cancellable, timeout_ms
 
 import pandas as pd
 import psycopg2
@@ -307,10 +308,17 @@ class AwsRedshiftClient(DataSourceClient):
                 conn.close()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
-        """Execute SQL statement and return the result as a DataFrame."""
+        """Execute SQL statement and return the result as a DataFrame.
+
+        The active query timeout is applied as `statement_timeout`; `cancel()` sends a
+        cancel request for the running statement.
+        """
         try:
-            with self.connect() as conn:
+            with self.connect() as conn, cancellable(self, conn.cancel):
                 with conn.cursor() as cursor:
+                    timeout = timeout_ms()
+                    if timeout:
+                        cursor.execute(f"SET statement_timeout TO {timeout}")
                     cursor.execute(sql)
                     # Get column names
                     columns = [desc[0] for desc in cursor.description]
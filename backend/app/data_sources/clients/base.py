@@ -1,7 +1,17 @@
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+from app.data_sources.client_executor import run_client_call
+from app.data_sources.query_control import cancel_client_queries
+from app.data_sources.result_limits import collect_arrow_chunks
 
 
 class DataSourceClient(ABC):
+    # Set by Connection.get_client / construct_client; scopes pooled engines and caches
+    connection_id = None
 
     def __init__(self):
         pass
@@ -33,3 +43,79 @@ class DataSourceClient(ABC):
     @abstractmethod
     def execute_query(self, **kwargs):
         pass
+
+    def execute_query_stream(self, sql: str, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """Yield the result of `sql` as DataFrame chunks.
+
+        Clients without a streaming fetch yield the full result as a single chunk.
+        """
+        yield self.execute_query(sql)
+
+    def execute_query_arrow_stream(self, sql: str, chunk_rows: Optional[int] = None) -> Iterator[pa.Table]:
+        """Yield the result of `sql` as Arrow table chunks (at least one, for the schema).
+
+        Clients whose driver fetches Arrow natively override this; the default converts
+        the `execute_query_stream` chunks.
+        """
+        for df in self.execute_query_stream(sql, chunk_rows):
+            yield pa.Table.from_pandas(df, preserve_index=False)
+
+    def execute_query_arrow(self, sql: str) -> pa.Table:
+        """Result of `sql` as an Arrow table (up to the active result caps).
+
+        Callers convert with `.to_pandas()` only when they need a DataFrame. Column
+        types follow the driver's Arrow types, so the converted frame can differ from
+        `execute_query` (e.g. decimals and dates as Python objects rather than float64
+        and datetime64, nullable integers as float64).
+        """
+        return collect_arrow_chunks(self.execute_query_arrow_stream(sql), sql)
+
+    def cancel(self) -> int:
+        """Cancel this client's running queries, server-side where the driver allows it.
+
+        Returns how many queries were signalled. Clients register their queries with
+        `app.data_sources.query_control.cancellable`; others have nothing to cancel.
+        """
+        return cancel_client_queries(self)
+
+    def list_schema_names(self) -> Optional[List[str]]:
+        """Schemas that `get_tables_in_schemas(schemas)` can introspect independently.
+
+        Lets schema refreshes split introspection across concurrent workers; None (the
+        default) means the client only supports a single `get_schemas` pass.
+        """
+        return None
+
+    # Async interface. Defaults run the synchronous method on the bounded client thread
+    # pool; clients with a native async driver override these.
+
+    async def aexecute_query(self, sql: str) -> pd.DataFrame:
+        return await run_client_call(self.execute_query, sql)
+
+    async def aget_schemas(self) -> Any:
+        return await run_client_call(self.get_schemas)
+
+    async def aget_tables(self) -> Any:
+        return await run_client_call(self.get_tables)
+
+    async def alist_schema_names(self) -> Optional[List[str]]:
+        return await run_client_call(self.list_schema_names)
+
+    async def aget_tables_in_schemas(self, schemas: List[str]) -> Any:
+        """Only for clients that implement `get_tables_in_schemas`."""
+        return await run_client_call(self.get_tables_in_schemas, schemas)
+
+    async def atest_connection(self) -> Any:
+        return await run_client_call(self.test_connection)
+
+    async def aprompt_schema(self) -> str:
+        return await run_client_call(self.prompt_schema)
+
+    def get_table_versions(self, tables: List[str]) -> Dict[str, Optional[str]]:
+        """Cheap change signal per table name, as written in the query.
+
+        A signal must change whenever the table's data may have changed; a table mapped
+        to None (or missing) has no reliable signal and is always treated as changed.
+        Clients without such metadata return no signals.
+        """
+        return {}
@@ -1,15 +1,23 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.query_control import cancellable, timeout_ms
+from app.data_sources.result_limits import collect_chunks, current_chunk_rows
 
 import json
 import os
 import pandas as pd
+import pyarrow as pa
 from google.cloud import bigquery
 from google.oauth2 import service_account
-from typing import List, Generator, Optional
+from typing import Dict, Generator, Iterator, List, Optional
 from app.ai.prompt_formatters import Table, TableColumn
 from app.ai.prompt_formatters import TableFormatter
 from contextlib import contextmanager
 
+try:
+    from google.cloud import bigquery_storage
+except ImportError:
+    bigquery_storage = None
+
 
 class BigqueryClient(DataSourceClient):
     def __init__(self, project_id, credentials_json, dataset, maximum_bytes_billed: Optional[int] = None, use_query_cache: bool = False):
@@ -50,6 +58,7 @@ class BigqueryClient(DataSourceClient):
             raise TypeError("credentials_json must be a JSON string or a server file path string")
 
         self.client = bigquery.Client(project=self.project_id, credentials=self.credentials)
+        self._bqstorage_client = None
 
     @contextmanager
     def connect(self) -> Generator[bigquery.Client, None, None]:
@@ -60,8 +69,41 @@ class BigqueryClient(DataSourceClient):
             # No explicit close method for BigQuery client, but ensuring resource cleanup if needed
             pass
 
+    def _storage_client(self):
+        """BigQuery Storage Read API client for large result downloads, if installed.
+
+        The BigQuery library only uses it when a result doesn't fit in the first page.
+        """
+        if bigquery_storage is None:
+            return None
+        if self._bqstorage_client is None:
+            self._bqstorage_client = bigquery_storage.BigQueryReadClient(credentials=self.credentials)
+        return self._bqstorage_client
+
+    @contextmanager
+    def _query_result(self, conn, sql: str, chunk_rows: Optional[int], maximum_bytes_billed: Optional[int], use_query_cache: Optional[bool]):
+        """Run the query job and yield its row iterator; `cancel()` cancels the job."""
+        job_config = self._job_config(maximum_bytes_billed, use_query_cache)
+        timeout = timeout_ms()
+        if timeout:
+            job_config.job_timeout_ms = timeout
+        query_job = conn.query(sql, job_config=job_config)
+        with cancellable(self, query_job.cancel):
+            yield query_job.result(page_size=chunk_rows or current_chunk_rows())
+
+    def _job_config(self, maximum_bytes_billed: Optional[int] = None, use_query_cache: Optional[bool] = None) -> bigquery.QueryJobConfig:
+        # Determine effective settings
+        cap = self.maximum_bytes_billed if maximum_bytes_billed is None else maximum_bytes_billed
+        cache_flag = self.use_query_cache if use_query_cache is None else use_query_cache
+
+        job_config = bigquery.QueryJobConfig(use_query_cache=bool(cache_flag))
+        # Only set maximum_bytes_billed if a positive integer cap is provided
+        if isinstance(cap, int) and cap > 0:
+            job_config.maximum_bytes_billed = int(cap)
+        return job_config
+
     def execute_query(self, sql: str, maximum_bytes_billed: Optional[int] = None, use_query_cache: Optional[bool] = None) -> pd.DataFrame:
-        """Run SQL statement and return the result as a DataFrame.
+        """Run SQL statement and return the result as a DataFrame (up to the active result caps).
 
         Args:
             sql: SQL to execute.
@@ -69,24 +111,46 @@ class BigqueryClient(DataSourceClient):
             use_query_cache: Optional per-call cache flag. Defaults to client-level setting.
         """
         try:
-            with self.connect() as conn:
-                # Determine effective settings
-                cap = self.maximum_bytes_billed if maximum_bytes_billed is None else maximum_bytes_billed
-                cache_flag = self.use_query_cache if use_query_cache is None else use_query_cache
-
-                job_config = bigquery.QueryJobConfig(use_query_cache=bool(cache_flag))
-                # Only set maximum_bytes_billed if a positive integer cap is provided
-                if isinstance(cap, int) and cap > 0:
-                    job_config.maximum_bytes_billed = int(cap)
-
-                query_job = conn.query(sql, job_config=job_config)
-                result = query_job.result()
-                df = result.to_dataframe()
-            return df
+            chunks = self.execute_query_stream(
+                sql, maximum_bytes_billed=maximum_bytes_billed, use_query_cache=use_query_cache
+            )
+            return collect_chunks(chunks, sql)
         except Exception as e:
             print(f"Error executing SQL: {e}")
             raise e
 
+    def execute_query_stream(
+        self,
+        sql: str,
+        chunk_rows: Optional[int] = None,
+        maximum_bytes_billed: Optional[int] = None,
+        use_query_cache: Optional[bool] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """Yield the result page by page (`chunk_rows` rows per page, or Storage API streams)."""
+        with self.connect() as conn, self._query_result(conn, sql, chunk_rows, maximum_bytes_billed, use_query_cache) as result:
+            emitted = False
+            for df in result.to_dataframe_iterable(bqstorage_client=self._storage_client()):
+                emitted = True
+                yield df
+            if not emitted:
+                yield result.to_dataframe()
+
+    def execute_query_arrow_stream(
+        self,
+        sql: str,
+        chunk_rows: Optional[int] = None,
+        maximum_bytes_billed: Optional[int] = None,
+        use_query_cache: Optional[bool] = None,
+    ) -> Iterator[pa.Table]:
+        """Yield the result as Arrow tables (Storage Read API when available, no pandas step)."""
+        with self.connect() as conn, self._query_result(conn, sql, chunk_rows, maximum_bytes_billed, use_query_cache) as result:
+            emitted = False
+            for batch in result.to_arrow_iterable(bqstorage_client=self._storage_client()):
+                emitted = True
+                yield pa.Table.from_batches([batch])
+            if not emitted:
+                yield result.to_arrow(create_bqstorage_client=False)
+
     def get_tables(self) -> List[Table]:
         """Get all tables and their columns across one or more datasets.
         - Supports comma-separated datasets via the existing `dataset` config field.
@@ -129,6 +193,28 @@ class BigqueryClient(DataSourceClient):
             print(f"Error retrieving tables: {e}")
             return []
 
+    def get_table_versions(self, tables: List[str]) -> Dict[str, Optional[str]]:
+        """last_modified_time/num_rows of each table from its metadata (no query, no bytes billed)."""
+        versions: Dict[str, Optional[str]] = {}
+        for table in tables:
+            parts = table.split(".")
+            if len(parts) == 2:
+                parts = [self.project_id] + parts
+            if len(parts) != 3:
+                versions[table] = None
+                continue
+            try:
+                meta = self.client.get_table(".".join(parts))
+            except Exception:
+                versions[table] = None
+                continue
+            # Rows still in the streaming buffer don't move `modified`
+            if meta.table_type != "TABLE" or meta.modified is None or meta.streaming_buffer is not None:
+                versions[table] = None
+            else:
+                versions[table] = f"{meta.modified.isoformat()}:{meta.num_rows}"
+        return versions
+
     def get_schema(self, table_id: str) -> Table:
         """This method is now obsolete. Please use get_tables() instead."""
         raise NotImplementedError(
@@ -1,5 +1,7 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.query_control import current_query_timeout
 
+import math
 import pandas as pd
 import clickhouse_connect
 from typing import List, Generator
@@ -51,10 +53,15 @@ class ClickhouseClient(DataSourceClient):
             pass
 
     def execute_query(self, sql: str) -> pd.DataFrame:
-        """Run SQL statement and return the result as a DataFrame."""
+        """Run SQL statement and return the result as a DataFrame.
+
+        The active query timeout is enforced server-side via `max_execution_time`.
+        """
         try:
             with self.connect() as conn:
-                result = conn.query(sql)
+                timeout = current_query_timeout()
+                settings = {"max_execution_time": max(1, math.ceil(timeout))} if timeout else None
+                result = conn.query(sql, settings=settings)
                 df = pd.DataFrame(result.result_set, columns=result.column_names)
                 return df
         except Exception as e:
@@ -1,12 +1,56 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.duckdb_materialization import (
+    REMOTE_SCHEMES,
+    Probe,
+    blob_probe,
+    default_ttl_seconds,
+    get_snapshot_store,
+)
+from app.data_sources.duckdb_sessions import SessionRetired, get_duckdb_session_manager
+from app.data_sources.query_control import interruptible
+from app.data_sources.result_limits import collect_chunks, current_chunk_rows
 
 import duckdb
+import hashlib
+import math
+import re
 import pandas as pd
+import pyarrow as pa
 from contextlib import contextmanager
-from typing import Generator, List
+from typing import Dict, Generator, Iterator, List, Optional
 from app.ai.prompt_formatters import Table, TableColumn, TableFormatter
 import urllib.parse
 
+# Rows per DuckDB vector; fetch_df_chunk reads whole vectors
+_DUCKDB_VECTOR_SIZE = 2048
+# Statements allowed as-is on the shared URI-mode database (DESCRIBE/SHOW/SUMMARIZE parse as SELECT)
+_READ_ONLY_STATEMENTS = (duckdb.StatementType.SELECT, duckdb.StatementType.EXPLAIN)
+# Allowed when they only touch the cursor's own temporary objects (the temp catalog is
+# per connection, so other queries on the shared database never see them)
+_TEMP_WRITE_STATEMENTS = (
+    duckdb.StatementType.CREATE,
+    duckdb.StatementType.DROP,
+    duckdb.StatementType.INSERT,
+    duckdb.StatementType.UPDATE,
+    duckdb.StatementType.DELETE,
+)
+_LEADING_COMMENTS = re.compile(r"^(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*", re.S)
+_NAME = r'((?:"[^"]*"|[\w$]+)(?:\s*\.\s*(?:"[^"]*"|[\w$]+))*)'
+_CREATE_TEMP = re.compile(r"CREATE\s+(?:OR\s+REPLACE\s+)?TEMP(?:ORARY)?\s", re.I)
+_DROP_TARGET = re.compile(
+    r"DROP\s+(?:TABLE|VIEW)\s+(?:IF\s+EXISTS\s+)?" + _NAME + r"(?:\s+(?:CASCADE|RESTRICT))?\s*;?\s*", re.I
+)
+_DML_TARGET = re.compile(
+    r"(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM)\s+" + _NAME + r"(?=[\s(;]|$)", re.I
+)
+# SET/RESET without an explicit scope; run as SESSION so global-only options are refused
+_UNSCOPED_SET = re.compile(r"(SET|RESET)\s+(?!(?:SESSION|LOCAL|VARIABLE|GLOBAL)\b)", re.I)
+_GLOBAL_SET = re.compile(r"(?:SET|RESET)\s+GLOBAL\b", re.I)
+_TEMP_OBJECTS_SQL = (
+    "SELECT table_name FROM duckdb_tables() WHERE temporary "
+    "UNION ALL SELECT view_name FROM duckdb_views() WHERE temporary AND NOT internal"
+)
+
 
 class DuckDBClient(DataSourceClient):
     def __init__(self,
@@ -22,6 +66,9 @@ class DuckDBClient(DataSourceClient):
                  service_account_json: str | None = None,
                  # azure
                  connection_string: str | None = None,
+                 # local Parquet snapshots of remote URIs
+                 materialize: bool = False,
+                 materialize_ttl_seconds: int | None = None,
                  ):
         self.uris_raw = uris or ""
         self.database = database  # Path to local .duckdb file
@@ -31,6 +78,8 @@ class DuckDBClient(DataSourceClient):
         self.service_account_json = service_account_json
         self.connection_string = connection_string
         self.session_token = session_token
+        self.materialize = bool(materialize)
+        self.materialize_ttl_seconds = materialize_ttl_seconds
 
         # normalize list of URI patterns (one per line)
         self.uri_patterns: List[str] = [u.strip() for u in (self.uris_raw.splitlines() if self.uris_raw else []) if u.strip()]
@@ -97,10 +146,10 @@ class DuckDBClient(DataSourceClient):
         used.add(name)
         return name
 
-    def _create_views(self, con: duckdb.DuckDBPyConnection) -> List[str]:
-        created: List[str] = []
+    def _view_sources(self) -> List[tuple[str, str]]:
+        """(view name, normalized URI) for each configured URI pattern."""
+        sources: List[tuple[str, str]] = []
         used: set[str] = set()
-        import os
         for pattern in self.uri_patterns:
             normalized = self._normalize_uri(pattern)
             # derive a friendly name from the last path segment (filename without extension)
@@ -115,15 +164,162 @@ class DuckDBClient(DataSourceClient):
             else:
                 # strip extension
                 candidate = last_segment.rsplit(".", 1)[0]
-            view = self._safe_view_name(candidate, used)
-            lower = normalized.lower()
-            if lower.endswith(".parquet") or ".parquet" in lower:
-                con.execute(f"CREATE OR REPLACE VIEW {view} AS SELECT * FROM read_parquet({self._sql_literal(normalized)})")
-            else:
-                # default to CSV auto
-                con.execute(f"CREATE OR REPLACE VIEW {view} AS SELECT * FROM read_csv_auto({self._sql_literal(normalized)})")
-            created.append(view)
-        return created
+            sources.append((self._safe_view_name(candidate, used), normalized))
+        return sources
+
+    def _view_select(self, normalized: str) -> str:
+        lower = normalized.lower()
+        if lower.endswith(".parquet") or ".parquet" in lower:
+            return f"SELECT * FROM read_parquet({self._sql_literal(normalized)})"
+        # default to CSV auto
+        return f"SELECT * FROM read_csv_auto({self._sql_literal(normalized)})"
+
+    def _snapshot_probe(self, con: duckdb.DuckDBPyConnection, uri: str) -> Probe:
+        if urllib.parse.urlparse(uri).scheme.lower() in ("http", "https"):
+            return self._http_probe(uri)
+        return blob_probe(con, uri)
+
+    def _snapshot_connection(self) -> duckdb.DuckDBPyConnection:
+        """Separate database for building snapshots, so the copy never holds up session queries."""
+        con = duckdb.connect(database=":memory:")
+        try:
+            self._configure_httpfs(con)
+        except Exception:
+            con.close()
+            raise
+        return con
+
+    def _materialized_select(self, con: duckdb.DuckDBPyConnection, normalized: str) -> Optional[tuple[Optional[str], float]]:
+        """SELECT over a local snapshot of a remote URI (None while there is none) and when to re-check."""
+        if urllib.parse.urlparse(normalized).scheme.lower() not in REMOTE_SCHEMES:
+            return None
+        ttl = self.materialize_ttl_seconds
+        # Snapshots are shared by sessions of the same connection and credentials
+        scope_config = {k: v for k, v in self._session_config().items() if not k.startswith("materialize")}
+        scope_config["connection_id"] = self.connection_id
+        try:
+            path, recheck_at = get_snapshot_store().materialize(
+                scope=get_duckdb_session_manager().fingerprint(scope_config),
+                uri=normalized,
+                select_sql=self._view_select(normalized),
+                probe=lambda: self._snapshot_probe(con, normalized),
+                ttl_seconds=ttl if ttl is not None else default_ttl_seconds(),
+                connect=self._snapshot_connection,
+            )
+        except Exception:
+            return None
+        select_sql = f"SELECT * FROM read_parquet({self._sql_literal(path)})" if path else None
+        return select_sql, recheck_at
+
+    def _create_views(self, con: duckdb.DuckDBPyConnection) -> Optional[float]:
+        """Create one view per URI pattern; returns when materialized views must be re-checked."""
+        expires_at: Optional[float] = None
+        for view, normalized in self._view_sources():
+            select_sql = self._view_select(normalized)
+            if self.materialize:
+                materialized = self._materialized_select(con, normalized)
+                if materialized is not None:
+                    snapshot_sql, view_expires_at = materialized
+                    select_sql = snapshot_sql or select_sql
+                    expires_at = view_expires_at if expires_at is None else min(expires_at, view_expires_at)
+            con.execute(f"CREATE OR REPLACE VIEW {view} AS {select_sql}")
+        return expires_at
+
+    @staticmethod
+    def _local_files_version(pattern: str) -> Optional[str]:
+        import glob
+        import os
+        path = pattern[len("file://"):] if pattern.startswith("file://") else pattern
+        files = sorted(glob.glob(path, recursive=True))
+        if not files:
+            return None
+        parts = []
+        for f in files:
+            st = os.stat(f)
+            parts.append(f"{f}:{st.st_mtime_ns}:{st.st_size}")
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _http_probe(uri: str) -> Probe:
+        """(ETag/Last-Modified, Content-Length) from a HEAD request."""
+        import urllib.request
+        if "*" in uri:
+            return None, None
+        request = urllib.request.Request(uri, method="HEAD")
+        with urllib.request.urlopen(request, timeout=10) as response:
+            etag = response.headers.get("ETag")
+            modified = response.headers.get("Last-Modified")
+            length = response.headers.get("Content-Length")
+        size = int(length) if length and length.isdigit() else None
+        if not etag and not modified:
+            return None, size
+        return f"{etag or ''}:{modified or ''}", size
+
+    @classmethod
+    def _http_version(cls, uri: str) -> Optional[str]:
+        return cls._http_probe(uri)[0]
+
+    def get_table_versions(self, tables: List[str]) -> Dict[str, Optional[str]]:
+        """File mtimes/sizes for local paths and the .duckdb file, ETag/Last-Modified for http(s).
+
+        Object store URIs (s3/gs/az) have no cheap signal here and are always refreshed.
+        """
+        import os
+        if self.database:
+            files = [self.database, f"{self.database}.wal"]
+            stats = [f"{os.stat(f).st_mtime_ns}:{os.stat(f).st_size}" for f in files if os.path.exists(f)]
+            version = "|".join(stats) if stats else None
+            return {table: version for table in tables}
+
+        sources = dict(self._view_sources())
+        versions: Dict[str, Optional[str]] = {}
+        for table in tables:
+            uri = sources.get(table)
+            if uri is None:
+                versions[table] = None
+                continue
+            scheme = urllib.parse.urlparse(uri).scheme.lower()
+            try:
+                if scheme in ("", "file"):
+                    versions[table] = self._local_files_version(uri)
+                elif scheme in ("http", "https"):
+                    versions[table] = self._http_version(uri)
+                else:
+                    versions[table] = None
+            except Exception:
+                versions[table] = None
+        return versions
+
+    def _setup_session(self, con: duckdb.DuckDBPyConnection) -> Optional[float]:
+        self._configure_httpfs(con)
+        return self._create_views(con)
+
+    def _session_config(self) -> Dict[str, object]:
+        return {
+            "uris": self.uris_raw,
+            "access_key": self.access_key,
+            "secret_key": self.secret_key,
+            "region": self.region,
+            "session_token": self.session_token,
+            "service_account_json": self.service_account_json,
+            "connection_string": self.connection_string,
+            "materialize": self.materialize,
+            "materialize_ttl_seconds": self.materialize_ttl_seconds,
+        }
+
+    def _session(self):
+        """Shared in-memory session with extensions and views already set up (URI mode)."""
+        session = get_duckdb_session_manager().get_session(
+            self._session_config(), self._setup_session, self.connection_id
+        )
+        # Local snapshots due for a check against the source
+        session.refresh_if_expired()
+        return session
+
+    def refresh_views(self) -> None:
+        """Re-create the views of this data source's session (e.g. after files were added)."""
+        if not self.database:
+            self._session().refresh()
 
     @contextmanager
     def connect(self) -> Generator[duckdb.DuckDBPyConnection, None, None]:
@@ -132,12 +328,20 @@ class DuckDBClient(DataSourceClient):
             if self.database:
                 # Open local .duckdb file directly (read-only for safety)
                 con = duckdb.connect(database=self.database, read_only=True)
+                yield con
             else:
-                # In-memory database with views from URI patterns
-                con = duckdb.connect(database=":memory:")
-                self._configure_httpfs(con)
-                self._create_views(con)
-            yield con
+                # Cursor on the shared in-memory database with views from URI patterns
+                session = self._session()
+                try:
+                    cur = session.open_cursor()
+                except SessionRetired:
+                    # Invalidated between lookup and use; the manager already dropped it
+                    session = self._session()
+                    cur = session.open_cursor()
+                try:
+                    yield cur
+                finally:
+                    session.release(cur)
         except Exception as e:
             raise RuntimeError(f"Error while connecting to DuckDB: {e}")
         finally:
@@ -149,12 +353,91 @@ class DuckDBClient(DataSourceClient):
 
     def execute_query(self, sql: str) -> pd.DataFrame:
         try:
-            with self.connect() as con:
-                res = con.execute(sql)
-                return res.df()
+            return collect_chunks(self.execute_query_stream(sql), sql)
         except Exception as e:
             raise
 
+    @staticmethod
+    def _temp_target(con: duckdb.DuckDBPyConnection, name: str) -> bool:
+        parts = [part.strip().strip('"') for part in name.split(".")]
+        if len(parts) > 1:
+            return parts[0].lower() == "temp"
+        temp_objects = {row[0].lower() for row in con.execute(_TEMP_OBJECTS_SQL).fetchall()}
+        return parts[0].lower() in temp_objects
+
+    @classmethod
+    def _shared_statement(cls, con: duckdb.DuckDBPyConnection, statement) -> str:
+        """SQL of `statement` to run on the shared session, or ValueError if it would change it.
+
+        Reads, temporary objects (created, filled and dropped on this cursor only) and
+        session-scoped SET are allowed; DDL on the shared catalog, global settings,
+        secrets, ATTACH and COPY are not.
+        """
+        query = _LEADING_COMMENTS.sub("", statement.query, count=1)
+        kind = statement.type
+        if kind in _READ_ONLY_STATEMENTS:
+            return statement.query
+        if kind == duckdb.StatementType.SET and not _GLOBAL_SET.match(query):
+            return _UNSCOPED_SET.sub(lambda m: f"{m.group(1)} SESSION ", query, count=1)
+        if kind in _TEMP_WRITE_STATEMENTS:
+            if kind == duckdb.StatementType.CREATE:
+                allowed = bool(_CREATE_TEMP.match(query))
+            else:
+                target = (_DROP_TARGET.fullmatch(query) if kind == duckdb.StatementType.DROP else _DML_TARGET.match(query))
+                allowed = bool(target) and cls._temp_target(con, target.group(1))
+            if allowed:
+                return statement.query
+        raise ValueError(
+            f"Only reads, temporary tables/views and session settings are allowed on this DuckDB "
+            f"data source; got a {kind.name} statement"
+        )
+
+    def _execute(self, con: duckdb.DuckDBPyConnection, sql: str) -> duckdb.DuckDBPyConnection:
+        """Run `sql` (one or more statements) and return the cursor holding the last result.
+
+        On the shared URI-mode session every statement is checked just before it runs,
+        so temporary objects created earlier in the same SQL count as this query's own.
+        """
+        if self.database:
+            return con.execute(sql)
+        statements = con.extract_statements(sql)
+        if not statements:
+            raise ValueError("No SQL statement to run")
+        for statement in statements:
+            res = con.execute(self._shared_statement(con, statement))
+        return res
+
+    def execute_query_stream(self, sql: str, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """Yield the result in chunks of whole DuckDB vectors (same dtypes as `.df()`)."""
+        vectors = max(1, math.ceil((chunk_rows or current_chunk_rows()) / _DUCKDB_VECTOR_SIZE))
+        with self.connect() as con, interruptible(self, con.interrupt):
+            res = self._execute(con, sql)
+            emitted = False
+            while True:
+                chunk = res.fetch_df_chunk(vectors)
+                if chunk.empty:
+                    break
+                emitted = True
+                yield chunk
+            if not emitted:
+                yield chunk
+
+    def execute_query_arrow_stream(self, sql: str, chunk_rows: Optional[int] = None) -> Iterator[pa.Table]:
+        """Yield the result as Arrow record batches straight from DuckDB (no pandas step).
+
+        Types follow Arrow, not `.df()`: DECIMAL and DATE columns convert to Decimal and
+        date objects with `to_pandas()`, and nullable integers to float64.
+        """
+        batch_rows = max(_DUCKDB_VECTOR_SIZE, chunk_rows or current_chunk_rows())
+        with self.connect() as con, interruptible(self, con.interrupt):
+            reader = self._execute(con, sql).fetch_record_batch(batch_rows)
+            emitted = False
+            for batch in reader:
+                emitted = True
+                yield pa.Table.from_batches([batch])
+            if not emitted:
+                yield reader.schema.empty_table()
+
     def get_tables(self) -> List[Table]:
         tables: List[Table] = []
         with self.connect() as con:
@@ -1,14 +1,36 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.schema_sync import introspection_concurrency
 from app.ai.prompt_formatters import Table, TableColumn, ServiceFormatter
 from pymongo import MongoClient
 from bson import ObjectId
 import pandas as pd
 import json
-from typing import List, Optional, Generator
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Generator, Tuple
 from contextlib import contextmanager
 from datetime import datetime
 
 
+# Documents sampled per collection: ~2*sqrt(estimated count), within these bounds
+SAMPLE_MIN = 100
+SAMPLE_MAX = 1000
+
+# Inferred columns per (host, port, database, collection), valid while the
+# collection's collStats (count, size) stay the same
+_INFERENCE_CACHE_MAX = 4096
+_inference_cache: "OrderedDict[tuple, Tuple[tuple, List[Tuple[str, str]]]]" = OrderedDict()
+_inference_cache_lock = threading.Lock()
+
+
+def sample_size_for(count: Optional[int]) -> int:
+    if not count or count <= SAMPLE_MIN:
+        return SAMPLE_MIN
+    return max(SAMPLE_MIN, min(SAMPLE_MAX, int(2 * math.sqrt(count))))
+
+
 class MongodbClient(DataSourceClient):
     """MongoDB client for document-based data access.
     
@@ -214,26 +236,70 @@ class MongodbClient(DataSourceClient):
                     else:
                         merged[key] = value
 
+    @staticmethod
+    def _collection_signature(db, coll_name: str) -> Optional[tuple]:
+        """(count, size) from collStats; None when unavailable (views, missing privileges)."""
+        try:
+            stats = db.command("collStats", coll_name)
+            return (stats.get("count"), stats.get("size"))
+        except Exception:
+            return None
+
+    def _collection_columns(self, db, coll_name: str) -> List[TableColumn]:
+        """Inferred columns of a collection, re-sampled only when its collStats changed."""
+        cache_key = (self.host, self.port, self.database_name, coll_name)
+        signature = self._collection_signature(db, coll_name)
+        if signature is not None:
+            with _inference_cache_lock:
+                cached = _inference_cache.get(cache_key)
+                if cached is not None and cached[0] == signature:
+                    _inference_cache.move_to_end(cache_key)
+                    return [TableColumn(name=n, dtype=d) for n, d in cached[1]]
+
+        count = signature[0] if signature is not None else None
+        if count is None:
+            try:
+                count = db[coll_name].estimated_document_count()
+            except Exception:
+                count = None
+        # Sample multiple docs and merge all unique keys
+        merged_sample = self._get_all_keys(db[coll_name], sample_size=sample_size_for(count))
+        columns = []
+        if merged_sample:
+            self._convert_bson_types(merged_sample)
+            columns = self._infer_columns(merged_sample)
+
+        if signature is not None:
+            with _inference_cache_lock:
+                _inference_cache[cache_key] = (signature, [(c.name, c.dtype) for c in columns])
+                _inference_cache.move_to_end(cache_key)
+                while len(_inference_cache) > _INFERENCE_CACHE_MAX:
+                    _inference_cache.popitem(last=False)
+        return columns
+
     def get_tables(self) -> List[Table]:
-        """Get all collections and their inferred schema."""
-        tables = []
+        """Get all collections and their inferred schema.
+
+        Collections are sampled concurrently (bounded by the introspection concurrency);
+        the pymongo client is shared, it is thread-safe.
+        """
         with self.connect() as db:
-            for coll_name in db.list_collection_names():
-                # Sample multiple docs and merge all unique keys
-                merged_sample = self._get_all_keys(db[coll_name])
-                columns = []
-                if merged_sample:
-                    self._convert_bson_types(merged_sample)
-                    columns = self._infer_columns(merged_sample)
-                
-                tables.append(Table(
-                    name=coll_name,
-                    columns=columns,
-                    pks=[TableColumn(name="_id", dtype="string")],
-                    fks=[],
-                    metadata_json={"type": "collection"}
-                ))
-        return tables
+            names = db.list_collection_names()
+            if not names:
+                return []
+            workers = min(len(names), introspection_concurrency())
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bow-mongo-schema") as pool:
+                columns_by_collection = list(pool.map(lambda name: self._collection_columns(db, name), names))
+        return [
+            Table(
+                name=coll_name,
+                columns=columns,
+                pks=[TableColumn(name="_id", dtype="string")],
+                fks=[],
+                metadata_json={"type": "collection"}
+            )
+            for coll_name, columns in zip(names, columns_by_collection)
+        ]
     
     def _infer_columns(self, doc: dict, prefix: str = "") -> List[TableColumn]:
         """Infer column types from a sample document, including array element structure."""
@@ -273,11 +339,7 @@ class MongodbClient(DataSourceClient):
     def get_schema(self, collection_name: str) -> Table:
         """Get schema for a specific collection."""
         with self.connect() as db:
-            merged_sample = self._get_all_keys(db[collection_name])
-            columns = []
-            if merged_sample:
-                self._convert_bson_types(merged_sample)
-                columns = self._infer_columns(merged_sample)
+            columns = self._collection_columns(db, collection_name)
             return Table(
                 name=collection_name,
                 columns=columns,
@@ -1,4 +1,6 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.engine_registry import get_engine_registry
+from app.data_sources.table_keys import attach_keys, fetch_key_rows
 
 import pandas as pd
 import sqlalchemy
@@ -29,10 +31,9 @@ class MSSQLClient(DataSourceClient):
     @contextmanager
     def connect(self) -> Generator[sqlalchemy.engine.base.Connection, None, None]:
         """Yield a connection to a SQL Server database."""
-        engine = None
         conn = None
         try:
-            engine = sqlalchemy.create_engine(self.sql_server_uri)
+            engine = get_engine_registry().get_engine(self.sql_server_uri, connection_id=self.connection_id)
             conn = engine.connect()
             yield conn
         except Exception as e:
@@ -40,8 +41,6 @@ class MSSQLClient(DataSourceClient):
         finally:
             if conn is not None:
                 conn.close()
-            if engine is not None:
-                engine.dispose()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
         """Execute SQL statement and return the result as a DataFrame."""
@@ -53,8 +52,24 @@ class MSSQLClient(DataSourceClient):
             print(f"Error executing SQL: {e}")
             raise
 
+    # Primary and foreign key columns of the whole database in one query; a foreign key
+    # column is matched to the referenced key column at the same ordinal position
+    _KEYS_SQL = """
+        SELECT kcu.TABLE_NAME, kcu.COLUMN_NAME, tc.CONSTRAINT_TYPE, rk.TABLE_NAME, rk.COLUMN_NAME
+        FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+        JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
+          ON kcu.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA AND kcu.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+        LEFT JOIN INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS rc
+          ON rc.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA AND rc.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+        LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE rk
+          ON rk.CONSTRAINT_SCHEMA = rc.UNIQUE_CONSTRAINT_SCHEMA AND rk.CONSTRAINT_NAME = rc.UNIQUE_CONSTRAINT_NAME
+         AND rk.ORDINAL_POSITION = kcu.ORDINAL_POSITION
+        WHERE tc.TABLE_CATALOG = :database AND tc.CONSTRAINT_TYPE IN ('PRIMARY KEY', 'FOREIGN KEY')
+        ORDER BY kcu.TABLE_NAME, tc.CONSTRAINT_NAME, kcu.ORDINAL_POSITION
+    """
+
     def get_tables(self) -> List[Table]:
-        """Get all tables and their columns in the specified database."""
+        """Get all tables, their columns and keys in the specified database."""
         try:
             with self.connect() as conn:
                 sql = """
@@ -75,6 +90,16 @@ class MSSQLClient(DataSourceClient):
                             name=table_name, columns=[], pks=None, fks=None)
                     tables[table_name].columns.append(
                         TableColumn(name=column_name, dtype=data_type))
+
+                key_rows = fetch_key_rows(
+                    lambda: conn.execute(text(self._KEYS_SQL), {'database': self.database}).fetchall())
+                pk_rows, fk_rows = [], []
+                for table_name, column_name, constraint_type, ref_table, ref_column in key_rows:
+                    if constraint_type == 'PRIMARY KEY':
+                        pk_rows.append((table_name, column_name))
+                    elif ref_table:
+                        fk_rows.append((table_name, column_name, ref_table, ref_column))
+                attach_keys(tables, pk_rows, fk_rows)
                 return list(tables.values())
         except Exception as e:
             print(f"Error retrieving tables: {e}")
@@ -1,10 +1,14 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.engine_registry import get_engine_registry
+from app.data_sources.query_control import cancellable, timeout_ms
+from app.data_sources.result_limits import collect_chunks, current_chunk_rows
+from app.data_sources.table_keys import attach_keys, fetch_key_rows
 
 import pandas as pd
 import sqlalchemy
 from sqlalchemy import text
 from contextlib import contextmanager
-from typing import List, Generator, Optional
+from typing import Dict, Generator, Iterator, List, Optional
 from app.ai.prompt_formatters import Table, TableColumn
 from app.ai.prompt_formatters import TableFormatter
 from functools import cached_property
@@ -35,10 +39,9 @@ class MysqlClient(DataSourceClient):
     @contextmanager
     def connect(self) -> Generator[sqlalchemy.engine.base.Connection, None, None]:
         """Yield a connection to a MySQL db."""
-        engine = None
         conn = None
         try:
-            engine = sqlalchemy.create_engine(self.mysql_uri)
+            engine = get_engine_registry().get_engine(self.mysql_uri, connection_id=self.connection_id)
             conn = engine.connect()
             yield conn
         except Exception as e:
@@ -46,21 +49,60 @@ class MysqlClient(DataSourceClient):
         finally:
             if conn is not None:
                 conn.close()
-            if engine is not None:
-                engine.dispose()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
-        """Execute SQL statement and return the result as a DataFrame."""
+        """Execute SQL statement and return the result as a DataFrame (up to the active result caps)."""
         try:
-            with self.connect() as conn:
-                df = pd.read_sql(text(sql), conn)
-            return df
+            return collect_chunks(self.execute_query_stream(sql), sql)
         except Exception as e:
             print(f"Error executing SQL: {e}")
             raise
 
+    def execute_query_stream(self, sql: str, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """Yield the result in chunks read from a server-side cursor.
+
+        The active query timeout is set as the session's `MAX_EXECUTION_TIME` for the
+        duration of the query; `cancel()` runs `KILL QUERY` from a second connection.
+        """
+        chunk_rows = chunk_rows or current_chunk_rows()
+        with self.connect() as conn:
+            timeout = timeout_ms()
+            if timeout:
+                conn.execute(text(f"SET SESSION MAX_EXECUTION_TIME = {timeout}"))
+            thread_id = conn.connection.dbapi_connection.thread_id()
+            try:
+                with cancellable(self, lambda: self._kill_query(thread_id)):
+                    stream_conn = conn.execution_options(stream_results=True, max_row_buffer=chunk_rows)
+                    yield from pd.read_sql(text(sql), stream_conn, chunksize=chunk_rows)
+            finally:
+                if timeout:
+                    # Pooled connection: don't leak the timeout into later queries
+                    try:
+                        conn.execute(text("SET SESSION MAX_EXECUTION_TIME = DEFAULT"))
+                    except Exception:
+                        conn.invalidate()
+
+    def _kill_query(self, thread_id: int) -> None:
+        engine = get_engine_registry().get_engine(self.mysql_uri, connection_id=self.connection_id)
+        with engine.connect() as conn:
+            conn.execute(text(f"KILL QUERY {int(thread_id)}"))
+
+    # Primary and foreign key columns of the whole database in one query
+    _KEYS_SQL = """
+        SELECT kcu.table_name, kcu.column_name, tc.constraint_type,
+               kcu.referenced_table_schema, kcu.referenced_table_name, kcu.referenced_column_name
+        FROM information_schema.table_constraints tc
+        JOIN information_schema.key_column_usage kcu
+          ON kcu.constraint_schema = tc.constraint_schema
+         AND kcu.constraint_name = tc.constraint_name
+         AND kcu.table_name = tc.table_name
+        WHERE tc.table_schema = :database
+          AND tc.constraint_type IN ('PRIMARY KEY', 'FOREIGN KEY')
+        ORDER BY kcu.table_name, tc.constraint_name, kcu.ordinal_position
+    """
+
     def get_tables(self) -> List[Table]:
-        """Get all tables and their columns in the specified database."""
+        """Get all tables, their columns and keys in the specified database."""
         try:
             with self.connect() as conn:
                 sql = """
@@ -81,11 +123,55 @@ class MysqlClient(DataSourceClient):
                             name=table_name, columns=[], pks=None, fks=None)
                     tables[table_name].columns.append(
                         TableColumn(name=column_name, dtype=data_type))
+
+                key_rows = fetch_key_rows(
+                    lambda: conn.execute(text(self._KEYS_SQL), {'database': self.database}).fetchall())
+                pk_rows, fk_rows = [], []
+                for table_name, column_name, constraint_type, ref_schema, ref_table, ref_column in key_rows:
+                    if constraint_type == 'PRIMARY KEY':
+                        pk_rows.append((table_name, column_name))
+                    elif ref_table:
+                        ref_name = ref_table if ref_schema == self.database else f"{ref_schema}.{ref_table}"
+                        fk_rows.append((table_name, column_name, ref_name, ref_column))
+                attach_keys(tables, pk_rows, fk_rows)
                 return list(tables.values())
         except Exception as e:
             print(f"Error retrieving tables: {e}")
             return []
 
+    def get_table_versions(self, tables: List[str]) -> Dict[str, Optional[str]]:
+        """UPDATE_TIME of each base table; NULL (engine doesn't track it, or after a restart) means unknown."""
+        versions: Dict[str, Optional[str]] = {}
+        sql = text("""
+            SELECT UPDATE_TIME, CREATE_TIME, NOW()
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = :schema AND TABLE_NAME = :name AND TABLE_TYPE = 'BASE TABLE'
+        """)
+        with self.connect() as conn:
+            previous_expiry = None
+            try:
+                # MySQL 8 caches these statistics for a day by default
+                previous_expiry = conn.execute(text("SELECT @@SESSION.information_schema_stats_expiry")).scalar()
+                conn.execute(text("SET SESSION information_schema_stats_expiry = 0"))
+            except Exception:
+                pass
+            try:
+                for table in tables:
+                    schema, _, name = table.rpartition(".")
+                    row = conn.execute(sql, {"schema": schema or self.database, "name": name}).fetchone()
+                    # UPDATE_TIME has one-second resolution: a write in the current second could still be missed
+                    if row is None or row[0] is None or (row[2] - row[0]).total_seconds() < 2:
+                        versions[table] = None
+                    else:
+                        versions[table] = f"{row[1]}:{row[0]}"
+            finally:
+                if previous_expiry is not None:
+                    # The connection goes back to the shared pool
+                    conn.execute(
+                        text("SET SESSION information_schema_stats_expiry = :expiry"), {"expiry": previous_expiry}
+                    )
+        return versions
+
     def get_schema(self, table_id: str) -> Table:
         """This method is now obsolete. Please use get_tables() instead."""
         raise NotImplementedError(
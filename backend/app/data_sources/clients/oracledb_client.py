@@ -1,4 +1,5 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.engine_registry import get_engine_registry
 
 import pandas as pd
 import sqlalchemy
@@ -40,10 +41,9 @@ class OracledbClient(DataSourceClient):
     @contextmanager
     def connect(self) -> Generator[sqlalchemy.engine.base.Connection, None, None]:
         """Yield a connection to an Oracle database."""
-        engine = None
         conn = None
         try:
-            engine = sqlalchemy.create_engine(self.oracle_uri)
+            engine = get_engine_registry().get_engine(self.oracle_uri, connection_id=self.connection_id, scope=tuple(self._schemas[:1]))
             conn = engine.connect()
             # Set current schema if provided (Oracle has no search_path; use first schema)
             if self._schemas:
@@ -58,8 +58,6 @@ class OracledbClient(DataSourceClient):
         finally:
             if conn is not None:
                 conn.close()
-            if engine is not None:
-                engine.dispose()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
         """Execute SQL statement and return the result as a DataFrame."""
@@ -1,14 +1,24 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.engine_registry import get_engine_registry
+from app.data_sources.query_control import cancellable, timeout_ms
+from app.data_sources.result_limits import collect_chunks, current_chunk_rows, current_max_rows
+from app.data_sources.table_keys import attach_keys, fetch_key_rows
 
 import pandas as pd
 import sqlalchemy
 from sqlalchemy import text
 from contextlib import contextmanager
-from typing import List, Generator
+from typing import Dict, Generator, Iterator, List, Optional
 from app.ai.prompt_formatters import Table, TableColumn
 from app.ai.prompt_formatters import TableFormatter
 from functools import cached_property
 
+_SCHEMA_NAMES_SQL = """
+    SELECT schema_name FROM information_schema.schemata
+    WHERE schema_name NOT IN ('information_schema', 'pg_catalog') AND schema_name NOT LIKE 'pg\\_%'
+    ORDER BY schema_name
+"""
+
 
 class PostgresqlClient(DataSourceClient):
     def __init__(self, host, port, database, user, password="", schema=None):
@@ -42,10 +52,9 @@ class PostgresqlClient(DataSourceClient):
     @contextmanager
     def connect(self) -> Generator[sqlalchemy.engine.base.Connection, None, None]:
         """Yield a connection to a Postgres db."""
-        engine = None
         conn = None
         try:
-            engine = sqlalchemy.create_engine(self.pg_uri)
+            engine = get_engine_registry().get_engine(self.pg_uri, connection_id=self.connection_id, scope=tuple(self._schemas))
             conn = engine.connect()
             # Set search_path if schemas are provided
             if self._schemas:
@@ -60,64 +69,146 @@ class PostgresqlClient(DataSourceClient):
         finally:
             if conn is not None:
                 conn.close()
-            if engine is not None:
-                engine.dispose()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
-        """Execute SQL statement and return the result as a DataFrame."""
+        """Execute SQL statement and return the result as a DataFrame (up to the active result caps)."""
         try:
-            with self.connect() as conn:
-                df = pd.read_sql(text(sql), conn)
-            return df
+            return collect_chunks(self.execute_query_stream(sql), sql)
         except Exception as e:
             print(f"Error executing SQL: {e}")
             raise
 
+    def execute_query_stream(self, sql: str, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """Yield the result in chunks read from a server-side cursor.
+
+        The active query timeout is applied as a transaction-local `statement_timeout`;
+        `cancel()` sends a cancel request for the running statement.
+        """
+        chunk_rows = chunk_rows or current_chunk_rows()
+        with self.connect() as conn:
+            timeout = timeout_ms()
+            if timeout:
+                conn.execute(text(f"SET LOCAL statement_timeout = {timeout}"))
+            with cancellable(self, conn.connection.dbapi_connection.cancel):
+                conn = conn.execution_options(stream_results=True, max_row_buffer=chunk_rows)
+                yield from pd.read_sql(text(sql), conn, chunksize=chunk_rows)
+
+    @staticmethod
+    def _columns_query(placeholders: List[str]) -> str:
+        """information_schema.columns query; `placeholders` are the bind markers for
+        the database followed by one per schema to restrict to."""
+        where_clauses = [
+            f"table_catalog = {placeholders[0]}",
+            "table_schema NOT IN ('information_schema', 'pg_catalog')",
+        ]
+        if len(placeholders) > 1:
+            where_clauses.append(f"table_schema IN ({', '.join(placeholders[1:])})")
+        return f"""
+            SELECT table_schema, table_name, column_name, data_type
+            FROM information_schema.columns
+            WHERE {" AND ".join(where_clauses)}
+            ORDER BY table_schema, table_name, ordinal_position
+        """
+
+    @staticmethod
+    def _keys_query(placeholders: List[str]) -> str:
+        """Primary and foreign key columns of every table in one pg_constraint scan;
+        `placeholders` are the bind markers of the schemas to restrict to."""
+        where_clauses = [
+            "con.contype IN ('p', 'f')",
+            "n.nspname NOT IN ('information_schema', 'pg_catalog')",
+        ]
+        if placeholders:
+            where_clauses.append(f"n.nspname IN ({', '.join(placeholders)})")
+        return f"""
+            SELECT con.contype, n.nspname, c.relname, a.attname, rn.nspname, rc.relname, ra.attname
+            FROM pg_constraint con
+            JOIN pg_class c ON c.oid = con.conrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            CROSS JOIN LATERAL unnest(con.conkey, con.confkey) WITH ORDINALITY AS k(attnum, refnum, ord)
+            JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+            LEFT JOIN pg_class rc ON rc.oid = con.confrelid
+            LEFT JOIN pg_namespace rn ON rn.oid = rc.relnamespace
+            LEFT JOIN pg_attribute ra ON ra.attrelid = con.confrelid AND ra.attnum = k.refnum
+            WHERE {" AND ".join(where_clauses)}
+            ORDER BY n.nspname, c.relname, con.conname, k.ord
+        """
+
+    @staticmethod
+    def _tables_from_rows(rows, key_rows=()) -> List[Table]:
+        tables = {}
+        for row in rows:
+            table_schema, table_name, column_name, data_type = row
+            key = (table_schema, table_name)
+            fqn = f"{table_schema}.{table_name}"
+            if key not in tables:
+                tables[key] = Table(
+                    name=fqn, columns=[], pks=[], fks=[], metadata_json={"schema": table_schema}
+                )
+            tables[key].columns.append(TableColumn(name=column_name, dtype=data_type))
+        pk_rows, fk_rows = [], []
+        for contype, table_schema, table_name, column_name, ref_schema, ref_table, ref_column in key_rows:
+            if contype == "p":
+                pk_rows.append(((table_schema, table_name), column_name))
+            else:
+                fk_rows.append(((table_schema, table_name), column_name, f"{ref_schema}.{ref_table}", ref_column))
+        attach_keys(tables, pk_rows, fk_rows)
+        return list(tables.values())
+
     def get_tables(self) -> List[Table]:
         """Get all tables and their columns in the specified database.
         - Emits fully-qualified names: schema.table
         - If `schema` is configured, limits discovery to those schemas
         """
         try:
-            with self.connect() as conn:
-                # Build optional schema filter
-                params = {"database": self.database}
-                where_clauses = [
-                    "table_catalog = :database",
-                    "table_schema NOT IN ('information_schema', 'pg_catalog')",
-                ]
-                if self._schemas:
-                    in_keys = []
-                    for idx, sch in enumerate(self._schemas):
-                        key = f"s{idx}"
-                        params[key] = sch
-                        in_keys.append(f":{key}")
-                    where_clauses.append(f"table_schema IN ({', '.join(in_keys)})")
-
-                where_sql = " WHERE " + " AND ".join(where_clauses)
-                sql = text(f"""
-                    SELECT table_schema, table_name, column_name, data_type
-                    FROM information_schema.columns
-                    {where_sql}
-                    ORDER BY table_schema, table_name, ordinal_position
-                """)
-                result = conn.execute(sql, params).fetchall()
-
-                tables = {}
-                for row in result:
-                    table_schema, table_name, column_name, data_type = row
-                    key = (table_schema, table_name)
-                    fqn = f"{table_schema}.{table_name}"
-                    if key not in tables:
-                        tables[key] = Table(
-                            name=fqn, columns=[], pks=[], fks=[], metadata_json={"schema": table_schema}
-                        )
-                    tables[key].columns.append(TableColumn(name=column_name, dtype=data_type))
-                return list(tables.values())
+            return self.get_tables_in_schemas(self._schemas)
         except Exception as e:
             print(f"Error retrieving tables: {e}")
             return []
 
+    def list_schema_names(self) -> Optional[List[str]]:
+        if self._schemas:
+            return list(self._schemas)
+        with self.connect() as conn:
+            rows = conn.execute(text(_SCHEMA_NAMES_SQL)).fetchall()
+        return [r[0] for r in rows]
+
+    def get_tables_in_schemas(self, schemas: List[str]) -> List[Table]:
+        """Tables, columns and keys of the given schemas (all non-system schemas if empty)."""
+        with self.connect() as conn:
+            keys = ["database"] + [f"s{idx}" for idx in range(len(schemas))]
+            params = dict(zip(keys, [self.database] + list(schemas)))
+            sql = text(self._columns_query([f":{k}" for k in keys]))
+            rows = conn.execute(sql, params).fetchall()
+            keys_sql = text(self._keys_query([f":{k}" for k in keys[1:]]))
+            key_rows = fetch_key_rows(lambda: conn.execute(keys_sql, params).fetchall())
+            return self._tables_from_rows(rows, key_rows)
+
+    def get_table_versions(self, tables: List[str]) -> Dict[str, Optional[str]]:
+        """Write counters and filenode of each table (resolved against the search_path).
+
+        n_tup_ins/upd/del grow with every write (even rolled back ones) and the filenode
+        changes on TRUNCATE/VACUUM FULL; views and partitioned parents have no signal.
+        On a standby the counters don't move with replicated writes, so nothing does.
+        """
+        versions: Dict[str, Optional[str]] = {}
+        sql = text("""
+            SELECT c.relkind, pg_relation_filenode(c.oid), s.n_tup_ins, s.n_tup_upd, s.n_tup_del
+            FROM pg_class c
+            LEFT JOIN pg_stat_all_tables s ON s.relid = c.oid
+            WHERE c.oid = to_regclass(:name)
+        """)
+        with self.connect() as conn:
+            if conn.execute(text("SELECT pg_is_in_recovery()")).scalar():
+                return {table: None for table in tables}
+            for table in tables:
+                row = conn.execute(sql, {"name": table}).fetchone()
+                if row is None or row[0] != "r" or row[2] is None:
+                    versions[table] = None
+                else:
+                    versions[table] = f"{row[1]}:{row[2]}:{row[3]}:{row[4]}"
+        return versions
+
     def get_schema(self, table_id: str) -> Table:
         """This method is now obsolete. Please use get_tables() instead."""
         raise NotImplementedError(
@@ -146,6 +237,106 @@ class PostgresqlClient(DataSourceClient):
                 "message": str(e)
             }
 
+    # Native async (asyncpg) versions of the introspection/test/query methods, so
+    # async routes don't tie up a thread for the whole round trip.
+
+    async def _aconnect(self):
+        import asyncpg
+
+        server_settings = {"search_path": ", ".join(self._schemas)} if self._schemas else None
+        return await asyncpg.connect(
+            host=self.host,
+            port=int(self.port) if self.port else 5432,
+            user=self.user,
+            password=self.password or None,
+            database=self.database,
+            server_settings=server_settings,
+            timeout=30,
+        )
+
+    async def alist_schema_names(self) -> Optional[List[str]]:
+        if self._schemas:
+            return list(self._schemas)
+        conn = await self._aconnect()
+        try:
+            rows = await conn.fetch(_SCHEMA_NAMES_SQL)
+        finally:
+            await conn.close()
+        return [r[0] for r in rows]
+
+    async def aget_tables_in_schemas(self, schemas: List[str]) -> List[Table]:
+        conn = await self._aconnect()
+        try:
+            placeholders = [f"${idx + 1}" for idx in range(len(schemas) + 1)]
+            rows = await conn.fetch(self._columns_query(placeholders), self.database, *schemas)
+            try:
+                key_rows = await conn.fetch(self._keys_query(placeholders[:-1]), *schemas)
+            except Exception as e:
+                print(f"Error retrieving keys: {e}")
+                key_rows = []
+        finally:
+            await conn.close()
+        return self._tables_from_rows(
+            (tuple(r.values()) for r in rows), [tuple(r.values()) for r in key_rows]
+        )
+
+    async def aget_tables(self) -> List[Table]:
+        try:
+            return await self.aget_tables_in_schemas(self._schemas)
+        except Exception as e:
+            print(f"Error retrieving tables: {e}")
+            return []
+
+    async def aget_schemas(self):
+        return await self.aget_tables()
+
+    async def atest_connection(self):
+        try:
+            conn = await self._aconnect()
+            try:
+                await conn.fetchval("SELECT 1")
+            finally:
+                await conn.close()
+            return {
+                "success": True,
+                "message": "Successfully connected to PostgreSQL"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": str(e)
+            }
+
+    async def aexecute_query(self, sql: str) -> pd.DataFrame:
+        """Execute SQL and return a DataFrame, reading through a server-side cursor
+        in chunks and stopping at the active result caps like `execute_query`."""
+        chunk_rows = current_chunk_rows()
+        max_rows = current_max_rows()
+        frames: List[pd.DataFrame] = []
+        conn = await self._aconnect()
+        try:
+            async with conn.transaction():
+                timeout = timeout_ms()
+                if timeout:
+                    await conn.execute(f"SET LOCAL statement_timeout = {timeout}")
+                stmt = await conn.prepare(sql)
+                columns = [a.name for a in stmt.get_attributes()]
+                cursor = await stmt.cursor()
+                fetched = 0
+                while True:
+                    rows = await cursor.fetch(chunk_rows)
+                    if rows:
+                        frames.append(pd.DataFrame([tuple(r.values()) for r in rows], columns=columns))
+                        fetched += len(rows)
+                    # One row past the cap is enough for collect_chunks to record the truncation
+                    if len(rows) < chunk_rows or (max_rows is not None and fetched > max_rows):
+                        break
+        finally:
+            await conn.close()
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return collect_chunks(frames, sql)
+
     @property
     def description(self):
         system_prompt = """
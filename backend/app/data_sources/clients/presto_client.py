@@ -1,4 +1,5 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.engine_registry import get_engine_registry
 import pandas as pd
 import sqlalchemy
 from sqlalchemy import text
@@ -60,10 +61,9 @@ class PrestoClient(DataSourceClient):
         """
         Yield a connection to the Presto server.
         """
-        engine = None
         conn = None
         try:
-            engine = sqlalchemy.create_engine(self.presto_uri)
+            engine = get_engine_registry().get_engine(self.presto_uri, connection_id=self.connection_id)
             conn = engine.connect()
             yield conn
         except Exception as e:
@@ -72,8 +72,6 @@ class PrestoClient(DataSourceClient):
         finally:
             if conn is not None:
                 conn.close()
-            if engine is not None:
-                engine.dispose()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
         """
@@ -1,11 +1,83 @@
 from app.data_sources.clients.base import DataSourceClient
-from app.ai.prompt_formatters import Table, TableColumn, ServiceFormatter
+from app.data_sources.query_control import cancellable
+from app.data_sources.result_limits import collect_arrow_chunks, current_chunk_rows
+from app.data_sources.schema_sync import introspection_concurrency
+from app.ai.prompt_formatters import Table, TableColumn, ForeignKey, ServiceFormatter
 from simple_salesforce import Salesforce
+import csv
+import logging
+import re
+import threading
+import time
 import pandas as pd
-from typing import List, Generator
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Generator, Optional, Tuple
 from functools import cached_property
 from contextlib import contextmanager
 
+logger = logging.getLogger(__name__)
+
+# Objects left out of discovery: field history, sharing rows, feeds, change events, tags
+_SKIPPED_SUFFIXES = ("History", "Share", "Feed", "ChangeEvent", "__Tag")
+# Queries matching more records than this (and that Bulk API 2.0 can run) use a bulk job
+BULK_MIN_ROWS = 10_000
+# SOQL features Bulk API 2.0 query jobs reject
+_BULK_UNSUPPORTED = re.compile(r"\(\s*select\b|\bgroup\s+by\b|\boffset\b|\btypeof\b|\b(count|sum|avg|min|max|count_distinct)\s*\(", re.IGNORECASE)
+_BULK_POLL_MAX_SECONDS = 5.0
+# Smallest REST batch; the probe page of a bulk-compatible query is only a record count.
+# Later pages go back to the default size.
+_PROBE_BATCH_SIZE = 200
+_REST_BATCH_SIZE = 2000
+_FROM_OBJECT = re.compile(r"\bfrom\s+(\w+)", re.IGNORECASE)
+# Describe field types read as numbers/booleans from bulk CSV; everything else stays a string,
+# as in REST JSON (ids, zip codes, picklists, dates)
+_ARROW_FIELD_TYPES = {
+    "int": pa.int64(),
+    "long": pa.int64(),
+    "double": pa.float64(),
+    "currency": pa.float64(),
+    "percent": pa.float64(),
+    "boolean": pa.bool_(),
+}
+
+# Describe results per (API base URL, object), revalidated with their ETag
+_describe_cache: Dict[Tuple[str, str], Tuple[Optional[str], Any]] = {}
+_describe_cache_lock = threading.Lock()
+
+
+def _flatten_record(record: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """REST record with relationship objects expanded to dotted keys, as in bulk CSV headers."""
+    flat = {}
+    for key, value in record.items():
+        if key == "attributes":
+            continue
+        if isinstance(value, dict) and "records" not in value:
+            flat.update(_flatten_record(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def _rest_frame(records: List[Dict[str, Any]]) -> pd.DataFrame:
+    """DataFrame of flattened REST records, with nulls as bulk results have them."""
+    df = pd.DataFrame(records)
+    # A null lookup comes back as `"Account": null` next to rows with `Account.Name`
+    columns = set(df.columns)
+    null_parents = [
+        c for c in df.columns
+        if any(other.startswith(f"{c}.") for other in columns) and df[c].isna().all()
+    ]
+    if null_parents:
+        df = df.drop(columns=null_parents)
+    # Keys missing from some records are filled with NaN; string columns use None
+    for column in df.columns:
+        if df[column].dtype == object and df[column].isna().any():
+            df[column] = df[column].astype(object).where(df[column].notna(), None)
+    return df
+
+
 class SalesforceClient(DataSourceClient):
     def __init__(self, username: str, password: str, security_token: str, domain: str, sandbox: bool=True):
         self.username = username
@@ -34,34 +106,211 @@ class SalesforceClient(DataSourceClient):
         except Exception as e:
             return {"success": False, "message": str(e)}
 
+    # REST calls go through the Salesforce session directly (relative to `sf.base_url`)
+    # so describe ETags and Bulk API 2.0 CSV results can be handled here.
+
+    def _request(self, method: str, path: str, headers: Optional[Dict[str, str]] = None, **kwargs):
+        sf = self.sf
+        url = path if path.startswith("http") else sf.base_url + path
+        response = sf.session.request(method, url, headers={**sf.headers, **(headers or {})}, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f"Salesforce {method} {path} failed ({response.status_code}): {response.text[:500]}")
+        return response
+
+    def _cached_get(self, path: str, key: str) -> Any:
+        """GET a describe resource, answering from the cache when its ETag still matches."""
+        cache_key = (self.sf.base_url, key)
+        with _describe_cache_lock:
+            cached = _describe_cache.get(cache_key)
+        headers = {"If-None-Match": cached[0]} if cached and cached[0] else None
+        response = self._request("GET", path, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            return cached[1]
+        body = response.json()
+        with _describe_cache_lock:
+            _describe_cache[cache_key] = (response.headers.get("ETag"), body)
+        return body
+
+    def list_object_names(self) -> List[str]:
+        """Queryable objects from the global describe."""
+        describe = self._cached_get("sobjects/", "__global__")
+        return [
+            obj["name"] for obj in describe.get("sobjects", [])
+            if obj.get("queryable") and not obj.get("deprecatedAndHidden")
+            and not obj["name"].endswith(_SKIPPED_SUFFIXES)
+        ]
+
     def get_schemas(self) -> List[Table]:
-        """Get schemas for common Salesforce objects."""
-        object_names = ["Account", "Contact", "Opportunity", "Lead", "Case"]
-        schemas = [self.get_schema(object_name) for object_name in object_names]
-        return schemas
+        """Schemas of all queryable objects, described concurrently."""
+        with self.connect():
+            names = self.list_object_names()
+            if not names:
+                return []
+
+            def _describe(name: str) -> Optional[Table]:
+                try:
+                    return self.get_schema(name)
+                except Exception as e:
+                    logger.info(f"Describing Salesforce object {name} failed: {e}")
+                    return None
+
+            with ThreadPoolExecutor(max_workers=min(len(names), introspection_concurrency())) as pool:
+                tables = list(pool.map(_describe, names))
+        return [t for t in tables if t is not None]
 
     def execute_query(self, query: str) -> pd.DataFrame:
-        """Execute a SOQL query and return results as a DataFrame."""
+        """Execute a SOQL query and return results as a DataFrame.
+
+        The first REST page tells how many records match; larger results that Bulk API
+        2.0 can produce are fetched as a bulk job instead of 2000-record REST pages. For
+        bulk-compatible queries that first page is requested at the minimum batch size,
+        so switching wastes at most `_PROBE_BATCH_SIZE` records. Both paths return the
+        same shape: relationship fields as dotted columns (`Account.Name`).
+        """
         try:
-            with self.connect() as sf:
-                results = sf.query_all(query)
-                df = pd.DataFrame(results['records'])
-                if not df.empty:
-                    df = df.drop('attributes', axis=1)
-                return df
+            with self.connect():
+                bulk_compatible = self._bulk_compatible(query)
+                headers = {"Sforce-Query-Options": f"batchSize={_PROBE_BATCH_SIZE}"} if bulk_compatible else None
+                first = self._request("GET", "query/", params={"q": query}, headers=headers).json()
+                if not first.get("done", True) and first.get("totalSize", 0) > BULK_MIN_ROWS and bulk_compatible:
+                    return collect_arrow_chunks(self.bulk_query_arrow_stream(query), query).to_pandas()
+                records = [_flatten_record(r) for r in first.get("records", [])]
+                page = first
+                while not page.get("done", True) and page.get("nextRecordsUrl"):
+                    page = self._request(
+                        "GET", self._instance_url() + page["nextRecordsUrl"],
+                        headers={"Sforce-Query-Options": f"batchSize={_REST_BATCH_SIZE}"},
+                    ).json()
+                    records.extend(_flatten_record(r) for r in page.get("records", []))
+                return _rest_frame(records)
         except Exception as e:
             raise RuntimeError(f"Error executing Salesforce query: {e}")
 
+    def _instance_url(self) -> str:
+        return self.sf.base_url.split("/services/data/")[0]
+
+    @staticmethod
+    def _bulk_compatible(query: str) -> bool:
+        return not _BULK_UNSUPPORTED.search(query)
+
+    def bulk_query_arrow_stream(self, query: str, chunk_rows: Optional[int] = None) -> Iterator[pa.Table]:
+        """Run `query` as a Bulk API 2.0 query job and yield its CSV result pages as Arrow.
+
+        Each page is parsed by Arrow's CSV reader straight from the response stream.
+        Column types come from the objects' describe metadata rather than inference, so
+        ids and codes like "02134" stay strings and every page has the same schema.
+        `cancel()` aborts the job.
+        """
+        job_id = self._request("POST", "jobs/query", json={"operation": "query", "query": query}).json()["id"]
+        finished = False
+        try:
+            with cancellable(self, lambda: self._abort_bulk_job(job_id)):
+                self._wait_for_bulk_job(job_id)
+                finished = True
+                column_types: Optional[Dict[str, pa.DataType]] = None
+                locator = None
+                while True:
+                    params = {"maxRecords": chunk_rows or current_chunk_rows()}
+                    if locator:
+                        params["locator"] = locator
+                    response = self._request(
+                        "GET", f"jobs/query/{job_id}/results", headers={"Accept": "text/csv"}, params=params, stream=True
+                    )
+                    response.raw.decode_content = True
+                    header = next(csv.reader([response.raw.readline().decode("utf-8-sig")]), [])
+                    if column_types is None:
+                        column_types = self._column_types(query, header)
+                    schema = pa.schema([(name, column_types[name]) for name in header])
+                    try:
+                        table = pa_csv.read_csv(
+                            response.raw,
+                            read_options=pa_csv.ReadOptions(column_names=header),
+                            convert_options=pa_csv.ConvertOptions(column_types=column_types, strings_can_be_null=True),
+                        )
+                    except pa.ArrowInvalid as e:
+                        if "Empty CSV" not in str(e):
+                            raise
+                        table = schema.empty_table()
+                    yield table
+                    locator = response.headers.get("Sforce-Locator")
+                    if not locator or locator == "null":
+                        break
+        finally:
+            if not finished:
+                self._abort_bulk_job(job_id)
+            try:
+                self._request("DELETE", f"jobs/query/{job_id}")
+            except Exception as e:
+                logger.info(f"Deleting bulk query job {job_id} failed: {e}")
+
+    def _column_types(self, query: str, header: List[str]) -> Dict[str, pa.DataType]:
+        """Arrow types of bulk CSV columns, resolved through the queried object's describe."""
+        match = _FROM_OBJECT.search(query)
+        describes: Dict[str, List[Dict[str, Any]]] = {}
+        types = {}
+        for name in header:
+            field_type = None
+            if match:
+                try:
+                    field_type = self._field_type(match.group(1), name.split("."), describes)
+                except Exception as e:
+                    logger.info(f"Resolving type of Salesforce field {name} failed: {e}")
+            types[name] = _ARROW_FIELD_TYPES.get(field_type, pa.string())
+        return types
+
+    def _field_type(self, object_name: str, path: List[str], describes: Dict[str, List[Dict[str, Any]]]) -> Optional[str]:
+        """Describe type of `path` (e.g. ["Owner", "Name"]) starting at `object_name`.
+
+        `describes` holds the fields of objects already described for this query.
+        """
+        if object_name not in describes:
+            describes[object_name] = self._cached_get(f"sobjects/{object_name}/describe/", object_name)["fields"]
+        fields = describes[object_name]
+        head = path[0].lower()
+        if len(path) == 1:
+            return next((f["type"] for f in fields if f["name"].lower() == head), None)
+        for field in fields:
+            if (field.get("relationshipName") or "").lower() == head and len(field.get("referenceTo") or []) == 1:
+                return self._field_type(field["referenceTo"][0], path[1:], describes)
+        return None
+
+    def _wait_for_bulk_job(self, job_id: str) -> None:
+        delay = 0.5
+        while True:
+            job = self._request("GET", f"jobs/query/{job_id}").json()
+            state = job.get("state")
+            if state == "JobComplete":
+                return
+            if state in ("Failed", "Aborted"):
+                raise RuntimeError(f"Bulk query job {state.lower()}: {job.get('errorMessage') or ''}")
+            time.sleep(delay)
+            delay = min(delay * 2, _BULK_POLL_MAX_SECONDS)
+
+    def _abort_bulk_job(self, job_id: str) -> None:
+        try:
+            self._request("PATCH", f"jobs/query/{job_id}", json={"state": "Aborted"})
+        except Exception as e:
+            logger.info(f"Aborting bulk query job {job_id} failed: {e}")
+
     def prompt_schema(self):
         schemas = self.get_schemas()
         return ServiceFormatter(schemas).table_str
     
     def get_schema(self, object_name: str) -> Table:
-        """Get schema for a specific Salesforce object."""
-        with self.connect() as sf:
-            describe = sf.__getattr__(object_name).describe()
+        """Get schema for a specific Salesforce object; lookups become foreign keys to Id."""
+        with self.connect():
+            describe = self._cached_get(f"sobjects/{object_name}/describe/", object_name)
             columns = [TableColumn(name=field['name'], dtype=field['type']) for field in describe['fields']]
-            return Table(name=object_name, columns=columns, pks=[TableColumn(name="Id", dtype="str")], fks=[])
+            fks = [
+                ForeignKey(
+                    column=TableColumn(name=field['name'], dtype=field['type']),
+                    references_name=field['referenceTo'][0],
+                    references_column=TableColumn(name="Id", dtype="id"),
+                )
+                for field in describe['fields']
+                if field.get('type') == 'reference' and len(field.get('referenceTo') or []) == 1
+            ]
+            return Table(name=object_name, columns=columns, pks=[TableColumn(name="Id", dtype="str")], fks=fks)
 
     def system_prompt(self):
         """Provide a detailed system prompt for LLM integration."""
@@ -1,15 +1,21 @@
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.engine_registry import get_engine_registry
+from app.data_sources.query_control import cancellable, current_query_timeout
+from app.data_sources.result_limits import collect_chunks, current_chunk_rows
+from app.data_sources.table_keys import attach_keys, fetch_key_rows
 
 import pandas as pd
+import pyarrow as pa
 import sqlalchemy
 from sqlalchemy import text
 from contextlib import contextmanager
-from typing import Generator, List, Optional
+from typing import Dict, Generator, Iterator, List, Optional
 from app.ai.prompt_formatters import Table, TableColumn
 from app.ai.prompt_formatters import TableFormatter
-from functools import cached_property
 from snowflake.sqlalchemy import URL
+from snowflake.connector.errors import NotSupportedError
 import base64
+import math
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
 
@@ -55,9 +61,9 @@ class SnowflakeClient(DataSourceClient):
         )
         self.warehouse = warehouse
 
-    @cached_property
+    @property
     def snowflake_engine(self):
-        """Return a SQLAlchemy engine configured for either password or keypair auth."""
+        """Return the pooled SQLAlchemy engine for either password or keypair auth."""
         connect_args = {
             "user": self.user,
             "account": self.account,
@@ -93,13 +99,11 @@ class SnowflakeClient(DataSourceClient):
             # Fallback to password-based auth
             connect_args["password"] = self.password
 
-        engine = sqlalchemy.create_engine(URL(**connect_args))
-        return engine
+        return get_engine_registry().get_engine(URL(**connect_args), connection_id=self.connection_id)
 
     @contextmanager
     def connect(self) -> Generator[sqlalchemy.engine.base.Connection, None, None]:
         """Yield a connection to a Snowflake database."""
-        engine = None
         conn = None
 
         try:
@@ -112,33 +116,117 @@ class SnowflakeClient(DataSourceClient):
         finally:
             if conn is not None:
                 conn.close()
-            if engine is not None:
-                engine.dispose()
 
     def execute_query(self, sql: str) -> pd.DataFrame:
-        """Run SQL statement."""
+        """Run SQL statement (up to the active result caps)."""
         try:
-            with self.connect() as conn:
-                # Wrap SQL query with text() to handle complex SQL
-                df = pd.read_sql(text(sql), conn)
-            return df
+            return collect_chunks(self.execute_query_stream(sql), sql)
         except Exception as e:
             print(f"Error executing SQL: {e}")
             raise
 
+    @contextmanager
+    def _result_cursor(self, sql: str):
+        """Raw connector cursor with `sql` executed, and its normalized column names.
+
+        Column names are normalized the way SQLAlchemy results are (unquoted upper-case
+        names become lower-case). The active query timeout is passed to the connector,
+        which cancels the statement server-side; `cancel()` cancels every query of the
+        session from a second connection.
+        """
+        with self.connect() as conn:
+            session_id = conn.connection.dbapi_connection.session_id
+            timeout = current_query_timeout()
+            cursor = conn.connection.cursor()
+            try:
+                with cancellable(self, lambda: self._cancel_session_queries(session_id)):
+                    cursor.execute(sql, timeout=max(1, math.ceil(timeout)) if timeout else None)
+                    columns = [conn.dialect.normalize_name(d[0]) or d[0] for d in (cursor.description or [])]
+                    yield cursor, columns
+            finally:
+                cursor.close()
+
+    def _cancel_session_queries(self, session_id: int) -> None:
+        with self.connect() as conn:
+            conn.execute(text(f"SELECT SYSTEM$CANCEL_ALL_QUERIES({int(session_id)})"))
+
+    def execute_query_stream(self, sql: str, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """Yield the result batch by batch from the connector's Arrow result chunks.
+
+        Results the connector can't return as Arrow (e.g. SHOW/DESCRIBE) are read in
+        pages of `chunk_rows` instead.
+        """
+        chunk_rows = chunk_rows or current_chunk_rows()
+        with self._result_cursor(sql) as (cursor, columns):
+            emitted = False
+            try:
+                for batch in cursor.fetch_pandas_batches():
+                    batch.columns = columns
+                    emitted = True
+                    yield batch
+            except NotSupportedError:
+                if emitted:
+                    raise
+                for df in self._fetch_pages(cursor, columns, chunk_rows):
+                    emitted = True
+                    yield df
+            if not emitted:
+                yield pd.DataFrame(columns=columns)
+
+    def execute_query_arrow_stream(self, sql: str, chunk_rows: Optional[int] = None) -> Iterator[pa.Table]:
+        """Yield the connector's Arrow result chunks as-is (no pandas step)."""
+        chunk_rows = chunk_rows or current_chunk_rows()
+        with self._result_cursor(sql) as (cursor, columns):
+            emitted = False
+            try:
+                for batch in cursor.fetch_arrow_batches():
+                    emitted = True
+                    yield batch.rename_columns(columns)
+            except NotSupportedError:
+                if emitted:
+                    raise
+                for df in self._fetch_pages(cursor, columns, chunk_rows):
+                    emitted = True
+                    yield pa.Table.from_pandas(df, preserve_index=False)
+            if not emitted:
+                yield pa.Table.from_arrays([pa.array([], pa.null()) for _ in columns], names=columns)
+
+    @staticmethod
+    def _fetch_pages(cursor, columns: List[str], chunk_rows: int) -> Iterator[pd.DataFrame]:
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield pd.DataFrame.from_records(rows, columns=columns)
+
     def get_tables(self) -> List[Table]:
         """Get all tables and their columns across one or more schemas.
         - Supports comma-separated schemas via the existing `schema` config field.
         - Always emits fully qualified table names: SCHEMA.TABLE
         """
+        return self.get_tables_in_schemas(self._schemas)
+
+    def list_schema_names(self) -> Optional[List[str]]:
+        if self._schemas:
+            return list(self._schemas)
+        with self.connect() as conn:
+            rows = conn.execute(text(f"""
+                SELECT schema_name FROM {self.database}.INFORMATION_SCHEMA.SCHEMATA
+                WHERE schema_name <> 'INFORMATION_SCHEMA'
+                ORDER BY schema_name
+            """)).fetchall()
+        return [r[0] for r in rows]
+
+    def get_tables_in_schemas(self, schemas: List[str]) -> List[Table]:
+        """Tables, columns and keys of the given schemas (all of the database if empty)."""
         tables = {}
         with self.connect() as conn:
             # Build WHERE clause for single vs multi schema
             params = {}
             where_clauses = []
-            if self._schemas:
+            if schemas:
                 in_keys = []
-                for idx, sch in enumerate(self._schemas):
+                for idx, sch in enumerate(schemas):
                     key = f"s{idx}"
                     in_keys.append(f":{key}")
                     params[key] = sch
@@ -167,8 +255,54 @@ class SnowflakeClient(DataSourceClient):
                     )
                 tables[key].columns.append(TableColumn(name=column_name, dtype=data_type))
 
+            self._attach_keys(conn, tables, schemas or ([self._primary_schema] if self._primary_schema else []))
+
         return list(tables.values())
 
+    def _attach_keys(self, conn, tables: Dict, schemas: List[str]) -> None:
+        """Declared keys via SHOW PRIMARY KEYS / SHOW IMPORTED KEYS, one statement each
+        per schema (or for the whole database)."""
+        scopes = [f"SCHEMA {self.database}.{s}" for s in schemas] or [f"DATABASE {self.database}"]
+        pk_rows, fk_rows = [], []
+        for scope in scopes:
+            pks = [r._mapping for r in fetch_key_rows(lambda: conn.execute(text(f"SHOW PRIMARY KEYS IN {scope}")).fetchall())]
+            for m in sorted(pks, key=lambda m: (m["schema_name"], m["table_name"], m["key_sequence"])):
+                pk_rows.append(((m["schema_name"], m["table_name"]), m["column_name"]))
+            fks = [r._mapping for r in fetch_key_rows(lambda: conn.execute(text(f"SHOW IMPORTED KEYS IN {scope}")).fetchall())]
+            for m in sorted(fks, key=lambda m: (m["fk_schema_name"], m["fk_table_name"], m["fk_name"], m["key_sequence"])):
+                fk_rows.append((
+                    (m["fk_schema_name"], m["fk_table_name"]),
+                    m["fk_column_name"],
+                    f"{m['pk_schema_name']}.{m['pk_table_name']}",
+                    m["pk_column_name"],
+                ))
+        attach_keys(tables, pk_rows, fk_rows)
+
+    def get_table_versions(self, tables: List[str]) -> Dict[str, Optional[str]]:
+        """LAST_ALTERED/ROW_COUNT/BYTES of each base table (unqualified names use the primary schema)."""
+        versions: Dict[str, Optional[str]] = {}
+        with self.connect() as conn:
+            for table in tables:
+                parts = [p.upper() for p in table.split(".")]
+                if len(parts) == 1:
+                    parts = [self.database.upper(), self._primary_schema or "PUBLIC"] + parts
+                elif len(parts) == 2:
+                    parts = [self.database.upper()] + parts
+                if len(parts) != 3:
+                    versions[table] = None
+                    continue
+                database, schema, name = parts
+                row = conn.execute(
+                    text(f"""
+                        SELECT last_altered, row_count, bytes
+                        FROM "{database}".INFORMATION_SCHEMA.TABLES
+                        WHERE table_schema = :schema AND table_name = :name AND table_type = 'BASE TABLE'
+                    """),
+                    {"schema": schema, "name": name},
+                ).fetchone()
+                versions[table] = f"{row[0]}:{row[1]}:{row[2]}" if row is not None and row[0] is not None else None
+        return versions
+
     def get_schema(self, table: str, schema: str) -> Table:
         """Return Table."""
         with self.connect() as conn:
@@ -8,6 +8,7 @@ import pandas as pd
 
 from app.ai.prompt_formatters import Table, TableColumn, TableFormatter
 from app.data_sources.clients.base import DataSourceClient
+from app.data_sources.query_control import interruptible
 
 
 class SqliteClient(DataSourceClient):
@@ -31,7 +32,7 @@ class SqliteClient(DataSourceClient):
 
     def execute_query(self, sql: str) -> pd.DataFrame:
         try:
-            with self.connect() as conn:
+            with self.connect() as conn, interruptible(self, conn.interrupt):
                 df = pd.read_sql_query(sql, conn)
             return df
         except Exception as exc:
@@ -0,0 +1,298 @@
+"""
+Local Parquet snapshots of remote DuckDB URI sources.
+
+A URI-mode DuckDB view over s3/gs/az/https files re-reads (and for CSV, re-parses)
+the remote objects on every query. With `materialize` on a connection, each remote
+URI is copied once into a ZSTD-compressed Parquet file under `cache_dir` and the view
+reads that file instead.
+
+Snapshots are built in the background on their own DuckDB connection; until one is
+ready (and while a changed source is rebuilt) the view reads the remote URI and is
+re-checked every `PENDING_RECHECK_SECONDS`. Sources whose size (from `read_blob` or
+Content-Length) exceeds the whole budget are not copied at all, and sources that
+failed to build or came out too large are not retried until their signature changes
+or `ttl_seconds` pass.
+
+A snapshot is used as-is for `ttl_seconds`; after that the source's signature (ETag /
+Last-Modified for http(s), file names + sizes + modification times from `read_blob`
+for object stores) is compared with the one recorded at build time, and the snapshot
+is only rebuilt when it changed. The directory is kept under `max_bytes` by evicting
+the least recently used snapshots. Anything that goes wrong falls back to the remote
+view.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Set, Tuple
+
+import duckdb
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_SUFFIX = ".parquet"
+_META_SUFFIX = ".json"
+
+REMOTE_SCHEMES = ("s3", "s3a", "gs", "gcs", "az", "abfss", "wasbs", "http", "https", "hf", "r2")
+# Views over a source whose snapshot is being built look for it again after this long
+PENDING_RECHECK_SECONDS = 15
+BUILD_THREADS = 2
+
+# (signature, source size in bytes); either may be unknown
+Probe = Tuple[Optional[str], Optional[int]]
+
+
+def blob_probe(con: duckdb.DuckDBPyConnection, uri: str) -> Probe:
+    """Hash of (file name, size, last modified) for the files `uri` matches, and their total size.
+
+    Only object listings are read, not content.
+    """
+    rows = con.execute(
+        "SELECT filename, size, last_modified FROM read_blob(?) ORDER BY filename", [uri]
+    ).fetchall()
+    if not rows:
+        return None, None
+    raw = "\n".join(f"{name}:{size}:{modified}" for name, size, modified in rows)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest(), sum(int(size or 0) for _, size, _ in rows)
+
+
+class SnapshotStore:
+    """Parquet snapshots + JSON sidecars in `cache_dir`, bounded by `max_bytes` with LRU eviction."""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._building: Set[str] = set()
+        # key -> (signature, retry after): failed or over-budget builds not to repeat
+        self._rejected: Dict[str, Tuple[Optional[str], float]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=BUILD_THREADS, thread_name_prefix="bow-duckdb-snapshot")
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(scope: str, uri: str) -> str:
+        return hashlib.sha256(f"{scope}\x00{uri}".encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, key)
+        return base + _SNAPSHOT_SUFFIX, base + _META_SUFFIX
+
+    def _lock(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _read_meta(self, key: str) -> Optional[dict]:
+        path, meta_path = self._paths(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, key: str, meta: dict) -> None:
+        _, meta_path = self._paths(key)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=_META_SUFFIX, dir=self.cache_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def materialize(
+        self,
+        scope: str,
+        uri: str,
+        select_sql: str,
+        probe: Callable[[], Probe],
+        ttl_seconds: float,
+        connect: Callable[[], duckdb.DuckDBPyConnection],
+    ) -> Tuple[Optional[str], float]:
+        """Path of an up-to-date snapshot of `select_sql` (None: query remotely) and when to ask again.
+
+        `scope` separates snapshots of different connections/credentials. Never copies
+        data itself: a missing or outdated snapshot is built in the background on a
+        connection from `connect` (set up with the source's credentials) and the
+        caller re-checks after `PENDING_RECHECK_SECONDS`.
+        """
+        key = self.key(scope, uri)
+        path, _ = self._paths(key)
+        with self._lock(key):
+            now = time.time()
+            meta = self._read_meta(key)
+            if meta is not None and now < meta.get("checked_at", 0) + ttl_seconds:
+                self._touch(path)
+                return path, meta["checked_at"] + ttl_seconds
+            if key in self._building:
+                return None, now + PENDING_RECHECK_SECONDS
+
+            try:
+                current, size = probe()
+            except Exception as e:
+                logger.info(f"Could not read signature of {uri}: {e}")
+                current, size = None, None
+            if meta is not None and current is not None and current == meta.get("signature"):
+                meta["checked_at"] = now
+                meta["expires_at"] = now + ttl_seconds
+                self._write_meta(key, meta)
+                self._touch(path)
+                return path, now + ttl_seconds
+
+            rejected = self._rejected.get(key)
+            if rejected is not None:
+                rejected_signature, retry_after = rejected
+                unchanged = current is None or current == rejected_signature
+                if unchanged and now < retry_after:
+                    return None, retry_after
+                del self._rejected[key]
+            if size is not None and size > self.max_bytes:
+                logger.info(f"Not materializing {uri}: {size} bytes exceed the snapshot budget of {self.max_bytes}")
+                self._rejected[key] = (current, now + ttl_seconds)
+                return None, now + ttl_seconds
+
+            self._building.add(key)
+        self._executor.submit(self._build_in_background, key, uri, select_sql, current, ttl_seconds, connect)
+        return None, time.time() + PENDING_RECHECK_SECONDS
+
+    def _build_in_background(
+        self,
+        key: str,
+        uri: str,
+        select_sql: str,
+        signature: Optional[str],
+        ttl_seconds: float,
+        connect: Callable[[], duckdb.DuckDBPyConnection],
+    ) -> None:
+        path, meta_path = self._paths(key)
+        size = None
+        try:
+            con = connect()
+            try:
+                size = self._build(con, path, select_sql)
+            finally:
+                con.close()
+        except Exception as e:
+            logger.warning(f"Materializing DuckDB source failed, querying it remotely: {e}")
+        with self._lock(key):
+            now = time.time()
+            if size is None or size > self.max_bytes:
+                if size is not None:
+                    logger.info(f"Snapshot of {uri} ({size} bytes) exceeds the budget of {self.max_bytes}")
+                    self._remove(path)
+                    self._remove(meta_path)
+                self._rejected[key] = (signature, now + ttl_seconds)
+            else:
+                self._write_meta(key, {
+                    "uri": uri,
+                    "signature": signature,
+                    "built_at": now,
+                    "checked_at": now,
+                    "expires_at": now + ttl_seconds,
+                    "size": size,
+                })
+            self._building.discard(key)
+        if size is not None:
+            self.evict()
+
+    def _build(self, con: duckdb.DuckDBPyConnection, path: str, select_sql: str) -> Optional[int]:
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=_SNAPSHOT_SUFFIX, dir=self.cache_dir)
+        os.close(fd)
+        try:
+            target = "'" + tmp_path.replace("'", "''") + "'"
+            con.execute(f"COPY ({select_sql}) TO {target} (FORMAT PARQUET, COMPRESSION ZSTD)")
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+            return size
+        except Exception as e:
+            logger.warning(f"Materializing DuckDB source failed, querying it remotely: {e}")
+            self._remove(tmp_path)
+            return None
+
+    def evict(self) -> int:
+        """Remove least recently used snapshots until the directory fits `max_bytes`.
+
+        Snapshots not yet due for a check may still be read by session views, so they
+        are kept even when that leaves the directory over budget for a while.
+        """
+        now = time.time()
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(_SNAPSHOT_SUFFIX) or entry.name.startswith(".tmp-"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            key = os.path.basename(path)[: -len(_SNAPSHOT_SUFFIX)]
+            meta = self._read_meta(key) or {}
+            if meta.get("expires_at", 0) > now:
+                continue
+            self._remove(path)
+            self._remove(self._paths(key)[1])
+            total -= size
+            evicted += 1
+        return evicted
+
+    def clear(self) -> None:
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith((_SNAPSHOT_SUFFIX, _META_SUFFIX)):
+                    self._remove(entry.path)
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+_stores: Dict[str, SnapshotStore] = {}
+_stores_lock = threading.Lock()
+
+
+def default_snapshot_dir() -> str:
+    return os.path.join(tempfile.gettempdir(), "bow-duckdb-snapshots")
+
+
+def default_ttl_seconds() -> int:
+    from app.settings.config import settings
+
+    config = settings.bow_config.duckdb_materialization if settings.bow_config else None
+    return config.default_ttl_seconds if config else 3600
+
+
+def get_snapshot_store(cache_dir: Optional[str] = None) -> SnapshotStore:
+    """Process-wide store for `cache_dir` (configured directory by default)."""
+    from app.settings.config import settings
+
+    config = settings.bow_config.duckdb_materialization if settings.bow_config else None
+    cache_dir = cache_dir or (config.cache_dir if config else None) or default_snapshot_dir()
+    with _stores_lock:
+        store = _stores.get(cache_dir)
+        if store is None:
+            store = SnapshotStore(
+                cache_dir,
+                max_bytes=config.max_bytes if config else 10 * 1024 * 1024 * 1024,
+            )
+            _stores[cache_dir] = store
+    return store
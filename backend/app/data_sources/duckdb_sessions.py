@@ -0,0 +1,285 @@
+"""
+Long-lived DuckDB sessions for URI-mode DuckDB data sources.
+
+`DuckDBClient.connect()` used to open a fresh in-memory database per call, then
+install/load httpfs (and azure), set credentials and create a view per URI pattern, so
+every query and every DESCRIBE in `get_tables` paid the whole setup again. Sessions
+here do that once per process and data source, with DuckDB's object cache and HTTP
+metadata cache turned on; each query gets its own cursor (a thread-safe connection
+to the same in-memory database).
+
+The database is shared by every query of a data source, so clients only run reads,
+temporary objects and session-scoped SET on it (see `DuckDBClient._execute`): DDL,
+global settings, secrets and tables created by one query would otherwise persist into
+the next user's queries. Temporary objects and session settings belong to the cursor
+and go away when it is released.
+
+Sessions are keyed by connection id + a fingerprint of the URI list and credentials,
+so a changed configuration never reuses stale views; `invalidate(connection_id)`
+also retires them when a Connection is updated or deleted (closed once their last
+cursor is released), and `refresh()` re-creates a session's views in place. A setup may return a time after
+which its views must be re-created (local snapshots due for a check, see
+`duckdb_materialization`); `refresh_if_expired()` does that. `.duckdb` file data
+sources keep short-lived read-only connections so other processes can still write to
+the file.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import duckdb
+
+logger = logging.getLogger(__name__)
+
+# Sets up a fresh database; may return a time.time() after which it must run again
+Setup = Callable[[duckdb.DuckDBPyConnection], Optional[float]]
+
+_CACHE_SETTINGS = (
+    "SET enable_object_cache=true;",
+    "SET enable_http_metadata_cache=true;",
+)
+
+
+class SessionRetired(Exception):
+    """The session was invalidated after it was handed out; get a new one."""
+
+
+class DuckDBSession:
+    """One in-memory database with extensions, settings and views set up."""
+
+    def __init__(self, setup: Setup, connection_id: Optional[str] = None):
+        self.connection_id = connection_id
+        self._setup = setup
+        # Wall-clock time after which the views must be re-created, if any
+        self.expires_at: Optional[float] = None
+        self._lock = threading.Lock()
+        # Serializes refreshes only; cursors keep being handed out while views are re-created
+        self._refresh_lock = threading.Lock()
+        self._active = 0
+        self._retired = False
+        self._closed = False
+        self.last_used = time.monotonic()
+        self._con = duckdb.connect(database=":memory:")
+        try:
+            self._initialize(self._con)
+        except Exception:
+            self._con.close()
+            raise
+
+    def _initialize(self, con: duckdb.DuckDBPyConnection) -> None:
+        for statement in _CACHE_SETTINGS:
+            try:
+                con.execute(statement)
+            except duckdb.Error:
+                # Older DuckDB builds without the setting
+                pass
+        self.expires_at = self._setup(con)
+
+    def open_cursor(self) -> duckdb.DuckDBPyConnection:
+        """A cursor on the session's database; pair with `release`. Raises SessionRetired."""
+        with self._lock:
+            if self._retired:
+                raise SessionRetired()
+            self._active += 1
+            self.last_used = time.monotonic()
+            return self._con.cursor()
+
+    def release(self, cur: duckdb.DuckDBPyConnection) -> None:
+        try:
+            cur.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._active -= 1
+            self.last_used = time.monotonic()
+            close = self._retired and self._active == 0
+        if close:
+            self.close()
+
+    @contextmanager
+    def cursor(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        cur = self.open_cursor()
+        try:
+            yield cur
+        finally:
+            self.release(cur)
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.time() >= self.expires_at
+
+    def refresh(self, only_if_expired: bool = False) -> None:
+        """Re-run the setup on the live database.
+
+        Views are CREATE OR REPLACE, so queries running on other cursors never see a
+        missing view. A retired session is left alone.
+        """
+        with self._refresh_lock:
+            if only_if_expired and not self.expired():
+                return
+            try:
+                cur = self.open_cursor()
+            except SessionRetired:
+                return
+            try:
+                self.expires_at = self._setup(cur)
+            finally:
+                self.release(cur)
+
+    def refresh_if_expired(self) -> None:
+        if self.expired():
+            self.refresh(only_if_expired=True)
+
+    def retire(self) -> None:
+        """Refuse new cursors and close once running queries have released theirs."""
+        with self._lock:
+            self._retired = True
+            close = self._active == 0
+        if close:
+            self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self._con.close()
+        except Exception as e:
+            logger.warning(f"Failed to close DuckDB session: {e}")
+
+
+class DuckDBSessionManager:
+    """Process-wide set of DuckDB sessions, evicted when idle or over capacity."""
+
+    def __init__(self, idle_timeout_seconds: int = 900, max_sessions: int = 32):
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.max_sessions = max_sessions
+        self._sessions: Dict[Tuple[str, str], DuckDBSession] = {}
+        self._creating: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @staticmethod
+    def fingerprint(config: Dict[str, Any]) -> str:
+        raw = repr(sorted((k, str(v)) for k, v in config.items()))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_session(
+        self,
+        config: Dict[str, Any],
+        setup: Setup,
+        connection_id: Optional[str] = None,
+    ) -> DuckDBSession:
+        key = (str(connection_id or ""), self.fingerprint(config))
+        with self._lock:
+            self._check_fork()
+            session = self._sessions.get(key)
+            if session is not None:
+                session.last_used = time.monotonic()
+                return session
+            creating = self._creating.setdefault(key, threading.Lock())
+        # Setup (extension installs) can be slow: hold only this key's lock for it, so
+        # concurrent first queries of one data source wait for a single setup
+        with creating:
+            with self._lock:
+                session = self._sessions.get(key)
+            if session is not None:
+                return session
+            try:
+                session = DuckDBSession(setup, key[0] or None)
+                with self._lock:
+                    self._evict_locked()
+                    self._sessions[key] = session
+            finally:
+                with self._lock:
+                    self._creating.pop(key, None)
+            return session
+
+    def invalidate(self, connection_id: str) -> int:
+        connection_id = str(connection_id)
+        with self._lock:
+            keys = [k for k, s in self._sessions.items() if s.connection_id == connection_id]
+            sessions = [self._sessions.pop(k) for k in keys]
+        for session in sessions:
+            session.retire()
+        return len(sessions)
+
+    def refresh(self, connection_id: str) -> int:
+        """Re-create the views of a connection's sessions (e.g. new files under a prefix)."""
+        connection_id = str(connection_id)
+        with self._lock:
+            sessions = [s for s in self._sessions.values() if s.connection_id == connection_id]
+        for session in sessions:
+            session.refresh()
+        return len(sessions)
+
+    def close_all(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.retire()
+
+    def _check_fork(self) -> None:
+        # A forked child must not share the parent's database handles
+        if os.getpid() != self._pid:
+            self._sessions.clear()
+            self._creating.clear()
+            self._pid = os.getpid()
+
+    def _evict_locked(self) -> None:
+        now = time.monotonic()
+        idle = [
+            k for k, s in self._sessions.items()
+            if now - s.last_used > self.idle_timeout_seconds and s.active == 0
+        ]
+        for key in idle:
+            self._sessions.pop(key).retire()
+        if len(self._sessions) >= self.max_sessions:
+            candidates = sorted((s.last_used, k) for k, s in self._sessions.items() if s.active == 0)
+            for _, key in candidates[: len(self._sessions) - self.max_sessions + 1]:
+                self._sessions.pop(key).retire()
+
+
+_manager: Optional[DuckDBSessionManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_duckdb_session_manager() -> DuckDBSessionManager:
+    global _manager
+    if _manager is not None:
+        return _manager
+    from app.settings.config import settings
+
+    config = settings.bow_config.duckdb_sessions if settings.bow_config else None
+    with _manager_lock:
+        if _manager is None:
+            if config is None:
+                _manager = DuckDBSessionManager()
+            else:
+                _manager = DuckDBSessionManager(
+                    idle_timeout_seconds=config.idle_timeout_seconds,
+                    max_sessions=config.max_sessions,
+                )
+    return _manager
+
+
+def invalidate_duckdb_sessions(connection_id: str) -> None:
+    if _manager is not None:
+        _manager.invalidate(connection_id)
+
+
+def close_duckdb_sessions() -> None:
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.close_all()
+            _manager = None
@@ -0,0 +1,200 @@
+"""
+Process-wide registry of SQLAlchemy engines for data source clients.
+
+Clients used to create and dispose an engine around every `execute_query`/`get_tables`
+call, paying a TCP+TLS+auth handshake per query. They now borrow a pooled engine from
+here, keyed by connection id + a fingerprint of the URL/connect args (which include
+the credentials), plus any per-client session scope (e.g. a Postgres search_path).
+
+Because credentials are part of the key, a changed password or per-user credentials
+never reuse a stale engine; `invalidate(connection_id)` additionally disposes the
+connection's engines right away when a Connection is updated or deleted. Engines that
+have no checked-out connections and were not used for `idle_timeout_seconds` are
+disposed on the next lookup.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import sqlalchemy
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import URL
+
+logger = logging.getLogger(__name__)
+
+
+def _render_url(url: Any) -> str:
+    if isinstance(url, URL):
+        return url.render_as_string(hide_password=False)
+    return str(url)
+
+
+class _Entry:
+    __slots__ = ("engine", "connection_id", "last_used")
+
+    def __init__(self, engine: Engine, connection_id: Optional[str]):
+        self.engine = engine
+        self.connection_id = connection_id
+        self.last_used = time.monotonic()
+
+
+class EngineRegistry:
+    """Bounded set of pooled engines, shared by all clients in the process."""
+
+    def __init__(
+        self,
+        pool_size: int = 5,
+        max_overflow: int = 5,
+        pool_recycle: int = 1800,
+        pool_timeout: int = 30,
+        idle_timeout_seconds: int = 600,
+        max_engines: int = 64,
+    ):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_recycle = pool_recycle
+        self.pool_timeout = pool_timeout
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.max_engines = max_engines
+        self._engines: Dict[Tuple[str, str], _Entry] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @staticmethod
+    def fingerprint(url: Any, connect_args: Optional[Dict] = None, scope: Any = None) -> str:
+        raw = "\x00".join((_render_url(url), repr(sorted((connect_args or {}).items())), repr(scope)))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_engine(
+        self,
+        url: Any,
+        *,
+        connection_id: Optional[str] = None,
+        connect_args: Optional[Dict] = None,
+        scope: Any = None,
+    ) -> Engine:
+        """Return the pooled engine for this URL/credentials, creating it on first use.
+
+        `scope` is extra key material for session state a client sets on checkout
+        (search_path, current schema), so clients that differ only there don't share
+        connections.
+        """
+        key = (str(connection_id or ""), self.fingerprint(url, connect_args, scope))
+        with self._lock:
+            self._check_fork()
+            entry = self._engines.get(key)
+            if entry is None:
+                self._evict_locked()
+                kwargs = {
+                    "pool_size": self.pool_size,
+                    "max_overflow": self.max_overflow,
+                    "pool_recycle": self.pool_recycle,
+                    "pool_timeout": self.pool_timeout,
+                    "pool_pre_ping": True,
+                }
+                if connect_args:
+                    kwargs["connect_args"] = connect_args
+                entry = _Entry(sqlalchemy.create_engine(url, **kwargs), key[0] or None)
+                self._engines[key] = entry
+            entry.last_used = time.monotonic()
+            return entry.engine
+
+    def invalidate(self, connection_id: str) -> int:
+        """Dispose every engine of a connection (config or credentials changed)."""
+        connection_id = str(connection_id)
+        with self._lock:
+            keys = [k for k, e in self._engines.items() if e.connection_id == connection_id]
+            entries = [self._engines.pop(k) for k in keys]
+        for entry in entries:
+            self._dispose(entry.engine)
+        if entries:
+            logger.info(f"Disposed {len(entries)} pooled engine(s) for connection {connection_id}")
+        return len(entries)
+
+    def dispose_all(self) -> None:
+        with self._lock:
+            entries = list(self._engines.values())
+            self._engines.clear()
+        for entry in entries:
+            self._dispose(entry.engine)
+
+    def _check_fork(self) -> None:
+        # Pooled sockets must not be shared with a forked child; drop them without closing
+        if os.getpid() != self._pid:
+            for entry in self._engines.values():
+                entry.engine.dispose(close=False)
+            self._engines.clear()
+            self._pid = os.getpid()
+
+    def _evict_locked(self) -> None:
+        now = time.monotonic()
+        idle = [
+            k for k, e in self._engines.items()
+            if now - e.last_used > self.idle_timeout_seconds and self._checked_out(e.engine) == 0
+        ]
+        for key in idle:
+            self._dispose(self._engines.pop(key).engine)
+        # Over capacity: drop the least recently used engines that are not in use
+        if len(self._engines) >= self.max_engines:
+            candidates = sorted(
+                (e.last_used, k) for k, e in self._engines.items() if self._checked_out(e.engine) == 0
+            )
+            for _, key in candidates[: len(self._engines) - self.max_engines + 1]:
+                self._dispose(self._engines.pop(key).engine)
+
+    @staticmethod
+    def _checked_out(engine: Engine) -> int:
+        try:
+            return engine.pool.checkedout()
+        except Exception:
+            return 0
+
+    @staticmethod
+    def _dispose(engine: Engine) -> None:
+        try:
+            engine.dispose()
+        except Exception as e:
+            logger.warning(f"Failed to dispose engine: {e}")
+
+
+_registry: Optional[EngineRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_engine_registry() -> EngineRegistry:
+    global _registry
+    if _registry is not None:
+        return _registry
+    from app.settings.config import settings
+
+    config = settings.bow_config.data_source_engines if settings.bow_config else None
+    with _registry_lock:
+        if _registry is None:
+            if config is None:
+                _registry = EngineRegistry()
+            else:
+                _registry = EngineRegistry(
+                    pool_size=config.pool_size,
+                    max_overflow=config.max_overflow,
+                    pool_recycle=config.pool_recycle,
+                    pool_timeout=config.pool_timeout,
+                    idle_timeout_seconds=config.idle_timeout_seconds,
+                    max_engines=config.max_engines,
+                )
+    return _registry
+
+
+def invalidate_connection_engines(connection_id: str) -> None:
+    if _registry is not None:
+        _registry.invalidate(connection_id)
+
+
+def dispose_engine_registry() -> None:
+    global _registry
+    with _registry_lock:
+        if _registry is not None:
+            _registry.dispose_all()
+            _registry = None
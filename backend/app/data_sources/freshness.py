@@ -0,0 +1,213 @@
+"""
+Input freshness for step reruns.
+
+A step's inputs are the tables named in the SQL it passes to
+`db_clients[<name>].execute_query(...)`, found statically in its code. Each client can
+return a cheap change signal per table (`DataSourceClient.get_table_versions`):
+pg_stat counters for Postgres, UPDATE_TIME for MySQL, LAST_ALTERED for Snowflake,
+`modified` for BigQuery, file mtimes/ETags for DuckDB.
+
+Skipping is strictly opt-in per step: whenever anything is not known for sure (dynamic
+SQL, file reads, time-dependent code or SQL, views, a table without a signal), the
+step is treated as stale and re-executed.
+"""
+import ast
+import asyncio
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Steps touching any of these are never skipped: their result depends on more than tables
+_NONDETERMINISTIC_CODE = re.compile(
+    r"excel_files\s*\[|for\s+\w+\s+in\s+excel_files|pd\.read_|\bopen\(|requests\.|urlopen|"
+    r"\.now\(|\.today\(|\.utcnow\(|time\.time\(|random"
+)
+_NONDETERMINISTIC_SQL = re.compile(
+    r"\b(current_date|current_time|current_timestamp|localtime|localtimestamp|now|getdate|"
+    r"sysdate|systimestamp|today|rand|random|uuid|newid|gen_random_uuid)\b",
+    re.IGNORECASE,
+)
+
+_IDENT = r'(?:"[^"]+"|`[^`]+`|\[[^\]]+\]|[A-Za-z_][\w$]*)'
+_QUALIFIED = rf"{_IDENT}(?:\s*\.\s*{_IDENT})*"
+_ALIAS_STOP = {
+    "where", "join", "inner", "left", "right", "full", "cross", "outer", "natural", "on",
+    "using", "group", "order", "limit", "having", "union", "except", "intersect", "window",
+    "qualify", "offset", "fetch", "lateral", "pivot", "unpivot", "tablesample", "for",
+}
+_FROM_OR_JOIN = re.compile(rf"\b(?:from|join)\s+({_QUALIFIED})(\s*\()?", re.IGNORECASE)
+_COMMA_TABLE = re.compile(rf"\s+(?:as\s+)?({_IDENT})|\s*,\s*({_QUALIFIED})(\s*\()?", re.IGNORECASE)
+_CTE_NAME = re.compile(rf"(?:\bwith(?:\s+recursive)?|,)\s*({_IDENT})\s*(?:\([^)]*\))?\s+as\s*\(", re.IGNORECASE)
+_JOIN_CONDITION = re.compile(r"\b(?:on|using)\b", re.IGNORECASE)
+_DERIVED_TABLE = re.compile(r"\b(?:from|join|,)\s*\(", re.IGNORECASE)
+_DERIVED_ALIAS_COMMA = re.compile(rf"\s*(?:as\s+)?(?:{_IDENT})?\s*(?:\([^)]*\))?\s*,", re.IGNORECASE)
+_CLAUSE_END = re.compile(
+    r"\b(?:where|join|group|order|limit|having|union|except|intersect|window|qualify|select)\b", re.IGNORECASE
+)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def _unquote(name: str) -> str:
+    parts = re.findall(_IDENT, name)
+    return ".".join(p.strip('"`[]') for p in parts)
+
+
+def _missed_cross_join(text: str) -> bool:
+    """True for comma joins the FROM/JOIN regexes can't follow.
+
+    "a JOIN b ON ..., c" and "FROM (SELECT ...) s, c" both read `c` without a FROM/JOIN
+    keyword in front of it.
+    """
+    for match in _JOIN_CONDITION.finditer(text):
+        depth = 0
+        pos = match.end()
+        while pos < len(text):
+            ch = text[pos]
+            if ch == "(":
+                depth += 1
+            elif ch == ")":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif depth == 0:
+                if ch == ",":
+                    return True
+                if _CLAUSE_END.match(text, pos) and not (text[pos - 1].isalnum() or text[pos - 1] == "_"):
+                    break
+            pos += 1
+    for match in _DERIVED_TABLE.finditer(text):
+        depth = 1
+        pos = match.end()
+        while pos < len(text) and depth:
+            depth += {"(": 1, ")": -1}.get(text[pos], 0)
+            pos += 1
+        if _DERIVED_ALIAS_COMMA.match(text, pos):
+            return True
+    return False
+
+
+def tables_in_sql(sql: str) -> Optional[List[str]]:
+    """Tables a SELECT reads from; None if the statement can't be analysed safely."""
+    text = _STRING_LITERAL.sub("''", _COMMENT.sub(" ", sql))
+    if _NONDETERMINISTIC_SQL.search(text) or _missed_cross_join(text):
+        return None
+    ctes = {_unquote(m.group(1)).lower() for m in _CTE_NAME.finditer(text)}
+    tables: List[str] = []
+    for match in _FROM_OR_JOIN.finditer(text):
+        if match.group(2):
+            # FROM some_function(...): table functions read things we can't probe
+            return None
+        names = [match.group(1)]
+        pos = match.end()
+        # Comma-separated FROM lists: "FROM a x, b AS y, c"
+        while True:
+            more = _COMMA_TABLE.match(text, pos)
+            if not more:
+                break
+            if more.group(1) is not None:
+                if more.group(1).lower() in _ALIAS_STOP:
+                    break
+                pos = more.end()
+                continue
+            if more.group(3):
+                return None
+            names.append(more.group(2))
+            pos = more.end()
+        for name in names:
+            table = _unquote(name)
+            if table.lower() not in ctes and table not in tables:
+                tables.append(table)
+    return tables
+
+
+def _literal_strings(tree: ast.AST) -> Dict[str, str]:
+    """Names bound exactly once to a string constant anywhere in the code."""
+    values: Dict[str, Optional[str]] = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            value = node.value.value if isinstance(node.value, ast.Constant) and isinstance(node.value.value, str) else None
+            values[name] = value if name not in values else None
+    return {k: v for k, v in values.items() if v is not None}
+
+
+def step_inputs(code: str, data_source_names: List[str]) -> Optional[Dict[str, List[str]]]:
+    """{data source name: [tables]} read by `code`, or None if it can't be determined."""
+    if not code or _NONDETERMINISTIC_CODE.search(code):
+        return None
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    strings = _literal_strings(tree)
+    inputs: Dict[str, List[str]] = {}
+    found = False
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "execute_query"):
+            continue
+        found = True
+        target = node.func.value
+        ds_name = None
+        if isinstance(target, ast.Subscript) and isinstance(target.slice, ast.Constant):
+            ds_name = target.slice.value
+        elif len(data_source_names) == 1:
+            ds_name = data_source_names[0]
+        if ds_name not in data_source_names:
+            return None
+        args = list(node.args) + [kw.value for kw in node.keywords if kw.arg in ("sql", "query")]
+        if len(args) != 1:
+            return None
+        arg = args[0]
+        if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+            sql = arg.value
+        elif isinstance(arg, ast.Name) and arg.id in strings:
+            sql = strings[arg.id]
+        else:
+            return None
+        tables = tables_in_sql(sql)
+        if not tables:
+            return None
+        bucket = inputs.setdefault(ds_name, [])
+        bucket.extend(t for t in tables if t not in bucket)
+    return inputs if found else None
+
+
+async def probe_versions(clients: Dict[str, Any], inputs: Dict[str, List[str]]) -> Optional[Dict[str, Dict[str, str]]]:
+    """Current change signal of every input table, or None if any is unknown."""
+
+    async def _probe(ds_name: str, tables: List[str]):
+        client = clients.get(ds_name)
+        if client is None or not hasattr(client, "get_table_versions"):
+            return ds_name, None
+        try:
+            return ds_name, await asyncio.to_thread(client.get_table_versions, tables)
+        except Exception as e:
+            logger.info(f"Freshness probe failed for {ds_name}: {e}")
+            return ds_name, None
+
+    versions: Dict[str, Dict[str, str]] = {}
+    for ds_name, result in await asyncio.gather(*(_probe(n, t) for n, t in inputs.items())):
+        if result is None:
+            return None
+        signals = {table: result.get(table) for table in inputs[ds_name]}
+        if any(v is None for v in signals.values()):
+            return None
+        versions[ds_name] = {t: str(v) for t, v in signals.items()}
+    return versions
+
+
+def freshness_record(code_key: str, versions: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
+    """Value stored in `Step.freshness` after a successful run."""
+    return {
+        "code": code_key,
+        "versions": versions,
+        "checked_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def is_unchanged(record: Optional[Dict[str, Any]], code_key: str, versions: Optional[Dict[str, Dict[str, str]]]) -> bool:
+    return bool(record) and versions is not None and record.get("code") == code_key and record.get("versions") == versions
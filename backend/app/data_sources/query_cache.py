@@ -0,0 +1,346 @@
+"""
+Connection-scoped cache for `execute_query` results.
+
+Generated code calls `db_clients[name].execute_query(sql)`; retries, inspect_data ->
+create_data and dashboard reruns often issue the same SQL again. `CachingClient` wraps a
+data source client and serves repeated queries from Arrow IPC files keyed by
+connection id + credential fingerprint + normalized SQL.
+
+Entries live in a shared directory (not process memory) so code execution pool
+workers and the web process see the same cache. Hits are read from a memory map and
+converted into regular writable frames, since generated code routinely modifies the
+result in place. Each entry carries its expiry in the Arrow schema metadata; the
+directory is kept under `max_bytes` by evicting the least recently used files (mtime
+is bumped on every hit).
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+from app.data_sources.client_executor import run_client_call
+from app.data_sources.result_limits import truncation_count
+
+logger = logging.getLogger(__name__)
+
+_ENTRY_SUFFIX = ".arrow"
+_EXPIRES_KEY = b"bow.expires_at"
+
+# Quoted literals/identifiers, or runs of whitespace and comments, in one pass so
+# that whitespace and comment markers inside literals are left untouched.
+_SQL_TOKENS = re.compile(
+    r"""(?P<literal>'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`)"""
+    r"""|(?P<gap>(?:\s+|--[^\n]*|/\*.*?\*/)+)""",
+    re.DOTALL,
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """Drop comments, collapse whitespace outside literals and trailing semicolons."""
+
+    def _replace(match):
+        if match.group("literal") is not None:
+            return match.group("literal")
+        return " "
+
+    normalized = _SQL_TOKENS.sub(_replace, sql).strip()
+    return normalized.rstrip(";").rstrip()
+
+
+def client_fingerprint(client: Any) -> str:
+    """Hash of a client's scalar attributes (host, database, user, secrets, ...).
+
+    Two users on a `user_required` connection get different fingerprints, so their
+    results never share cache entries.
+    """
+    items = sorted(
+        (k, repr(v))
+        for k, v in vars(client).items()
+        if isinstance(v, (str, int, float, bool)) or v is None
+    )
+    return hashlib.sha256(f"{type(client).__name__}:{items}".encode("utf-8")).hexdigest()
+
+
+class QueryCacheMetrics:
+    """Process-local hit/miss counters. Pool workers ship theirs back with each job.
+
+    The web process logs the merged totals every `LOG_INTERVAL_SECONDS` (`log_if_due`).
+    """
+
+    FIELDS = ("hits", "misses", "stores", "evictions", "bytes_served")
+    LOG_INTERVAL_SECONDS = 300
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {name: 0 for name in self.FIELDS}
+        self._last_logged = time.monotonic()
+
+    def incr(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += value
+
+    def merge(self, counts: Optional[Dict[str, int]]) -> None:
+        if not counts:
+            return
+        with self._lock:
+            for name in self.FIELDS:
+                self._counts[name] += int(counts.get(name, 0))
+
+    def drain(self) -> Dict[str, int]:
+        """Return the counters and reset them to zero."""
+        with self._lock:
+            counts = dict(self._counts)
+            self._counts = {name: 0 for name in self.FIELDS}
+        return counts
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_ratio"] = (counts["hits"] / lookups) if lookups else 0.0
+        return counts
+
+    def log_if_due(self) -> None:
+        """Log cumulative counters at most once per `LOG_INTERVAL_SECONDS`."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_logged < self.LOG_INTERVAL_SECONDS:
+                return
+            self._last_logged = now
+        counts = self.snapshot()
+        if counts["hits"] or counts["misses"]:
+            logger.info(
+                "Query cache: %(hits)d hits, %(misses)d misses (ratio %(hit_ratio).2f), "
+                "%(stores)d stores, %(evictions)d evictions, %(bytes_served)d bytes served" % counts
+            )
+
+
+query_cache_metrics = QueryCacheMetrics()
+
+
+class QueryResultCache:
+    """Arrow IPC files in `cache_dir`, bounded by `max_bytes` with LRU eviction."""
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_entry_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+        self.max_entry_bytes = int(max_entry_bytes) if max_entry_bytes else self.max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + _ENTRY_SUFFIX)
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        path = self._path(key)
+        try:
+            source = pa.memory_map(path, "r")
+        except (FileNotFoundError, OSError):
+            return None
+        try:
+            table = pa.ipc.open_file(source).read_all()
+        except pa.ArrowException:
+            self._remove(path)
+            return None
+        expires_at = float((table.schema.metadata or {}).get(_EXPIRES_KEY, b"0"))
+        if expires_at < time.time():
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        query_cache_metrics.incr("bytes_served", table.nbytes)
+        # Not split_blocks/zero-copy: those arrays alias the read-only map and reject in-place writes
+        return table.to_pandas()
+
+    def put(self, key: str, df: Any, ttl_seconds: float) -> bool:
+        """Store `df`; returns False for results Arrow can't hold or that are too large."""
+        if not isinstance(df, pd.DataFrame) or not all(isinstance(c, str) for c in df.columns):
+            return False
+        try:
+            table = pa.Table.from_pandas(df)
+        except (pa.ArrowException, TypeError, ValueError):
+            return False
+        if table.nbytes > self.max_entry_bytes:
+            return False
+        metadata = dict(table.schema.metadata or {})
+        metadata[_EXPIRES_KEY] = str(time.time() + ttl_seconds).encode()
+        table = table.replace_schema_metadata(metadata)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=_ENTRY_SUFFIX, dir=self.cache_dir)
+        os.close(fd)
+        try:
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+        return True
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the directory fits `max_bytes`."""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(_ENTRY_SUFFIX) or entry.name.startswith(".tmp-"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return 0
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            evicted += 1
+        query_cache_metrics.incr("evictions", evicted)
+        return evicted
+
+    def clear(self) -> None:
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(_ENTRY_SUFFIX):
+                    self._remove(entry.path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+_caches: Dict[str, QueryResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def default_cache_dir() -> str:
+    return os.path.join(tempfile.gettempdir(), "bow-query-cache")
+
+
+def get_query_result_cache(cache_dir: Optional[str] = None) -> QueryResultCache:
+    """Process-wide cache instance for `cache_dir` (configured directory by default)."""
+    from app.settings.config import settings
+
+    config = settings.bow_config.query_cache if settings.bow_config else None
+    cache_dir = cache_dir or (config.cache_dir if config else None) or default_cache_dir()
+    with _caches_lock:
+        cache = _caches.get(cache_dir)
+        if cache is None:
+            cache = QueryResultCache(
+                cache_dir,
+                max_bytes=config.max_bytes if config else 512 * 1024 * 1024,
+                max_entry_bytes=config.max_entry_bytes if config else None,
+            )
+            _caches[cache_dir] = cache
+    return cache
+
+
+class CachingClient:
+    """Wraps a data source client; caches single-statement `execute_query` calls.
+
+    Everything else (get_schemas, test_connection, attributes) is delegated to the
+    wrapped client. Picklable as long as the wrapped client is, so it can be shipped
+    to code execution workers.
+    """
+
+    def __init__(self, client: Any, connection_id: str, ttl_seconds: float, cache_dir: Optional[str] = None):
+        self.client = client
+        self.connection_id = str(connection_id)
+        self.ttl_seconds = float(ttl_seconds)
+        self.cache_dir = cache_dir
+        self.fingerprint = client_fingerprint(client)
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set in __init__
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def cache_key(self, sql: str) -> str:
+        raw = "\x00".join((self.connection_id, self.fingerprint, normalize_sql(sql)))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def execute_query(self, *args, **kwargs):
+        sql = args[0] if len(args) == 1 and not kwargs else None
+        if sql is None and not args and len(kwargs) == 1:
+            sql = kwargs.get("sql", kwargs.get("query"))
+        if not isinstance(sql, str) or self.ttl_seconds <= 0:
+            return self.client.execute_query(*args, **kwargs)
+
+        cache = get_query_result_cache(self.cache_dir)
+        key = self.cache_key(sql)
+        try:
+            cached = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Query cache read failed: {e}")
+            cached = None
+        if cached is not None:
+            query_cache_metrics.incr("hits")
+            return cached
+
+        query_cache_metrics.incr("misses")
+        truncated_before = truncation_count()
+        df = self.client.execute_query(*args, **kwargs)
+        if truncation_count() != truncated_before:
+            # A capped (partial) result must not be served as the full one later
+            return df
+        try:
+            if cache.put(key, df, self.ttl_seconds):
+                query_cache_metrics.incr("stores")
+        except Exception as e:
+            logger.warning(f"Query cache write failed: {e}")
+        return df
+
+    async def aexecute_query(self, sql: str):
+        # Goes through the cache, so not delegated to the wrapped client's async method
+        return await run_client_call(self.execute_query, sql)
+
+
+def wrap_clients(clients: Dict[str, Any], data_sources, organization_settings) -> Dict[str, Any]:
+    """Wrap `clients` (keyed by data source name) in CachingClient when the org opted in."""
+    if organization_settings is None or not clients:
+        return clients
+    enabled = organization_settings.get_config("enable_query_cache")
+    if not (enabled and enabled.value):
+        return clients
+    ttl = organization_settings.get_config("query_cache_ttl_seconds")
+    ttl_seconds = ttl.value if ttl and ttl.value is not None else None
+    if ttl_seconds is None:
+        from app.settings.config import settings
+
+        config = settings.bow_config.query_cache if settings.bow_config else None
+        ttl_seconds = config.default_ttl_seconds if config else 300
+    wrapped = dict(clients)
+    for data_source in data_sources or []:
+        client = clients.get(data_source.name)
+        connections = getattr(data_source, "connections", None) or []
+        if client is None or not connections or isinstance(client, CachingClient):
+            continue
+        wrapped[data_source.name] = CachingClient(client, connections[0].id, ttl_seconds)
+    return wrapped
+
+
+async def wrap_clients_for_organization(db, clients: Dict[str, Any], data_sources, organization_id: str) -> Dict[str, Any]:
+    """`wrap_clients` for callers that only have the organization id at hand."""
+    from sqlalchemy import select
+    from app.models.organization_settings import OrganizationSettings
+
+    result = await db.execute(select(OrganizationSettings).where(OrganizationSettings.organization_id == str(organization_id)))
+    return wrap_clients(clients, data_sources, result.scalar_one_or_none())
@@ -0,0 +1,137 @@
+"""
+Statement timeouts and cancellation for queries issued by generated code.
+
+A code execution runs inside `query_control(...)`, which carries the per-query
+timeout (applied server-side where the database supports one: Postgres
+`statement_timeout`, MySQL `MAX_EXECUTION_TIME`, MariaDB `max_statement_time`,
+BigQuery `job_timeout_ms`, Snowflake's statement timeout) and collects a cancel
+callback for every query that is running. `QueryControl.cancel()` (wired to the
+completion's sigkill) calls them from another thread: Postgres cancel requests,
+`KILL QUERY`, Snowflake `SYSTEM$CANCEL_ALL_QUERIES`, BigQuery job cancel, DuckDB
+`interrupt()`. `DataSourceClient.cancel()` does the same for one client's queries.
+
+Clients wrap the blocking part of a query in `cancellable(self, cancel_fn)`, or in
+`interruptible(self, interrupt_fn)` when the driver has no server-side timeout.
+"""
+import contextvars
+import itertools
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCancelled(Exception):
+    """The code execution was cancelled before a query could start."""
+
+
+class QueryControl:
+    """Timeout and running-query registry of one code execution."""
+
+    def __init__(self, timeout_seconds: Optional[float] = None):
+        self.timeout_seconds = timeout_seconds or None
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._running: Dict[int, Callable[[], Any]] = {}
+
+    def _register(self, token: int, cancel: Callable[[], Any]) -> None:
+        with self._lock:
+            self._running[token] = cancel
+
+    def _unregister(self, token: int) -> None:
+        with self._lock:
+            self._running.pop(token, None)
+
+    def cancel(self) -> int:
+        """Cancel running queries and refuse new ones; returns how many were signalled."""
+        with self._lock:
+            self.cancelled = True
+            callbacks = list(self._running.values())
+        return _call_all(callbacks)
+
+
+_current: contextvars.ContextVar[Optional[QueryControl]] = contextvars.ContextVar("bow_query_control", default=None)
+_tokens = itertools.count()
+# Running queries per client (id(client) -> token -> cancel), for DataSourceClient.cancel()
+_by_client: Dict[int, Dict[int, Callable[[], Any]]] = {}
+_by_client_lock = threading.Lock()
+
+
+def _call_all(callbacks) -> int:
+    for cancel in callbacks:
+        try:
+            cancel()
+        except Exception as e:
+            logger.warning(f"Cancelling query failed: {e}")
+    return len(callbacks)
+
+
+def current_query_timeout() -> Optional[float]:
+    """Per-query timeout (seconds) of the active code execution, if any."""
+    control = _current.get()
+    return control.timeout_seconds if control is not None else None
+
+
+def timeout_ms() -> Optional[int]:
+    timeout = current_query_timeout()
+    return max(1, int(timeout * 1000)) if timeout else None
+
+
+@contextmanager
+def query_control(control: Optional[QueryControl] = None, timeout_seconds: Optional[float] = None) -> Iterator[QueryControl]:
+    """Apply `control` (or a new one with `timeout_seconds`) to queries issued inside the block."""
+    control = control or QueryControl(timeout_seconds)
+    token = _current.set(control)
+    try:
+        yield control
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def cancellable(client: Any, cancel: Callable[[], Any]) -> Iterator[None]:
+    """Register `cancel` for the query running inside the block."""
+    control = _current.get()
+    if control is not None and control.cancelled:
+        raise QueryCancelled("Query cancelled")
+    token = next(_tokens)
+    key = id(client)
+    if control is not None:
+        control._register(token, cancel)
+    with _by_client_lock:
+        _by_client.setdefault(key, {})[token] = cancel
+    try:
+        yield
+    finally:
+        if control is not None:
+            control._unregister(token)
+        with _by_client_lock:
+            running = _by_client.get(key)
+            if running is not None:
+                running.pop(token, None)
+                if not running:
+                    _by_client.pop(key, None)
+
+
+@contextmanager
+def interruptible(client: Any, interrupt: Callable[[], Any]) -> Iterator[None]:
+    """`cancellable`, plus calling `interrupt` once the active query timeout elapses."""
+    timeout = current_query_timeout()
+    timer = threading.Timer(timeout, interrupt) if timeout else None
+    with cancellable(client, interrupt):
+        if timer is not None:
+            timer.daemon = True
+            timer.start()
+        try:
+            yield
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+
+def cancel_client_queries(client: Any) -> int:
+    with _by_client_lock:
+        callbacks = list(_by_client.get(id(client), {}).values())
+    return _call_all(callbacks)
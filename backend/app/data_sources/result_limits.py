@@ -0,0 +1,188 @@
+"""
+Row/byte caps for query results fetched by generated code.
+
+Clients that can stream (`execute_query_stream`) build their `execute_query` result with
+`collect_chunks` (or `collect_arrow_chunks` for Arrow fetches such as Salesforce bulk
+results), which stops fetching once the active caps are reached and records the
+truncation. Caps are set per code execution with `result_limits(...)` (a context
+variable, so concurrent executions in threads don't see each other's caps); outside
+of one, results are collected in full as before.
+"""
+import contextvars
+import warnings
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+@dataclass
+class ResultLimits:
+    max_rows: Optional[int] = None
+    max_bytes: Optional[int] = None
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+    truncations: List[Dict[str, Any]] = field(default_factory=list)
+
+
+_current: contextvars.ContextVar[Optional[ResultLimits]] = contextvars.ContextVar("bow_result_limits", default=None)
+
+
+def current_chunk_rows() -> int:
+    limits = _current.get()
+    if limits is None:
+        return DEFAULT_CHUNK_ROWS
+    chunk_rows = limits.chunk_rows
+    if limits.max_rows:
+        # No point fetching pages much larger than what we'll keep
+        chunk_rows = min(chunk_rows, max(int(limits.max_rows), 1))
+    return max(int(chunk_rows), 1)
+
+
+def current_max_rows() -> Optional[int]:
+    limits = _current.get()
+    return limits.max_rows if limits is not None else None
+
+
+def truncation_count() -> int:
+    """Number of truncated queries so far in the active code execution."""
+    limits = _current.get()
+    return len(limits.truncations) if limits is not None else 0
+
+
+@contextmanager
+def result_limits(max_rows: Optional[int] = None, max_bytes: Optional[int] = None, chunk_rows: Optional[int] = None) -> Iterator[ResultLimits]:
+    """Apply caps to every capped query issued inside the block."""
+    limits = ResultLimits(
+        max_rows=max_rows or None,
+        max_bytes=max_bytes or None,
+        chunk_rows=chunk_rows or DEFAULT_CHUNK_ROWS,
+    )
+    token = _current.set(limits)
+    try:
+        yield limits
+    finally:
+        _current.reset(token)
+
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def _concat(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    with warnings.catch_warnings():
+        # All-null chunks: keep the pandas 2.x dtype resolution without the warning
+        warnings.simplefilter("ignore", FutureWarning)
+        return pd.concat(frames, ignore_index=True)
+
+
+def collect_chunks(chunks: Iterable[pd.DataFrame], sql: Optional[str] = None) -> pd.DataFrame:
+    """Concatenate streamed chunks, stopping early at the active row/byte caps."""
+    limits = _current.get()
+    max_rows = limits.max_rows if limits else None
+    max_bytes = limits.max_bytes if limits else None
+    frames: List[pd.DataFrame] = []
+    rows = 0
+    size = 0
+    reason = None
+    iterator = iter(chunks)
+    try:
+        for chunk in iterator:
+            if max_rows is not None and rows + len(chunk) > max_rows:
+                chunk = chunk.iloc[: max_rows - rows]
+                reason = "max_rows"
+            if max_bytes is not None and len(chunk):
+                chunk_bytes = _frame_bytes(chunk)
+                if size + chunk_bytes > max_bytes:
+                    keep = int(len(chunk) * (max_bytes - size) / chunk_bytes)
+                    chunk = chunk.iloc[: max(keep, 0)]
+                    chunk_bytes = _frame_bytes(chunk)
+                    reason = "max_bytes"
+                size += chunk_bytes
+            frames.append(chunk)
+            rows += len(chunk)
+            if reason is not None:
+                break
+    finally:
+        # Closes the server-side cursor / result stream when we stop early
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+    _record_truncation(limits, reason, max_rows, max_bytes, rows, sql)
+    if not frames:
+        return pd.DataFrame()
+    return _concat(frames)
+
+
+def _record_truncation(limits: Optional[ResultLimits], reason: Optional[str], max_rows, max_bytes, rows: int, sql: Optional[str]) -> None:
+    if reason is None or limits is None:
+        return
+    limits.truncations.append({
+        "reason": reason,
+        "limit": max_rows if reason == "max_rows" else max_bytes,
+        "rows": rows,
+        "sql": (sql or "")[:200],
+    })
+
+
+def collect_arrow_chunks(chunks: Iterable[pa.Table], sql: Optional[str] = None) -> pa.Table:
+    """`collect_chunks` for Arrow tables; slicing and concatenation don't copy column buffers."""
+    limits = _current.get()
+    max_rows = limits.max_rows if limits else None
+    max_bytes = limits.max_bytes if limits else None
+    tables: List[pa.Table] = []
+    rows = 0
+    size = 0
+    reason = None
+    iterator = iter(chunks)
+    try:
+        for chunk in iterator:
+            if max_rows is not None and rows + chunk.num_rows > max_rows:
+                chunk = chunk.slice(0, max_rows - rows)
+                reason = "max_rows"
+            if max_bytes is not None and chunk.num_rows:
+                chunk_bytes = chunk.nbytes
+                if size + chunk_bytes > max_bytes:
+                    keep = int(chunk.num_rows * (max_bytes - size) / chunk_bytes)
+                    chunk = chunk.slice(0, max(keep, 0))
+                    chunk_bytes = chunk.nbytes
+                    reason = "max_bytes"
+                size += chunk_bytes
+            tables.append(chunk)
+            rows += chunk.num_rows
+            if reason is not None:
+                break
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+    _record_truncation(limits, reason, max_rows, max_bytes, rows, sql)
+    if not tables:
+        return pa.table({})
+    if len(tables) == 1:
+        return tables[0]
+    return pa.concat_tables(tables, promote_options="default")
+
+
+def truncation_info(truncations: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Summary stored under `info["truncated"]` of a step's data."""
+    if not truncations:
+        return None
+    return {"queries": list(truncations), "reason": truncations[0]["reason"]}
+
+
+def truncation_warning(truncated: Dict[str, Any]) -> str:
+    """Execution log lines telling the agent which query results are partial."""
+    lines = []
+    for query in truncated["queries"]:
+        unit = "rows" if query["reason"] == "max_rows" else "bytes"
+        lines.append(
+            f"WARNING: query result truncated to {query['rows']} rows "
+            f"({query['reason']}={query['limit']} {unit}); the data is incomplete: {query['sql']}\n"
+        )
+    return "".join(lines)
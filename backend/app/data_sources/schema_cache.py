@@ -0,0 +1,143 @@
+"""
+Process-level cache of normalized, scored schema tables per data source.
+
+`SchemaContextBuilder.build` runs several times per agent turn (static priming,
+schema excerpts, active-table resolution, describe_tables), and each run used to
+reload every DataSourceTable / TableStats row and rebuild the prompt tables. Built
+table lists are cached here and reused until the data source's version changes.
+
+Each data source has two counters, stored on its `data_sources` row so every web
+worker sees a bump immediately: the schema version, bumped when tables are synced,
+(de)activated, re-scored or a user overlay changes, and the stats version, bumped
+when its usage/feedback stats change. Lookups read them with one primary-key query.
+Entries built without stats only check the schema version, so usage recorded during
+a turn doesn't evict them.
+
+Entries also expire after `ttl_seconds` so the recency decay in table scores is
+picked up. Each organization keeps at most `max_tables_per_org` cached tables, least
+recently used entries are evicted first.
+
+Cached tables are shared between builds and must be treated as read-only.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _config():
+    from app.settings.config import settings
+
+    return settings.bow_config.schema_cache if settings.bow_config else None
+
+
+async def schema_version(db: AsyncSession, data_source_id: Any, with_stats: bool = False) -> Tuple[int, ...]:
+    """Current version of a data source's cached tables."""
+    from app.models.data_source import DataSource
+
+    row = (await db.execute(
+        select(DataSource.schema_version, DataSource.stats_version).where(DataSource.id == str(data_source_id))
+    )).first()
+    schema, stats = (row[0] or 0, row[1] or 0) if row else (0, 0)
+    return (schema, stats) if with_stats else (schema,)
+
+
+async def _bump(db: AsyncSession, column: str, data_source_ids) -> None:
+    from app.models.data_source import DataSource
+
+    ids = [str(ds_id) for ds_id in data_source_ids if ds_id]
+    if not ids:
+        return
+    counter = getattr(DataSource, column)
+    await db.execute(
+        update(DataSource)
+        .where(DataSource.id.in_(ids))
+        # Keep updated_at: a version bump is not an edit of the data source itself
+        .values({column: counter + 1, "updated_at": DataSource.updated_at})
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+async def bump_schema_version(db: AsyncSession, *data_source_ids: Any) -> None:
+    """Invalidate cached tables after a sync, activation, metrics or overlay change.
+
+    Commits; call it after the change itself is committed.
+    """
+    await _bump(db, "schema_version", data_source_ids)
+
+
+async def bump_stats_version(db: AsyncSession, *data_source_ids: Any) -> None:
+    """Invalidate cached tables built with usage/feedback stats (commits)."""
+    await _bump(db, "stats_version", data_source_ids)
+
+
+class SchemaContextCache:
+    """LRU of table lists, bounded by the number of tables cached per organization."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # org id -> key -> (version, expires_at, tables)
+        self._orgs: Dict[str, "OrderedDict[Hashable, Tuple[Tuple[int, ...], float, List[Any]]]"] = {}
+        self._sizes: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, org_id: str, key: Hashable, version: Tuple[int, ...]) -> Optional[List[Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entries = self._orgs.get(org_id)
+            entry = entries.get(key) if entries is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            cached_version, expires_at, tables = entry
+            if cached_version != version or expires_at <= now:
+                self._drop(org_id, key)
+                self.misses += 1
+                return None
+            entries.move_to_end(key)
+            self.hits += 1
+            return tables
+
+    def put(self, org_id: str, key: Hashable, version: Tuple[int, ...], tables: List[Any]) -> None:
+        config = _config()
+        if config is not None and not config.enabled:
+            return
+        ttl = config.ttl_seconds if config else 300
+        max_tables = config.max_tables_per_org if config else 50_000
+        if len(tables) > max_tables:
+            return
+        with self._lock:
+            self._drop(org_id, key)
+            entries = self._orgs.setdefault(org_id, OrderedDict())
+            entries[key] = (version, time.monotonic() + ttl, tables)
+            self._sizes[org_id] = self._sizes.get(org_id, 0) + len(tables)
+            while self._sizes[org_id] > max_tables:
+                self._drop(org_id, next(iter(entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._orgs.clear()
+            self._sizes.clear()
+
+    def _drop(self, org_id: str, key: Hashable) -> None:
+        entries = self._orgs.get(org_id)
+        if entries is None or key not in entries:
+            return
+        _, _, tables = entries.pop(key)
+        self._sizes[org_id] -= len(tables)
+        if not entries:
+            del self._orgs[org_id]
+            del self._sizes[org_id]
+
+    @staticmethod
+    def enabled() -> bool:
+        config = _config()
+        return config.enabled if config else True
+
+
+schema_context_cache = SchemaContextCache()
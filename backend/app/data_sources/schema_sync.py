@@ -0,0 +1,138 @@
+"""
+Incremental schema sync helpers.
+
+Schema refreshes used to rewrite every known table row on each run. Here each table's
+introspected payload (columns, pks, fks, metadata) gets a fingerprint, stored on the
+row; a refresh only writes rows whose fingerprint changed, in bulk.
+
+`introspect_tables` splits introspection per schema across concurrent workers for
+clients that support it (`alist_schema_names` / `aget_tables_in_schemas`, native
+async where the client has an async driver) and falls back to a single
+`aget_schemas()` call otherwise. A schema that fails is logged and skipped; tables
+of the other schemas are still returned. When enabled, sources without declared
+foreign keys then get name/type-based inferred ones (see app.data_sources.table_keys).
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.data_sources.table_keys import infer_foreign_keys
+
+logger = logging.getLogger(__name__)
+
+# Rows per bulk INSERT/UPDATE statement
+BULK_CHUNK_SIZE = 1000
+
+
+def normalize_columns(cols) -> List[Dict[str, Any]]:
+    return [
+        {"name": (c.name if hasattr(c, "name") else c.get("name")),
+         "dtype": (c.dtype if hasattr(c, "dtype") else c.get("dtype"))}
+        for c in cols or []
+    ]
+
+
+def _plain(value: Any) -> Any:
+    # Pydantic models (foreign keys) -> dicts, so payloads hash and store as JSON
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "dict") and not isinstance(value, dict):
+        return value.dict()
+    return value
+
+
+def _foreign_key(fk: Any) -> Any:
+    fk = _plain(fk)
+    # Declared keys are stored without the tag, so their fingerprints don't change
+    if isinstance(fk, dict) and not fk.get("inferred"):
+        fk.pop("inferred", None)
+    return fk
+
+
+def normalize_tables(fresh_tables: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+    """Introspected tables (Table models or dicts) keyed by name, as stored on table rows."""
+    incoming: Dict[str, Dict[str, Any]] = {}
+    for t in fresh_tables or []:
+        get = t.get if isinstance(t, dict) else (lambda key, default=None, _t=t: getattr(_t, key, default))
+        name = get("name")
+        if not name:
+            continue
+        incoming[name] = {
+            "columns": normalize_columns(get("columns", [])),
+            "pks": normalize_columns(get("pks", [])),
+            "fks": [_foreign_key(fk) for fk in (get("fks", []) or [])],
+            "metadata_json": get("metadata_json"),
+        }
+    return incoming
+
+
+def table_fingerprint(payload: Dict[str, Any]) -> str:
+    raw = json.dumps(
+        [payload.get("columns"), payload.get("pks"), payload.get("fks"), payload.get("metadata_json")],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def chunked(items: List[Any], size: int = BULK_CHUNK_SIZE) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def introspection_concurrency() -> int:
+    from app.settings.config import settings
+
+    config = settings.bow_config.data_source_engines if settings.bow_config else None
+    return max(1, config.introspection_concurrency if config else 4)
+
+
+def _infer_foreign_keys_enabled() -> bool:
+    from app.settings.config import settings
+
+    config = settings.bow_config.data_source_engines if settings.bow_config else None
+    return config.infer_foreign_keys if config else False
+
+
+async def introspect_tables(client: Any, concurrency: Optional[int] = None) -> Optional[List[Any]]:
+    """Fetch the client's tables, one schema per worker when the client supports it."""
+    tables = await _fetch_tables(client, concurrency)
+    if tables and _infer_foreign_keys_enabled():
+        inferred = infer_foreign_keys(tables)
+        if inferred:
+            logger.info(f"Inferred {inferred} foreign keys for {type(client).__name__}")
+    return tables
+
+
+async def _fetch_tables(client: Any, concurrency: Optional[int] = None) -> Optional[List[Any]]:
+    schemas = None
+    if hasattr(client, "get_tables_in_schemas"):
+        try:
+            schemas = await client.alist_schema_names()
+        except Exception as e:
+            logger.info(f"Listing schemas failed, introspecting in one pass: {e}")
+    if not schemas or len(schemas) < 2:
+        return await client.aget_schemas()
+
+    slots = asyncio.Semaphore(concurrency or introspection_concurrency())
+
+    async def _one(schema: str) -> List[Any]:
+        async with slots:
+            return await client.aget_tables_in_schemas([schema])
+
+    results = await asyncio.gather(*(_one(s) for s in schemas), return_exceptions=True)
+    tables: List[Any] = []
+    failed: Dict[str, BaseException] = {}
+    for schema, part in zip(schemas, results):
+        if isinstance(part, BaseException):
+            failed[schema] = part
+        else:
+            tables.extend(part or [])
+    if failed:
+        if len(failed) == len(schemas):
+            raise next(iter(failed.values()))
+        for schema, error in failed.items():
+            logger.warning(f"Introspecting schema {schema} of {type(client).__name__} failed, skipping it: {error}")
+    return tables
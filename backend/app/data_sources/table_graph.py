@@ -0,0 +1,135 @@
+"""
+Join-graph metrics for schema tables.
+
+Tables are nodes; a foreign key adds an edge from the referencing table to the
+referenced one, and tables that generated steps used together (co-usage) are linked
+both ways with a weight growing with how often that happened. From that graph:
+
+  - centrality_score: weighted PageRank, scaled so the top table is 1.0 (tables
+    without any edge get 0.0)
+  - degree_in / degree_out: distinct tables referencing / referenced by foreign keys
+  - richness: column count on a log scale, 1.0 from `RICH_COLUMNS` columns up
+  - entity_like: has a key and is referenced at least as often as it references
+
+PageRank runs as a power iteration over edge arrays (np.bincount scatter-adds), so
+memory and time per iteration are linear in tables + edges.
+"""
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+RICH_COLUMNS = 50
+
+
+def _key_names(table: Dict[str, Any]) -> List[str]:
+    return [pk.get("name") for pk in (table.get("pks") or []) if isinstance(pk, dict)]
+
+
+def _has_key(table: Dict[str, Any]) -> bool:
+    if _key_names(table):
+        return True
+    return any(str(c.get("name", "")).lower() == "id" for c in (table.get("columns") or []) if isinstance(c, dict))
+
+
+def pagerank(
+    n: int,
+    src: np.ndarray,
+    dst: np.ndarray,
+    weight: np.ndarray,
+    damping: float = 0.85,
+    tol: float = 1e-8,
+    max_iter: int = 100,
+) -> np.ndarray:
+    """Weighted PageRank of an n-node graph given as parallel edge arrays."""
+    if n == 0:
+        return np.zeros(0)
+    out_weight = np.bincount(src, weights=weight, minlength=n)
+    share = weight / out_weight[src] if len(src) else weight
+    dangling = out_weight == 0
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        spread = np.bincount(dst, weights=rank[src] * share, minlength=n)
+        updated = (1.0 - damping) / n + damping * (spread + rank[dangling].sum() / n)
+        delta = np.abs(updated - rank).sum()
+        rank = updated
+        if delta < tol:
+            break
+    return rank
+
+
+def compute_table_metrics(
+    tables: Dict[str, Dict[str, Any]],
+    co_usage: Optional[Iterable[Tuple[str, str, float]]] = None,
+    damping: float = 0.85,
+    co_usage_weight: float = 0.5,
+) -> Dict[str, Dict[str, Any]]:
+    """Metrics per table name.
+
+    `tables` maps name -> {columns, pks, fks} as stored on table rows. `co_usage` yields
+    (name, name, times used together); names and foreign key targets are matched
+    case-insensitively, and unknown ones are ignored.
+    """
+    names = list(tables)
+    index = {name: i for i, name in enumerate(names)}
+    lowered = {name.lower(): i for i, name in enumerate(names)}
+
+    def _lookup(name: Any) -> Optional[int]:
+        if not name:
+            return None
+        found = index.get(name)
+        return found if found is not None else lowered.get(str(name).lower())
+
+    fk_pairs = set()
+    for name, table in tables.items():
+        source = index[name]
+        for fk in table.get("fks") or []:
+            target = _lookup(fk.get("references_name") if isinstance(fk, dict) else None)
+            if target is not None and target != source:
+                fk_pairs.add((source, target))
+
+    weights: Dict[Tuple[int, int], float] = {pair: 1.0 for pair in fk_pairs}
+    for left, right, count in co_usage or []:
+        a, b = _lookup(left), _lookup(right)
+        if a is None or b is None or a == b or count <= 0:
+            continue
+        w = co_usage_weight * math.log1p(count)
+        weights[(a, b)] = weights.get((a, b), 0.0) + w
+        weights[(b, a)] = weights.get((b, a), 0.0) + w
+
+    n = len(names)
+    if weights:
+        edges = np.array(list(weights.keys()), dtype=np.int64)
+        src, dst = edges[:, 0], edges[:, 1]
+        weight = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+    else:
+        src = dst = np.zeros(0, dtype=np.int64)
+        weight = np.zeros(0, dtype=np.float64)
+
+    connected = np.zeros(n, dtype=bool)
+    connected[src] = True
+    connected[dst] = True
+    rank = pagerank(n, src, dst, weight, damping=damping)
+    top = rank[connected].max() if connected.any() else 0.0
+    centrality = np.where(connected, rank / top, 0.0) if top > 0 else np.zeros(n)
+
+    if fk_pairs:
+        fk_edges = np.array(list(fk_pairs), dtype=np.int64)
+        degree_out = np.bincount(fk_edges[:, 0], minlength=n)
+        degree_in = np.bincount(fk_edges[:, 1], minlength=n)
+    else:
+        degree_out = degree_in = np.zeros(n, dtype=np.int64)
+
+    metrics: Dict[str, Dict[str, Any]] = {}
+    for i, name in enumerate(names):
+        table = tables[name]
+        n_columns = len(table.get("columns") or [])
+        d_in, d_out = int(degree_in[i]), int(degree_out[i])
+        metrics[name] = {
+            "centrality_score": round(float(centrality[i]), 6),
+            "richness": round(min(1.0, math.log1p(n_columns) / math.log1p(RICH_COLUMNS)), 4),
+            "degree_in": d_in,
+            "degree_out": d_out,
+            "entity_like": bool(_has_key(table) and d_in > 0 and d_in >= d_out),
+        }
+    return metrics
@@ -0,0 +1,266 @@
+"""
+Search index over a data source's table names and columns.
+
+Active-table resolution and schema excerpts filter tables with regexes such as
+`(?i)(?:^|\\.)orders$` (a name, optionally schema-qualified) or `(?i)customer` (a
+keyword). Scanning every table with `re.search` is linear in the schema size, which
+dominates tool start-up on warehouses with tens of thousands of tables. The index
+keeps, per table name (lowercased):
+
+  - every dot-separated suffix (`a.b.c` -> `c`, `b.c`, `a.b.c`) for exact and
+    schema-optional lookups
+  - its trigrams, for substring and fuzzy lookups
+  - column names and their `_`/camelCase tokens (built on first column lookup)
+
+`candidates(pattern)` returns a superset of the names a pattern can match (or None
+when the pattern is too complex to plan), so callers still confirm each candidate
+with the regex and results are the same as a full scan.
+
+Indexes are kept per data source and updated incrementally: when the schema version
+changes, only tables whose name or columns changed are re-indexed.
+"""
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+MAX_INDEXES = 128
+# A schema-optional name as built by active-table resolution: (?:^|\.)<literal>$
+_SUFFIX_PATTERN = re.compile(r"^\(\?:\^\|\\\.\)(?P<literal>.+)\$$")
+_CASE_FLAG = re.compile(r"^\(\?[aiLmsux]+\)")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_QUANTIFIERS = "?*+{"
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _suffixes(name: str) -> List[str]:
+    parts = name.split(".")
+    return [".".join(parts[i:]) for i in range(len(parts))]
+
+
+def _column_tokens(column: str) -> Set[str]:
+    tokens = {column.lower()}
+    for part in re.split(r"[^0-9A-Za-z]+", column):
+        tokens.update(p.lower() for p in _CAMEL.split(part) if p)
+    return tokens
+
+
+def _unescape(literal: str) -> Optional[str]:
+    """The text an escaped regex literal matches, or None if it isn't one."""
+    text = re.sub(r"\\(.)", r"\1", literal)
+    return text if re.escape(text) == literal else None
+
+
+def _required_literals(body: str) -> Optional[List[str]]:
+    """Literal runs every match of a simple pattern contains.
+
+    Supports literal characters, escapes, `.`, classes like `\\d` and anchors; returns
+    None for groups, alternations, character sets and quantified literals.
+    """
+    pieces: List[str] = []
+    current: List[str] = []
+    i = 0
+    while i < len(body):
+        char = body[i]
+        if char == "\\" and i + 1 < len(body):
+            escaped = body[i + 1]
+            i += 2
+            if escaped.isalnum():
+                # A character class or boundary (\d, \w, \b, ...)
+                pieces.append("".join(current))
+                current = []
+            else:
+                current.append(escaped)
+                if i < len(body) and body[i] in _QUANTIFIERS:
+                    # An optional/repeated character isn't required
+                    return None
+            continue
+        if char in "()[]|{":
+            return None
+        if char in "?*+":
+            # Quantifies a `.` or a class, which already ended the current run
+            i += 1
+            continue
+        if char in ".^$":
+            pieces.append("".join(current))
+            current = []
+        else:
+            if i + 1 < len(body) and body[i + 1] in _QUANTIFIERS:
+                return None
+            current.append(char)
+        i += 1
+    pieces.append("".join(current))
+    return [p for p in pieces if p]
+
+
+class TableSearchIndex:
+    """Name/column index of one data source's tables."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[Optional[str]] = []
+        self._signatures: Dict[str, Tuple[str, ...]] = {}
+        self._suffixes: Dict[str, Set[int]] = {}
+        self._trigrams: Dict[str, Set[int]] = {}
+        self._trigram_counts: List[int] = []
+        self._columns: Optional[Dict[str, Set[int]]] = None
+        self.version: Any = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def sync(self, tables: Iterable[Any], version: Any = None) -> Tuple[int, int]:
+        """Bring the index in line with `tables`; returns (tables added, tables removed)."""
+        incoming: Dict[str, Tuple[str, ...]] = {}
+        for table in tables:
+            name = getattr(table, "name", None)
+            if name:
+                incoming[name] = tuple(c.name for c in (getattr(table, "columns", None) or []) if c.name)
+        removed = [n for n, sig in self._signatures.items() if incoming.get(n) != sig]
+        added = [n for n, sig in incoming.items() if self._signatures.get(n) != sig]
+        tombstones = len(self._names) - len(self._ids)
+        if len(removed) > len(self._ids) // 2 or tombstones > len(self._ids):
+            # Mostly new schema: rebuilding is cheaper than unlinking postings one by one
+            self.__init__()
+            removed, added = [], list(incoming)
+        for name in removed:
+            self._remove(name)
+        for name in added:
+            self._add(name, incoming[name])
+        self.version = version
+        return len(added), len(removed)
+
+    def _add(self, name: str, columns: Tuple[str, ...]) -> None:
+        table_id = len(self._names)
+        self._names.append(name)
+        self._ids[name] = table_id
+        self._signatures[name] = columns
+        lowered = name.lower()
+        for suffix in _suffixes(lowered):
+            self._suffixes.setdefault(suffix, set()).add(table_id)
+        grams = _trigrams(lowered)
+        for gram in grams:
+            self._trigrams.setdefault(gram, set()).add(table_id)
+        # Fuzzy matches compare against the table's own name, not its schema prefix
+        self._trigram_counts.append(len(_trigrams(lowered.rsplit(".", 1)[-1])))
+        if self._columns is not None:
+            for column in columns:
+                for token in _column_tokens(column):
+                    self._columns.setdefault(token, set()).add(table_id)
+
+    def _remove(self, name: str) -> None:
+        table_id = self._ids.pop(name)
+        columns = self._signatures.pop(name)
+        self._names[table_id] = None
+        lowered = name.lower()
+        for suffix in _suffixes(lowered):
+            self._discard(self._suffixes, suffix, table_id)
+        for gram in _trigrams(lowered):
+            self._discard(self._trigrams, gram, table_id)
+        if self._columns is not None:
+            for column in columns:
+                for token in _column_tokens(column):
+                    self._discard(self._columns, token, table_id)
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[int]], key: str, table_id: int) -> None:
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(table_id)
+            if not ids:
+                del postings[key]
+
+    def _resolve(self, ids: Iterable[int]) -> Set[str]:
+        return {self._names[i] for i in ids if self._names[i] is not None}
+
+    def names(self) -> Set[str]:
+        return set(self._ids)
+
+    def by_suffix(self, name: str) -> Set[str]:
+        """Tables named `name` or `<schema...>.name` (case-insensitive)."""
+        return self._resolve(self._suffixes.get(name.lower(), ()))
+
+    def containing(self, text: str) -> Optional[Set[str]]:
+        """Tables whose name contains `text` (case-insensitive); None below 3 characters."""
+        lowered = text.lower()
+        if len(lowered) < 3:
+            return None
+        postings = [self._trigrams.get(gram, set()) for gram in _trigrams(lowered)]
+        ids = set.intersection(*sorted(postings, key=len))
+        return {name for name in self._resolve(ids) if lowered in name.lower()}
+
+    def candidates(self, pattern: str) -> Optional[Set[str]]:
+        """Names `pattern` may match with `re.search`, or None if the index can't tell."""
+        body = _CASE_FLAG.sub("", pattern, count=1)
+        suffix = _SUFFIX_PATTERN.match(body)
+        if suffix:
+            literal = _unescape(suffix.group("literal"))
+            if literal is not None:
+                return self.by_suffix(literal)
+        literals = _required_literals(body)
+        if not literals:
+            return None
+        found: Optional[Set[str]] = None
+        for literal in sorted(literals, key=len, reverse=True):
+            matched = self.containing(literal)
+            if matched is None:
+                continue
+            found = matched if found is None else found & matched
+            if not found:
+                break
+        return found
+
+    def with_column(self, column: str) -> Set[str]:
+        """Tables having a column named `column` or with it as a name token (`customer` -> `customer_id`)."""
+        if self._columns is None:
+            self._columns = {}
+            for name, table_id in self._ids.items():
+                for col in self._signatures[name]:
+                    for token in _column_tokens(col):
+                        self._columns.setdefault(token, set()).add(table_id)
+        return self._resolve(self._columns.get(column.lower(), ()))
+
+    def similar(self, text: str, limit: int = 3, min_score: float = 0.3) -> List[str]:
+        """Table names closest to `text` by trigram similarity, best first."""
+        grams = _trigrams(text.lower())
+        if not grams:
+            return []
+        shared: Counter = Counter()
+        for gram in grams:
+            shared.update(self._trigrams.get(gram, ()))
+        scored = []
+        for table_id, count in shared.items():
+            name = self._names[table_id]
+            if name is None:
+                continue
+            count = min(count, self._trigram_counts[table_id])
+            score = count / (len(grams) + self._trigram_counts[table_id] - count)
+            if score >= min_score:
+                scored.append((score, name))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [name for _, name in scored[:limit]]
+
+
+_indexes: "OrderedDict[Hashable, TableSearchIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def table_index(key: Hashable, tables: List[Any], version: Any) -> TableSearchIndex:
+    """The index for `key` (a data source, plus user for overlays), synced to `tables`.
+
+    Re-syncs when the schema version (stored on the data source, so shared by all
+    processes) changes or the table count differs.
+    """
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = TableSearchIndex()
+        _indexes.move_to_end(key)
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+        if index.version != version or len(index) != len(tables):
+            index.sync(tables, version)
+        return index
@@ -0,0 +1,156 @@
+"""
+Primary and foreign keys for introspected tables.
+
+SQL clients read declared keys with one set-based catalog query per source (not one
+per table) and hand the rows to `attach_keys`. For sources that declare no foreign
+keys at all, `infer_foreign_keys` can add name/type-based joins such as
+`orders.customer_id -> customers.id` (opt-in, `data_source_engines.infer_foreign_keys`);
+those are tagged `inferred` so they are never mistaken for declared constraints.
+"""
+import logging
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from app.ai.prompt_formatters import ForeignKey, Table, TableColumn
+
+logger = logging.getLogger(__name__)
+
+# (table key, column)
+PkRow = Tuple[Hashable, str]
+# (table key, column, referenced table name, referenced column)
+FkRow = Tuple[Hashable, str, str, str]
+
+_TYPE_FAMILIES = (
+    ("uuid", ("uuid", "uniqueidentifier")),
+    ("int", ("int", "serial", "number", "numeric", "decimal")),
+    ("str", ("char", "text", "string")),
+)
+
+
+def fetch_key_rows(fetch: Callable[[], Iterable[Any]]) -> List[Any]:
+    """Run a key discovery query; a source without catalog access just has no keys."""
+    try:
+        return list(fetch())
+    except Exception as e:
+        logger.info(f"Key discovery failed, continuing without keys: {e}")
+        return []
+
+
+def attach_keys(tables: Dict[Hashable, Table], pk_rows: Iterable[PkRow], fk_rows: Iterable[FkRow]) -> None:
+    """Set `pks`/`fks` of `tables` (keyed the way the rows refer to them).
+
+    Rows must come in key column order. Column dtypes are taken from the introspected
+    columns; referenced tables outside `tables` get a column without dtype.
+    """
+    by_name = {t.name: t for t in tables.values()}
+    for table in tables.values():
+        table.pks = []
+        table.fks = []
+    for key, column in pk_rows:
+        table = tables.get(key)
+        if table is not None:
+            table.pks.append(_column(table, column))
+    for key, column, references_name, references_column in fk_rows:
+        table = tables.get(key)
+        if table is None:
+            continue
+        referenced = by_name.get(references_name)
+        table.fks.append(ForeignKey(
+            column=_column(table, column),
+            references_name=references_name,
+            references_column=_column(referenced, references_column),
+        ))
+
+
+def _column(table: Optional[Table], name: str) -> TableColumn:
+    for col in (table.columns or []) if table is not None else []:
+        if col.name == name:
+            return TableColumn(name=col.name, dtype=col.dtype)
+    return TableColumn(name=name, dtype=None)
+
+
+def _type_family(dtype: Optional[str]) -> Optional[str]:
+    if not dtype:
+        return None
+    lowered = dtype.lower()
+    for family, markers in _TYPE_FAMILIES:
+        if any(m in lowered for m in markers):
+            return family
+    return lowered
+
+
+def _short_name(name: str) -> str:
+    return name.rsplit(".", 1)[-1].lower()
+
+
+def _namespace(name: str) -> str:
+    return name.rsplit(".", 1)[0].lower() if "." in name else ""
+
+
+def _stem(column: str) -> Optional[str]:
+    lowered = column.lower()
+    if lowered.endswith("_id") and len(lowered) > 3:
+        return lowered[:-3]
+    if lowered.endswith("id") and len(lowered) > 2 and column[-2:] == "Id":
+        return lowered[:-2]
+    return None
+
+
+def _candidate_names(stem: str) -> List[str]:
+    names = [stem, f"{stem}s", f"{stem}es"]
+    if stem.endswith("y"):
+        names.append(f"{stem[:-1]}ies")
+    return names
+
+
+def _target_column(target: Table, stem: str) -> Optional[TableColumn]:
+    if target.pks and len(target.pks) == 1:
+        return target.pks[0]
+    for col in target.columns or []:
+        if col.name.lower() in ("id", f"{stem}_id"):
+            return col
+    return None
+
+
+def infer_foreign_keys(tables: List[Any]) -> int:
+    """Add inferred foreign keys when none of `tables` declares any; returns how many.
+
+    A column `<stem>_id` (or `<stem>Id`) joins to the table named `<stem>` or its plural,
+    preferring one in the same schema, on that table's single-column primary key (or
+    its `id` / `<stem>_id` column) when both sides have compatible types. Added keys
+    have `inferred=True`.
+    """
+    tables = [t for t in tables or [] if isinstance(t, Table)]
+    if any(t.fks for t in tables):
+        return 0
+    by_short: Dict[str, List[Table]] = {}
+    for t in tables:
+        by_short.setdefault(_short_name(t.name), []).append(t)
+
+    inferred = 0
+    for table in tables:
+        fks: List[ForeignKey] = []
+        for col in table.columns or []:
+            stem = _stem(col.name)
+            if stem is None:
+                continue
+            candidates = [c for name in _candidate_names(stem) for c in by_short.get(name, []) if c is not table]
+            if not candidates:
+                continue
+            same_schema = [c for c in candidates if _namespace(c.name) == _namespace(table.name)]
+            target = (same_schema or candidates)[0]
+            target_col = _target_column(target, stem)
+            if target_col is None:
+                continue
+            family, target_family = _type_family(col.dtype), _type_family(target_col.dtype)
+            if family and target_family and family != target_family:
+                continue
+            fks.append(ForeignKey(
+                column=TableColumn(name=col.name, dtype=col.dtype),
+                references_name=target.name,
+                references_column=TableColumn(name=target_col.name, dtype=target_col.dtype),
+                inferred=True,
+            ))
+        if fks:
+            table.fks = fks
+            inferred += len(fks)
+    return inferred
@@ -94,7 +94,9 @@ class Connection(BaseSchema):
             logger = logging.getLogger(__name__)
             logger.info(f"Client params for {self.type}")
             
-            return ClientClass(**client_params)
+            client = ClientClass(**client_params)
+            client.connection_id = str(self.id) if self.id else None
+            return client
         except (ImportError, AttributeError) as e:
             raise ValueError(f"Unable to load data source client for {self.type}: {str(e)}")
 
@@ -31,6 +31,8 @@ class ConnectionTable(BaseSchema):
     
     # Additional metadata
     metadata_json = Column(JSON, nullable=True)
+    # Hash of columns/pks/fks/metadata_json as last introspected; unchanged tables aren't rewritten
+    schema_fingerprint = Column(String(64), nullable=True)
     
     # Relationships
     connection = relationship("Connection", back_populates="connection_tables")
@@ -69,7 +71,8 @@ class ConnectionTable(BaseSchema):
                 references_column=TableColumn(
                     name=fk['references_column']['name'],
                     dtype=fk['references_column'].get('dtype')
-                )
+                ),
+                inferred=bool(fk.get('inferred')),
             )
             for fk in self.fks
         ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Text, select, UniqueConstraint, JSON
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, Text, select, UniqueConstraint, JSON
 from sqlalchemy.orm import relationship, selectinload, object_session
 from sqlalchemy import ForeignKey
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -32,6 +32,11 @@ class DataSource(BaseSchema):
     conversation_starters = Column(JSON, nullable=True)
     use_llm_sync = Column(Boolean, nullable=False, default=False)
 
+    # Bumped on table/overlay/metrics changes and on usage stats changes; they key the
+    # schema context cache (app.data_sources.schema_cache) across web workers
+    schema_version = Column(Integer, nullable=False, default=0, server_default="0")
+    stats_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     # The organization that owns this data source
     organization_id = Column(String(36), ForeignKey(
         'organizations.id'), nullable=False)
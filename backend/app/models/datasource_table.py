@@ -31,6 +31,8 @@ class DataSourceTable(BaseSchema):
     no_rows = Column(Integer, nullable=True, default=0)  # Changed to nullable
     pks = Column(JSON, nullable=True)  # Changed to nullable
     fks = Column(JSON, nullable=True)  # Changed to nullable
+    # Hash of columns/pks/fks/metadata_json as last introspected; unchanged tables aren't rewritten
+    schema_fingerprint = Column(String(64), nullable=True)
     
     # Legacy metrics - will be removed after migration
     centrality_score = Column(Float, nullable=True)
@@ -97,7 +99,8 @@ class DataSourceTable(BaseSchema):
                 references_column=TableColumn(
                     name=fk['references_column']['name'],
                     dtype=fk['references_column'].get('dtype')
-                )
+                ),
+                inferred=bool(fk.get('inferred')),
             )
             for fk in fks_data
         ]
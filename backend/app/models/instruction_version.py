@@ -47,6 +47,10 @@ class InstructionVersion(BaseSchema):
     # SHA-256 hash of content for fast change detection
     content_hash = Column(String(64), nullable=False)
     
+    # Number of search terms in the version (BM25 document length); NULL until its
+    # postings are written to instruction_version_terms
+    search_length = Column(Integer, nullable=True)
+    
     # === Audit fields ===
     created_by_user_id = Column(String(36), ForeignKey('users.id'), nullable=True)
     
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, UniqueConstraint, Index
+
+from app.models.base import BaseSchema
+
+
+class InstructionVersionTerm(BaseSchema):
+    """
+    Inverted-index posting: how often a search term occurs in an instruction version.
+    Versions are immutable, so postings are written once per version and shared by
+    every build that includes it; a build's index is its contents joined to these rows.
+    """
+    __tablename__ = "instruction_version_terms"
+
+    instruction_version_id = Column(String(36), ForeignKey('instruction_versions.id', ondelete='CASCADE'), nullable=False)
+    term = Column(String(64), nullable=False)
+    # Term frequency within the version's searchable text
+    tf = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('instruction_version_id', 'term', name='uq_instruction_version_term'),
+        Index('ix_instruction_version_terms_term', 'term', 'instruction_version_id'),
+    )
+
+    def __repr__(self):
+        return f"<InstructionVersionTerm {self.instruction_version_id} {self.term}={self.tf}>"
@@ -24,6 +24,8 @@ class Step(BaseSchema):
     type = Column(String, nullable=False, default="table")
     data_model = Column(JSON, nullable=True, default=dict)
     view = Column(JSON, nullable=True, default=dict)
+    # Input table change signals at the last refresh (see app.data_sources.freshness)
+    freshness = Column(JSON, nullable=True, default=None)
 
     widget_id = Column(String(36), ForeignKey('widgets.id'), nullable=False)
     widget = relationship("Widget", back_populates="steps")
@@ -41,5 +41,6 @@ class TableUsageEvent(BaseSchema):
         Index("ix_usage_org_report_table_time", "org_id", "report_id", "table_fqn", "used_at"),
         Index("ix_usage_org_report_ds_time", "org_id", "report_id", "data_source_id", "used_at"),
         Index("ix_usage_table_time", "table_fqn", "used_at"),
+        Index("ix_usage_dstable_time", "datasource_table_id", "used_at"),
     )
 
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.dependencies import get_async_db, get_current_organization
@@ -9,12 +9,18 @@ from app.models.user import User
 from app.models.organization import Organization
 from app.schemas.query_schema import QueryCreate, QuerySchema, QueryRunRequest
 from app.services.query_service import QueryService
+from app.ai.code_execution.widget_serializer import dumps_widget_payload
 
 
 router = APIRouter(prefix="/queries", tags=["queries"])
 service = QueryService()
 
 
+def _json_response(payload) -> Response:
+    # Step payloads carry widget rows; orjson skips FastAPI's per-value jsonable_encoder walk
+    return Response(content=dumps_widget_payload(payload), media_type="application/json")
+
+
 @router.get("", response_model=list[QuerySchema])
 @requires_permission('view_reports')
 async def list_queries(
@@ -77,8 +83,8 @@ async def run_query_new_step(
         q_dict, step_obj = await service.run_query_new_step(db, query_id, payload)
         # If backend marked the step as error, reflect that in response so UI can show error state
         if isinstance(step_obj, dict) and step_obj.get("status") == "error":
-            return {"query": q_dict, "step": step_obj, "error": step_obj.get("status_reason")}
-        return {"query": q_dict, "step": step_obj}
+            return _json_response({"query": q_dict, "step": step_obj, "error": step_obj.get("status_reason")})
+        return _json_response({"query": q_dict, "step": step_obj})
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -93,7 +99,7 @@ async def run_existing_step(
 ):
     try:
         step = await service.run_existing_step(db, step_id)
-        return {"step": step}
+        return _json_response({"step": step})
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -109,7 +115,7 @@ async def get_default_step(
     step = await service.get_default_step_for_query(db, query_id)
     if not step:
         return {"step": None}
-    return {"step": step.model_dump() if hasattr(step, 'model_dump') else step.dict()}
+    return _json_response({"step": step.model_dump() if hasattr(step, 'model_dump') else step.dict()})
 
 
 @router.post("/{query_id}/preview", response_model=dict)
@@ -123,7 +129,7 @@ async def preview_query_code(
 ):
     try:
         result = await service.preview_query_code(db, query_id, payload)
-        return result
+        return _json_response(result)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
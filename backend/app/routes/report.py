@@ -6,7 +6,7 @@ from app.dependencies import get_current_organization
 from typing import List
 from app.services.report_service import ReportService
 from app.services.dashboard_layout_service import DashboardLayoutService
-from app.schemas.report_schema import ReportSchema, ReportCreate, ReportUpdate, ReportListResponse
+from app.schemas.report_schema import ReportSchema, ReportCreate, ReportUpdate, ReportListResponse, ReportRerunSchema, RefreshSummarySchema
 from app.schemas.dashboard_layout_version_schema import (
     DashboardLayoutVersionSchema,
     DashboardLayoutVersionCreate,
@@ -77,10 +77,13 @@ async def bulk_archive_reports(
     """
     return await report_service.bulk_archive_reports(db, report_ids, current_user, organization)
 
-@router.post("/reports/{report_id}/rerun", response_model=ReportSchema)
+@router.post("/reports/{report_id}/rerun", response_model=ReportRerunSchema)
 @requires_permission('rerun_report_steps', model=Report, owner_only=True)
 async def rerun_report(report_id: str, current_user: User = Depends(current_user), db: AsyncSession = Depends(get_async_db), organization: Organization = Depends(get_current_organization)):
-    return await report_service.rerun_report_steps(db, report_id, current_user, organization)
+    report, summary = await report_service.rerun_report_steps(db, report_id, current_user, organization, strict=True)
+    response = ReportRerunSchema.model_validate(report)
+    response.refresh = RefreshSummarySchema(**summary.to_dict()) if summary else None
+    return response
 
 @router.post("/reports/{report_id}/publish", response_model=ReportSchema)
 @requires_permission('publish_reports', model=Report, owner_only=True)
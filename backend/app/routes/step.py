@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.dependencies import get_async_db, get_current_organization
 from app.services.step_service import StepService
@@ -8,7 +8,9 @@ from app.core.auth import current_user
 from app.core.permissions_decorator import requires_permission
 import io
 import logging
+from typing import Literal
 from app.schemas.step_schema import StepSchema
+from app.ai.code_execution.widget_serializer import COLUMNAR_LAYOUT, dumps_widget_payload, rows_to_columnar
 
 router = APIRouter(tags=["steps"])
 step_service = StepService()
@@ -47,6 +49,7 @@ async def export_step(
 @requires_permission('view_reports')
 async def get_step(
     step_id: str,
+    layout: Literal["rows", "columnar"] = Query("rows", description="Data payload layout: rows | columnar"),
     current_user: User = Depends(current_user),
     organization: Organization = Depends(get_current_organization),
     db: AsyncSession = Depends(get_async_db)
@@ -54,4 +57,8 @@ async def get_step(
     step = await step_service.get_step_by_id(db, step_id)
     if not step:
         raise HTTPException(status_code=404, detail="Step not found")
-    return StepSchema.from_orm(step)
\ No newline at end of file
+    payload = StepSchema.from_orm(step).model_dump()
+    if layout == COLUMNAR_LAYOUT:
+        payload["data"] = rows_to_columnar(payload.get("data") or {})
+    # Serialized with orjson on both layouts (rows can be large)
+    return Response(content=dumps_widget_payload(payload), media_type="application/json")
\ No newline at end of file
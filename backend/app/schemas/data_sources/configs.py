@@ -371,6 +371,19 @@ class DuckDBConfig(BaseModel):
         description="One URI pattern per line for parquet/csv files. Supports wildcards. Examples: s3:// or az://",
         json_schema_extra={"ui:type": "textarea"}
     )
+    materialize: bool = Field(
+        False,
+        title="Cache Locally",
+        description="Keep a local Parquet copy of each remote URI (s3, gs, az, https) and query that instead",
+        json_schema_extra={"ui:type": "boolean"}
+    )
+    materialize_ttl_seconds: Optional[int] = Field(
+        None,
+        ge=0,
+        title="Local Cache TTL (seconds)",
+        description="How long a local copy is used before checking the source for changes. Defaults to the deployment setting.",
+        json_schema_extra={"ui:type": "number"}
+    )
 
 # Apache Pinot
 class PinotConfig(BaseModel):
@@ -15,6 +15,7 @@ class ForeignKeySchema(BaseModel):
     column: TableColumnSchema
     references_name: str
     references_column: TableColumnSchema
+    inferred: bool = False
     
     class Config:
         from_attributes = True
@@ -71,6 +72,7 @@ class DataSourceTableSchema(BaseModel):
                         column=TableColumn(name=col_d.get('name'), dtype=col_d.get('dtype')),
                         references_name=fk.get('references_name'),
                         references_column=TableColumn(name=ref_col_d.get('name'), dtype=ref_col_d.get('dtype')),
+                        inferred=bool(fk.get('inferred')),
                     )
                 )
             else:
@@ -80,6 +82,7 @@ class DataSourceTableSchema(BaseModel):
                         column=TableColumn(name=getattr(getattr(fk, 'column', None), 'name', ''), dtype=getattr(getattr(fk, 'column', None), 'dtype', None)),
                         references_name=getattr(fk, 'references_name', ''),
                         references_column=TableColumn(name=getattr(getattr(fk, 'references_column', None), 'name', ''), dtype=getattr(getattr(fk, 'references_column', None), 'dtype', None)),
+                        inferred=bool(getattr(fk, 'inferred', False)),
                     )
                 )
 
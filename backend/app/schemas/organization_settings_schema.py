@@ -116,6 +116,8 @@ class OrganizationSettingsConfig(BaseModel):
     top_k_metadata_resources: FeatureConfig = FeatureConfig(value=10, name="Top K metadata resources", description="The number of metadata resources to sample from the data source in the Agent", is_lab=False, editable=True) # Assuming value is int here
     mcp_enabled: FeatureConfig = FeatureConfig(value=True, name="MCP", description="Enable Model Context Protocol (MCP) endpoint for integration with AI assistants like Cursor, Claude, or others", is_lab=False, editable=True)
     max_instructions_in_context: FeatureConfig = FeatureConfig(value=50, name="Max instructions in context", description="Maximum number of instructions to include in AI context. 'Always' instructions are loaded first, then 'intelligent' instructions fill remaining slots.", is_lab=False, editable=True)
+    enable_query_cache: FeatureConfig = FeatureConfig(value=False, name="Query result cache", description="Reuse results of identical SQL queries against the same connection instead of re-running them on the warehouse", is_lab=True, editable=True)
+    query_cache_ttl_seconds: FeatureConfig = FeatureConfig(value=300, name="Query cache TTL (seconds)", description="How long a cached query result may be reused", is_lab=True, editable=True)
 
     ai_features: Dict[str, FeatureConfig] = {
         # Update defaults to use 'value' instead of 'enabled'
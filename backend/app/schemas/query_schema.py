@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 from app.schemas.visualization_schema import VisualizationSchema
 from app.schemas.step_schema import StepSchema
@@ -38,5 +38,7 @@ class QueryRunRequest(BaseModel):
     type: Optional[str] = None
     row_limit: Optional[int] = None
     tool_execution_id: Optional[str] = None
+    # Preview payload layout: "rows" (default) or "columnar"
+    layout: Optional[Literal["rows", "columnar"]] = None
 
 
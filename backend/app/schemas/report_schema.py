@@ -53,6 +53,23 @@ class ReportSchema(ReportBase):
     class Config:
         from_attributes = True
 
+class RefreshTileSchema(BaseModel):
+    label: str
+    step_id: Optional[str] = None
+    status: Literal["success", "failed", "skipped", "unchanged"]
+    duration_ms: float = 0.0
+    error: Optional[str] = None
+    shared_with: Optional[str] = None
+
+class RefreshSummarySchema(BaseModel):
+    report_id: str
+    duration_ms: float = 0.0
+    tiles: List[RefreshTileSchema] = []
+
+class ReportRerunSchema(ReportSchema):
+    # Per-tile outcome of the rerun; None when the report has no dashboard tiles
+    refresh: Optional[RefreshSummarySchema] = None
+
 class PaginationMeta(BaseModel):
     total: int
     page: int
@@ -13,6 +13,7 @@ from app.models.instruction import Instruction
 from app.models.organization import Organization
 from app.models.user import User
 from app.models.eval import TestRun
+from app.services.instruction_search_service import InstructionSearchService
 
 import logging
 logger = logging.getLogger(__name__)
@@ -663,6 +664,8 @@ class BuildService:
                 instruction.current_version_id = content.instruction_version_id
         
         await db.commit()
+        # Index the build's new intelligent versions for retrieval (unchanged ones already are)
+        await InstructionSearchService().safe_index_build(db, build_id)
         await db.refresh(build)
         return build
     
@@ -38,6 +38,7 @@ from app.services.widget_service import WidgetService
 from app.services.report_service import ReportService
 from app.services.mention_service import MentionService
 from app.services.data_source_service import DataSourceService
+from app.data_sources.query_cache import wrap_clients
 
 from app.websocket_manager import websocket_manager
 from app.settings.database import create_async_session_factory
@@ -253,6 +254,7 @@ class CompletionService:
             clients = {}
             for data_source in report.data_sources:
                 clients[data_source.name] = await self.data_source_service.construct_client(db, data_source, current_user)
+            clients = wrap_clients(clients, report.data_sources, org_settings)
             # Pre-load files relationship in async context to avoid greenlet error in AgentV2.__init__
             _ = report.files
 
@@ -444,6 +446,7 @@ class CompletionService:
                             clients = {}
                             for data_source in report_obj.data_sources:
                                 clients[data_source.name] = await self.data_source_service.construct_client(session, data_source, current_user)
+                            clients = wrap_clients(clients, report_obj.data_sources, org_settings)
                             # Pre-load files relationship in async context to avoid greenlet error in AgentV2.__init__
                             _ = report_obj.files
 
@@ -494,6 +497,7 @@ class CompletionService:
                     clients = {}
                     for data_source in report.data_sources:
                         clients[data_source.name] = await self.data_source_service.construct_client(db, data_source, current_user)
+                    clients = wrap_clients(clients, report.data_sources, org_settings)
                     # Pre-load files relationship in async context to avoid greenlet error in AgentV2.__init__
                     _ = report.files
                     agent = AgentV2(
@@ -1395,6 +1399,7 @@ class CompletionService:
                         clients = {}
                         for data_source in report_obj.data_sources:
                             clients[data_source.name] = await self.data_source_service.construct_client(session, data_source, current_user)
+                        clients = wrap_clients(clients, report_obj.data_sources, org_settings)
 
                         # Pre-load files relationship in async context to avoid greenlet error in AgentV2.__init__
                         # (AgentV2.__init__ is synchronous, so lazy-loading files there would fail)
@@ -14,6 +14,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy import insert, update
 from fastapi import HTTPException
 
 from app.models.connection import Connection
@@ -23,6 +24,10 @@ from app.models.user import User
 from app.models.user_connection_credentials import UserConnectionCredentials
 from app.models.user_connection_overlay import UserConnectionTable, UserConnectionColumn
 from app.schemas.data_source_registry import resolve_client_class, list_available_data_sources
+from app.data_sources.engine_registry import invalidate_connection_engines
+from app.data_sources.duckdb_sessions import invalidate_duckdb_sessions
+from app.data_sources.schema_sync import chunked, introspect_tables, normalize_tables, table_fingerprint
+from app.services.table_metrics_service import TableMetricsService
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +54,7 @@ class ConnectionService:
         
         # Validate connection before saving (for system_only auth)
         if auth_policy == "system_only":
-            validation_result = self.test_connection_params(
+            validation_result = await self.test_connection_params(
                 data_source_type=type,
                 config=config,
                 credentials=credentials,
@@ -185,7 +190,7 @@ class ConnectionService:
             current_config = json.loads(connection.config) if isinstance(connection.config, str) else connection.config
             current_credentials = connection.decrypt_credentials()
             
-            validation_result = self.test_connection_params(
+            validation_result = await self.test_connection_params(
                 data_source_type=connection.type,
                 config=current_config,
                 credentials=current_credentials,
@@ -200,6 +205,10 @@ class ConnectionService:
         try:
             await db.commit()
 
+            if connection_changed:
+                invalidate_connection_engines(connection.id)
+                invalidate_duckdb_sessions(connection.id)
+
             # Refresh tables if connection changed
             if connection_changed and connection.auth_policy == "system_only":
                 await self.refresh_schema(db=db, connection=connection)
@@ -234,10 +243,12 @@ class ConnectionService:
 
         await db.delete(connection)
         await db.commit()
+        invalidate_connection_engines(connection_id)
+        invalidate_duckdb_sessions(connection_id)
 
         return {"message": "Connection deleted successfully"}
 
-    def test_connection_params(
+    async def test_connection_params(
         self,
         data_source_type: str,
         config: dict,
@@ -252,12 +263,12 @@ class ConnectionService:
             )
 
             # Test basic connectivity
-            connection_status = client.test_connection()
+            connection_status = await client.atest_connection()
             if not connection_status.get("success"):
                 return connection_status
 
             # Validate schema access
-            schema_status = self._validate_schema_access(client)
+            schema_status = await self._validate_schema_access(client)
             
             if not schema_status.get("success"):
                 return {
@@ -294,7 +305,7 @@ class ConnectionService:
 
         try:
             client = await self.construct_client(db, connection, current_user)
-            connection_status = client.test_connection()
+            connection_status = await client.atest_connection()
 
             success = bool(connection_status.get("success")) if isinstance(connection_status, dict) else bool(connection_status)
 
@@ -328,81 +339,73 @@ class ConnectionService:
         """Refresh schema and update ConnectionTable records."""
         try:
             client = await self.construct_client(db, connection, current_user)
-            fresh_tables = client.get_schemas()
+            fresh_tables = await introspect_tables(client)
             
             if not fresh_tables:
                 return []
 
-            # Normalize incoming tables
-            def normalize_columns(cols):
-                return [
-                    {"name": (c.name if hasattr(c, "name") else c.get("name")), 
-                     "dtype": (c.dtype if hasattr(c, "dtype") else c.get("dtype"))}
-                    for c in cols or []
-                ]
-
-            incoming = {}
-            for t in fresh_tables:
-                if isinstance(t, dict):
-                    name = t.get("name")
-                    if not name:
-                        continue
-                    incoming[name] = {
-                        "columns": normalize_columns(t.get("columns", [])),
-                        "pks": normalize_columns(t.get("pks", [])),
-                        "fks": t.get("fks", []) or [],
-                        "metadata_json": t.get("metadata_json"),
-                    }
-                else:
-                    name = getattr(t, "name", None)
-                    if not name:
-                        continue
-                    incoming[name] = {
-                        "columns": normalize_columns(getattr(t, "columns", [])),
-                        "pks": normalize_columns(getattr(t, "pks", [])),
-                        "fks": getattr(t, "fks", []) or [],
-                        "metadata_json": getattr(t, "metadata_json", None),
-                    }
-
-            # Get existing tables
+            incoming = normalize_tables(fresh_tables)
+
+            # Existing table keys only; unchanged tables are not loaded or rewritten
             existing_q = await db.execute(
-                select(ConnectionTable)
+                select(ConnectionTable.id, ConnectionTable.name, ConnectionTable.schema_fingerprint)
                 .filter(ConnectionTable.connection_id == connection.id)
             )
-            existing_tables = {t.name: t for t in existing_q.scalars().all()}
+            existing = {row.name: row for row in existing_q.fetchall()}
 
-            # Upsert tables
+            now = datetime.utcnow()
+            new_rows = []
+            changed_rows = []
             for name, payload in incoming.items():
-                if name in existing_tables:
-                    # Update existing
-                    table = existing_tables[name]
-                    table.columns = payload["columns"]
-                    table.pks = payload["pks"]
-                    table.fks = payload["fks"]
-                    table.metadata_json = payload.get("metadata_json")
-                else:
-                    # Create new
-                    table = ConnectionTable(
-                        name=name,
-                        connection_id=connection.id,
-                        columns=payload["columns"],
-                        pks=payload["pks"],
-                        fks=payload["fks"],
-                        metadata_json=payload.get("metadata_json"),
-                        no_rows=0,
-                    )
-                    db.add(table)
+                fingerprint = table_fingerprint(payload)
+                row = existing.get(name)
+                if row is None:
+                    new_rows.append({
+                        "id": str(uuid_module.uuid4()),
+                        "name": name,
+                        "connection_id": connection.id,
+                        "columns": payload["columns"],
+                        "pks": payload["pks"],
+                        "fks": payload["fks"],
+                        "metadata_json": payload.get("metadata_json"),
+                        "no_rows": 0,
+                        "schema_fingerprint": fingerprint,
+                        "created_at": now,
+                        "updated_at": now,
+                    })
+                elif row.schema_fingerprint != fingerprint:
+                    changed_rows.append({
+                        "id": row.id,
+                        "columns": payload["columns"],
+                        "pks": payload["pks"],
+                        "fks": payload["fks"],
+                        "metadata_json": payload.get("metadata_json"),
+                        "schema_fingerprint": fingerprint,
+                        "updated_at": now,
+                    })
+
+            # Bulk executemany in chunks
+            for chunk in chunked(new_rows):
+                await db.execute(insert(ConnectionTable), chunk)
+            for chunk in chunked(changed_rows):
+                await db.execute(update(ConnectionTable), chunk)
+            logger.info(
+                f"Schema refresh for connection {connection.id}: {len(new_rows)} new, {len(changed_rows)} changed, "
+                f"{len(incoming) - len(new_rows) - len(changed_rows)} unchanged"
+            )
 
             # Update last_synced_at
             # NOTE: our SQLAlchemy DateTime columns are stored as TIMESTAMP WITHOUT TIME ZONE,
             # so we must write naive UTC datetimes (asyncpg will error on tz-aware datetimes).
             connection.last_synced_at = datetime.utcnow()
             await db.commit()
+            await TableMetricsService().safe_refresh_connection(db, str(connection.id))
 
-            # Return all tables
+            # Return all tables (refreshing instances the bulk UPDATE bypassed)
             result = await db.execute(
                 select(ConnectionTable)
                 .filter(ConnectionTable.connection_id == connection.id)
+                .execution_options(populate_existing=True)
             )
             return result.scalars().all()
 
@@ -436,7 +439,9 @@ class ConnectionService:
         except Exception:
             allowed = params
             
-        return ClientClass(**allowed)
+        client = ClientClass(**allowed)
+        client.connection_id = str(connection.id)
+        return client
 
     async def resolve_credentials(
         self,
@@ -504,14 +509,14 @@ class ConnectionService:
         except (ImportError, AttributeError) as e:
             raise ValueError(f"Unable to load client for {data_source_type}: {str(e)}")
 
-    def _validate_schema_access(self, client) -> dict:
+    async def _validate_schema_access(self, client) -> dict:
         """Validate that we can read schema metadata."""
         try:
             tables = None
             if hasattr(client, "get_schemas"):
-                tables = client.get_schemas()
+                tables = await client.aget_schemas()
             elif hasattr(client, "get_tables"):
-                tables = client.get_tables()
+                tables = await client.aget_tables()
 
             if tables is None:
                 return {
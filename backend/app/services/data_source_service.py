@@ -41,11 +41,14 @@ from sqlalchemy import insert, delete, or_, and_, func
 from sqlalchemy.exc import IntegrityError
 from app.schemas.datasource_table_schema import DataSourceTableSchema
 from app.models.datasource_table import DataSourceTable  # Add this import at the top of the file
+from app.data_sources.schema_cache import bump_schema_version
+from app.data_sources.schema_sync import chunked, introspect_tables, normalize_tables, table_fingerprint
 from app.models.user_data_source_overlay import UserDataSourceTable as UserOverlayTable, UserDataSourceColumn as UserOverlayColumn
 
 from typing import List
 from sqlalchemy.orm import selectinload
 from app.services.instruction_service import InstructionService
+from app.services.table_metrics_service import TableMetricsService
 from app.schemas.instruction_schema import InstructionCreate
 from app.core.telemetry import telemetry
 
@@ -899,7 +902,7 @@ class DataSourceService:
             # Resolve client with policy-aware credentials
             client = await self.construct_client(db=db, data_source=data_source, current_user=current_user)
             # Test the connection
-            connection_status = client.test_connection()
+            connection_status = await client.atest_connection()
 
             # Normalize success value for robust handling
             try:
@@ -969,12 +972,12 @@ class DataSourceService:
             )
 
             # Step 1: Test basic connectivity
-            connection_status = client.test_connection()
+            connection_status = await client.atest_connection()
             if not connection_status.get("success"):
                 return connection_status
 
             # Step 2: Validate schema access by attempting to get tables
-            schema_status = self._validate_schema_access(client)
+            schema_status = await self._validate_schema_access(client)
             
             # Combine results
             if not schema_status.get("success"):
@@ -1001,7 +1004,7 @@ class DataSourceService:
                 "schema_access": False,
             }
 
-    def _validate_schema_access(self, client) -> dict:
+    async def _validate_schema_access(self, client) -> dict:
         """Validate that we can read schema metadata and find tables.
         Returns a dict with success status, table count, and optional error message.
         """
@@ -1009,9 +1012,9 @@ class DataSourceService:
             # Try get_schemas first (most clients), fall back to get_tables
             tables = None
             if hasattr(client, "get_schemas"):
-                tables = client.get_schemas()
+                tables = await client.aget_schemas()
             elif hasattr(client, "get_tables"):
-                tables = client.get_tables()
+                tables = await client.aget_tables()
             
             if tables is None:
                 return {
@@ -1114,7 +1117,9 @@ class DataSourceService:
             allowed = {k: v for k, v in params.items() if k in sig.parameters and k != "self"}
         except Exception:
             allowed = params
-        return ClientClass(**allowed)
+        client = ClientClass(**allowed)
+        client.connection_id = str(conn.id)
+        return client
 
     def _resolve_client_by_type(self, data_source_type: str, config: dict, credentials: dict):
         """Dynamically import and construct the client for a given data source type.
@@ -1262,7 +1267,7 @@ class DataSourceService:
 
         client = await self.construct_client(db=db, data_source=data_source, current_user=current_user)
         try:
-            schema = client.get_schemas()
+            schema = await introspect_tables(client)
             # Empty list is valid (e.g., empty database) - only None indicates an error
             if schema is None:
                 raise HTTPException(status_code=500, detail="No schema returned from data source")
@@ -1556,6 +1561,7 @@ class DataSourceService:
         update_query = update_query.values(is_active=new_status)
         result = await db.execute(update_query)
         await db.commit()
+        await bump_schema_version(db, data_source_id)
         
         affected_count = result.rowcount
         
@@ -1632,6 +1638,7 @@ class DataSourceService:
             deactivated_count = deactivate_result.rowcount
         
         await db.commit()
+        await bump_schema_version(db, data_source_id)
         
         # Get new total selected count
         selected_count_result = await db.execute(
@@ -1651,7 +1658,7 @@ class DataSourceService:
     async def get_user_data_source_schema(self, db: AsyncSession, data_source: DataSource, user: User):
         """Fetch live schema with user creds, persist overlay rows, and return a user-scoped Table list."""
         client = await self.construct_client(db=db, data_source=data_source, current_user=user)
-        fresh = client.get_schemas()
+        fresh = await introspect_tables(client)
         if not fresh:
             return []
 
@@ -1763,6 +1770,7 @@ class DataSourceService:
                 db.add(c_row)
 
         await db.commit()
+        await bump_schema_version(db, data_source.id)
     
     async def update_table_status_in_schema(self, db: AsyncSession, data_source_id: str, tables: list[DataSourceTableSchema], organization: Organization):
         data_source = await self.get_data_source(db=db, data_source_id=data_source_id, organization=organization)
@@ -1776,6 +1784,7 @@ class DataSourceService:
                 table_object.is_active = table.is_active
                 await db.commit()
                 await db.refresh(table_object)
+        await bump_schema_version(db, data_source_id)
         
         return data_source
     
@@ -1788,112 +1797,85 @@ class DataSourceService:
     async def save_or_update_tables(self, db: AsyncSession, data_source: DataSource, organization: Organization = None, should_set_active: bool = True, current_user: User | None = None):
         """Diff-based upsert of datasource tables.
         - Insert new tables
-        - Update changed tables
+        - Update tables whose schema fingerprint changed (unchanged rows are not written)
         - Deactivate missing tables (keep history)
         - If should_set_active and > ONBOARDING_MAX_TABLES, auto-select top tables via SQL
+        Writes are bulk executemany statements in chunks of BULK_CHUNK_SIZE rows.
         """
-        from sqlalchemy import text, update
-        import json as json_module
-        
+        from sqlalchemy import update
+
         try:
             fresh_tables = await self.get_data_source_fresh_schema(db=db, data_source_id=data_source.id, organization=organization, current_user=current_user)
             if not fresh_tables:
                 return
 
             # Map incoming by name
-            def normalize_columns(cols):
-                return [{"name": (c.name if hasattr(c, "name") else c.get("name")), "dtype": (c.dtype if hasattr(c, "dtype") else c.get("dtype"))} for c in cols or []]
-
-            incoming = {}
-            for t in fresh_tables:
-                if isinstance(t, dict):
-                    name = t.get("name")
-                    if not name:
-                        continue
-                    incoming[name] = {
-                        "columns": normalize_columns(t.get("columns", [])),
-                        "pks": normalize_columns(t.get("pks", [])),
-                        "fks": t.get("fks", []),
-                        "metadata_json": t.get("metadata_json")
-                    }
-                else:
-                    name = getattr(t, "name", None)
-                    if not name:
-                        continue
-                    incoming[name] = {
-                        "columns": normalize_columns(getattr(t, "columns", [])),
-                        "pks": normalize_columns(getattr(t, "pks", [])),
-                        "fks": getattr(t, "fks", []) or [],
-                        "metadata_json": getattr(t, "metadata_json", None)
-                    }
+            incoming = normalize_tables(fresh_tables)
 
             total_tables = len(incoming)
             needs_smart_selection = should_set_active and total_tables > self.ONBOARDING_MAX_TABLES
 
-            # Load existing table names only (not full objects for efficiency)
+            # Load existing table keys only (not full objects for efficiency)
             existing_q = await db.execute(
-                select(DataSourceTable.id, DataSourceTable.name)
+                select(DataSourceTable.id, DataSourceTable.name, DataSourceTable.schema_fingerprint, DataSourceTable.is_active)
                 .where(DataSourceTable.datasource_id == data_source.id)
             )
-            existing_names = {row.name: row.id for row in existing_q.fetchall()}
+            existing = {row.name: row for row in existing_q.fetchall()}
 
-            # Prepare bulk insert for new tables
-            new_tables = []
+            now = datetime.utcnow()
+            new_rows = []
+            changed_rows = []
             for name, payload in incoming.items():
-                if name not in existing_names:
-                    new_tables.append({
+                fingerprint = table_fingerprint(payload)
+                row = existing.get(name)
+                if row is None:
+                    new_rows.append({
+                        "id": str(uuid.uuid4()),
                         "name": name,
-                        "columns": json_module.dumps(payload["columns"]),
-                        "pks": json_module.dumps(payload["pks"]),
-                        "fks": json_module.dumps(payload["fks"]),
+                        "columns": payload["columns"],
+                        "pks": payload["pks"],
+                        "fks": payload["fks"],
                         "datasource_id": str(data_source.id),
                         "is_active": False if needs_smart_selection else bool(should_set_active),
-                        "metadata_json": json_module.dumps(payload.get("metadata_json")) if payload.get("metadata_json") else None,
+                        "metadata_json": payload.get("metadata_json") or None,
                         "no_rows": 0,
+                        "schema_fingerprint": fingerprint,
+                        "created_at": now,
+                        "updated_at": now,
+                    })
+                elif row.schema_fingerprint != fingerprint:
+                    changed_rows.append({
+                        "id": row.id,
+                        "columns": payload["columns"],
+                        "pks": payload["pks"],
+                        "fks": payload["fks"],
+                        "metadata_json": payload.get("metadata_json"),
+                        "schema_fingerprint": fingerprint,
+                        "updated_at": now,
                     })
 
-            # Bulk insert new tables using ORM (database-agnostic)
-            if new_tables:
-                for table_data in new_tables:
-                    db.add(DataSourceTable(
-                        name=table_data["name"],
-                        columns=json_module.loads(table_data["columns"]),
-                        pks=json_module.loads(table_data["pks"]),
-                        fks=json_module.loads(table_data["fks"]),
-                        datasource_id=table_data["datasource_id"],  # Already a string
-                        is_active=table_data["is_active"],
-                        metadata_json=json_module.loads(table_data["metadata_json"]) if table_data["metadata_json"] else None,
-                        no_rows=table_data["no_rows"],
-                    ))
-                await db.commit()
+            for chunk in chunked(new_rows):
+                await db.execute(insert(DataSourceTable), chunk)
+            # ORM bulk UPDATE by primary key (executemany)
+            for chunk in chunked(changed_rows):
+                await db.execute(update(DataSourceTable), chunk)
 
-            # Update existing tables with new column data
-            for name, payload in incoming.items():
-                if name in existing_names:
-                    table_id = existing_names[name]
-                    await db.execute(
-                        update(DataSourceTable)
-                        .where(DataSourceTable.id == table_id)
-                        .values(
-                            columns=payload["columns"],
-                            pks=payload["pks"],
-                            fks=payload["fks"],
-                            metadata_json=payload.get("metadata_json"),
-                        )
-                    )
-            
             # Deactivate tables that no longer exist in fresh schema
-            missing_tables = set(existing_names.keys()) - set(incoming.keys())
-            if missing_tables:
-                for table_name in missing_tables:
-                    table_id = existing_names[table_name]
-                    await db.execute(
-                        update(DataSourceTable)
-                        .where(DataSourceTable.id == table_id)
-                        .values(is_active=False)
-                    )
-            
+            missing_ids = [row.id for name, row in existing.items() if name not in incoming and row.is_active]
+            for chunk in chunked(missing_ids):
+                await db.execute(
+                    update(DataSourceTable)
+                    .where(DataSourceTable.id.in_(chunk))
+                    .values(is_active=False)
+                )
+
             await db.commit()
+            await bump_schema_version(db, data_source.id)
+            logger.info(
+                f"Schema sync for data source {data_source.id}: {len(new_rows)} new, {len(changed_rows)} changed, "
+                f"{len(incoming) - len(new_rows) - len(changed_rows)} unchanged, {len(missing_ids)} deactivated"
+            )
+            await TableMetricsService().safe_refresh_data_source(db, str(data_source.id))
 
             # If smart selection needed, use SQL to select top tables (onboarding limit)
             if needs_smart_selection:
@@ -2005,6 +1987,7 @@ class DataSourceService:
             )
         
         await db.commit()
+        await bump_schema_version(db, datasource_id)
         
     
     async def refresh_data_source_schema(self, db: AsyncSession, data_source_id: str, organization: Organization, current_user: User):
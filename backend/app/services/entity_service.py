@@ -12,6 +12,8 @@ from app.models.step import Step
 from app.models.query import Query
 from app.services.step_service import StepService
 from app.services.query_service import QueryService
+from app.data_sources.query_cache import wrap_clients_for_organization
+from app.ai.code_execution.compiled_code import needed_data_sources
 from app.schemas.entity_schema import EntityCreate, EntityUpdate
 from datetime import datetime
 from app.schemas.entity_schema import EntityRunPayload
@@ -407,12 +409,14 @@ class EntityService:
         # Resolve report/data sources context via any linked data sources on the entity
         # When entities are not tied to a report, we execute with all entity data sources
         from app.ai.code_execution.code_execution import StreamingCodeExecutor
-        ds_clients = {ds.name: ds.get_client() for ds in (entity.data_sources or [])}
+        data_sources = needed_data_sources(code_to_run, entity.data_sources or [])
+        ds_clients = {ds.name: ds.get_client() for ds in data_sources}
+        ds_clients = await wrap_clients_for_organization(db, ds_clients, data_sources, organization.id)
         excel_files = []
 
         executor = StreamingCodeExecutor()
         try:
-            exec_df, execution_log = executor.execute_code(code=code_to_run, ds_clients=ds_clients, excel_files=excel_files)
+            exec_df, execution_log = await executor.aexecute_code(code=code_to_run, ds_clients=ds_clients, excel_files=excel_files)
             df = executor.format_df_for_widget(exec_df)
             # Persist execution results
             entity.data = df
@@ -463,12 +467,14 @@ class EntityService:
         code_to_run = (getattr(payload, "code", None) if payload else None) or entity.code or ""
 
         from app.ai.code_execution.code_execution import StreamingCodeExecutor
-        ds_clients = {ds.name: ds.get_client() for ds in (entity.data_sources or [])}
+        data_sources = needed_data_sources(code_to_run, entity.data_sources or [])
+        ds_clients = {ds.name: ds.get_client() for ds in data_sources}
+        ds_clients = await wrap_clients_for_organization(db, ds_clients, data_sources, organization.id)
         excel_files = []
 
         executor = StreamingCodeExecutor()
         try:
-            exec_df, execution_log = executor.execute_code(code=code_to_run, ds_clients=ds_clients, excel_files=excel_files)
+            exec_df, execution_log = await executor.aexecute_code(code=code_to_run, ds_clients=ds_clients, excel_files=excel_files)
             df = executor.format_df_for_widget(exec_df)
             return {"data": df, "execution_log": execution_log}
         except Exception as e:
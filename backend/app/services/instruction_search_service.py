@@ -0,0 +1,367 @@
+"""
+BM25 retrieval of 'intelligent' instructions within an instruction build.
+
+Every intelligent InstructionVersion gets postings (term, tf) in
+instruction_version_terms and its term count in `search_length`. Versions are
+immutable, so they are tokenized once; publishing a build (or the first search of a
+build) only indexes versions that don't have postings yet. A search reads the
+postings of the query terms for the build's contents, ranks them with BM25 and loads
+only the top instructions.
+
+With semantic search enabled, versions are also embedded (by version id, in the
+organization's "instructions" vector index) and the BM25 ranking is fused with the
+embedding similarity ranking, so instructions phrased differently from the question
+are still found.
+"""
+import asyncio
+import logging
+import math
+import re
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import and_, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.ai.semantic_index import embed_query, get_index, rrf_fuse, semantic_enabled, semantic_top_k
+from app.data_sources.schema_sync import chunked
+from app.models.build_content import BuildContent
+from app.models.instruction import Instruction
+from app.models.instruction_build import InstructionBuild
+from app.models.instruction_version import InstructionVersion
+from app.models.instruction_version_term import InstructionVersionTerm
+from app.settings.database import create_async_session_factory
+
+logger = logging.getLogger(__name__)
+
+# Common words dropped from queries and indexed text
+SEARCH_STOPWORDS = {
+    "the", "a", "an", "of", "and", "for", "to", "in", "by", "with", "on",
+    "is", "are", "be", "this", "that", "it", "as", "at", "from", "or",
+    "what", "how", "when", "where", "why", "which", "who", "can", "will",
+    "should", "would", "could", "have", "has", "had", "do", "does", "did",
+    "i", "you", "we", "they", "he", "she", "my", "your", "our", "their",
+    "me", "us", "them", "all", "some", "any", "no", "not", "but", "if",
+    "show", "get", "find", "give", "tell", "list", "display", "want", "need",
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_TERM_LENGTH = 64
+
+
+def _normalize(word: str) -> str:
+    # Light plural folding so "order" finds "orders" (and the reverse)
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+# camelCase / PascalCase word boundaries: totalRevenue, HTTPServer
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+
+def search_terms(text: Optional[str]) -> List[str]:
+    """Terms of `text` as indexed and queried: lowercase alphanumeric runs, no stopwords.
+
+    Identifiers are split into their words (`totalRevenue`, `net_revenue_usd`), so
+    "revenue" finds both. Changing this requires re-indexing the stored postings.
+    """
+    words = re.split(r"[^a-z0-9]+", _CAMEL_BOUNDARY.sub(" ", text or "").lower())
+    return [
+        _normalize(w) for w in words
+        if 2 <= len(w) <= MAX_TERM_LENGTH and w not in SEARCH_STOPWORDS
+    ]
+
+
+def searchable_text(record: Any) -> str:
+    """Text, title, formatted content and structured name/description/path/columns of an instruction or version."""
+    parts = [getattr(record, "text", None) or ""]
+    for attr in ("title", "formatted_content"):
+        value = getattr(record, attr, None)
+        if value:
+            parts.append(value)
+    structured = getattr(record, "structured_data", None)
+    if isinstance(structured, dict):
+        for key in ("name", "description", "path"):
+            if structured.get(key):
+                parts.append(str(structured[key]))
+        for col in structured.get("columns") or []:
+            if isinstance(col, dict) and col.get("name"):
+                parts.append(str(col["name"]))
+    return " ".join(parts)
+
+
+def bm25_scores(
+    query_terms: Iterable[str],
+    postings: Iterable[Tuple[Any, str, int, int]],
+    doc_count: int,
+    avg_length: float,
+) -> Dict[Any, float]:
+    """BM25 score per document from (doc, term, tf, doc length) postings of the query terms."""
+    rows = list(postings)
+    df: Counter = Counter(term for _, term, _, _ in rows)
+    wanted = set(query_terms)
+    avg_length = avg_length or 1.0
+    scores: Dict[Any, float] = defaultdict(float)
+    for doc, term, tf, length in rows:
+        if term not in wanted:
+            continue
+        idf = math.log(1.0 + (doc_count - df[term] + 0.5) / (df[term] + 0.5))
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * (length or 0) / avg_length)
+        scores[doc] += idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+    return dict(scores)
+
+
+def rank_documents(query_terms: Sequence[str], documents: Sequence[str]) -> List[float]:
+    """BM25 scores of in-memory documents (for instructions outside any build)."""
+    counts = [Counter(search_terms(doc)) for doc in documents]
+    wanted = set(query_terms)
+    postings = [
+        (i, term, tf, sum(c.values()))
+        for i, c in enumerate(counts)
+        for term, tf in c.items()
+        if term in wanted
+    ]
+    avg_length = (sum(sum(c.values()) for c in counts) / len(counts)) if counts else 0.0
+    scores = bm25_scores(wanted, postings, len(counts), avg_length)
+    return [scores.get(i, 0.0) for i in range(len(counts))]
+
+
+def _intersects(values: Optional[List[Any]], wanted: Optional[Set[str]]) -> bool:
+    if not wanted:
+        return True
+    return bool(values) and any(str(v) in wanted for v in values)
+
+
+class InstructionSearchService:
+
+    @staticmethod
+    def _intelligent_contents(build_id: str):
+        """Conditions selecting a build's published, intelligent contents."""
+        return and_(
+            BuildContent.build_id == str(build_id),
+            InstructionVersion.load_mode == "intelligent",
+            Instruction.status == "published",
+        )
+
+    def _contents_query(self, *columns, build_id: str):
+        return (
+            select(*columns)
+            .select_from(BuildContent)
+            .join(InstructionVersion, InstructionVersion.id == BuildContent.instruction_version_id)
+            .join(Instruction, Instruction.id == BuildContent.instruction_id)
+            .where(self._intelligent_contents(build_id))
+        )
+
+    @staticmethod
+    def _unindexed_versions(*columns, build_id: str):
+        return (
+            select(*columns)
+            .join(BuildContent, BuildContent.instruction_version_id == InstructionVersion.id)
+            .where(
+                BuildContent.build_id == str(build_id),
+                InstructionVersion.load_mode == "intelligent",
+                InstructionVersion.search_length.is_(None),
+            )
+        )
+
+    async def index_build(self, db: AsyncSession, build_id: str) -> int:
+        """Write postings for the build's intelligent versions that have none; returns how many were indexed."""
+        versions = (await db.execute(self._unindexed_versions(InstructionVersion, build_id=build_id))).scalars().all()
+        if not versions:
+            return 0
+        now = datetime.utcnow()
+        postings: List[Dict[str, Any]] = []
+        lengths: List[Dict[str, Any]] = []
+        for version in versions:
+            counts = Counter(search_terms(searchable_text(version)))
+            postings.extend(
+                {
+                    "id": str(uuid.uuid4()),
+                    "instruction_version_id": version.id,
+                    "term": term,
+                    "tf": tf,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for term, tf in counts.items()
+            )
+            lengths.append({"id": version.id, "search_length": sum(counts.values())})
+        for chunk in chunked(postings):
+            await db.execute(insert(InstructionVersionTerm), chunk)
+        # ORM bulk UPDATE by primary key (executemany)
+        for chunk in chunked(lengths):
+            await db.execute(update(InstructionVersion), chunk)
+        await db.commit()
+        logger.info(f"Instruction search index for build {build_id}: indexed {len(versions)} versions, {len(postings)} postings")
+        return len(versions)
+
+    async def safe_index_build(self, db: AsyncSession, build_id: str) -> Optional[int]:
+        """`index_build` (and `embed_build`) for publish hooks: failures are logged, not raised (searches index lazily)."""
+        try:
+            indexed = await self.index_build(db, build_id)
+        except IntegrityError:
+            # Another process indexed the same versions first
+            await db.rollback()
+            indexed = 0
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Instruction search indexing failed for build {build_id}: {e}")
+            return None
+        try:
+            await self.embed_build(db, build_id)
+        except Exception as e:
+            logger.warning(f"Instruction embedding failed for build {build_id}: {e}")
+        return indexed
+
+    @staticmethod
+    async def _organization_id(db: AsyncSession, build_id: str) -> Optional[str]:
+        return (await db.execute(
+            select(InstructionBuild.organization_id).where(InstructionBuild.id == str(build_id))
+        )).scalar()
+
+    async def embed_build(self, db: AsyncSession, build_id: str) -> int:
+        """Embed the build's intelligent versions missing from the vector index; returns how many were embedded."""
+        if not semantic_enabled():
+            return 0
+        organization_id = await self._organization_id(db, build_id)
+        if organization_id is None:
+            return 0
+        index = get_index(organization_id, "instructions")
+        version_ids = (await db.execute(self._contents_query(InstructionVersion.id, build_id=build_id))).scalars().all()
+        missing = [v for v in version_ids if v not in index]
+        if not missing:
+            return 0
+        items: Dict[str, str] = {}
+        for chunk in chunked(missing):
+            versions = (await db.execute(select(InstructionVersion).where(InstructionVersion.id.in_(chunk)))).scalars().all()
+            items.update((v.id, searchable_text(v)) for v in versions)
+        # Versions are immutable and shared between builds, so nothing is pruned
+        return await asyncio.to_thread(index.sync, items, prune=False)
+
+    async def _semantic_ranking(self, db: AsyncSession, build_id: str, query: str) -> List[Tuple[str, float]]:
+        """(content id, similarity) of the build's intelligent contents closest to `query`."""
+        query_vector = await asyncio.to_thread(embed_query, query)
+        if query_vector is None:
+            return []
+        await self.embed_build(db, build_id)
+        organization_id = await self._organization_id(db, build_id)
+        rows = (await db.execute(
+            self._contents_query(BuildContent.id, InstructionVersion.id, build_id=build_id)
+        )).all()
+        content_by_version = {version_id: content_id for content_id, version_id in rows}
+        hits = get_index(organization_id, "instructions").search(
+            query_vector, semantic_top_k(), allowed=content_by_version.keys()
+        )
+        return [(content_by_version[version_id], similarity) for version_id, similarity in hits]
+
+    async def ensure_indexed(self, db: AsyncSession, build_id: str) -> None:
+        """Index a build not indexed at publish time (e.g. published before the index existed).
+
+        Writes go through a separate session so the caller's session is never rolled back.
+        """
+        missing = (await db.execute(
+            self._unindexed_versions(func.count(InstructionVersion.id), build_id=build_id)
+        )).scalar()
+        if not missing:
+            return
+        SessionLocal = create_async_session_factory()
+        async with SessionLocal() as session:
+            await self.safe_index_build(session, build_id)
+
+    async def search(
+        self,
+        db: AsyncSession,
+        build_id: str,
+        query_terms: Iterable[str],
+        limit: int,
+        *,
+        data_source_ids: Optional[List[str]] = None,
+        label_ids: Optional[List[str]] = None,
+        semantic_query: Optional[str] = None,
+    ) -> List[Tuple[BuildContent, float]]:
+        """Top `limit` intelligent contents of a build by BM25 score (only matching ones).
+
+        `data_source_ids` / `label_ids` keep versions associated with any of them
+        (versions without data sources apply to all of them). With `semantic_query` (and
+        semantic search enabled) the contents most similar to it are fused into the
+        ranking; those without a keyword match are scored by their similarity.
+        """
+        terms = sorted({_normalize(t) for t in query_terms if t})
+        semantic = bool(semantic_query) and semantic_enabled()
+        if limit <= 0 or not (terms or semantic):
+            return []
+        await self.ensure_indexed(db, build_id)
+
+        doc_count, avg_length = (await db.execute(
+            self._contents_query(func.count(BuildContent.id), func.avg(InstructionVersion.search_length), build_id=build_id)
+        )).one()
+        if not doc_count:
+            return []
+        scores: Dict[Any, float] = {}
+        if terms:
+            postings = (await db.execute(
+                self._contents_query(
+                    BuildContent.id, InstructionVersionTerm.term, InstructionVersionTerm.tf, InstructionVersion.search_length,
+                    build_id=build_id,
+                )
+                .join(InstructionVersionTerm, InstructionVersionTerm.instruction_version_id == InstructionVersion.id)
+                .where(InstructionVersionTerm.term.in_(terms))
+            )).all()
+            scores = bm25_scores(terms, postings, int(doc_count), float(avg_length or 0.0))
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if semantic:
+            try:
+                similar = await self._semantic_ranking(db, build_id, semantic_query)
+            except Exception as e:
+                logger.warning(f"Semantic instruction search failed for build {build_id}: {e}")
+                similar = []
+            if similar:
+                similarity = dict(similar)
+                fused = rrf_fuse([content_id for content_id, _ in ranked], [content_id for content_id, _ in similar])
+                ranked = [(content_id, scores.get(content_id) or similarity[content_id]) for content_id, _ in fused]
+
+        ds_filter = {str(x) for x in data_source_ids} if data_source_ids else None
+        label_filter = {str(x) for x in label_ids} if label_ids else None
+        results: List[Tuple[BuildContent, float]] = []
+        # Load ranked contents a page at a time until `limit` pass the filters
+        page = max(limit * 2, 20)
+        for start in range(0, len(ranked), page):
+            batch = ranked[start:start + page]
+            loaded = (await db.execute(
+                select(BuildContent)
+                .options(selectinload(BuildContent.instruction), selectinload(BuildContent.instruction_version))
+                .where(BuildContent.id.in_([content_id for content_id, _ in batch]))
+            )).scalars().all()
+            by_id = {content.id: content for content in loaded}
+            for content_id, score in batch:
+                content = by_id.get(content_id)
+                if content is None or content.instruction_version is None:
+                    continue
+                version = content.instruction_version
+                if ds_filter and version.data_source_ids and not _intersects(version.data_source_ids, ds_filter):
+                    continue
+                if not _intersects(version.label_ids, label_filter):
+                    continue
+                results.append((content, score))
+                if len(results) >= limit:
+                    return results
+        return results
+
+    async def fill(self, db: AsyncSession, build_id: str, limit: int) -> List[BuildContent]:
+        """Up to `limit` intelligent contents of a build, unranked (used when there is no query)."""
+        if limit <= 0:
+            return []
+        ids = (await db.execute(self._contents_query(BuildContent.id, build_id=build_id).limit(limit))).scalars().all()
+        if not ids:
+            return []
+        return (await db.execute(
+            select(BuildContent)
+            .options(selectinload(BuildContent.instruction), selectinload(BuildContent.instruction_version))
+            .where(BuildContent.id.in_(ids))
+        )).scalars().all()
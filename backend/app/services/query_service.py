@@ -9,6 +9,9 @@ from app.models.report import Report
 from app.schemas.query_schema import QueryCreate, QuerySchema, QueryRunRequest
 from app.schemas.step_schema import StepSchema
 from app.ai.code_execution.code_execution import StreamingCodeExecutor
+from app.ai.code_execution.compiled_code import needed_data_sources
+from app.ai.code_execution.widget_serializer import ROWS_LAYOUT
+from app.data_sources.query_cache import wrap_clients_for_organization
 
 from sqlalchemy import and_
 
@@ -173,11 +176,13 @@ class QueryService:
         if not report:
             raise ValueError("Report not found for step's widget")
 
-        ds_clients = {ds.name: ds.get_client() for ds in report.data_sources}
+        data_sources = needed_data_sources(step.code, report.data_sources)
+        ds_clients = {ds.name: ds.get_client() for ds in data_sources}
+        ds_clients = await wrap_clients_for_organization(db, ds_clients, data_sources, report.organization_id)
         excel_files = report.files
         executor = StreamingCodeExecutor()
         try:
-            exec_df, execution_log = executor.execute_code(code=step.code, ds_clients=ds_clients, excel_files=excel_files)
+            exec_df, execution_log = await executor.aexecute_code(code=step.code, ds_clients=ds_clients, excel_files=excel_files)
             df = executor.format_df_for_widget(exec_df)
             # Persist results on the new step
             step.data = df
@@ -286,13 +291,15 @@ class QueryService:
         if not report:
             raise ValueError("Report not found for query's widget")
 
-        ds_clients = {ds.name: ds.get_client() for ds in report.data_sources}
+        data_sources = needed_data_sources(request.code or "", report.data_sources)
+        ds_clients = {ds.name: ds.get_client() for ds in data_sources}
+        ds_clients = await wrap_clients_for_organization(db, ds_clients, data_sources, report.organization_id)
         excel_files = report.files
         executor = StreamingCodeExecutor()
 
         try:
-            exec_df, execution_log = executor.execute_code(code=request.code or "", ds_clients=ds_clients, excel_files=excel_files)
-            df = executor.format_df_for_widget(exec_df)
+            exec_df, execution_log = await executor.aexecute_code(code=request.code or "", ds_clients=ds_clients, excel_files=excel_files)
+            df = executor.format_df_for_widget(exec_df, layout=request.layout or ROWS_LAYOUT)
             return {"preview": df, "execution_log": execution_log}
         except Exception as e:
             # Surface error to client for preview display
@@ -0,0 +1,229 @@
+"""
+Concurrent refresh of a report's dashboard tiles.
+
+`ReportService.rerun_report_steps` collects one step per visualization and hands them
+to `ReportRefreshService.refresh`, which:
+  - builds the report's data source clients once for the whole refresh,
+  - runs tiles whose steps have identical code once and copies the result,
+  - executes the rest concurrently, bounded by a global limit and a per-data-source
+    limit (a tile holds a slot for every data source its code references),
+  - records timing and errors per tile instead of aborting on the first failure.
+
+With `skip_unchanged`, tiles whose input tables report the same change signals as at
+their last successful refresh are left as they are (see app.data_sources.freshness).
+
+Code execution overlaps; database writes are serialized since an AsyncSession can't be
+used concurrently.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.ai.code_execution.code_execution import StreamingCodeExecutor
+from app.ai.code_execution.compiled_code import get_compiled_code
+from app.data_sources.freshness import freshness_record, is_unchanged, probe_versions, step_inputs
+from app.data_sources.query_cache import wrap_clients_for_organization
+from app.models.report import Report
+from app.models.step import Step
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RefreshTarget:
+    """A tile to refresh: the step whose data backs a visualization (or widget)."""
+    label: str
+    step: Optional[Step] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class TileResult:
+    label: str
+    step_id: Optional[str]
+    status: str  # success | failed | skipped | unchanged
+    duration_ms: float = 0.0
+    error: Optional[str] = None
+    # Label of the tile whose execution produced this result, for deduplicated tiles
+    shared_with: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "label": self.label,
+            "step_id": self.step_id,
+            "status": self.status,
+            "duration_ms": round(self.duration_ms, 1),
+            "error": self.error,
+            "shared_with": self.shared_with,
+        }
+
+
+@dataclass
+class RefreshSummary:
+    report_id: str
+    tiles: List[TileResult] = field(default_factory=list)
+    duration_ms: float = 0.0
+
+    @property
+    def failed(self) -> List[TileResult]:
+        return [t for t in self.tiles if t.status == "failed"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "report_id": self.report_id,
+            "duration_ms": round(self.duration_ms, 1),
+            "tiles": [t.to_dict() for t in self.tiles],
+        }
+
+
+def code_key(code: str) -> str:
+    """Identity of a step's code for deduplication (trailing whitespace ignored)."""
+    lines = [line.rstrip() for line in (code or "").strip().splitlines()]
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def referenced_data_sources(code: str, names: List[str]) -> List[str]:
+    """Data sources `code` reaches through db_clients; all of them if that isn't known statically."""
+    try:
+        return get_compiled_code(code).needed_clients(names)
+    except SyntaxError:
+        return list(names)
+
+
+class ReportRefreshService:
+
+    def __init__(self, max_concurrency: Optional[int] = None, per_data_source_concurrency: Optional[int] = None):
+        from app.settings.config import settings
+
+        config = settings.bow_config.report_refresh if settings.bow_config else None
+        self.max_concurrency = max(1, max_concurrency or (config.max_concurrency if config else 4))
+        self.per_data_source_concurrency = max(
+            1, per_data_source_concurrency or (config.per_data_source_concurrency if config else 2)
+        )
+        self.skip_unchanged_scheduled = config.skip_unchanged_scheduled if config else False
+
+    async def refresh(
+        self, db: AsyncSession, report: Report, targets: List[RefreshTarget], skip_unchanged: bool = False
+    ) -> RefreshSummary:
+        started = time.perf_counter()
+        summary = RefreshSummary(report_id=str(report.id))
+        results: Dict[int, TileResult] = {}
+
+        # Group runnable tiles by code; the first tile of each group is executed
+        groups: Dict[str, List[RefreshTarget]] = {}
+        for target in targets:
+            if target.error or target.step is None:
+                results[id(target)] = TileResult(
+                    label=target.label,
+                    step_id=str(target.step.id) if target.step is not None else None,
+                    status="skipped",
+                    error=target.error,
+                )
+                continue
+            groups.setdefault(code_key(target.step.code), []).append(target)
+
+        if groups:
+            ds_names = [ds.name for ds in (report.data_sources or [])]
+            # Only open clients some tile's code can reach
+            needed_names = set()
+            for group in groups.values():
+                needed_names.update(referenced_data_sources(group[0].step.code, ds_names))
+            data_sources = [ds for ds in (report.data_sources or []) if ds.name in needed_names]
+            try:
+                clients = {ds.name: ds.get_client() for ds in data_sources}
+                clients = await wrap_clients_for_organization(db, clients, data_sources, report.organization_id)
+            except Exception as e:
+                logger.exception("Failed to build clients for report %s refresh", report.id)
+                for group in groups.values():
+                    for target in group:
+                        results[id(target)] = TileResult(
+                            label=target.label, step_id=str(target.step.id), status="failed", error=str(e)
+                        )
+                groups = {}
+            excel_files = list(report.files or [])
+
+            global_slots = asyncio.Semaphore(self.max_concurrency)
+            ds_slots = {name: asyncio.Semaphore(self.per_data_source_concurrency) for name in ds_names}
+            write_lock = asyncio.Lock()
+
+            async def run_group(group: List[RefreshTarget]) -> None:
+                leader = group[0]
+                code = leader.step.code
+                needed = sorted(referenced_data_sources(code, ds_names))
+                inputs = step_inputs(code, ds_names)
+                key = code_key(code)
+                tile_started = time.perf_counter()
+                try:
+                    unknown = get_compiled_code(code).unknown_clients(ds_names)
+                    if unknown:
+                        raise ValueError(f"Code uses data sources not attached to the report: {', '.join(unknown)}")
+                    async with global_slots:
+                        # Acquire in sorted order so tiles sharing data sources can't deadlock
+                        acquired = []
+                        try:
+                            for name in needed:
+                                await ds_slots[name].acquire()
+                                acquired.append(name)
+                            tile_started = time.perf_counter()
+                            # Probed before executing: a write landing mid-run shows up next time
+                            versions = await probe_versions(clients, inputs) if inputs else None
+                            if skip_unchanged and all(is_unchanged(t.step.freshness, key, versions) for t in group):
+                                for target in group:
+                                    results[id(target)] = TileResult(
+                                        label=target.label,
+                                        step_id=str(target.step.id),
+                                        status="unchanged",
+                                        duration_ms=(time.perf_counter() - tile_started) * 1000,
+                                        shared_with=leader.label if target is not leader else None,
+                                    )
+                                return
+                            executor = StreamingCodeExecutor()
+                            df, _ = await executor.aexecute_code(code=code, ds_clients=clients, excel_files=excel_files)
+                            data = await asyncio.to_thread(executor.format_df_for_widget, df)
+                            # Truncated results depend on the caps, not only on the tables
+                            if df.attrs.get("truncated"):
+                                versions = None
+                        finally:
+                            for name in acquired:
+                                ds_slots[name].release()
+                    duration_ms = (time.perf_counter() - tile_started) * 1000
+                    async with write_lock:
+                        for target in group:
+                            target.step.data = data
+                            target.step.freshness = freshness_record(key, versions) if versions is not None else None
+                        try:
+                            await db.commit()
+                        except Exception:
+                            await db.rollback()
+                            raise
+                    for target in group:
+                        results[id(target)] = TileResult(
+                            label=target.label,
+                            step_id=str(target.step.id),
+                            status="success",
+                            duration_ms=duration_ms,
+                            shared_with=leader.label if target is not leader else None,
+                        )
+                except Exception as e:
+                    duration_ms = (time.perf_counter() - tile_started) * 1000
+                    logger.warning("Refresh of %s in report %s failed: %s", leader.label, report.id, e)
+                    for target in group:
+                        results[id(target)] = TileResult(
+                            label=target.label,
+                            step_id=str(target.step.id),
+                            status="failed",
+                            duration_ms=duration_ms,
+                            error=str(e),
+                            shared_with=leader.label if target is not leader else None,
+                        )
+
+            await asyncio.gather(*(run_group(group) for group in groups.values()))
+
+        summary.tiles = [results[id(t)] for t in targets if id(t) in results]
+        summary.duration_ms = (time.perf_counter() - started) * 1000
+        return summary
@@ -19,6 +19,7 @@ from app.models.report_file_association import report_file_association
 from fastapi import HTTPException
 
 import uuid
+from typing import Optional, Tuple
 from sqlalchemy import select, or_, func
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -29,6 +30,7 @@ import asyncio
 from app.core.scheduler import scheduler
 from app.models.dashboard_layout_version import DashboardLayoutVersion
 from app.services.dashboard_layout_service import DashboardLayoutService
+from app.services.report_refresh_service import RefreshSummary, RefreshTarget, ReportRefreshService
 from app.models.visualization import Visualization
 from app.models.query import Query
 from app.models.step import Step
@@ -40,6 +42,7 @@ class ReportService:
     def __init__(self):
         self.widget_service = WidgetService()
         self.layout_service = DashboardLayoutService()
+        self.refresh_service = ReportRefreshService()
     
     async def _detect_app_version(self, db: AsyncSession, report_id: str) -> str:
         """Detect app version for routing decisions based on agent execution data."""
@@ -233,8 +236,17 @@ class ReportService:
             pass
         return report
     
-    async def rerun_report_steps(self, db: AsyncSession, report_id: str, current_user: User, organization: Organization) -> Report:
+    async def rerun_report_steps(
+        self, db: AsyncSession, report_id: str, current_user: User, organization: Organization,
+        skip_unchanged: bool = False, strict: bool = False,
+    ) -> Tuple[Report, Optional[RefreshSummary]]:
+        """Refresh the report's dashboard tiles; returns the report and the per-tile summary.
+
+        With `strict` (manual reruns), a visualization without a runnable step is a 400
+        before anything runs; scheduled runs record it in the summary and refresh the rest.
+        """
         logger.info(f"Executing scheduled report run for report_id: {report_id}")
+        summary: Optional[RefreshSummary] = None
         report = await self.get_report(db, report_id, current_user, organization)
 
         # Prefer visualization/query-based rerun via active dashboard layout
@@ -247,10 +259,12 @@ class ReportService:
             viz_blocks = []
 
         if viz_blocks:
+            targets: list[RefreshTarget] = []
             for b in viz_blocks:
                 viz_id = b.get('visualization_id')
                 if not viz_id:
                     continue
+                label = f"visualization {viz_id}"
                 # Load visualization and its query
                 viz_result = await db.execute(select(Visualization).where(Visualization.id == viz_id))
                 viz = viz_result.scalar_one_or_none()
@@ -276,12 +290,29 @@ class ReportService:
                     step = step_result.scalar_one_or_none()
 
                 if not step:
-                    raise HTTPException(status_code=400, detail=f"No step found for visualization {viz_id}")
-                if not step.code or not str(step.code).strip():
-                    raise HTTPException(status_code=400, detail=f"Step code is empty for visualization {viz_id}; cannot rerun")
-
-                logger.info(f"Running visualization {viz_id} via step {step.id} for report {report_id}")
-                await self.widget_service.step_service.rerun_step(db, step.id)
+                    if strict:
+                        raise HTTPException(status_code=400, detail=f"No step found for visualization {viz_id}")
+                    targets.append(RefreshTarget(label=label, error="No step found for visualization"))
+                elif not step.code or not str(step.code).strip():
+                    if strict:
+                        raise HTTPException(status_code=400, detail=f"Step code is empty for visualization {viz_id}; cannot rerun")
+                    targets.append(RefreshTarget(label=label, step=step, error="Step code is empty; cannot rerun"))
+                else:
+                    targets.append(RefreshTarget(label=label, step=step))
+
+            summary = await self.refresh_service.refresh(db, report, targets, skip_unchanged=skip_unchanged)
+            for tile in summary.tiles:
+                if tile.status == "success":
+                    logger.info("Refreshed %s (step %s) in %.0f ms%s", tile.label, tile.step_id, tile.duration_ms,
+                                f", shared with {tile.shared_with}" if tile.shared_with else "")
+                elif tile.status == "unchanged":
+                    logger.info("Skipped %s (step %s): input tables unchanged", tile.label, tile.step_id)
+                else:
+                    logger.warning("Refresh %s for %s (step %s): %s", tile.status, tile.label, tile.step_id, tile.error)
+            logger.info(
+                "Refreshed %s tiles for report %s in %.0f ms (%s failed)",
+                len(summary.tiles), report_id, summary.duration_ms, len(summary.failed),
+            )
         else:
             # Legacy fallback: rerun last step for each published widget
             published_widgets = await self.widget_service.get_published_widgets_for_report(db, report_id)
@@ -290,7 +321,7 @@ class ReportService:
                 await self.widget_service.run_widget_step(db, widget, current_user, organization)
 
         logger.info(f"Completed scheduled report run for report_id: {report_id}")
-        return report
+        return report, summary
 
     async def archive_report(self, db: AsyncSession, report_id: str, current_user: User, organization: Organization) -> Report:
         result = await db.execute(select(Report).filter(Report.id == report_id).filter(Report.report_type == 'regular'))
@@ -637,7 +668,10 @@ class ReportService:
             organization = await db.get(Organization, organization_id)
 
             # Now call rerun_report_steps with the fresh db and loaded objects
-            await self.rerun_report_steps(db, report_id, current_user, organization)
+            await self.rerun_report_steps(
+                db, report_id, current_user, organization,
+                skip_unchanged=self.refresh_service.skip_unchanged_scheduled,
+            )
 
     async def set_report_schedule(self, db: AsyncSession, report_id: str, cron_expression: str, current_user: User, organization: Organization) -> Report:
         
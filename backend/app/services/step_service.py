@@ -16,7 +16,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.report import Report
 
-from app.ai.code_execution.code_execution import CodeExecutionManager
+from app.ai.code_execution.code_execution import StreamingCodeExecutor
+from app.ai.code_execution.compiled_code import needed_data_sources
+from app.data_sources.query_cache import wrap_clients_for_organization
 
 
 
@@ -120,14 +122,16 @@ class StepService:
         if not report:
             raise ValueError("Report not found")
         
-        db_clients = {data_source.name: data_source.get_client() for data_source in report.data_sources}
+        code = step.code
+        data_sources = needed_data_sources(code, report.data_sources)
+        db_clients = {data_source.name: data_source.get_client() for data_source in data_sources}
+        db_clients = await wrap_clients_for_organization(db, db_clients, data_sources, report.organization_id)
 
         excel_files = report.files
-        code_execution_manager = CodeExecutionManager()
-        code = step.code
+        executor = StreamingCodeExecutor()
         
-        df, output_log = code_execution_manager.execute_code(code=code, db_clients=db_clients, excel_files=excel_files)
-        df = code_execution_manager.format_df_for_widget(df)
+        df, output_log = await executor.aexecute_code(code=code, ds_clients=db_clients, excel_files=excel_files)
+        df = executor.format_df_for_widget(df)
         
         # Update existing step instead of creating new one
         step.data = df
@@ -0,0 +1,145 @@
+"""
+Join-graph metrics (centrality, degrees, richness, entity_like) for schema tables.
+
+Runs after a schema sync: loads the tables' columns/keys, mines co-usage pairs from
+recent TableUsageEvents (the tables each step's data model was built from, recorded
+per step and linked to the schema table rows),
+computes the metrics (see app.data_sources.table_graph) in a worker thread and bulk
+updates only the rows whose metrics changed.
+"""
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.data_sources.schema_cache import bump_schema_version
+from app.data_sources.schema_sync import chunked
+from app.data_sources.table_graph import compute_table_metrics
+from app.models.connection_table import ConnectionTable
+from app.models.datasource_table import DataSourceTable
+from app.models.table_usage_event import TableUsageEvent
+
+logger = logging.getLogger(__name__)
+
+_METRIC_FIELDS = ("centrality_score", "richness", "degree_in", "degree_out", "entity_like")
+
+
+def _graph_config():
+    from app.settings.config import settings
+
+    return settings.bow_config.table_graph if settings.bow_config else None
+
+
+class TableMetricsService:
+
+    async def refresh_data_source(self, db: AsyncSession, data_source_id: str) -> int:
+        """Recompute metrics of a data source's tables; returns how many rows changed."""
+        rows = (await db.execute(
+            select(
+                DataSourceTable.id, DataSourceTable.name, DataSourceTable.columns,
+                DataSourceTable.pks, DataSourceTable.fks,
+                *(getattr(DataSourceTable, f) for f in _METRIC_FIELDS),
+            ).where(DataSourceTable.datasource_id == str(data_source_id))
+        )).fetchall()
+        co_usage = await self._co_usage(db, str(data_source_id))
+        changed = await self._refresh(db, DataSourceTable, rows, co_usage)
+        if changed:
+            await bump_schema_version(db, data_source_id)
+        return changed
+
+    async def refresh_connection(self, db: AsyncSession, connection_id: str) -> int:
+        """Recompute metrics of a connection's tables from its foreign keys."""
+        rows = (await db.execute(
+            select(
+                ConnectionTable.id, ConnectionTable.name, ConnectionTable.columns,
+                ConnectionTable.pks, ConnectionTable.fks,
+                *(getattr(ConnectionTable, f) for f in _METRIC_FIELDS),
+            ).where(ConnectionTable.connection_id == str(connection_id))
+        )).fetchall()
+        return await self._refresh(db, ConnectionTable, rows, [])
+
+    async def _co_usage(self, db: AsyncSession, data_source_id: str) -> List[Tuple[str, str, float]]:
+        """(table, table, steps that used both) from the data source's recent table usage.
+
+        Events are matched to tables by their `datasource_table_id` link, so names are
+        the table rows' own; events without the link are skipped.
+        """
+        config = _graph_config()
+        max_tables = config.max_tables_per_step if config else 20
+        window_days = config.co_usage_window_days if config else 90
+        result = await db.execute(
+            select(TableUsageEvent.step_id, DataSourceTable.name)
+            .join(DataSourceTable, DataSourceTable.id == TableUsageEvent.datasource_table_id)
+            .where(
+                DataSourceTable.datasource_id == data_source_id,
+                TableUsageEvent.success == True,
+                TableUsageEvent.used_at >= datetime.utcnow() - timedelta(days=window_days),
+            )
+        )
+        by_step: Dict[str, set] = {}
+        for step_id, name in result.fetchall():
+            by_step.setdefault(step_id, set()).add(name)
+        pairs: Counter = Counter()
+        for used in by_step.values():
+            # Steps touching many tables say little about any single pair
+            if 2 <= len(used) <= max_tables:
+                pairs.update(combinations(sorted(used), 2))
+        return [(a, b, float(count)) for (a, b), count in pairs.items()]
+
+    async def _refresh(self, db: AsyncSession, model, rows, co_usage: List[Tuple[str, str, float]]) -> int:
+        if not rows:
+            return 0
+        config = _graph_config()
+        tables = {row.name: {"columns": row.columns, "pks": row.pks, "fks": row.fks} for row in rows}
+        metrics = await asyncio.to_thread(
+            compute_table_metrics,
+            tables,
+            co_usage,
+            damping=config.damping if config else 0.85,
+            co_usage_weight=config.co_usage_weight if config else 0.5,
+        )
+        now = datetime.utcnow()
+        changed: List[Dict[str, Any]] = []
+        for row in rows:
+            values = metrics.get(row.name)
+            if values is None or all(getattr(row, f) == values[f] for f in _METRIC_FIELDS):
+                continue
+            changed.append({"id": row.id, **values, "metrics_computed_at": now})
+        # ORM bulk UPDATE by primary key (executemany)
+        for chunk in chunked(changed):
+            await db.execute(update(model), chunk)
+        await db.commit()
+        logger.info(f"Table metrics for {model.__tablename__}: {len(changed)} of {len(rows)} rows changed")
+        return len(changed)
+
+    async def safe_refresh_data_source(self, db: AsyncSession, data_source_id: str) -> Optional[int]:
+        """`refresh_data_source` for post-sync hooks: failures are logged, not raised."""
+        if not self._enabled():
+            return None
+        try:
+            return await self.refresh_data_source(db, data_source_id)
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Table metrics refresh failed for data source {data_source_id}: {e}")
+            return None
+
+    async def safe_refresh_connection(self, db: AsyncSession, connection_id: str) -> Optional[int]:
+        """`refresh_connection` for post-sync hooks: failures are logged, not raised."""
+        if not self._enabled():
+            return None
+        try:
+            return await self.refresh_connection(db, connection_id)
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Table metrics refresh failed for connection {connection_id}: {e}")
+            return None
+
+    @staticmethod
+    def _enabled() -> bool:
+        config = _graph_config()
+        return config.enabled if config else True
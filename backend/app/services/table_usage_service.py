@@ -6,6 +6,7 @@ from sqlalchemy import select, or_
 from app.models.table_usage_event import TableUsageEvent
 from app.models.table_feedback_event import TableFeedbackEvent
 from app.models.table_stats import TableStats
+from app.data_sources.schema_cache import bump_stats_version
 from app.models.data_source import DataSource
 from app.models.data_source_membership import DataSourceMembership, PRINCIPAL_TYPE_USER
 from app.schemas.table_usage_schema import (
@@ -206,6 +207,9 @@ class TableUsageService:
             row.updated_at_stats = datetime.utcnow()
 
         await db.commit()
+        # Org-level stats feed table scores in the agent's schema context
+        if up.report_id is None:
+            await bump_stats_version(db, up.data_source_id)
         await db.refresh(row)
         return TableStatsSchema.from_orm(row)
 
@@ -89,6 +89,127 @@ class Database(BaseModel):
         )
     )
 
+class CodeExecution(BaseModel):
+    # process | inline
+    backend: str = "process"
+    pool_size: int = Field(default_factory=lambda: int(os.getenv("BOW_CODE_EXECUTION_POOL_SIZE", "2")))
+    # Recycle a worker after this many jobs to bound memory growth from generated code
+    max_jobs_per_worker: int = 200
+    start_method: str = "forkserver"
+    # arrow: results come back as memory-mapped Arrow IPC files; pickle: through the pipe
+    result_transport: str = "arrow"
+    # Where Arrow result files are written; defaults to /dev/shm when available
+    result_dir: Optional[str] = None
+    # Result frames above this many rows are profiled on a sample of profile_sample_size rows
+    profile_sample_threshold: int = 100_000
+    profile_sample_size: int = 20_000
+    # Optional hard caps per query issued by generated code (streaming clients stop fetching
+    # early). Off by default; when set, truncation is reported in the step's info and as a
+    # warning in the execution log the agent reads.
+    query_max_rows: Optional[int] = None
+    query_max_bytes: Optional[int] = None
+    query_chunk_rows: int = 50_000
+    # Optional server-side timeout per query issued by generated code. Off by default;
+    # when set, a query running longer is cancelled and the step fails with a timeout
+    query_timeout_seconds: Optional[float] = None
+    # After a sigkill, how long a worker gets to cancel its queries before it is killed
+    cancel_grace_seconds: float = 5
+    # Compiled generated code kept per process, by source hash
+    compiled_cache_size: int = 256
+
+
+class QueryCache(BaseModel):
+    # Shared by the web process and code execution workers; defaults to <tmp>/bow-query-cache
+    cache_dir: Optional[str] = None
+    max_bytes: int = 512 * 1024 * 1024
+    # Larger results are not cached
+    max_entry_bytes: int = 64 * 1024 * 1024
+    # Used when the organization doesn't set query_cache_ttl_seconds
+    default_ttl_seconds: int = 300
+
+
+class ReportRefresh(BaseModel):
+    # Dashboard tiles executed at once during a report refresh
+    max_concurrency: int = 4
+    # Tiles running against the same data source at once
+    per_data_source_concurrency: int = 2
+    # Scheduled refreshes skip tiles whose input tables report no change since the last run.
+    # Opt-in: change signals are heuristics (e.g. Postgres write counters) and a missed
+    # change leaves a dashboard stale.
+    skip_unchanged_scheduled: bool = False
+
+
+class DataSourceEngines(BaseModel):
+    # Per pooled engine (one per connection + credentials, per process)
+    pool_size: int = 5
+    max_overflow: int = 5
+    pool_recycle: int = 1800
+    pool_timeout: int = 30
+    # Engines unused for this long are disposed
+    idle_timeout_seconds: int = 600
+    max_engines: int = 64
+    # Threads running blocking client calls (schema introspection, connection tests) for async callers
+    client_threads: int = 16
+    # Schemas introspected at once by clients that can split a schema refresh per schema
+    introspection_concurrency: int = 4
+    # Sources that declare no foreign keys get name/type-based ones (orders.customer_id -> customers.id),
+    # tagged "inferred". Off by default: a wrong guess reads like a real constraint to the agent
+    infer_foreign_keys: bool = False
+
+
+class DuckDBSessions(BaseModel):
+    # Per-process in-memory sessions for URI-mode DuckDB data sources
+    idle_timeout_seconds: int = 900
+    max_sessions: int = 32
+
+
+class DuckDBMaterialization(BaseModel):
+    # Local Parquet snapshots of remote URIs (opt-in per connection); defaults to <tmp>/bow-duckdb-snapshots
+    cache_dir: Optional[str] = None
+    # Sources larger than this are always queried remotely
+    max_bytes: int = 10 * 1024 * 1024 * 1024
+    # Used when the connection doesn't set materialize_ttl_seconds
+    default_ttl_seconds: int = 3600
+
+
+class TableGraph(BaseModel):
+    # Centrality/degree/richness scores of schema tables, recomputed after each schema sync
+    enabled: bool = True
+    damping: float = 0.85
+    # Weight of a table pair used together by steps, relative to a foreign key (scaled by log1p(times))
+    co_usage_weight: float = 0.5
+    # Steps using more tables than this don't contribute co-usage pairs
+    max_tables_per_step: int = 20
+    # Only table usage from the last this many days counts
+    co_usage_window_days: int = 90
+
+
+class SchemaCache(BaseModel):
+    # Per-process cache of the scored schema tables agent context is built from; entries
+    # are invalidated when tables are synced, (de)activated, re-scored or their stats change
+    enabled: bool = True
+    # Upper bound on entry age, so the recency decay in table scores is picked up
+    ttl_seconds: int = 300
+    max_tables_per_org: int = 50_000
+
+
+class SemanticSearch(BaseModel):
+    # Embedding-based retrieval of tables, instructions and resources, fused with keyword
+    # ranking. Needs the optional `fastembed` package; off (keyword-only) by default
+    enabled: bool = False
+    model: str = "BAAI/bge-small-en-v1.5"
+    # Where the model is downloaded to (fastembed's default cache when unset)
+    model_dir: Optional[str] = None
+    # Vector indexes on disk (a temp directory when unset)
+    index_dir: Optional[str] = None
+    threads: Optional[int] = None
+    batch_size: int = 64
+    # Items embedded before a request proceeds; the rest are embedded in the background
+    inline_embed_limit: int = 256
+    # Semantic candidates fused with keyword results per lookup
+    top_k: int = 50
+
+
 def generate_fernet_key():
     # Generate a valid Fernet-compatible key (32 url-safe base64-encoded bytes)
     key = secrets.token_bytes(32)
@@ -112,6 +233,15 @@ class BowConfig(BaseModel):
     database: Database = Database()
     intercom: Intercom = Intercom()
     telemetry: Telemetry = Telemetry()
+    code_execution: CodeExecution = CodeExecution()
+    query_cache: QueryCache = QueryCache()
+    data_source_engines: DataSourceEngines = DataSourceEngines()
+    report_refresh: ReportRefresh = ReportRefresh()
+    duckdb_sessions: DuckDBSessions = DuckDBSessions()
+    duckdb_materialization: DuckDBMaterialization = DuckDBMaterialization()
+    table_graph: TableGraph = TableGraph()
+    schema_cache: SchemaCache = SchemaCache()
+    semantic_search: SemanticSearch = SemanticSearch()
 
     @validator('encryption_key')
     def validate_encryption_key(cls, v):
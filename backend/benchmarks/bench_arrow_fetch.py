@@ -0,0 +1,73 @@
+"""
+Compare fetching a query result from the local DuckDB client as a DataFrame
+(`execute_query`) versus as an Arrow table (`execute_query_arrow`), with and without
+converting the Arrow table to pandas afterwards.
+
+Usage (from backend/):
+    python benchmarks/bench_arrow_fetch.py [--rows 100000 1000000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data_sources.clients.duckdb_client import DuckDBClient  # noqa: E402
+
+
+def make_database(path: str, rows: int) -> None:
+    con = duckdb.connect(path)
+    con.execute(f"""
+        CREATE OR REPLACE TABLE orders AS
+        SELECT
+            range AS id,
+            random() * 1000 AS amount,
+            (range % 100)::INTEGER AS quantity,
+            TIMESTAMP '2024-01-01' + to_seconds(range) AS created_at,
+            ['US', 'DE', 'FR', 'IL', 'JP'][(range % 5) + 1] AS country,
+            'sku-' || (range % 5000) AS sku
+        FROM range({rows})
+    """)
+    con.close()
+
+
+def _best_of(repeat: int, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'fetch':>16} {'seconds':>10} {'rows/s':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"bench_{rows}.duckdb")
+            make_database(path, rows)
+            client = DuckDBClient(database=path)
+            sql = "SELECT * FROM orders"
+            for name, fetch in (
+                ("pandas", lambda: client.execute_query(sql)),
+                ("arrow", lambda: client.execute_query_arrow(sql)),
+                ("arrow->pandas", lambda: client.execute_query_arrow(sql).to_pandas()),
+            ):
+                result, elapsed = _best_of(args.repeat, fetch)
+                assert len(result) == rows
+                print(f"{rows:>10} {name:>16} {elapsed:>10.3f} {rows / elapsed:>14,.0f}")
+                del result
+
+
+if __name__ == "__main__":
+    main()
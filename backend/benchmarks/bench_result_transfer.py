@@ -0,0 +1,85 @@
+"""
+Compare moving a result DataFrame from a code execution worker to the web process
+via pickle (through a pipe) versus an Arrow IPC file in shared memory.
+
+Usage (from backend/):
+    python benchmarks/bench_result_transfer.py [--rows 10000 100000 1000000]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai.code_execution.process_pool import default_result_dir, read_arrow_result, write_arrow_result  # noqa: E402
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "id": np.arange(rows, dtype=np.int64),
+        "amount": rng.random(rows) * 1000,
+        "quantity": rng.integers(0, 100, rows),
+        "created_at": pd.date_range("2024-01-01", periods=rows, freq="s"),
+        "country": rng.choice(["US", "DE", "FR", "IL", "JP"], rows),
+        "sku": [f"sku-{i % 5000}" for i in range(rows)],
+    })
+
+
+def _send_pickle(conn, rows):
+    conn.send(make_frame(rows))
+    conn.close()
+
+
+def _send_arrow(conn, rows, result_dir):
+    conn.send(write_arrow_result(make_frame(rows), result_dir))
+    conn.close()
+
+
+def _receive(target, args):
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=target, args=(child,) + args)
+    proc.start()
+    child.close()
+    parent.poll(None)  # exclude frame generation from the timing
+    tracemalloc.start()
+    start = time.perf_counter()
+    payload = parent.recv()
+    df = read_arrow_result(payload) if isinstance(payload, str) else payload
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    proc.join()
+    return df, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    result_dir = default_result_dir()
+
+    print(f"{'rows':>10} {'transport':>10} {'seconds':>10} {'py peak MB':>12} {'arrow MB':>10}")
+    for rows in args.rows:
+        for name, target, extra in (
+            ("pickle", _send_pickle, (rows,)),
+            ("arrow", _send_arrow, (rows, result_dir)),
+        ):
+            arrow_before = pa.total_allocated_bytes()
+            df, elapsed, peak = _receive(target, extra)
+            arrow_mb = (pa.total_allocated_bytes() - arrow_before) / 1e6
+            assert len(df) == rows
+            print(f"{rows:>10} {name:>10} {elapsed:>10.3f} {peak / 1e6:>12.1f} {arrow_mb:>10.1f}")
+            del df
+
+
+if __name__ == "__main__":
+    main()
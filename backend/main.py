@@ -34,6 +34,10 @@ from app.core.cors import init_cors
 from app.core.scheduler import scheduler
 from app.models.user import User
 from app.services.maintenance_service import purge_step_payloads_keep_latest_per_query
+from app.ai.code_execution.process_pool import get_code_execution_pool, shutdown_code_execution_pool
+from app.data_sources.engine_registry import dispose_engine_registry
+from app.data_sources.client_executor import shutdown_client_executor
+from app.data_sources.duckdb_sessions import close_duckdb_sessions
 
 from app.routes import (
     report,
@@ -307,6 +311,14 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Failed to schedule purge job: {e}")
 
+    # Warm the code execution workers so the first query does not pay for process startup
+    try:
+        pool = get_code_execution_pool()
+        if pool is not None and not settings.TESTING:
+            pool.start()
+    except Exception as e:
+        logger.error(f"Failed to start code execution pool: {e}")
+
     scheduler.start()
     print(f"""
    ____                       __                         _     
@@ -332,6 +344,10 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     scheduler.shutdown()
+    shutdown_code_execution_pool()
+    dispose_engine_registry()
+    shutdown_client_executor()
+    close_duckdb_sessions()
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -154,6 +154,7 @@ from tests.fixtures.file import upload_file, upload_csv_file, upload_excel_file,
 from tests.fixtures.organization_settings import get_organization_settings, update_organization_settings, upload_organization_icon, delete_organization_icon, get_organization_icon
 from tests.fixtures.api_key import create_api_key, list_api_keys, delete_api_key, api_key_request
 from tests.fixtures.mcp import enable_mcp, disable_mcp
+from tests.fixtures.salesforce import mock_salesforce
 from tests.fixtures.build import (
     get_builds,
     get_build,
@@ -0,0 +1,188 @@
+"""
+Local mock of the Salesforce REST endpoints SalesforceClient uses: global and object
+describe (with ETags), SOQL query paging and Bulk API 2.0 query jobs with CSV results.
+"""
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+_API = re.compile(r"^/services/data/v[\d.]+/(.*)$")
+
+MOCK_OBJECTS = {
+    "Account": [
+        {"name": "Id", "type": "id"},
+        {"name": "Name", "type": "string"},
+        {"name": "AnnualRevenue", "type": "currency"},
+        {"name": "BillingPostalCode", "type": "string"},
+        {"name": "OwnerId", "type": "reference", "referenceTo": ["User"], "relationshipName": "Owner"},
+    ],
+    "User": [
+        {"name": "Id", "type": "id"},
+        {"name": "Name", "type": "string"},
+    ],
+    "Contact": [
+        {"name": "Id", "type": "id"},
+        {"name": "LastName", "type": "string"},
+        {"name": "AccountId", "type": "reference", "referenceTo": ["Account"]},
+    ],
+    "AccountHistory": [{"name": "Id", "type": "id"}],
+}
+
+
+class MockSalesforceState:
+    def __init__(self, account_count: int = 5):
+        self.account_count = account_count
+        self.page_size = 2000
+        self.calls = []
+        self.page_sizes = []
+        self.jobs = {}
+
+    def accounts(self):
+        # Account 0 has no owner: REST returns `"Owner": null`, bulk an empty `Owner.Name`
+        return [
+            {
+                "attributes": {"type": "Account"},
+                "Id": f"001A{i:011d}",
+                "Name": f"Account {i}",
+                "AnnualRevenue": float(i),
+                "BillingPostalCode": f"{i:05d}",
+                "Owner": {"attributes": {"type": "User"}, "Name": f"User {i % 3}"} if i else None,
+            }
+            for i in range(self.account_count)
+        ]
+
+    def count(self, method: str, path: str) -> int:
+        return sum(1 for m, p, _ in self.calls if m == method and p == path)
+
+
+def _make_handler(state: MockSalesforceState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=None, headers=None, content_type="application/json"):
+            payload = b""
+            if body is not None:
+                payload = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _route(self, method):
+            parsed = urlparse(self.path)
+            match = _API.match(parsed.path)
+            if not match:
+                return self._send(404, {"error": "not found"})
+            path, query = match.group(1).rstrip("/"), parse_qs(parsed.query)
+            state.calls.append((method, path, self.headers.get("If-None-Match")))
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+
+            if method == "GET" and path == "sobjects":
+                return self._describe("g1", {"sobjects": [{"name": n, "queryable": True} for n in MOCK_OBJECTS]})
+            described = re.match(r"^sobjects/(\w+)/describe$", path)
+            if method == "GET" and described and described.group(1) in MOCK_OBJECTS:
+                name = described.group(1)
+                return self._describe(f"{name}-1", {"name": name, "fields": MOCK_OBJECTS[name]})
+            if method == "GET" and path == "query":
+                return self._query_page(0)
+            paged = re.match(r"^query/page-(\d+)$", path)
+            if method == "GET" and paged:
+                return self._query_page(int(paged.group(1)))
+            if method == "POST" and path == "jobs/query":
+                job_id = f"750{len(state.jobs):06d}"
+                state.jobs[job_id] = {"query": body["query"], "state": "JobComplete"}
+                return self._send(200, {"id": job_id, "state": "UploadComplete"})
+            job = re.match(r"^jobs/query/(\w+)(/results)?$", path)
+            if job and job.group(1) in state.jobs:
+                job_id = job.group(1)
+                if job.group(2):
+                    return self._bulk_results(query)
+                if method == "GET":
+                    return self._send(200, {"id": job_id, "state": state.jobs[job_id]["state"]})
+                if method == "PATCH":
+                    state.jobs[job_id]["state"] = body.get("state", "Aborted")
+                    return self._send(200, {"id": job_id, "state": state.jobs[job_id]["state"]})
+                if method == "DELETE":
+                    state.jobs.pop(job_id)
+                    return self._send(204)
+            return self._send(404, [{"errorCode": "NOT_FOUND"}])
+
+        def _describe(self, etag, body):
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, headers={"ETag": etag})
+            return self._send(200, body, headers={"ETag": etag})
+
+        def _query_page(self, start):
+            records = state.accounts()
+            options = re.match(r"batchSize=(\d+)", self.headers.get("Sforce-Query-Options") or "")
+            size = int(options.group(1)) if options else state.page_size
+            state.page_sizes.append(size)
+            chunk = records[start:start + size]
+            done = start + size >= len(records)
+            body = {"totalSize": len(records), "done": done, "records": chunk}
+            if not done:
+                body["nextRecordsUrl"] = f"/services/data/v59.0/query/page-{start + size}"
+            return self._send(200, body)
+
+        def _bulk_results(self, query):
+            records = state.accounts()
+            max_records = int(query.get("maxRecords", ["50000"])[0])
+            start = int(query.get("locator", ["0"])[0])
+            chunk = records[start:start + max_records]
+            lines = ['"Id","Name","AnnualRevenue","BillingPostalCode","Owner.Name"'] + [
+                f'"{r["Id"]}","{r["Name"]}","{r["AnnualRevenue"]}","{r["BillingPostalCode"]}",'
+                + (f'"{r["Owner"]["Name"]}"' if r["Owner"] else "")
+                for r in chunk
+            ]
+            locator = str(start + max_records) if start + max_records < len(records) else "null"
+            return self._send(200, "\n".join(lines) + "\n", headers={"Sforce-Locator": locator}, content_type="text/csv")
+
+        def do_GET(self):
+            self._route("GET")
+
+        def do_POST(self):
+            self._route("POST")
+
+        def do_PATCH(self):
+            self._route("PATCH")
+
+        def do_DELETE(self):
+            self._route("DELETE")
+
+    return Handler
+
+
+@pytest.fixture
+def mock_salesforce():
+    """Yields a function building a SalesforceClient bound to a local mock server, and the server state."""
+    from simple_salesforce import Salesforce
+    from app.data_sources.clients.salesforce_client import SalesforceClient
+
+    state = MockSalesforceState()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def _client() -> SalesforceClient:
+        client = SalesforceClient(username="user", password="pass", security_token="token", domain="login")
+        sf = Salesforce(instance_url=base_url, session_id="mock-session")
+        # simple_salesforce always builds https URLs; point the API base at the mock
+        sf.base_url = f"{base_url}/services/data/v{sf.sf_version}/"
+        client.__dict__["sf"] = sf
+        return client
+
+    try:
+        yield _client, state
+    finally:
+        server.shutdown()
+        server.server_close()
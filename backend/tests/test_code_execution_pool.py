@@ -0,0 +1,89 @@
+"""
+CodeExecutionPool worker handoff under contention, and per-execution stdout capture.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.ai.code_execution.process_pool import CodeExecutionPool, capture_stdout
+
+_CODE = """
+def generate_df(db_clients, excel_files):
+    import time
+    print("job", {n})
+    time.sleep(0.05)
+    return pd.DataFrame({{"n": [{n}]}})
+"""
+
+
+@pytest.fixture
+def pool():
+    pool = CodeExecutionPool(size=2, start_method="spawn")
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_more_jobs_than_workers_and_executor_threads(pool):
+    loop = asyncio.get_running_loop()
+    # A tiny default executor used to be exhausted by callers waiting for a worker
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=1))
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(pool.run(_CODE.format(n=n), {}, []) for n in range(8))),
+        timeout=60,
+    )
+
+    assert [df["n"].tolist() for df, _ in results] == [[n] for n in range(8)]
+    assert [log for _, log in results] == [f"job {n}\n" for n in range(8)]
+    assert len(pool._idle) == 2 and not pool._waiters
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_lose_a_worker(pool):
+    busy = [asyncio.ensure_future(pool.run(_CODE.format(n=n), {}, [])) for n in range(2)]
+    await asyncio.sleep(0)
+    waiting = asyncio.ensure_future(pool.run(_CODE.format(n=9), {}, []))
+    await asyncio.sleep(0)
+    assert pool._waiters
+    waiting.cancel()
+
+    await asyncio.wait_for(asyncio.gather(*busy), timeout=60)
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    assert len(pool._idle) == 2
+    df, _ = await asyncio.wait_for(pool.run(_CODE.format(n=3), {}, []), timeout=60)
+    assert df["n"].tolist() == [3]
+
+
+def test_concurrent_captures_keep_their_own_output():
+    barrier = threading.Barrier(4)
+
+    def capture(n):
+        with capture_stdout() as out:
+            barrier.wait()
+            for _ in range(50):
+                print(n)
+        return out.getvalue()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        logs = list(executor.map(capture, range(4)))
+
+    assert logs == [f"{n}\n" * 50 for n in range(4)]
+
+
+@pytest.mark.asyncio
+async def test_arrow_result_can_be_modified_in_place(pool):
+    code = """
+def generate_df(db_clients, excel_files):
+    return pd.DataFrame({"amount": [1.0, 2.0], "qty": [1, 2], "name": ["a", "b"]})
+"""
+    df, _ = await asyncio.wait_for(pool.run(code, {}, []), timeout=60)
+    df.loc[0, "amount"] = 10.0
+    df["qty"] *= 2
+    df.sort_values("amount", inplace=True)
+    assert df["amount"].tolist() == [2.0, 10.0]
+    assert df["qty"].tolist() == [4, 2]
@@ -0,0 +1,53 @@
+"""
+DuckDBClient statements on the shared URI-mode session, over a local Parquet file.
+"""
+import duckdb
+import pytest
+
+from app.data_sources.clients.duckdb_client import DuckDBClient
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    path = tmp_path / "orders.parquet"
+    duckdb.sql("SELECT range AS id, range * 1.5 AS amount FROM range(10)").write_parquet(str(path))
+    # No network here; local files need no httpfs
+    monkeypatch.setattr(DuckDBClient, "_configure_httpfs", lambda self, con: None)
+    return DuckDBClient(uris=str(path))
+
+
+def test_temp_table_then_select(client):
+    df = client.execute_query(
+        "CREATE TEMP TABLE big AS SELECT * FROM orders WHERE amount > 9; "
+        "INSERT INTO big SELECT * FROM orders WHERE id = 0; "
+        "SELECT count(*) AS n FROM big"
+    )
+    assert df["n"].tolist() == [4]
+    # Temp objects belong to the query's cursor
+    with pytest.raises(Exception, match="big"):
+        client.execute_query("SELECT * FROM big")
+
+
+def test_session_settings_are_allowed_and_not_shared(client):
+    df = client.execute_query("SET TimeZone = 'Asia/Tokyo'; SELECT current_setting('TimeZone') AS tz")
+    assert df["tz"].tolist() == ["Asia/Tokyo"]
+    assert client.execute_query("SELECT current_setting('TimeZone') AS tz")["tz"].tolist() != ["Asia/Tokyo"]
+
+
+@pytest.mark.parametrize("sql", [
+    "CREATE TABLE copy AS SELECT * FROM orders",
+    "CREATE OR REPLACE VIEW orders AS SELECT 1 AS id",
+    "DROP VIEW orders",
+    "CREATE TEMP TABLE t AS SELECT 1 AS id; DROP VIEW orders, t",
+    "SET threads = 3",
+    "SET GLOBAL TimeZone = 'UTC'",
+    "ATTACH ':memory:' AS other",
+    "COPY orders TO '/tmp/orders.csv'",
+])
+def test_changes_to_the_shared_session_are_rejected(client, sql):
+    settings = "SELECT current_setting('threads') AS threads, current_setting('TimeZone') AS tz"
+    before = client.execute_query(settings)
+    with pytest.raises(Exception):
+        client.execute_query(sql)
+    assert client.execute_query("SELECT count(*) AS n FROM orders")["n"].tolist() == [10]
+    assert client.execute_query(settings).equals(before)
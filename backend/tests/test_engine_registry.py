@@ -0,0 +1,63 @@
+"""
+EngineRegistry keying, invalidation and eviction, over SQLite files.
+"""
+from sqlalchemy import text
+
+from app.data_sources.engine_registry import EngineRegistry
+
+
+def _url(tmp_path, name="a.db", password=None):
+    # SQLite ignores the password, but it is part of the rendered URL like any credential
+    return f"sqlite:///{tmp_path / name}" + (f"?password={password}" if password else "")
+
+
+def test_same_url_and_connection_share_an_engine(tmp_path):
+    registry = EngineRegistry()
+    engine = registry.get_engine(_url(tmp_path), connection_id="c1")
+    assert registry.get_engine(_url(tmp_path), connection_id="c1") is engine
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_credentials_connection_and_scope_are_part_of_the_key(tmp_path):
+    registry = EngineRegistry()
+    engine = registry.get_engine(_url(tmp_path), connection_id="c1")
+    assert registry.get_engine(_url(tmp_path, password="new"), connection_id="c1") is not engine
+    assert registry.get_engine(_url(tmp_path), connection_id="c2") is not engine
+    assert registry.get_engine(_url(tmp_path), connection_id="c1", scope="analytics") is not engine
+    assert registry.get_engine(_url(tmp_path), connection_id="c1", connect_args={"timeout": 5}) is not engine
+
+
+def test_invalidate_disposes_only_that_connections_engines(tmp_path):
+    registry = EngineRegistry()
+    first = registry.get_engine(_url(tmp_path), connection_id="c1")
+    registry.get_engine(_url(tmp_path), connection_id="c1", scope="other")
+    other = registry.get_engine(_url(tmp_path), connection_id="c2")
+
+    assert registry.invalidate("c1") == 2
+    assert registry.invalidate("c1") == 0
+    assert registry.get_engine(_url(tmp_path), connection_id="c1") is not first
+    assert registry.get_engine(_url(tmp_path), connection_id="c2") is other
+
+
+def test_idle_engines_are_evicted_unless_checked_out(tmp_path):
+    registry = EngineRegistry()
+    busy = registry.get_engine(_url(tmp_path, "busy.db"), connection_id="c1")
+    idle = registry.get_engine(_url(tmp_path, "idle.db"), connection_id="c1")
+    registry.idle_timeout_seconds = 0
+    with busy.connect():
+        registry.get_engine(_url(tmp_path, "new.db"), connection_id="c1")
+        assert registry.get_engine(_url(tmp_path, "busy.db"), connection_id="c1") is busy
+    assert registry.get_engine(_url(tmp_path, "idle.db"), connection_id="c1") is not idle
+
+
+def test_capacity_evicts_the_least_recently_used(tmp_path):
+    registry = EngineRegistry(max_engines=2)
+    a = registry.get_engine(_url(tmp_path, "a.db"))
+    b = registry.get_engine(_url(tmp_path, "b.db"))
+    registry.get_engine(_url(tmp_path, "a.db"))
+    registry.get_engine(_url(tmp_path, "c.db"))
+
+    assert registry.get_engine(_url(tmp_path, "a.db")) is a
+    assert len(registry._engines) == 2
+    assert registry.get_engine(_url(tmp_path, "b.db")) is not b
@@ -0,0 +1,75 @@
+"""
+Static input detection for step reruns: anything uncertain must come back as None.
+"""
+import pytest
+
+from app.data_sources.freshness import step_inputs, tables_in_sql
+
+
+@pytest.mark.parametrize("sql, tables", [
+    ("SELECT * FROM orders", ["orders"]),
+    ("select o.id from sales.orders o join \"Customers\" c on c.id = o.customer_id", ["sales.orders", "Customers"]),
+    ("SELECT * FROM a x, b AS y, c WHERE x.id = y.id", ["a", "b", "c"]),
+    ("WITH recent AS (SELECT * FROM orders WHERE id > 10) SELECT * FROM recent JOIN items USING (id)", ["orders", "items"]),
+    ("SELECT 'from fake' AS s FROM real_table -- join other", ["real_table"]),
+    ("SELECT * FROM `db`.`events` /* from hidden */", ["db.events"]),
+])
+def test_tables_read_by_a_select(sql, tables):
+    assert tables_in_sql(sql) == tables
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM orders WHERE created_at > now() - interval '1 day'",
+    "SELECT current_date, * FROM orders",
+    "SELECT * FROM read_parquet('s3://bucket/*.parquet')",
+    "SELECT * FROM a JOIN b ON a.id = b.id, c",
+    "SELECT * FROM (SELECT * FROM a) s, c",
+    "SELECT * FROM a, generate_series(1, 3)",
+    "SELECT random() AS r FROM orders",
+])
+def test_unanalysable_sql_is_none(sql):
+    assert tables_in_sql(sql) is None
+
+
+def test_step_inputs_by_data_source():
+    code = '''
+QUERY = "SELECT * FROM orders"
+
+def generate_df(db_clients, excel_files):
+    orders = db_clients["warehouse"].execute_query(QUERY)
+    users = db_clients["app"].execute_query(sql="SELECT * FROM users u JOIN orgs o ON o.id = u.org_id")
+    return orders.merge(users)
+'''
+    assert step_inputs(code, ["warehouse", "app"]) == {"warehouse": ["orders"], "app": ["users", "orgs"]}
+
+
+def test_single_data_source_may_be_unnamed():
+    code = '''
+def generate_df(db_clients, excel_files):
+    client = list(db_clients.values())[0]
+    return client.execute_query("SELECT * FROM orders")
+'''
+    assert step_inputs(code, ["warehouse"]) == {"warehouse": ["orders"]}
+    assert step_inputs(code, ["warehouse", "app"]) is None
+
+
+@pytest.mark.parametrize("body", [
+    # SQL built at runtime
+    'return db_clients["warehouse"].execute_query(f"SELECT * FROM {table}")',
+    # Name bound more than once
+    'sql = "SELECT * FROM a"\n    sql = "SELECT * FROM b"\n    return db_clients["warehouse"].execute_query(sql)',
+    # Files, time and randomness
+    'return pd.read_csv(excel_files[0].path)',
+    'df = db_clients["warehouse"].execute_query("SELECT * FROM orders")\n    df["at"] = pd.Timestamp.now()\n    return df',
+    # Unknown data source
+    'return db_clients["other"].execute_query("SELECT * FROM orders")',
+    # No query at all
+    'return pd.DataFrame({"a": [1]})',
+])
+def test_uncertain_steps_are_never_skippable(body):
+    code = f"def generate_df(db_clients, excel_files):\n    table = 'orders'\n    {body}\n"
+    assert step_inputs(code, ["warehouse"]) is None
+
+
+def test_syntax_error_is_none():
+    assert step_inputs("def generate_df(:", ["warehouse"]) is None
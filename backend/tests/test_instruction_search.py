@@ -0,0 +1,81 @@
+"""
+Instruction search terms and BM25 ranking (the pure functions behind InstructionSearchService).
+"""
+import math
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.instruction_search_service import bm25_scores, rank_documents, search_terms, searchable_text
+
+
+def test_terms_drop_stopwords_and_fold_plurals():
+    assert search_terms("Show me the orders by region") == ["order", "region"]
+    assert search_terms("class address") == ["class", "address"]
+    assert search_terms(None) == []
+
+
+@pytest.mark.parametrize("text, terms", [
+    ("totalRevenue", ["total", "revenue"]),
+    ("net_revenue_usd", ["net", "revenue", "usd"]),
+    ("HTTPServer logs", ["http", "server", "log"]),
+    ("revenueQ3", ["revenue", "q3"]),
+])
+def test_identifiers_are_split_into_words(text, terms):
+    assert search_terms(text) == terms
+
+
+def test_searchable_text_includes_structured_fields():
+    record = SimpleNamespace(
+        text="Use for finance questions",
+        title="Revenue",
+        formatted_content=None,
+        structured_data={"name": "fact_sales", "path": "db/sales", "columns": [{"name": "amtGross"}, {"type": "int"}]},
+    )
+    assert search_terms(searchable_text(record)) == ["use", "finance", "question", "revenue", "fact", "sale", "db", "sale", "amt", "gross"]
+
+
+def test_rare_terms_outweigh_common_ones():
+    documents = [
+        "orders table with order status",
+        "orders by region",
+        "orders and refunds",
+        "refund policy for orders",
+    ]
+    scores = rank_documents(search_terms("orders refunds"), documents)
+    # Both terms beat one; "refund" is rarer than "order"
+    assert scores[2] > scores[0] and scores[3] > scores[1]
+    assert scores[1] > 0
+
+
+def test_shorter_documents_rank_higher_for_equal_matches():
+    documents = ["revenue", "revenue " + " ".join(f"word{i}" for i in range(40)), "unrelated"]
+    scores = rank_documents(["revenue"], documents)
+    assert scores[0] > scores[1] > 0
+    assert scores[2] == 0.0
+
+
+def test_term_frequency_saturates():
+    documents = ["revenue filler", "revenue revenue", "revenue " * 20, "other text", "more text"]
+    scores = rank_documents(["revenue"], documents)
+    assert scores[1] > scores[0]
+    # k1 bounds the contribution of repeated terms
+    assert scores[2] < scores[0] * 2.2
+
+
+def test_bm25_matches_the_formula():
+    postings = [("d1", "revenue", 2, 10), ("d2", "revenue", 1, 5), ("d2", "region", 1, 5)]
+    scores = bm25_scores(["revenue", "region"], postings, doc_count=4, avg_length=7.5)
+
+    idf_revenue = math.log(1 + (4 - 2 + 0.5) / (2 + 0.5))
+    idf_region = math.log(1 + (4 - 1 + 0.5) / (1 + 0.5))
+
+    def term(idf, tf, length):
+        return idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * length / 7.5))
+
+    assert scores["d1"] == pytest.approx(term(idf_revenue, 2, 10))
+    assert scores["d2"] == pytest.approx(term(idf_revenue, 1, 5) + term(idf_region, 1, 5))
+
+
+def test_no_documents():
+    assert rank_documents(["revenue"], []) == []
@@ -0,0 +1,44 @@
+"""
+QueryResultCache / CachingClient against a temporary cache directory.
+"""
+import pandas as pd
+
+from app.data_sources.query_cache import CachingClient, QueryResultCache
+
+
+class _CountingClient:
+    def __init__(self):
+        self.host = "db.local"
+        self.calls = 0
+
+    def execute_query(self, sql):
+        self.calls += 1
+        return pd.DataFrame({"id": [1, 2, 3], "amount": [1.5, 2.5, 3.5], "name": ["a", "b", "c"]})
+
+
+def test_cached_hit_can_be_modified_in_place(tmp_path):
+    cache = QueryResultCache(str(tmp_path), max_bytes=1 << 20)
+    cache.put("k", pd.DataFrame({"amount": [1.0, 2.0], "qty": [1, 2]}), ttl_seconds=60)
+
+    df = cache.get("k")
+    df.loc[0, "amount"] = 10.0
+    df["qty"] *= 2
+    df.sort_values("amount", inplace=True)
+
+    assert df["amount"].tolist() == [2.0, 10.0]
+    assert df["qty"].tolist() == [4, 2]
+    # The stored entry is unaffected
+    assert cache.get("k")["amount"].tolist() == [1.0, 2.0]
+
+
+def test_repeated_query_is_served_from_cache(tmp_path):
+    client = _CountingClient()
+    caching = CachingClient(client, "conn-1", ttl_seconds=60, cache_dir=str(tmp_path))
+
+    first = caching.execute_query("SELECT * FROM t")
+    second = caching.execute_query("SELECT  *\nFROM t -- again")
+    second.loc[1, "amount"] = 0.0
+
+    assert client.calls == 1
+    assert first["amount"].tolist() == [1.5, 2.5, 3.5]
+    assert second["amount"].tolist() == [1.5, 0.0, 3.5]
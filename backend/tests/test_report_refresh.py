@@ -0,0 +1,116 @@
+"""
+ReportRefreshService deduplication, failure isolation and per-data-source limits,
+with a stand-in executor instead of running generated code.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from app.services import report_refresh_service
+from app.services.report_refresh_service import RefreshTarget, ReportRefreshService
+
+_CODE = """
+def generate_df(db_clients, excel_files):
+    return db_clients["{ds}"].execute_query("SELECT {value}")
+"""
+
+
+class _Executor:
+    calls = []
+    running = {}
+    peak = {}
+
+    async def aexecute_code(self, code, ds_clients, excel_files):
+        ds = next(name for name in ds_clients if f'"{name}"' in code)
+        _Executor.calls.append(code)
+        _Executor.running[ds] = _Executor.running.get(ds, 0) + 1
+        _Executor.peak[ds] = max(_Executor.peak.get(ds, 0), _Executor.running[ds])
+        try:
+            await asyncio.sleep(0.01)
+            if "fail" in code:
+                raise RuntimeError("relation does not exist")
+            return pd.DataFrame({"value": [code.count("SELECT")]}), ""
+        finally:
+            _Executor.running[ds] -= 1
+
+    def format_df_for_widget(self, df):
+        return {"rows": df.to_dict(orient="records")}
+
+
+class _Session:
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+
+async def _no_cache(db, clients, data_sources, organization_id):
+    return clients
+
+
+@pytest.fixture(autouse=True)
+def stand_ins(monkeypatch):
+    _Executor.calls, _Executor.running, _Executor.peak = [], {}, {}
+    monkeypatch.setattr(report_refresh_service, "StreamingCodeExecutor", _Executor)
+    monkeypatch.setattr(report_refresh_service, "wrap_clients_for_organization", _no_cache)
+
+
+def _report(*names):
+    data_sources = [SimpleNamespace(name=name, get_client=lambda: object()) for name in names]
+    return SimpleNamespace(id="r1", organization_id="o1", data_sources=data_sources, files=[])
+
+
+def _target(label, ds="warehouse", value="1", code=None):
+    step = SimpleNamespace(id=f"s-{label}", code=code or _CODE.format(ds=ds, value=value), data=None, freshness=None)
+    return RefreshTarget(label=label, step=step)
+
+
+def _refresh(report, targets, **kwargs):
+    service = ReportRefreshService(max_concurrency=kwargs.pop("max_concurrency", 4), per_data_source_concurrency=1)
+    return asyncio.run(service.refresh(_Session(), report, targets, **kwargs))
+
+
+def test_identical_code_runs_once_and_is_shared():
+    first, same, other = _target("a"), _target("b"), _target("c", value="2")
+    # Trailing whitespace doesn't make code different
+    same.step.code = first.step.code.replace("\n", "  \n")
+
+    summary = _refresh(_report("warehouse"), [first, same, other])
+
+    assert len(_Executor.calls) == 2
+    assert [t.status for t in summary.tiles] == ["success"] * 3
+    assert summary.tiles[1].shared_with == "a" and summary.tiles[0].shared_with is None
+    assert same.step.data == first.step.data
+
+
+def test_a_failing_tile_does_not_stop_the_others():
+    ok, broken, skipped = _target("ok"), _target("broken", value="fail"), RefreshTarget(label="gone", error="Step not found")
+
+    summary = _refresh(_report("warehouse"), [ok, broken, skipped])
+
+    assert [t.status for t in summary.tiles] == ["success", "failed", "skipped"]
+    assert "relation does not exist" in summary.tiles[1].error
+    assert summary.tiles[2].error == "Step not found"
+    assert [t.label for t in summary.failed] == ["broken"]
+    assert ok.step.data == {"rows": [{"value": 1}]} and broken.step.data is None
+
+
+def test_unknown_data_source_fails_only_that_tile():
+    summary = _refresh(_report("warehouse"), [_target("ok"), _target("elsewhere", ds="crm")])
+    assert [t.status for t in summary.tiles] == ["success", "failed"]
+    assert "crm" in summary.tiles[1].error
+
+
+def test_per_data_source_limit_is_respected():
+    targets = [_target(f"w{i}", value=str(i)) for i in range(4)] + [_target(f"c{i}", ds="crm", value=str(i)) for i in range(4)]
+
+    summary = _refresh(_report("warehouse", "crm"), targets)
+
+    assert all(t.status == "success" for t in summary.tiles)
+    assert _Executor.peak == {"warehouse": 1, "crm": 1}
@@ -0,0 +1,112 @@
+"""
+collect_chunks / collect_arrow_chunks caps and the truncation records they leave.
+"""
+import threading
+
+import pandas as pd
+import pyarrow as pa
+
+from app.data_sources.result_limits import (
+    collect_arrow_chunks,
+    collect_chunks,
+    current_chunk_rows,
+    result_limits,
+    truncation_info,
+    truncation_warning,
+)
+
+
+class _Stream:
+    """Chunked result that records how far it was read and whether it was closed."""
+
+    def __init__(self, chunks, rows_per_chunk=10):
+        self.chunks = chunks
+        self.rows_per_chunk = rows_per_chunk
+        self.yielded = 0
+        self.closed = False
+
+    def __iter__(self):
+        try:
+            for i in range(self.chunks):
+                self.yielded += 1
+                start = i * self.rows_per_chunk
+                yield pd.DataFrame({"id": range(start, start + self.rows_per_chunk), "name": ["x" * 20] * self.rows_per_chunk})
+        finally:
+            self.closed = True
+
+
+def test_without_limits_everything_is_collected():
+    df = collect_chunks(iter(_Stream(5)), "SELECT 1")
+    assert len(df) == 50
+    assert df["id"].tolist() == list(range(50))
+
+
+def test_row_cap_stops_fetching_and_records_truncation():
+    stream = _Stream(10)
+    with result_limits(max_rows=25) as limits:
+        df = collect_chunks(iter(stream), "SELECT * FROM orders")
+
+    assert df["id"].tolist() == list(range(25))
+    assert stream.yielded == 3 and stream.closed
+    assert limits.truncations == [{"reason": "max_rows", "limit": 25, "rows": 25, "sql": "SELECT * FROM orders"}]
+
+
+def test_result_exactly_at_the_cap_is_not_truncated():
+    with result_limits(max_rows=30) as limits:
+        df = collect_chunks(iter(_Stream(3)), "SELECT 1")
+    assert len(df) == 30
+    assert limits.truncations == []
+
+
+def test_byte_cap_keeps_a_proportional_prefix():
+    one_chunk = _Stream(1)
+    chunk_bytes = int(next(iter(one_chunk)).memory_usage(deep=True, index=False).sum())
+    stream = _Stream(10)
+    with result_limits(max_bytes=int(chunk_bytes * 2.5)) as limits:
+        df = collect_chunks(iter(stream), "SELECT 1")
+
+    assert len(df) == 25
+    assert stream.closed
+    assert limits.truncations[0]["reason"] == "max_bytes"
+    assert limits.truncations[0]["limit"] == int(chunk_bytes * 2.5)
+
+
+def test_arrow_chunks_follow_the_same_caps():
+    tables = (pa.table({"id": list(range(i * 10, i * 10 + 10))}) for i in range(10))
+    with result_limits(max_rows=15) as limits:
+        table = collect_arrow_chunks(tables, "SELECT 2")
+    assert table.column("id").to_pylist() == list(range(15))
+    assert limits.truncations[0]["reason"] == "max_rows"
+
+
+def test_chunk_rows_shrink_to_the_row_cap():
+    assert current_chunk_rows() == 50_000
+    with result_limits(max_rows=100, chunk_rows=1000):
+        assert current_chunk_rows() == 100
+    with result_limits(chunk_rows=1000):
+        assert current_chunk_rows() == 1000
+
+
+def test_limits_are_per_thread_context():
+    seen = {}
+
+    def other_thread():
+        seen["rows"] = len(collect_chunks(iter(_Stream(5)), "SELECT 1"))
+
+    with result_limits(max_rows=5):
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        thread.join()
+    assert seen["rows"] == 50
+
+
+def test_truncation_summary_and_warning():
+    with result_limits(max_rows=5) as limits:
+        collect_chunks(iter(_Stream(2)), "SELECT * FROM a")
+        collect_chunks(iter(_Stream(2)), "SELECT * FROM b")
+    info = truncation_info(limits.truncations)
+    assert info["reason"] == "max_rows" and len(info["queries"]) == 2
+    warning = truncation_warning(info)
+    assert warning.count("WARNING: query result truncated to 5 rows (max_rows=5 rows)") == 2
+    assert "SELECT * FROM b" in warning
+    assert truncation_info([]) is None
@@ -0,0 +1,91 @@
+"""
+SalesforceClient against the local mock Salesforce server (tests/fixtures/salesforce.py).
+"""
+import app.data_sources.clients.salesforce_client as salesforce_module
+
+
+def test_get_schemas_discovers_queryable_objects(mock_salesforce):
+    make_client, state = mock_salesforce
+    tables = {t.name: t for t in make_client().get_schemas()}
+
+    assert set(tables) == {"Account", "Contact", "User"}
+    assert [c.name for c in tables["Account"].columns] == ["Id", "Name", "AnnualRevenue", "BillingPostalCode", "OwnerId"]
+    fk = tables["Contact"].fks[0]
+    assert (fk.column.name, fk.references_name, fk.references_column.name) == ("AccountId", "Account", "Id")
+
+
+def test_describes_are_revalidated_by_etag(mock_salesforce):
+    make_client, state = mock_salesforce
+    make_client().get_schemas()
+    make_client().get_schemas()
+
+    account_describes = [etag for method, path, etag in state.calls if path == "sobjects/Account/describe"]
+    assert account_describes == [None, "Account-1"]
+
+
+def test_small_query_uses_rest_pages(mock_salesforce):
+    make_client, state = mock_salesforce
+    state.account_count = 4500
+
+    df = make_client().execute_query("SELECT Id, Name, AnnualRevenue FROM Account")
+
+    assert len(df) == 4500
+    assert "attributes" not in df.columns
+    assert not state.jobs and state.count("POST", "jobs/query") == 0
+
+
+def test_large_query_switches_to_bulk_api(mock_salesforce, monkeypatch):
+    make_client, state = mock_salesforce
+    monkeypatch.setattr(salesforce_module, "BULK_MIN_ROWS", 3000)
+    state.account_count = 5000
+
+    client = make_client()
+    chunks = list(client.bulk_query_arrow_stream("SELECT Id, Name, AnnualRevenue FROM Account", chunk_rows=2000))
+    df = client.execute_query("SELECT Id, Name, AnnualRevenue FROM Account")
+
+    assert [c.num_rows for c in chunks] == [2000, 2000, 1000]
+    assert len(df) == 5000
+    assert df["AnnualRevenue"].dtype == "float64"
+    assert state.count("POST", "jobs/query") == 2
+    # Only the small probe page was fetched over REST
+    assert state.page_sizes == [200]
+    # Finished jobs are deleted
+    assert not state.jobs
+
+
+def test_aggregate_query_stays_on_rest(mock_salesforce, monkeypatch):
+    make_client, state = mock_salesforce
+    monkeypatch.setattr(salesforce_module, "BULK_MIN_ROWS", 10)
+    state.account_count = 2500
+
+    make_client().execute_query("SELECT COUNT(Id) FROM Account GROUP BY Name")
+
+    assert state.count("POST", "jobs/query") == 0
+
+
+def test_bulk_and_rest_results_have_the_same_shape(mock_salesforce, monkeypatch):
+    make_client, state = mock_salesforce
+    query = "SELECT Id, Name, AnnualRevenue, BillingPostalCode, Owner.Name FROM Account"
+    state.account_count = 3000
+
+    rest = make_client().execute_query(query)
+    monkeypatch.setattr(salesforce_module, "BULK_MIN_ROWS", 1000)
+    bulk = make_client().execute_query(query)
+
+    assert state.count("POST", "jobs/query") == 1
+    assert list(rest.columns) == list(bulk.columns) == ["Id", "Name", "AnnualRevenue", "BillingPostalCode", "Owner.Name"]
+    assert rest.dtypes.tolist() == bulk.dtypes.tolist()
+    # Zip-code-like strings keep their leading zeros instead of being inferred as ints
+    assert bulk["BillingPostalCode"].iloc[:3].tolist() == ["00000", "00001", "00002"]
+    assert rest["Owner.Name"].iloc[0] is None and bulk["Owner.Name"].iloc[0] is None
+    assert rest.equals(bulk)
+
+
+def test_rest_pages_after_the_probe_use_the_default_batch_size(mock_salesforce):
+    make_client, state = mock_salesforce
+    state.account_count = 4500
+
+    df = make_client().execute_query("SELECT Id, Name FROM Account")
+
+    assert len(df) == 4500
+    assert state.page_sizes == [200, 2000, 2000, 2000]
@@ -0,0 +1,107 @@
+"""
+VectorIndex sync/search with a deterministic stand-in for the embedding model.
+"""
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.ai import semantic_index
+from app.ai.semantic_index import VectorIndex
+from app.settings.bow_config import SemanticSearch
+
+_WORDS = ["revenue", "orders", "customers", "refunds", "sessions", "invoices"]
+
+
+def _fake_embed(texts, *, query=False):
+    vectors = np.array([[text.count(word) for word in _WORDS] for text in texts], dtype=np.float32)
+    vectors += 1e-3
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _query(text):
+    return _fake_embed([text])[0]
+
+
+@pytest.fixture(autouse=True)
+def fake_model(monkeypatch, tmp_path):
+    config = SemanticSearch(enabled=True, index_dir=str(tmp_path), inline_embed_limit=2)
+    monkeypatch.setattr(semantic_index, "_config", lambda: config)
+    monkeypatch.setattr(semantic_index, "embed", _fake_embed)
+
+
+def _wait_backfill(index):
+    deadline = time.monotonic() + 10
+    while index._backfilling and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_sync_embeds_only_new_and_changed_items(tmp_path):
+    index = VectorIndex(str(tmp_path / "tables"))
+    items = {"a": "revenue", "b": "orders"}
+    assert index.sync(items) == 2
+    assert index.sync(items) == 0
+    assert index.sync({"a": "revenue", "b": "orders customers"}) == 1
+    assert index.search(_query("customers"), 1)[0][0] == "b"
+    assert len(index) == 2
+
+
+def test_sync_prunes_removed_items_unless_told_not_to(tmp_path):
+    index = VectorIndex(str(tmp_path / "tables"))
+    index.sync({"a": "revenue", "b": "orders"})
+    index.sync({"c": "refunds"}, prune=False)
+    assert len(index) == 3
+    index.sync({"c": "refunds"})
+    assert "a" not in index and "c" in index and len(index) == 1
+
+
+def test_search_ranks_by_similarity_within_allowed(tmp_path):
+    index = VectorIndex(str(tmp_path / "tables"))
+    index.sync({"a": "revenue", "b": "revenue orders", "c": "sessions"})
+    _wait_backfill(index)
+
+    hits = index.search(_query("revenue"), 3)
+    assert [item_id for item_id, _ in hits][:2] == ["a", "b"]
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-3)
+    assert [item_id for item_id, _ in index.search(_query("revenue"), 3, allowed=["b", "c"])] == ["b", "c"]
+    assert index.search(_query("revenue"), 3, allowed=["missing"]) == []
+
+
+def test_index_round_trips_through_disk(tmp_path):
+    path = str(tmp_path / "tables")
+    VectorIndex(path).sync({"a": "revenue", "b": "orders"})
+    reopened = VectorIndex(path)
+    assert len(reopened) == 2
+    assert reopened.search(_query("orders"), 1)[0][0] == "b"
+    assert reopened.sync({"a": "revenue", "b": "orders"}) == 0
+
+
+def test_backlog_is_embedded_in_the_background(tmp_path):
+    index = VectorIndex(str(tmp_path / "tables"))
+    items = {f"t{i}": _WORDS[i % len(_WORDS)] for i in range(7)}
+    assert index.sync(items) == 2
+    _wait_backfill(index)
+    assert len(index) == 7
+    assert VectorIndex(str(tmp_path / "tables")).missing(items) == []
+
+
+def test_search_does_not_wait_for_backfill_embedding(tmp_path, monkeypatch):
+    index = VectorIndex(str(tmp_path / "tables"))
+    index.sync({"a": "revenue", "b": "orders"})
+    release = threading.Event()
+
+    def slow_embed(texts, *, query=False):
+        release.wait(10)
+        return _fake_embed(texts)
+
+    monkeypatch.setattr(semantic_index, "embed", slow_embed)
+    index._backfill({"c": "refunds", "d": "sessions"})
+    try:
+        started = time.monotonic()
+        assert index.search(_query("revenue"), 1)[0][0] == "a"
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+    _wait_backfill(index)
+    assert len(index) == 4
@@ -0,0 +1,49 @@
+"""
+widget_serializer output against the `to_json` -> `json.loads` round trip it replaced.
+"""
+import datetime
+import json
+
+import numpy as np
+import orjson
+import pandas as pd
+
+from app.ai.code_execution.widget_serializer import build_columnar, build_rows, dumps_widget_payload
+
+
+def _to_json_rows(df):
+    return json.loads(df.to_json(orient="records", date_format="iso", default_handler=str))
+
+
+def _frame():
+    return pd.DataFrame({
+        "amount": [523178077.891, 0.1 + 0.2, np.nan, np.inf],
+        "ratio": np.array([0.1, 1 / 3, 523178.9, -2.5], dtype=np.float32),
+        "qty": [1, 2, 3, 4],
+        "nullable": pd.array([1, None, 3, None], dtype="Int64"),
+        "flag": [True, False, True, False],
+        "name": ["a", None, "c", "d"],
+        "created": pd.to_datetime(["2024-01-02 03:04:05.678", None, "2024-03-01 00:00:00.000", "2024-12-31 23:59:59.000"]),
+        "created_utc": pd.to_datetime(["2024-01-02 03:04:05", None, "2024-03-01 00:00:00", "2024-12-31 00:00:00"]).tz_localize("Europe/Berlin"),
+        "day": [datetime.date(2024, 1, 2), None, datetime.date(2024, 3, 1), datetime.date(2024, 12, 31)],
+        "elapsed": pd.to_timedelta(["1 days 02:03:04.5", None, "0s", "3ms"]),
+        "mixed": [1.25, "x", None, 3],
+    })
+
+
+def test_rows_match_to_json():
+    df = _frame()
+    assert build_rows(df) == _to_json_rows(df)
+
+
+def test_columnar_matches_rows():
+    df = _frame()
+    rows = _to_json_rows(df)
+    assert build_columnar(df) == [[row[col] for row in rows] for col in df.columns]
+
+
+def test_large_floats_keep_their_shortest_repr():
+    df = pd.DataFrame({"amount": [523178077.891, 123456789012.125]})
+    assert orjson.loads(dumps_widget_payload({"rows": build_rows(df)})) == {
+        "rows": [{"amount": 523178077.891}, {"amount": 123456789012.125}]
+    }